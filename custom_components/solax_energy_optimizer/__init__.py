@@ -2,27 +2,45 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
+from . import forecast_accuracy, load_forecast, peak_demand, shadow
 from .const import DOMAIN
 from .coordinator import EnergyOptimizerCoordinator
+from .fleet import async_leave_fleet
+from .history import async_remove_history
+from .services import async_setup_services
 
 type EnergyOptimizerConfigEntry = ConfigEntry[EnergyOptimizerCoordinator]
 
 _LOGGER = logging.getLogger(__name__)
 
-SERVICE_TRIGGER_OPTIMIZATION = "trigger_optimization"
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 PLATFORMS: list[str] = [
+    "calendar",
     "number",
     "sensor",
     "switch",
     "select",
 ]
 
+# Modules keeping a per-entry Store of learned state
+ENTRY_STORES = (load_forecast, forecast_accuracy, shadow, peak_demand)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services once for all entries."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: EnergyOptimizerConfigEntry
@@ -40,11 +58,33 @@ async def async_setup_entry(
     )
 
     coordinator = EnergyOptimizerCoordinator(hass, entry)
+    if coordinator.fleet is not None:
+        entry.async_on_unload(partial(async_leave_fleet, hass, coordinator.fleet, entry.entry_id))
     _LOGGER.info("Coordinator created, fetching initial data")
 
     await coordinator.async_config_entry_first_refresh()
     _LOGGER.info("Initial data fetch complete")
 
+    if coordinator.load_forecaster is not None:
+        entry.async_create_background_task(
+            hass, coordinator.load_forecaster.async_load(), f"{DOMAIN} load profile"
+        )
+    if coordinator.forecast_accuracy is not None:
+        entry.async_create_background_task(
+            hass, coordinator.forecast_accuracy.async_load(), f"{DOMAIN} forecast accuracy"
+        )
+    if coordinator.peak_demand is not None:
+        entry.async_on_unload(coordinator.peak_demand.async_start())
+        entry.async_create_background_task(
+            hass, coordinator.peak_demand.async_load(), f"{DOMAIN} peak demand"
+        )
+    entry.async_create_background_task(
+        hass, coordinator.history.async_sync(), f"{DOMAIN} history sync"
+    )
+    entry.async_create_background_task(
+        hass, coordinator.shadow.async_load(), f"{DOMAIN} shadow strategies"
+    )
+
     entry.runtime_data = coordinator
 
     device_registry = dr.async_get(hass)
@@ -60,21 +100,22 @@ async def async_setup_entry(
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     _LOGGER.info("Platforms set up: %s", PLATFORMS)
 
-    async def handle_trigger_optimization(call: ServiceCall) -> None:
-        """Handle trigger optimization service call."""
-        _LOGGER.info("Manual optimization triggered via service call")
-        await coordinator.async_request_refresh()
-
-    hass.services.async_register(
-        DOMAIN,
-        SERVICE_TRIGGER_OPTIMIZATION,
-        handle_trigger_optimization,
-    )
+    entry.async_on_unload(coordinator.monte_carlo.shutdown)
+    entry.async_on_unload(coordinator.tuner.shutdown)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     _LOGGER.info("Solar Energy Optimizer setup complete")
     return True
 
 
+async def async_reload_entry(
+    hass: HomeAssistant, entry: EnergyOptimizerConfigEntry
+) -> None:
+    """Reload the entry when its options change."""
+    _LOGGER.info("Options updated — reloading Solar Energy Optimizer (entry_id=%s)", entry.entry_id)
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(
     hass: HomeAssistant, entry: EnergyOptimizerConfigEntry
 ) -> bool:
@@ -83,3 +124,13 @@ async def async_unload_entry(
     result = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     _LOGGER.info("Unload result: %s", result)
     return result
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: EnergyOptimizerConfigEntry
+) -> None:
+    """Delete the history cache and the learned state of a removed entry."""
+    _LOGGER.info("Removing stored data of Solar Energy Optimizer (entry_id=%s)", entry.entry_id)
+    await async_remove_history(hass, entry.entry_id)
+    for module in ENTRY_STORES:
+        await Store(hass, module.STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.{module.STORAGE_KEY}").async_remove()
@@ -5,6 +5,9 @@ from abc import ABC, abstractmethod
 
 from homeassistant.core import HomeAssistant
 
+# Optional quantile bands a forecast period may carry besides "pv_estimate"
+PV_ESTIMATE_BANDS: tuple[str, ...] = ("pv_estimate10", "pv_estimate90")
+
 
 class InverterAdapter(ABC):
     """Abstract base for any inverter / battery SOC source."""
@@ -33,6 +36,11 @@ class SolarForecastAdapter(ABC):
         Each dict MUST contain:
           "period_start": datetime   (timezone-aware)
           "pv_estimate":  float      (kW, average over the period)
+
+        It MAY contain the 10th / 90th percentile estimates when the
+        provider supplies them:
+          "pv_estimate10": float     (kW)
+          "pv_estimate90": float     (kW)
         """
 
     @abstractmethod
@@ -51,6 +51,8 @@ def build_forecast_adapter(config_data: dict) -> SolarForecastAdapter:
         period_start_field=config_data.get("forecast_period_start_field") or "period_start",
         pv_estimate_field=config_data.get("forecast_pv_estimate_field") or "pv_estimate",
         today_total_from_state=config_data.get("forecast_today_from_state", True),
+        pv_estimate10_field=config_data.get("forecast_pv_estimate10_field") or None,
+        pv_estimate90_field=config_data.get("forecast_pv_estimate90_field") or None,
     )
     return GenericForecastAdapter(entity_id, field_map)
 
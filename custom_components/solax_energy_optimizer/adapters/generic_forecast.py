@@ -22,12 +22,18 @@ class ForecastFieldMap:
         today_total_from_state: If True, read today's total kWh from the entity
             state. If False, sum the pv_estimate values from the forecast list
             (assuming 30-minute intervals).
+        pv_estimate10_field: Optional field name of the 10th percentile
+            estimate in kW (e.g., "pv_estimate10"). None if not provided.
+        pv_estimate90_field: Optional field name of the 90th percentile
+            estimate in kW (e.g., "pv_estimate90"). None if not provided.
     """
 
     forecast_attribute: str
     period_start_field: str
     pv_estimate_field: str
     today_total_from_state: bool = True
+    pv_estimate10_field: str | None = None
+    pv_estimate90_field: str | None = None
 
 
 class GenericForecastAdapter(SolarForecastAdapter):
@@ -52,10 +58,17 @@ class GenericForecastAdapter(SolarForecastAdapter):
         for item in raw_list:
             if not isinstance(item, dict):
                 continue
-            normalized.append({
+            entry = {
                 "period_start": item.get(self._field_map.period_start_field),
                 "pv_estimate": item.get(self._field_map.pv_estimate_field, 0),
-            })
+            }
+            for band, field in (
+                ("pv_estimate10", self._field_map.pv_estimate10_field),
+                ("pv_estimate90", self._field_map.pv_estimate90_field),
+            ):
+                if field and field in item:
+                    entry[band] = item[field]
+            normalized.append(entry)
         return normalized
 
     def get_solar_today(self, hass: HomeAssistant) -> float | None:
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from homeassistant.core import HomeAssistant
 
-from .base import SolarForecastAdapter
+from .base import PV_ESTIMATE_BANDS, SolarForecastAdapter
 
 
 class SolcastSolarForecastAdapter(SolarForecastAdapter):
@@ -12,7 +12,8 @@ class SolcastSolarForecastAdapter(SolarForecastAdapter):
     Expects:
       - entity state: today's total forecast in kWh
       - attributes["detailedForecast"]: list of dicts with
-          "period_start" (ISO 8601 datetime) and "pv_estimate" (kW)
+          "period_start" (ISO 8601 datetime) and "pv_estimate" (kW), plus the
+          optional "pv_estimate10" / "pv_estimate90" quantile bands (kW)
     """
 
     def __init__(self, entity_id: str) -> None:
@@ -26,7 +27,22 @@ class SolcastSolarForecastAdapter(SolarForecastAdapter):
         state = hass.states.get(self._entity_id)
         if state is None or not state.attributes:
             return []
-        return state.attributes.get("detailedForecast", [])
+        raw_list = state.attributes.get("detailedForecast", [])
+        if not isinstance(raw_list, list):
+            return []
+        normalized = []
+        for item in raw_list:
+            if not isinstance(item, dict):
+                continue
+            entry = {
+                "period_start": item.get("period_start"),
+                "pv_estimate": item.get("pv_estimate", 0),
+            }
+            for band in PV_ESTIMATE_BANDS:
+                if band in item:
+                    entry[band] = item[band]
+            normalized.append(entry)
+        return normalized
 
     def get_solar_today(self, hass: HomeAssistant) -> float | None:
         state = hass.states.get(self._entity_id)
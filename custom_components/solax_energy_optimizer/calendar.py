@@ -0,0 +1,130 @@
+"""Calendar platform for Solar Energy Optimizer.
+
+The horizon plan is published as calendar events, one per run-length encoded
+segment, so it shows up in Home Assistant's calendar and automations can
+trigger on a segment's start. Segments are sorted and never overlap, so the
+events are indexed by two parallel lists of start and end timestamps: a
+range query from the frontend is two bisections and a slice, the current or
+next event one bisection. The index is built from the plan's segments and
+only rebuilt when they change; a refresh that reproduces the same plan keeps
+the index and its events.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from . import EnergyOptimizerConfigEntry
+from .const import ACTION_CHARGE, ACTION_DISCHARGE, ENTITY_PLAN_CALENDAR
+from .coordinator import EnergyOptimizerCoordinator
+from .entity import EnergyOptimizerEntity
+from .plan import Plan, PlanSegment
+
+ACTION_SUMMARIES: dict[str, str] = {ACTION_CHARGE: "Charge", ACTION_DISCHARGE: "Discharge"}
+
+
+def segment_event(segment: PlanSegment) -> CalendarEvent:
+    """Return the calendar event of one plan segment."""
+    summary = ACTION_SUMMARIES.get(segment.action, "Idle")
+    if segment.action in ACTION_SUMMARIES and segment.target_soc is not None:
+        summary = f"{summary} to {segment.target_soc:g}%"
+    return CalendarEvent(
+        start=segment.start,
+        end=segment.end,
+        summary=summary,
+        description=(
+            f"Expected price: {segment.expected_price:.4f}/kWh" if segment.expected_price is not None else None
+        ),
+    )
+
+
+class PlanEventIndex:
+    """Interval index over the events of one plan's segments."""
+
+    def __init__(self, segments: Sequence[PlanSegment]) -> None:
+        """Build the events and their sorted start and end timestamps."""
+        self.segments = list(segments)
+        self.events = [segment_event(segment) for segment in self.segments]
+        self._starts = [segment.start.timestamp() for segment in self.segments]
+        self._ends = [segment.end.timestamp() for segment in self.segments]
+
+    def __len__(self) -> int:
+        """Return the number of events."""
+        return len(self.events)
+
+    def between(self, start: datetime, end: datetime) -> list[CalendarEvent]:
+        """Return the events overlapping ``[start, end)``."""
+        first = bisect_right(self._ends, start.timestamp())
+        stop = bisect_left(self._starts, end.timestamp())
+        return self.events[first:stop]
+
+    def upcoming(self, when: datetime) -> CalendarEvent | None:
+        """Return the event in progress at ``when``, else the next one."""
+        index = bisect_right(self._ends, when.timestamp())
+        return self.events[index] if index < len(self.events) else None
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: EnergyOptimizerConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up calendar platform."""
+    async_add_entities([PlanCalendar(entry.runtime_data, entry)])
+
+
+class PlanCalendar(EnergyOptimizerEntity, CalendarEntity):
+    """Calendar of the planned charge, discharge and idle segments."""
+
+    _attr_translation_key = "plan"
+    _attr_icon = "mdi:calendar-clock"
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: EnergyOptimizerConfigEntry,
+    ) -> None:
+        """Initialize the calendar."""
+        super().__init__(coordinator, entry, ENTITY_PLAN_CALENDAR)
+        self._attr_name = "Battery plan"
+        self._plan: Plan | None = None
+        self._index = PlanEventIndex(())
+
+    @property
+    def index(self) -> PlanEventIndex:
+        """Return the event index, rebuilt only when the planned segments change."""
+        data = self.coordinator.data
+        plan = data.plan if data is not None else None
+        if plan is self._plan:
+            return self._index
+        # Every refresh builds a new plan; most reproduce the same segments
+        self._plan = plan
+        segments = plan.segments if plan is not None else []
+        if segments != self._index.segments:
+            self._index = PlanEventIndex(segments)
+        return self._index
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the segment in progress, else the next one."""
+        return self.index.upcoming(dt_util.utcnow())
+
+    def _state_snapshot(self) -> tuple[Any, ...]:
+        """Write when the current event changes, not only the on/off state."""
+        return (self.available, self.state, self.event)
+
+    async def async_get_events(
+        self,
+        hass: HomeAssistant,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[CalendarEvent]:
+        """Return the planned segments within a datetime range."""
+        return self.index.between(start_date, end_date)
@@ -1,45 +1,86 @@
 """Config flow for Solar Energy Optimizer integration."""
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import Any
 
 import voluptuous as vol
-
-from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
 
 from .const import (
+    CONF_BALANCED_CHARGE,
+    CONF_BALANCED_DISCHARGE,
     CONF_BATTERY_CAPACITY,
+    CONF_CHEAP_BAND,
+    CONF_EXPENSIVE_BAND,
+    CONF_FLEET_GROUP,
     CONF_FORECAST_ATTRIBUTE,
     CONF_FORECAST_ENTITY,
     CONF_FORECAST_PERIOD_START_FIELD,
+    CONF_FORECAST_PV_ESTIMATE10_FIELD,
+    CONF_FORECAST_PV_ESTIMATE90_FIELD,
     CONF_FORECAST_PV_ESTIMATE_FIELD,
     CONF_FORECAST_TODAY_FROM_STATE,
     CONF_FORECAST_TYPE,
+    CONF_GRID_EXPORT_LIMIT,
+    CONF_GRID_IMPORT_LIMIT,
+    CONF_GRID_POWER_ENTITY,
     CONF_INVERTER_ENTITY,
     CONF_INVERTER_SOC_ATTRIBUTE,
     CONF_INVERTER_TYPE,
+    CONF_LOAD_ENTITY,
     CONF_MAX_CHARGE_RATE,
     CONF_MAX_DISCHARGE_RATE,
+    CONF_NET_METERING,
+    CONF_PEAK_FLOOR,
+    CONF_PRICE_WINDOWS,
     CONF_PRICES_ATTRIBUTE,
     CONF_PRICES_ENTITY,
     CONF_PRICES_PERIOD_START_FIELD,
     CONF_PRICES_PRICE_FIELD,
     CONF_PRICES_TYPE,
+    CONF_PV_POWER_ENTITY,
+    CONF_SOLAR_HEADROOM,
+    CONF_SOLAR_SURPLUS,
+    CONF_VAT,
+    CONF_VAT_ON,
+    DEFAULT_PEAK_FLOOR,
+    DEFAULT_PRICE_WINDOWS,
     DOMAIN,
     FORECAST_TYPE_GENERIC,
     FORECAST_TYPE_SOLCAST,
     INVERTER_TYPE_GENERIC_ATTRIBUTE,
     INVERTER_TYPE_GENERIC_STATE,
     INVERTER_TYPE_SOLAX_MODBUS,
+    PRICE_WINDOW_CHOICES,
     PRICES_TYPE_AMBER,
     PRICES_TYPE_AWATTAR,
     PRICES_TYPE_FRANK_ENERGIE,
     PRICES_TYPE_GENERIC,
     PRICES_TYPE_NORDPOOL,
     PRICES_TYPE_TIBBER,
+    TARIFF_SPOT,
 )
+from .flexible_loads import FLEXIBLE_LOAD_OPTIONS
+from .planner import StrategyParams
+from .tariff import DEFAULT_VAT_ON, TARIFF_COMPONENTS
+
+# (minimum, maximum, step, unit) of the strategy threshold options
+_PARAM_RANGES: dict[str, tuple[float, float, float, str | None]] = {
+    CONF_CHEAP_BAND: (0.0, 0.5, 0.01, None),
+    CONF_EXPENSIVE_BAND: (0.0, 0.5, 0.01, None),
+    CONF_BALANCED_CHARGE: (0.5, 1.0, 0.005, None),
+    CONF_BALANCED_DISCHARGE: (1.0, 1.5, 0.005, None),
+    CONF_SOLAR_HEADROOM: (0.0, 60.0, 1.0, "%"),
+    CONF_SOLAR_SURPLUS: (0.0, 5.0, 0.1, "kW"),
+}
 
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -70,6 +111,12 @@ class EnergyOptimizerConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         self._data: dict[str, Any] = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> EnergyOptimizerOptionsFlow:
+        """Return the options flow."""
+        return EnergyOptimizerOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -146,6 +193,8 @@ class EnergyOptimizerConfigFlow(ConfigFlow, domain=DOMAIN):
             schema_fields[vol.Optional(CONF_FORECAST_ATTRIBUTE, default="forecasts")] = selector.TextSelector()
             schema_fields[vol.Optional(CONF_FORECAST_PERIOD_START_FIELD, default="period_start")] = selector.TextSelector()
             schema_fields[vol.Optional(CONF_FORECAST_PV_ESTIMATE_FIELD, default="pv_estimate")] = selector.TextSelector()
+            schema_fields[vol.Optional(CONF_FORECAST_PV_ESTIMATE10_FIELD, default="")] = selector.TextSelector()
+            schema_fields[vol.Optional(CONF_FORECAST_PV_ESTIMATE90_FIELD, default="")] = selector.TextSelector()
             schema_fields[vol.Optional(CONF_FORECAST_TODAY_FROM_STATE, default=True)] = selector.BooleanSelector()
 
         return self.async_show_form(
@@ -251,3 +300,149 @@ class EnergyOptimizerConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="battery",
             data_schema=data_schema,
         )
+
+
+def _flexible_load_schema(options: Mapping[str, Any]) -> dict[vol.Optional, Any]:
+    """Return the power, energy and deadline fields of every flexible load."""
+    schema: dict[vol.Optional, Any] = {}
+    for load in FLEXIBLE_LOAD_OPTIONS:
+        schema[vol.Optional(load.power, default=options.get(load.power, 0.0))] = selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0.0, max=50.0, step=0.1, unit_of_measurement="kW", mode=selector.NumberSelectorMode.BOX
+            )
+        )
+        schema[vol.Optional(load.energy, default=options.get(load.energy, 0.0))] = selector.NumberSelector(
+            selector.NumberSelectorConfig(
+                min=0.0, max=200.0, step=0.1, unit_of_measurement="kWh", mode=selector.NumberSelectorMode.BOX
+            )
+        )
+        schema[
+            vol.Optional(load.deadline, default=options.get(load.deadline, load.default_deadline))
+        ] = selector.TimeSelector()
+    return schema
+
+
+class EnergyOptimizerOptionsFlow(OptionsFlow):
+    """Handle options for Solar Energy Optimizer."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the optimizer options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        params = StrategyParams.from_options(options).as_options()
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_PRICE_WINDOWS,
+                    default=options.get(CONF_PRICE_WINDOWS, DEFAULT_PRICE_WINDOWS),
+                ): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=PRICE_WINDOW_CHOICES,
+                        multiple=True,
+                        custom_value=True,
+                        mode=selector.SelectSelectorMode.DROPDOWN,
+                    )
+                ),
+                vol.Optional(
+                    CONF_LOAD_ENTITY,
+                    description={"suggested_value": options.get(CONF_LOAD_ENTITY)},
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain="sensor", device_class="power")
+                ),
+                vol.Optional(
+                    CONF_PV_POWER_ENTITY,
+                    description={"suggested_value": options.get(CONF_PV_POWER_ENTITY)},
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain="sensor", device_class="power")
+                ),
+                vol.Optional(
+                    CONF_FLEET_GROUP,
+                    description={"suggested_value": options.get(CONF_FLEET_GROUP)},
+                ): selector.TextSelector(),
+                **{
+                    vol.Optional(key, default=options.get(key, 0.0)): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0.0,
+                            max=1000.0,
+                            step=0.1,
+                            unit_of_measurement="kW",
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    )
+                    for key in (CONF_GRID_IMPORT_LIMIT, CONF_GRID_EXPORT_LIMIT)
+                },
+                vol.Optional(
+                    CONF_GRID_POWER_ENTITY,
+                    description={"suggested_value": options.get(CONF_GRID_POWER_ENTITY)},
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain="sensor", device_class="power")
+                ),
+                vol.Optional(
+                    CONF_PEAK_FLOOR, default=options.get(CONF_PEAK_FLOOR, DEFAULT_PEAK_FLOOR)
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0.0,
+                        max=100.0,
+                        step=0.1,
+                        unit_of_measurement="kW",
+                        mode=selector.NumberSelectorMode.BOX,
+                    )
+                ),
+                **{
+                    vol.Optional(
+                        component.key, default=options.get(component.key, component.default)
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0.0 if component.per_spot else -1.0,
+                            max=2.0 if component.per_spot else 1.0,
+                            step=0.01 if component.per_spot else 0.0001,
+                            unit_of_measurement=component.unit,
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    )
+                    for component in TARIFF_COMPONENTS
+                    if component.key != TARIFF_SPOT
+                },
+                vol.Optional(CONF_VAT, default=options.get(CONF_VAT, 0.0)): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0.0,
+                        max=50.0,
+                        step=0.1,
+                        unit_of_measurement="%",
+                        mode=selector.NumberSelectorMode.BOX,
+                    )
+                ),
+                vol.Optional(
+                    CONF_VAT_ON, default=list(options.get(CONF_VAT_ON, DEFAULT_VAT_ON))
+                ): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[component.key for component in TARIFF_COMPONENTS],
+                        multiple=True,
+                        translation_key=CONF_VAT_ON,
+                        mode=selector.SelectSelectorMode.LIST,
+                    )
+                ),
+                vol.Optional(
+                    CONF_NET_METERING, default=options.get(CONF_NET_METERING, False)
+                ): selector.BooleanSelector(),
+                **_flexible_load_schema(options),
+                **{
+                    vol.Optional(key, default=params[key]): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=low,
+                            max=high,
+                            step=step,
+                            unit_of_measurement=unit,
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    )
+                    for key, (low, high, step, unit) in _PARAM_RANGES.items()
+                },
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=data_schema)
@@ -35,6 +35,8 @@ CONF_INVERTER_SOC_ATTRIBUTE: Final = "inverter_soc_attribute"
 CONF_FORECAST_ATTRIBUTE: Final = "forecast_attribute"
 CONF_FORECAST_PERIOD_START_FIELD: Final = "forecast_period_start_field"
 CONF_FORECAST_PV_ESTIMATE_FIELD: Final = "forecast_pv_estimate_field"
+CONF_FORECAST_PV_ESTIMATE10_FIELD: Final = "forecast_pv_estimate10_field"
+CONF_FORECAST_PV_ESTIMATE90_FIELD: Final = "forecast_pv_estimate90_field"
 CONF_FORECAST_TODAY_FROM_STATE: Final = "forecast_today_from_state"
 CONF_PRICES_ATTRIBUTE: Final = "prices_attribute"
 CONF_PRICES_PERIOD_START_FIELD: Final = "prices_period_start_field"
@@ -52,22 +54,69 @@ CONF_MAX_DISCHARGE_RATE: Final = "max_discharge_rate"
 CONF_MIN_SOC: Final = "min_soc"
 CONF_MAX_SOC: Final = "max_soc"
 
+# Options
+CONF_PRICE_WINDOWS: Final = "price_window_hours"
+CONF_LOAD_ENTITY: Final = "load_entity"
+CONF_PV_POWER_ENTITY: Final = "pv_power_entity"
+CONF_CHEAP_BAND: Final = "cheap_band"
+CONF_EXPENSIVE_BAND: Final = "expensive_band"
+CONF_BALANCED_CHARGE: Final = "balanced_charge_factor"
+CONF_BALANCED_DISCHARGE: Final = "balanced_discharge_factor"
+CONF_SOLAR_HEADROOM: Final = "solar_headroom"
+CONF_SOLAR_SURPLUS: Final = "solar_surplus_threshold"
+CONF_FLEET_GROUP: Final = "fleet_group"
+CONF_GRID_IMPORT_LIMIT: Final = "grid_import_limit"
+CONF_GRID_EXPORT_LIMIT: Final = "grid_export_limit"
+CONF_GRID_POWER_ENTITY: Final = "grid_power_entity"
+CONF_PEAK_FLOOR: Final = "peak_floor"
+CONF_IMPORT_MARKUP: Final = "import_markup"
+CONF_GRID_FEE: Final = "grid_fee"
+CONF_ENERGY_TAX: Final = "energy_tax"
+CONF_VAT: Final = "vat"
+CONF_VAT_ON: Final = "vat_on"
+CONF_EXPORT_FACTOR: Final = "export_factor"
+CONF_EXPORT_FEE: Final = "export_fee"
+CONF_NET_METERING: Final = "net_metering"
+CONF_EV_POWER: Final = "ev_charger_power"
+CONF_EV_ENERGY: Final = "ev_charger_energy"
+CONF_EV_DEADLINE: Final = "ev_charger_deadline"
+CONF_BOILER_POWER: Final = "boiler_power"
+CONF_BOILER_ENERGY: Final = "boiler_energy"
+CONF_BOILER_DEADLINE: Final = "boiler_deadline"
+# Tariff component standing for the spot price itself (a choice of vat_on)
+TARIFF_SPOT: Final = "spot"
+
+# Flexible loads planned together with the battery
+FLEXIBLE_LOAD_EV: Final = "ev_charger"
+FLEXIBLE_LOAD_BOILER: Final = "boiler"
+
 # Default values
 DEFAULT_MIN_SOC: Final = 20
 DEFAULT_MAX_SOC: Final = 95
+DEFAULT_BATTERY_CAPACITY: Final = 10.0
+DEFAULT_MAX_CHARGE_RATE: Final = 3.6
+DEFAULT_MAX_DISCHARGE_RATE: Final = 3.6
 DEFAULT_UPDATE_INTERVAL: Final = timedelta(minutes=5)
+DEFAULT_PRICE_WINDOWS: Final = ["1", "2", "3"]
+# Minimum peak a capacity tariff bills (kW); charging below it is free
+DEFAULT_PEAK_FLOOR: Final = 2.5
+PRICE_WINDOW_CHOICES: Final = ["1", "2", "3", "4", "6", "8"]
 
 # Optimization strategies
 STRATEGY_MINIMIZE_COST: Final = "minimize_cost"
 STRATEGY_MAXIMIZE_SELF_CONSUMPTION: Final = "maximize_self_consumption"
 STRATEGY_GRID_INDEPENDENCE: Final = "grid_independence"
 STRATEGY_BALANCED: Final = "balanced"
+STRATEGY_ROBUST: Final = "robust"
+STRATEGY_OPTIMAL: Final = "optimal"
 
 STRATEGIES: Final = [
     STRATEGY_MINIMIZE_COST,
     STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
     STRATEGY_GRID_INDEPENDENCE,
     STRATEGY_BALANCED,
+    STRATEGY_ROBUST,
+    STRATEGY_OPTIMAL,
 ]
 
 # Entity keys
@@ -90,14 +139,87 @@ ENTITY_MANUAL_OVERRIDE: Final = "manual_override"
 ENTITY_DRY_RUN: Final = "dry_run"
 ENTITY_MIN_SOC: Final = "min_soc"
 ENTITY_MAX_SOC: Final = "max_soc"
+ENTITY_SCHEDULE: Final = "schedule"
+ENTITY_CHEAPEST_WINDOW: Final = "cheapest_window"
+ENTITY_PRICE_PERCENTILE: Final = "price_percentile"
+ENTITY_PRICE_RANK: Final = "price_rank"
+ENTITY_FORECAST_BIAS: Final = "forecast_bias"
+ENTITY_FORECAST_MAE: Final = "forecast_mae"
+ENTITY_FORECAST_CORRECTION: Final = "forecast_correction"
+ENTITY_SHADOW_COST: Final = "shadow_cost"
+ENTITY_GRID_DEMAND: Final = "grid_demand"
+ENTITY_MONTHLY_PEAK: Final = "monthly_peak_demand"
+ENTITY_FLEXIBLE_LOAD: Final = "flexible_load"
+ENTITY_PLAN_CALENDAR: Final = "plan_calendar"
 
 # Actions
 ACTION_CHARGE: Final = "charge"
 ACTION_DISCHARGE: Final = "discharge"
 ACTION_IDLE: Final = "idle"
 
+# Decision reason codes (state of the decision_reason sensor)
+REASON_NONE: Final = "none"
+REASON_AUTOMATION_DISABLED: Final = "automation_disabled"
+REASON_MANUAL_OVERRIDE: Final = "manual_override"
+REASON_SAFETY_OVERRIDE: Final = "safety_override"
+REASON_SOC_UNAVAILABLE: Final = "soc_unavailable"
+REASON_NO_PRICE_DATA: Final = "no_price_data"
+REASON_NO_FUTURE_PRICES: Final = "no_future_prices"
+REASON_CHEAP_PRICE: Final = "cheap_price"
+REASON_EXPENSIVE_PRICE: Final = "expensive_price"
+REASON_MODERATE_PRICE: Final = "moderate_price"
+REASON_CHEAP_BUT_FULL: Final = "cheap_but_full"
+REASON_EXPENSIVE_BUT_EMPTY: Final = "expensive_but_empty"
+REASON_NO_SOLAR_FORECAST: Final = "no_solar_forecast"
+REASON_SOLAR_MAKE_ROOM: Final = "solar_make_room"
+REASON_SOLAR_HAS_ROOM: Final = "solar_has_room"
+REASON_NO_SIGNIFICANT_SOLAR: Final = "no_significant_solar"
+REASON_CHARGE_TO_MAX: Final = "charge_to_max"
+REASON_BATTERY_FULL: Final = "battery_full"
+REASON_BELOW_AVERAGE: Final = "below_average"
+REASON_ABOVE_AVERAGE: Final = "above_average"
+REASON_NEAR_AVERAGE: Final = "near_average"
+REASON_ROBUST_PLAN: Final = "robust_plan"
+REASON_OPTIMAL_PLAN: Final = "optimal_plan"
+REASON_FLEET_PLAN: Final = "fleet_plan"
+REASON_PEAK_LIMIT: Final = "peak_limit"
+
+REASON_CODES: Final = [
+    REASON_NONE,
+    REASON_AUTOMATION_DISABLED,
+    REASON_MANUAL_OVERRIDE,
+    REASON_SAFETY_OVERRIDE,
+    REASON_SOC_UNAVAILABLE,
+    REASON_NO_PRICE_DATA,
+    REASON_NO_FUTURE_PRICES,
+    REASON_CHEAP_PRICE,
+    REASON_EXPENSIVE_PRICE,
+    REASON_MODERATE_PRICE,
+    REASON_CHEAP_BUT_FULL,
+    REASON_EXPENSIVE_BUT_EMPTY,
+    REASON_NO_SOLAR_FORECAST,
+    REASON_SOLAR_MAKE_ROOM,
+    REASON_SOLAR_HAS_ROOM,
+    REASON_NO_SIGNIFICANT_SOLAR,
+    REASON_CHARGE_TO_MAX,
+    REASON_BATTERY_FULL,
+    REASON_BELOW_AVERAGE,
+    REASON_ABOVE_AVERAGE,
+    REASON_NEAR_AVERAGE,
+    REASON_ROBUST_PLAN,
+    REASON_OPTIMAL_PLAN,
+    REASON_FLEET_PLAN,
+    REASON_PEAK_LIMIT,
+]
+
 # Attributes
+ATTR_CONFIG_ENTRY_ID: Final = "config_entry_id"
 ATTR_BATTERY_SOC: Final = "battery_soc"
 ATTR_CURRENT_PRICE: Final = "current_price"
 ATTR_SOLAR_FORECAST: Final = "solar_forecast"
 ATTR_DRY_RUN_MODE: Final = "dry_run_mode"
+ATTR_SEGMENTS: Final = "segments"
+ATTR_REASON_PARAMS: Final = "parameters"
+ATTR_PRICE_RANK: Final = "price_rank"
+ATTR_PRICE_PERCENTILE: Final = "price_percentile"
+ATTR_PRICE_BAND: Final = "price_band"
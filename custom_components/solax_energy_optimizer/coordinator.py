@@ -1,32 +1,117 @@
 """Data update coordinator for Solar Energy Optimizer."""
 from __future__ import annotations
 
-from datetime import datetime
+import copy
 import logging
+import time
+from dataclasses import replace
+from datetime import datetime
 from typing import Any
 
+import numpy as np
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
-from .adapters import build_forecast_adapter, build_inverter_adapter, build_price_adapter
+from .adapters import (
+    build_forecast_adapter,
+    build_inverter_adapter,
+    build_price_adapter,
+)
 from .adapters.base import InverterAdapter, PriceAdapter, SolarForecastAdapter
 from .const import (
     ACTION_CHARGE,
     ACTION_DISCHARGE,
     ACTION_IDLE,
+    CONF_FLEET_GROUP,
+    CONF_GRID_EXPORT_LIMIT,
+    CONF_GRID_IMPORT_LIMIT,
+    CONF_GRID_POWER_ENTITY,
+    CONF_INVERTER_ENTITY,
+    CONF_INVERTER_SOC_ATTRIBUTE,
+    CONF_LOAD_ENTITY,
     CONF_MAX_SOC,
     CONF_MIN_SOC,
+    CONF_PEAK_FLOOR,
+    CONF_PRICE_WINDOWS,
+    CONF_PRICES_ENTITY,
+    CONF_PV_POWER_ENTITY,
     DEFAULT_MAX_SOC,
     DEFAULT_MIN_SOC,
+    DEFAULT_PEAK_FLOOR,
+    DEFAULT_PRICE_WINDOWS,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    REASON_ABOVE_AVERAGE,
+    REASON_AUTOMATION_DISABLED,
+    REASON_BATTERY_FULL,
+    REASON_BELOW_AVERAGE,
+    REASON_CHARGE_TO_MAX,
+    REASON_CHEAP_BUT_FULL,
+    REASON_CHEAP_PRICE,
+    REASON_EXPENSIVE_BUT_EMPTY,
+    REASON_EXPENSIVE_PRICE,
+    REASON_FLEET_PLAN,
+    REASON_MANUAL_OVERRIDE,
+    REASON_MODERATE_PRICE,
+    REASON_NEAR_AVERAGE,
+    REASON_NO_FUTURE_PRICES,
+    REASON_NO_PRICE_DATA,
+    REASON_NO_SIGNIFICANT_SOLAR,
+    REASON_NO_SOLAR_FORECAST,
+    REASON_OPTIMAL_PLAN,
+    REASON_PEAK_LIMIT,
+    REASON_ROBUST_PLAN,
+    REASON_SAFETY_OVERRIDE,
+    REASON_SOC_UNAVAILABLE,
+    REASON_SOLAR_HAS_ROOM,
+    REASON_SOLAR_MAKE_ROOM,
     STRATEGY_BALANCED,
     STRATEGY_GRID_INDEPENDENCE,
     STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
     STRATEGY_MINIMIZE_COST,
+    STRATEGY_OPTIMAL,
+    STRATEGY_ROBUST,
 )
+from .energy_statistics import EnergyAccountant, EnergyStatisticsPublisher
+from .fleet import FleetCoordinator, FleetMember, async_join_fleet
+from .flexible_loads import (
+    FlexibleLoadTracker,
+    JointPlan,
+    LoadSchedule,
+    LoadStatus,
+    load_status,
+    place_loads,
+    solve_with_loads,
+)
+from .forecast_accuracy import ForecastAccuracy, ForecastAccuracyTracker
+from .history import HistoryCache
+from .horizon import compress_horizon
+from .inputs import PlanningInputs, build_planning_inputs, resample_pv
+from .load_forecast import LoadForecaster, read_power_kw
+from .monte_carlo import MonteCarloEvaluator, MonteCarloResult
+from .optimizer import HorizonSolver, Solution
+from .peak_demand import PeakDemand, PeakDemandTracker
+from .plan import Plan
+from .plan_cache import (
+    SOC_RESOLUTION,
+    TIME_RESOLUTION,
+    CachedDecision,
+    PlanCache,
+    input_fingerprint,
+)
+from .planner import ACTIONS, CODE_IDLE, BatteryModel, StrategyParams, build_slot_plan
+from .price_index import FuturePriceStats, PriceRankIndex
+from .price_windows import WINDOW_MODE_CHEAPEST, PriceWindow, PriceWindowEngine
+from .reasons import DecisionReason
+from .scenarios import RobustChoice, choose_robust_schedule
+from .shadow import ShadowSummary, ShadowTracker
+from .simulation import simulate_slot_plan
+from .strategies import MarketSeries
+from .tariff import TariffEngine, compile_tariff
+from .tuner import ParameterTuner, TuneResult
+from .what_if import WhatIfScenario, WhatIfSimulator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -38,6 +123,8 @@ class EnergyOptimizerData:
         """Initialize data."""
         self.battery_soc: float | None = None
         self.current_price: float | None = None
+        self.import_price: float | None = None
+        self.export_price: float | None = None
         self.solar_forecast_today: float | None = None
         self.prices_today: list[dict[str, Any]] = []
         self.prices_tomorrow: list[dict[str, Any]] = []
@@ -46,11 +133,20 @@ class EnergyOptimizerData:
         self.last_action_time: datetime | None = None
         self.next_update_time: datetime | None = None
         self.target_soc: float | None = None
-        self.decision_reason: str = ""
+        self.decision_reason: DecisionReason = DecisionReason()
         self.daily_cost: float = 0.0
         self.daily_savings: float = 0.0
         self.monthly_cost: float = 0.0
         self.monthly_savings: float = 0.0
+        self.plan: Plan | None = None
+        self.price_windows: dict[float, PriceWindow | None] = {}
+        self.price_rank: int | None = None
+        self.price_percentile: float | None = None
+        self.price_band: int | None = None
+        self.forecast_accuracy: ForecastAccuracy | None = None
+        self.shadow: ShadowSummary | None = None
+        self.peak_demand: PeakDemand | None = None
+        self.flexible_loads: dict[str, LoadStatus] = {}
 
 
 class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
@@ -76,6 +172,69 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
         self._inverter_adapter: InverterAdapter = build_inverter_adapter(entry.data)
         self._forecast_adapter: SolarForecastAdapter = build_forecast_adapter(entry.data)
         self._price_adapter: PriceAdapter = build_price_adapter(entry.data)
+        self._battery: BatteryModel = BatteryModel.from_config(entry.data)
+        self._params: StrategyParams = StrategyParams.from_options(entry.options)
+        self._tariff = TariffEngine(compile_tariff(entry.options))
+        self._accountant = EnergyAccountant(self._battery.capacity_kwh)
+        self._statistics = EnergyStatisticsPublisher(hass, entry.entry_id)
+        self._window_hours: list[float] = sorted(
+            {float(hours) for hours in entry.options.get(CONF_PRICE_WINDOWS, DEFAULT_PRICE_WINDOWS)}
+        )
+        self._inputs: PlanningInputs = build_planning_inputs([], [])
+        self._window_engine: PriceWindowEngine | None = None
+        self._price_index: PriceRankIndex | None = None
+        self._robust_choice: RobustChoice | None = None
+        self._solver = HorizonSolver()
+        self._optimal: Solution | None = None
+        self._flexible = FlexibleLoadTracker(entry.options)
+        self._load_schedule: LoadSchedule | None = None
+        self._joint: JointPlan | None = None
+        self._monte_carlo = MonteCarloEvaluator()
+        self._tuner = ParameterTuner()
+        self._what_if = WhatIfSimulator()
+        self._plan_cache = PlanCache()
+        self._shadow = ShadowTracker(hass, entry.entry_id)
+        group = (entry.options.get(CONF_FLEET_GROUP) or "").strip()
+        self._fleet: FleetCoordinator | None = (
+            async_join_fleet(
+                hass,
+                group,
+                entry.entry_id,
+                entry.options.get(CONF_GRID_IMPORT_LIMIT),
+                entry.options.get(CONF_GRID_EXPORT_LIMIT),
+            )
+            if group
+            else None
+        )
+        load_entity = entry.options.get(CONF_LOAD_ENTITY)
+        self._load_entity: str | None = load_entity
+        self._load_forecaster: LoadForecaster | None = (
+            LoadForecaster(hass, entry.entry_id, load_entity) if load_entity else None
+        )
+        pv_entity = entry.options.get(CONF_PV_POWER_ENTITY)
+        self._pv_entity: str | None = pv_entity
+        self._forecast_accuracy: ForecastAccuracyTracker | None = (
+            ForecastAccuracyTracker(hass, entry.entry_id, pv_entity) if pv_entity else None
+        )
+        grid_entity = entry.options.get(CONF_GRID_POWER_ENTITY)
+        self._peak_demand: PeakDemandTracker | None = (
+            PeakDemandTracker(
+                hass, entry.entry_id, grid_entity, float(entry.options.get(CONF_PEAK_FLOOR, DEFAULT_PEAK_FLOOR))
+            )
+            if grid_entity
+            else None
+        )
+        self._history = HistoryCache(
+            hass,
+            entry.entry_id,
+            {
+                # An attribute-based SOC has no statistics of its own
+                "soc": None if entry.data.get(CONF_INVERTER_SOC_ATTRIBUTE) else entry.data.get(CONF_INVERTER_ENTITY),
+                "price": entry.data.get(CONF_PRICES_ENTITY),
+                "pv": pv_entity,
+                "load": load_entity,
+            },
+        )
 
     @property
     def current_strategy(self) -> str:
@@ -122,6 +281,159 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
         """Return total number of times a charge/discharge action was issued to the inverter."""
         return self._inverter_update_count
 
+    @property
+    def window_hours(self) -> list[float]:
+        """Return the configured price window lengths in hours."""
+        return self._window_hours
+
+    @property
+    def window_engine(self) -> PriceWindowEngine | None:
+        """Return the price window engine for the current price series."""
+        return self._window_engine
+
+    @property
+    def price_index(self) -> PriceRankIndex | None:
+        """Return the rank/percentile index for the current price series."""
+        return self._price_index
+
+    @property
+    def load_forecaster(self) -> LoadForecaster | None:
+        """Return the household load forecaster, if a load entity is configured."""
+        return self._load_forecaster
+
+    @property
+    def forecast_accuracy(self) -> ForecastAccuracyTracker | None:
+        """Return the forecast accuracy tracker, if a PV power entity is configured."""
+        return self._forecast_accuracy
+
+    @property
+    def peak_demand(self) -> PeakDemandTracker | None:
+        """Return the capacity-tariff peak tracker, if a grid power entity is configured."""
+        return self._peak_demand
+
+    @property
+    def shadow(self) -> ShadowTracker:
+        """Return the counterfactual cost tracker of the base strategies."""
+        return self._shadow
+
+    @property
+    def flexible_loads(self) -> FlexibleLoadTracker:
+        """Return the flexible load tracker."""
+        return self._flexible
+
+    @property
+    def joint_plan(self) -> JointPlan | None:
+        """Return the last joint battery and flexible load solve."""
+        return self._joint
+
+    @property
+    def tariff(self) -> TariffEngine:
+        """Return the compiled tariff that turns spot prices into import / export prices."""
+        return self._tariff
+
+    @property
+    def planning_inputs(self) -> PlanningInputs:
+        """Return the aligned planning inputs of the last update."""
+        return self._inputs
+
+    @property
+    def solver(self) -> HorizonSolver:
+        """Return the warm-started dynamic-programming solver of the optimal strategy."""
+        return self._solver
+
+    @property
+    def fleet(self) -> FleetCoordinator | None:
+        """Return the fleet this entry is planned with, if it belongs to a fleet group."""
+        return self._fleet
+
+    @property
+    def history(self) -> HistoryCache:
+        """Return the on-disk cache of past SOC/price/PV/load history."""
+        return self._history
+
+    @property
+    def monte_carlo(self) -> MonteCarloEvaluator:
+        """Return the process-pool Monte Carlo strategy evaluator."""
+        return self._monte_carlo
+
+    async def async_evaluate_strategies(self, samples: int, time_limit: float) -> MonteCarloResult | None:
+        """Sample trajectories around the current inputs and evaluate every candidate schedule."""
+        if self.data is None or self.data.battery_soc is None:
+            return None
+        inputs = self._inputs.slice_from(dt_util.now().timestamp())
+        if not len(inputs):
+            return None
+        forecast = self.data.solar_forecast
+        return await self._monte_carlo.async_evaluate(
+            inputs,
+            resample_pv(forecast, inputs.starts, inputs.ends, "pv_estimate10"),
+            resample_pv(forecast, inputs.starts, inputs.ends, "pv_estimate90"),
+            soc=self.data.battery_soc,
+            min_soc=self._min_soc,
+            max_soc=self._max_soc,
+            battery=self._battery,
+            params=self._params,
+            samples=samples,
+            time_limit=time_limit,
+            tariff=self._tariff.tariff,
+        )
+
+    @property
+    def plan_cache(self) -> PlanCache:
+        """Return the input-fingerprint decision cache."""
+        return self._plan_cache
+
+    @property
+    def what_if(self) -> WhatIfSimulator:
+        """Return the memoizing what-if simulator."""
+        return self._what_if
+
+    @property
+    def current_scenario(self) -> WhatIfScenario:
+        """Return the settings the live plan is made with."""
+        return WhatIfScenario(self._current_strategy, self._min_soc, self._max_soc, self._battery)
+
+    async def async_what_if(self, scenario: WhatIfScenario) -> tuple[Plan, bool] | None:
+        """Plan ``scenario`` from the cached inputs and SOC; return the plan and whether it was memoized."""
+        if self.data is None or self.data.battery_soc is None:
+            return None
+        now = dt_util.now()
+        if not np.any(self._inputs.ends > now.timestamp()):
+            return None
+        return await self._what_if.async_plan(
+            self.hass,
+            self._inputs,
+            scenario,
+            now=now,
+            soc=self.data.battery_soc,
+            params=self._params,
+            forecast=self.data.solar_forecast,
+        )
+
+    @property
+    def strategy_params(self) -> StrategyParams:
+        """Return the strategy thresholds from the options."""
+        return self._params
+
+    @property
+    def tuner(self) -> ParameterTuner:
+        """Return the process-pool strategy parameter tuner."""
+        return self._tuner
+
+    async def async_tune_parameters(self, days: int) -> TuneResult | None:
+        """Replay the last ``days`` days of history and grid-search the strategy thresholds."""
+        history = await self._history.async_load(days)
+        if not np.isfinite(history.column("price")).any():
+            return None
+        return await self._tuner.async_tune(
+            history,
+            battery=self._battery,
+            min_soc=self._min_soc,
+            max_soc=self._max_soc,
+            base=self._params,
+            tariff=self._tariff.tariff,
+        )
+
     @property
     def min_soc(self) -> float:
         """Return minimum SOC threshold."""
@@ -160,6 +472,18 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             # --- Solar forecast ---
             data.solar_forecast = self._forecast_adapter.get_forecast(self.hass)
             data.solar_forecast_today = self._forecast_adapter.get_solar_today(self.hass)
+            if self._forecast_accuracy is not None:
+                now_ts = dt_util.utcnow().timestamp()
+                self._forecast_accuracy.observe(now_ts, data.solar_forecast)
+                data.solar_forecast = self._forecast_accuracy.correct(data.solar_forecast)
+                data.forecast_accuracy = self._forecast_accuracy.summary(now_ts)
+                _LOGGER.info(
+                    "[accuracy] %d periods | bias=%s kW | MAE=%s kW | correction now ×%.2f",
+                    data.forecast_accuracy.periods,
+                    f"{data.forecast_accuracy.bias_kw:+.3f}" if data.forecast_accuracy.bias_kw is not None else "n/a",
+                    f"{data.forecast_accuracy.mae_kw:.3f}" if data.forecast_accuracy.mae_kw is not None else "n/a",
+                    data.forecast_accuracy.correction,
+                )
             # Log the next 3 non-zero solar periods for context
             upcoming = [
                 f for f in data.solar_forecast
@@ -181,13 +505,78 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             # --- Electricity prices ---
             data.prices_today = self._price_adapter.get_prices(self.hass)
             data.current_price = self._price_adapter.get_current_price(self.hass)
+            if data.current_price is not None:
+                data.import_price = self._tariff.tariff.import_price(data.current_price)
+                data.export_price = self._tariff.tariff.export_price(data.current_price)
             _LOGGER.info(
-                "[prices] %s: current=%.4f/kWh, %d price entries loaded",
+                "[prices] %s: current=%.4f/kWh (import %.4f, export %.4f), %d price entries loaded",
                 self._price_adapter.source_entity_id,
                 data.current_price if data.current_price is not None else 0,
+                data.import_price if data.import_price is not None else 0,
+                data.export_price if data.export_price is not None else 0,
                 len(data.prices_today),
             )
 
+            # --- Aligned inputs & price windows ---
+            self._inputs = self._tariff.apply(build_planning_inputs(data.prices_today, data.solar_forecast))
+            if self._load_forecaster is not None:
+                self._load_forecaster.sample(dt_util.utcnow().timestamp())
+                self._inputs = self._inputs.with_load(
+                    self._load_forecaster.forecast(self._inputs.starts, self._inputs.ends)
+                )
+            if self._window_engine is None or not self._window_engine.matches(self._inputs):
+                self._window_engine = PriceWindowEngine(self._inputs)
+                self._price_index = PriceRankIndex(self._inputs)
+                _LOGGER.info("[windows] price series changed — window engine and rank index rebuilt (%d slots)", len(self._inputs))
+            now_ts = dt_util.now().timestamp()
+            slot_stats = self._price_index.slot_stats(now_ts) if self._price_index else None
+            if slot_stats is not None:
+                data.price_rank, data.price_percentile, data.price_band = slot_stats
+            data.price_windows = {
+                hours: self._window_engine.find(hours, WINDOW_MODE_CHEAPEST, start_after=now_ts)
+                for hours in self._window_hours
+            }
+
+            # --- Capacity tariff ---
+            if self._peak_demand is not None:
+                data.peak_demand = self._peak_demand.summary(dt_util.utcnow().timestamp())
+                _LOGGER.info(
+                    "[peak] %s: 15 min %.2f kW | quarter so far %.2f kW | monthly peak %.2f kW | limit %.2f kW",
+                    self._peak_demand.entity_id,
+                    data.peak_demand.rolling_kw,
+                    data.peak_demand.quarter_kw,
+                    data.peak_demand.peak_kw,
+                    data.peak_demand.limit_kw,
+                )
+
+            # --- Shadow strategies ---
+            current = self._inputs.slice_from(now_ts)
+            data.shadow = self._shadow.step(
+                now_ts,
+                MarketSeries.from_inputs(self._inputs, data.solar_forecast, self._load_series),
+                price=data.import_price,
+                export_price=data.export_price,
+                pv_kw=self._measured_or_forecast(self._pv_entity, current.pv),
+                load_kw=self._measured_or_forecast(self._load_entity, current.load),
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+                params=self._params,
+            )
+            if data.shadow is not None:
+                _LOGGER.info(
+                    "[shadow] %s",
+                    " | ".join(
+                        f"{name}: {data.shadow.action[name]} €{cost:.3f}"
+                        for name, cost in data.shadow.cost.items()
+                    ),
+                )
+
+            # --- Flexible loads ---
+            if self._flexible:
+                self._flexible.advance(now_ts)
+
             # --- Optimization ---
             _LOGGER.info(
                 "[optimizer] cycle=#%d inverter_updates=%d | strategy=%s | automation=%s | manual_override=%s | dry_run=%s",
@@ -199,23 +588,11 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
                 self._dry_run_mode,
             )
 
-            if self._automation_enabled and not self._manual_override:
-                self._run_optimization(data)
-                if data.next_action != ACTION_IDLE:
-                    self._inverter_update_count += 1
-                mode = "DRY RUN" if self._dry_run_mode else "LIVE"
-                _LOGGER.info(
-                    "[optimizer] %s | action=%s | target_soc=%s%% | inverter_updates=%d | reason: %s",
-                    mode,
-                    data.next_action,
-                    data.target_soc,
-                    self._inverter_update_count,
-                    data.decision_reason,
-                )
-            else:
-                reason = "automation disabled" if not self._automation_enabled else "manual override active"
-                data.decision_reason = reason
-                _LOGGER.info("[optimizer] skipped — %s", reason)
+            self._decide(data)
+            if data.next_action != ACTION_IDLE:
+                self._inverter_update_count += 1
+
+            self._update_accounting(data)
 
             _LOGGER.info("=== Update cycle #%d end ===", self._cycle_count)
             return data
@@ -224,6 +601,72 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             _LOGGER.error("Update cycle #%d failed: %s (%s)", self._cycle_count, err, type(err).__name__, exc_info=True)
             raise UpdateFailed(f"Error fetching data: {err}") from err
 
+    def _decide(self, data: EnergyOptimizerData) -> None:
+        """Take the decision and build the plan from the cached planning inputs."""
+        if self._automation_enabled and not self._manual_override:
+            self._load_schedule = None
+            self._run_optimization(data)
+            if self._flexible:
+                self._schedule_loads(data)
+            data.plan = self._build_plan(data)
+            mode = "DRY RUN" if self._dry_run_mode else "LIVE"
+            _LOGGER.info(
+                "[optimizer] %s | action=%s | target_soc=%s%% | reason: %s",
+                mode,
+                data.next_action,
+                data.target_soc,
+                data.decision_reason,
+            )
+        else:
+            reason = DecisionReason(
+                REASON_AUTOMATION_DISABLED if not self._automation_enabled else REASON_MANUAL_OVERRIDE
+            )
+            data.decision_reason = reason
+            data.flexible_loads = {}
+            self._flexible.follow([0.0] * len(self._flexible.keys))
+            _LOGGER.info("[optimizer] skipped — %s", reason)
+
+    @callback
+    def async_replan(self, trigger: str) -> None:
+        """Re-decide and re-plan immediately after a setting change.
+
+        Reuses the source readings of the last update and the cached planning
+        inputs, price index and window engine instead of re-reading every
+        source entity; listeners are notified right away. Accounting and the
+        shadow strategies keep advancing on the regular update cycle only.
+        """
+        if self.data is None:
+            return
+        began = time.perf_counter()
+        data = copy.copy(self.data)
+        data.next_action = ACTION_IDLE
+        data.target_soc = None
+        data.decision_reason = DecisionReason()
+        data.plan = None
+        # Setting the data resets the poll timer
+        data.next_update_time = dt_util.now() + DEFAULT_UPDATE_INTERVAL
+        self._decide(data)
+        self.async_set_updated_data(data)
+        _LOGGER.info(
+            "[replan] %s changed → %s in %.1f ms", trigger, data.next_action, (time.perf_counter() - began) * 1000
+        )
+
+    def _update_accounting(self, data: EnergyOptimizerData) -> None:
+        """Accumulate cost/savings and import completed hours into long-term statistics."""
+        completed = self._accountant.record(
+            dt_util.utcnow(), data.battery_soc, data.import_price, data.next_action
+        )
+        data.daily_cost = self._accountant.daily_cost
+        data.daily_savings = self._accountant.daily_savings
+        data.monthly_cost = self._accountant.monthly_cost
+        data.monthly_savings = self._accountant.monthly_savings
+        if completed is not None:
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self._statistics.async_publish(completed),
+                f"{DOMAIN} statistics import",
+            )
+
     def _run_optimization(self, data: EnergyOptimizerData) -> None:
         """Run optimization algorithm based on current strategy."""
         min_soc = self._min_soc
@@ -233,8 +676,8 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             data.next_action = ACTION_CHARGE
             data.target_soc = min_soc
             data.last_action_time = dt_util.now()
-            data.decision_reason = (
-                f"Safety override — SOC {data.battery_soc:.1f}% is below minimum {min_soc:.0f}%"
+            data.decision_reason = DecisionReason(
+                REASON_SAFETY_OVERRIDE, {"soc": data.battery_soc, "min_soc": min_soc}
             )
             _LOGGER.info(
                 "[optimizer] SAFETY OVERRIDE | SOC=%.1f%% < min=%.0f%% | action=CHARGE to %.0f%%",
@@ -244,6 +687,78 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             )
             return
 
+        key = self._fingerprint(data)
+        cached = self._plan_cache.get(key) if key is not None else None
+        if cached is not None:
+            data.next_action = cached.next_action
+            data.target_soc = cached.target_soc
+            data.decision_reason = cached.decision_reason
+            if cached.acted:
+                data.last_action_time = dt_util.now()
+            self._optimal = cached.optimal
+            self._robust_choice = cached.robust_choice
+            self._joint = cached.joint
+            self._load_schedule = cached.load_schedule
+            _LOGGER.info("[optimizer] inputs unchanged → cached %s decision", self._current_strategy)
+        else:
+            acted_before = data.last_action_time
+            self._run_strategy(data)
+            if key is not None:
+                self._plan_cache.put(
+                    key,
+                    CachedDecision(
+                        next_action=data.next_action,
+                        target_soc=data.target_soc,
+                        decision_reason=data.decision_reason,
+                        acted=data.last_action_time is not acted_before,
+                        optimal=self._optimal,
+                        robust_choice=self._robust_choice,
+                        joint=self._joint,
+                        load_schedule=self._load_schedule,
+                    ),
+                )
+
+        if data.next_action == ACTION_CHARGE and data.peak_demand is not None:
+            self._hold_under_peak(data)
+
+    def _fingerprint(self, data: EnergyOptimizerData) -> bytes | None:
+        """Return the fingerprint of everything the strategies read, or None if the decision is not cacheable.
+
+        Fleet members dispatch from the other batteries' state as well, so
+        their decisions are never cached.
+        """
+        if self._fleet is not None:
+            return None
+        now_ts = dt_util.now().timestamp()
+        forecast = tuple(
+            (entry.get("period_start"), entry.get("pv_estimate"), entry.get("pv_estimate10"), entry.get("pv_estimate90"))
+            for entry in data.solar_forecast
+            if isinstance(entry, dict)
+        )
+        return input_fingerprint(
+            self._inputs.slice_from(now_ts),
+            (
+                self._current_strategy,
+                self._min_soc,
+                self._max_soc,
+                self._battery,
+                self._params,
+                round(data.battery_soc / SOC_RESOLUTION) if data.battery_soc is not None else None,
+                int(now_ts // TIME_RESOLUTION),
+                bool(data.prices_today),
+                data.import_price,
+                data.peak_demand.limit_kw if data.peak_demand is not None else None,
+                tuple(self._flexible.loads()) if self._flexible else (),
+                # The rows' hash is far cheaper than their repr
+                hash(forecast),
+            ),
+        )
+
+    def _run_strategy(self, data: EnergyOptimizerData) -> None:
+        """Dispatch to the current strategy."""
+        if self._fleet is not None and self._current_strategy != STRATEGY_OPTIMAL:
+            # Only the optimal strategy follows the joint schedule
+            self._fleet.withdraw(self.config_entry.entry_id)
         if self._current_strategy == STRATEGY_MINIMIZE_COST:
             self._optimize_minimize_cost(data)
         elif self._current_strategy == STRATEGY_MAXIMIZE_SELF_CONSUMPTION:
@@ -252,41 +767,174 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             self._optimize_grid_independence(data)
         elif self._current_strategy == STRATEGY_BALANCED:
             self._optimize_balanced(data)
+        elif self._current_strategy == STRATEGY_ROBUST:
+            self._optimize_robust(data)
+        elif self._current_strategy == STRATEGY_OPTIMAL:
+            self._optimize_optimal(data)
+
+    def _hold_under_peak(self, data: EnergyOptimizerData) -> None:
+        """Stay idle when charging at full rate would lift this quarter-hour above the monthly peak.
+
+        The inverter charges at its full rate, so the guard applies to every
+        strategy; the safety override returns before it and always charges.
+        """
+        now_ts = dt_util.utcnow().timestamp()
+        current = self._inputs.slice_from(now_ts)
+        net_kw = self._measured_or_forecast(self._load_entity, current.load) - self._measured_or_forecast(
+            self._pv_entity, current.pv
+        )
+        demand = data.peak_demand
+        projected = demand.projected_kw(now_ts, net_kw + self._battery.max_charge_kw)
+        if projected <= demand.limit_kw:
+            return
+        data.next_action = ACTION_IDLE
+        data.target_soc = None
+        data.decision_reason = DecisionReason(
+            REASON_PEAK_LIMIT,
+            {
+                "strategy": self._current_strategy,
+                "projected": projected,
+                "limit": demand.limit_kw,
+                "peak": demand.peak_kw,
+            },
+        )
+        # Keep the cached schedules' first slot in line with the decision
+        for name in ("_optimal", "_robust_choice"):
+            schedule = getattr(self, name)
+            if schedule is not None and schedule.action.size:
+                action, target = schedule.action.copy(), schedule.target.copy()
+                action[0], target[0] = CODE_IDLE, np.nan
+                setattr(self, name, replace(schedule, action=action, target=target))
+        _LOGGER.info(
+            "[peak] IDLE | charging would lift the quarter-hour to %.2f kW > limit %.2f kW (household net %.2f kW)",
+            projected,
+            demand.limit_kw,
+            net_kw,
+        )
+
+    def _schedule_loads(self, data: EnergyOptimizerData) -> None:
+        """Place the flexible loads on the remaining slots and follow their first slot.
+
+        The optimal strategy has already placed them together with the
+        battery; every other strategy, and a fleet member, places them
+        against the household load alone.
+        """
+        inputs = self._inputs.slice_from(dt_util.now().timestamp())
+        loads = self._flexible.loads()
+        schedule = self._load_schedule
+        if schedule is None or schedule.power_kw.shape[1] != len(inputs):
+            horizon = compress_horizon(inputs)
+            bucketed = horizon.inputs
+            schedule = place_loads(
+                loads,
+                bucketed,
+                (bucketed.load - bucketed.pv) * bucketed.durations_h,
+                data.peak_demand.limit_kw if data.peak_demand is not None else None,
+            ).expand(horizon)
+            self._load_schedule = schedule
+        data.flexible_loads = load_status(loads, schedule, inputs)
+        self._flexible.follow([status.power_kw for status in data.flexible_loads.values()])
+        _LOGGER.info(
+            "[loads] %s",
+            " | ".join(
+                f"{key}: {status.power_kw:.1f} kW now, {status.planned_kwh:.1f}/{status.remaining_kwh:.1f} kWh planned"
+                for key, status in data.flexible_loads.items()
+            ),
+        )
+
+    def _build_plan(self, data: EnergyOptimizerData) -> Plan | None:
+        """Roll the current strategy over the remaining price horizon."""
+        if data.battery_soc is None:
+            _LOGGER.info("[plan] skipped — battery SOC unavailable")
+            return None
+
+        now = dt_util.now()
+        inputs = self._inputs.slice_from(now.timestamp())
+        if not len(inputs):
+            _LOGGER.info("[plan] skipped — no remaining price slots")
+            return None
+        schedule = self._load_schedule
+        if schedule is not None and schedule.power_kw.shape[1] == len(inputs):
+            inputs = inputs.with_load(inputs.load + schedule.total_kw)
+
+        choice = self._robust_choice
+        if self._current_strategy == STRATEGY_ROBUST and choice is not None and choice.action.size == len(inputs):
+            slots = simulate_slot_plan(
+                inputs,
+                choice.action,
+                choice.target,
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+            )
+            plan = Plan(slots, self._current_strategy, now)
+            _LOGGER.info("[plan] robust schedule '%s' → %d segments", choice.name, len(plan.segments))
+            return plan
+
+        solution = self._optimal
+        if self._current_strategy == STRATEGY_OPTIMAL and solution is not None and solution.action.size == len(inputs):
+            slots = simulate_slot_plan(
+                inputs,
+                solution.action,
+                solution.target,
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+            )
+            plan = Plan(slots, self._current_strategy, now)
+            _LOGGER.info("[plan] optimal schedule → %d segments", len(plan.segments))
+            return plan
+
+        slots = build_slot_plan(
+            inputs,
+            self._current_strategy,
+            soc=data.battery_soc,
+            min_soc=self._min_soc,
+            max_soc=self._max_soc,
+            battery=self._battery,
+            first_action=data.next_action,
+            first_target=data.target_soc,
+            params=self._params,
+        )
+        plan = Plan(slots, self._current_strategy, now)
+        _LOGGER.info(
+            "[plan] %d slots → %d segments until %s",
+            len(slots),
+            len(plan.segments),
+            plan.segments[-1].end.isoformat() if plan.segments else "?",
+        )
+        return plan
+
+    def _future_price_stats(self) -> FuturePriceStats | None:
+        """Return min/max/mean of the price slots that have not started yet."""
+        if self._price_index is None:
+            return None
+        return self._price_index.future_stats(dt_util.now().timestamp())
 
     def _optimize_minimize_cost(self, data: EnergyOptimizerData) -> None:
         """Optimize to minimize energy costs."""
         if not data.prices_today:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No price data available"
+            data.decision_reason = DecisionReason(REASON_NO_PRICE_DATA)
             _LOGGER.info("[minimize_cost] no price data → idle")
             return
 
-        now = dt_util.now()
-        future_prices = []
-        for p in data.prices_today:
-            try:
-                if not isinstance(p, dict):
-                    _LOGGER.warning("[minimize_cost] unexpected price entry type %s: %s", type(p).__name__, p)
-                    continue
-                if self._parse_datetime(p.get("from", "")) >= now:
-                    future_prices.append(p)
-            except Exception as e:
-                _LOGGER.error("[minimize_cost] error processing price entry %s: %s", p, e, exc_info=True)
-
-        if not future_prices:
+        future_prices = self._future_price_stats()
+        if future_prices is None:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No future price entries found"
+            data.decision_reason = DecisionReason(REASON_NO_FUTURE_PRICES)
             _LOGGER.info("[minimize_cost] no future prices → idle")
             return
 
-        prices_by_value = sorted(future_prices, key=lambda x: float(x.get("price", 0)))
-        lowest_price_val = float(prices_by_value[0].get("price", 0))
-        highest_price_val = float(prices_by_value[-1].get("price", 0))
+        lowest_price_val = future_prices.minimum
+        highest_price_val = future_prices.maximum
 
         price_range = highest_price_val - lowest_price_val
-        cheap_price_threshold = lowest_price_val + (price_range * 0.25)
-        expensive_price_threshold = highest_price_val - (price_range * 0.25)
-        current_price = data.current_price or 0
+        cheap_price_threshold = lowest_price_val + (price_range * self._params.cheap_band)
+        expensive_price_threshold = highest_price_val - (price_range * self._params.expensive_band)
+        current_price = data.import_price or 0
         min_soc = self._min_soc
         max_soc = self._max_soc
 
@@ -294,8 +942,8 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             "[minimize_cost] inputs:"
             " current_price=€%.4f"
             " | price_range=[€%.4f, €%.4f]"
-            " | cheap_threshold=€%.4f (bottom 25%%)"
-            " | expensive_threshold=€%.4f (top 25%%)"
+            " | cheap_threshold=€%.4f (bottom %.0f%%)"
+            " | expensive_threshold=€%.4f (top %.0f%%)"
             " | SOC=%.1f%%"
             " | SOC_limits=[%.0f%%, %.0f%%]"
             " | future_prices=%d",
@@ -303,20 +951,27 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             lowest_price_val,
             highest_price_val,
             cheap_price_threshold,
+            self._params.cheap_band * 100,
             expensive_price_threshold,
+            self._params.expensive_band * 100,
             data.battery_soc if data.battery_soc is not None else -1,
             min_soc,
             max_soc,
-            len(future_prices),
+            future_prices.count,
         )
 
         if current_price <= cheap_price_threshold and data.battery_soc is not None and data.battery_soc < max_soc:
             data.next_action = ACTION_CHARGE
             data.target_soc = max_soc
             data.last_action_time = dt_util.now()
-            data.decision_reason = (
-                f"Price €{current_price:.4f} ≤ cheap threshold €{cheap_price_threshold:.4f} "
-                f"and SOC {data.battery_soc:.1f}% < max {max_soc:.0f}%"
+            data.decision_reason = DecisionReason(
+                REASON_CHEAP_PRICE,
+                {
+                    "price": current_price,
+                    "cheap_threshold": cheap_price_threshold,
+                    "soc": data.battery_soc,
+                    "max_soc": max_soc,
+                },
             )
             _LOGGER.info(
                 "[minimize_cost] CHARGE | €%.4f ≤ cheap_threshold €%.4f | SOC %.1f%% < max %.0f%%",
@@ -326,9 +981,14 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             data.next_action = ACTION_DISCHARGE
             data.target_soc = min_soc
             data.last_action_time = dt_util.now()
-            data.decision_reason = (
-                f"Price €{current_price:.4f} ≥ expensive threshold €{expensive_price_threshold:.4f} "
-                f"and SOC {data.battery_soc:.1f}% > min {min_soc:.0f}%"
+            data.decision_reason = DecisionReason(
+                REASON_EXPENSIVE_PRICE,
+                {
+                    "price": current_price,
+                    "expensive_threshold": expensive_price_threshold,
+                    "soc": data.battery_soc,
+                    "min_soc": min_soc,
+                },
             )
             _LOGGER.info(
                 "[minimize_cost] DISCHARGE | €%.4f ≥ expensive_threshold €%.4f | SOC %.1f%% > min %.0f%%",
@@ -337,22 +997,21 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
         else:
             data.next_action = ACTION_IDLE
             # Explain exactly why idle was chosen
+            moderate = {
+                "price": current_price,
+                "cheap_threshold": cheap_price_threshold,
+                "expensive_threshold": expensive_price_threshold,
+            }
             if current_price > cheap_price_threshold and current_price < expensive_price_threshold:
-                reason = (
-                    f"Price €{current_price:.4f} is in moderate range "
-                    f"(€{cheap_price_threshold:.4f}–€{expensive_price_threshold:.4f})"
-                )
+                reason = DecisionReason(REASON_MODERATE_PRICE, moderate)
             elif data.battery_soc is None:
-                reason = "Battery SOC unavailable"
+                reason = DecisionReason(REASON_SOC_UNAVAILABLE)
             elif current_price <= cheap_price_threshold and data.battery_soc is not None and data.battery_soc >= max_soc:
-                reason = f"Price is cheap but battery already at max SOC ({data.battery_soc:.1f}%)"
+                reason = DecisionReason(REASON_CHEAP_BUT_FULL, {"soc": data.battery_soc})
             elif current_price >= expensive_price_threshold and data.battery_soc is not None and data.battery_soc <= min_soc:
-                reason = f"Price is expensive but battery already at min SOC ({data.battery_soc:.1f}%)"
+                reason = DecisionReason(REASON_EXPENSIVE_BUT_EMPTY, {"soc": data.battery_soc})
             else:
-                reason = (
-                    f"Price €{current_price:.4f} in moderate range "
-                    f"(cheap=€{cheap_price_threshold:.4f}, expensive=€{expensive_price_threshold:.4f})"
-                )
+                reason = DecisionReason(REASON_MODERATE_PRICE, moderate)
             data.decision_reason = reason
             _LOGGER.info("[minimize_cost] IDLE | %s", reason)
 
@@ -360,17 +1019,24 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
         """Optimize to maximize self-consumption of solar energy."""
         if not data.solar_forecast:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No solar forecast data available"
+            data.decision_reason = DecisionReason(REASON_NO_SOLAR_FORECAST)
             _LOGGER.info("[maximize_self_consumption] no solar forecast → idle")
             return
 
         now = dt_util.now()
         max_soc = self._max_soc
+        threshold = max_soc - self._params.solar_headroom
+        surplus_kw = self._params.solar_surplus_kw
 
+        # Solar only needs battery room once it exceeds the expected household load
         next_solar_period = None
+        load = 0.0
         for forecast in data.solar_forecast:
             forecast_time = self._parse_datetime(forecast.get("period_start", ""))
-            if forecast_time > now and forecast.get("pv_estimate", 0) > 1.0:
+            if forecast_time <= now:
+                continue
+            load = self._load_at(forecast_time)
+            if forecast.get("pv_estimate", 0) - load > surplus_kw:
                 next_solar_period = forecast
                 break
 
@@ -378,38 +1044,57 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             pv = next_solar_period.get("pv_estimate", 0)
             period_start = next_solar_period.get("period_start", "?")
             _LOGGER.info(
-                "[maximize_self_consumption] inputs: next_solar_period=%s pv_estimate=%.2f kW | SOC=%.1f%% | max_soc=%.0f%% | headroom_threshold=%.0f%%",
-                period_start, pv,
+                "[maximize_self_consumption] inputs: next_solar_period=%s pv_estimate=%.2f kW load=%.2f kW | SOC=%.1f%% | max_soc=%.0f%% | headroom_threshold=%.0f%%",
+                period_start, pv, load,
                 data.battery_soc if data.battery_soc is not None else -1,
                 max_soc,
-                max_soc - 20,
+                threshold,
             )
-            if data.battery_soc is not None and data.battery_soc > max_soc - 20:
+            if data.battery_soc is not None and data.battery_soc > threshold:
                 data.next_action = ACTION_DISCHARGE
-                data.target_soc = max_soc - 20
-                data.decision_reason = (
-                    f"Solar expected {pv:.2f} kW at {period_start[11:16]} — "
-                    f"discharging to {max_soc - 20:.0f}% to make room (SOC {data.battery_soc:.1f}% > headroom threshold {max_soc - 20:.0f}%)"
+                data.target_soc = threshold
+                data.decision_reason = DecisionReason(
+                    REASON_SOLAR_MAKE_ROOM,
+                    {"pv": pv, "load": load, "period_start": period_start[11:16], "soc": data.battery_soc, "threshold": threshold},
                 )
                 _LOGGER.info(
                     "[maximize_self_consumption] DISCHARGE to %.0f%% | SOC %.1f%% > headroom threshold %.0f%% | solar=%.2f kW at %s",
-                    max_soc - 20, data.battery_soc, max_soc - 20, pv, period_start[11:16],
+                    threshold, data.battery_soc, threshold, pv, period_start[11:16],
                 )
             else:
                 data.next_action = ACTION_IDLE
-                data.decision_reason = (
-                    f"Solar expected {pv:.2f} kW at {period_start[11:16]} — "
-                    f"battery has enough room (SOC {data.battery_soc:.1f}% ≤ {max_soc - 20:.0f}%)"
+                data.decision_reason = DecisionReason(
+                    REASON_SOLAR_HAS_ROOM,
+                    {"pv": pv, "load": load, "period_start": period_start[11:16], "soc": data.battery_soc, "threshold": threshold},
                 )
                 _LOGGER.info(
                     "[maximize_self_consumption] IDLE | battery has room | SOC=%.1f%% ≤ headroom_threshold=%.0f%%",
                     data.battery_soc if data.battery_soc is not None else -1,
-                    max_soc - 20,
+                    threshold,
                 )
         else:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No significant solar production expected (all periods < 1.0 kW)"
-            _LOGGER.info("[maximize_self_consumption] IDLE | no solar period > 1.0 kW found in forecast")
+            data.decision_reason = DecisionReason(REASON_NO_SIGNIFICANT_SOLAR, {"surplus_kw": surplus_kw})
+            _LOGGER.info("[maximize_self_consumption] IDLE | no solar period with surplus > %.1f kW found in forecast", surplus_kw)
+
+    def _measured_or_forecast(self, entity_id: str | None, forecast: np.ndarray) -> float:
+        """Return a power sensor's reading in kW, else the current slot's forecast."""
+        measured = read_power_kw(self.hass, entity_id) if entity_id else None
+        if measured is not None:
+            return measured
+        return float(forecast[0]) if forecast.size else 0.0
+
+    def _load_series(self, starts: np.ndarray) -> np.ndarray:
+        """Return the forecast household load at each POSIX time in kW."""
+        if self._load_forecaster is None:
+            return np.zeros(starts.size)
+        return np.array([self._load_forecaster.power_at(float(start)) for start in starts])
+
+    def _load_at(self, when: datetime) -> float:
+        """Return the forecast household load at ``when`` in kW (0 without a load entity)."""
+        if self._load_forecaster is None:
+            return 0.0
+        return self._load_forecaster.power_at(when.timestamp())
 
     def _optimize_grid_independence(self, data: EnergyOptimizerData) -> None:
         """Optimize for grid independence."""
@@ -425,17 +1110,19 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
             if data.battery_soc < max_soc:
                 data.next_action = ACTION_CHARGE
                 data.target_soc = max_soc
-                data.decision_reason = (
-                    f"Grid independence — charging to max {max_soc:.0f}% (SOC {data.battery_soc:.1f}% < {max_soc:.0f}%)"
+                data.decision_reason = DecisionReason(
+                    REASON_CHARGE_TO_MAX, {"soc": data.battery_soc, "max_soc": max_soc}
                 )
                 _LOGGER.info("[grid_independence] CHARGE to %.0f%% | SOC %.1f%% < max %.0f%%", max_soc, data.battery_soc, max_soc)
             else:
                 data.next_action = ACTION_IDLE
-                data.decision_reason = f"Battery already at max SOC ({data.battery_soc:.1f}% ≥ {max_soc:.0f}%)"
+                data.decision_reason = DecisionReason(
+                    REASON_BATTERY_FULL, {"soc": data.battery_soc, "max_soc": max_soc}
+                )
                 _LOGGER.info("[grid_independence] IDLE | SOC %.1f%% ≥ max %.0f%%", data.battery_soc, max_soc)
         else:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "Battery SOC unavailable"
+            data.decision_reason = DecisionReason(REASON_SOC_UNAVAILABLE)
             _LOGGER.info("[grid_independence] IDLE | battery SOC unavailable")
 
     def _optimize_balanced(self, data: EnergyOptimizerData) -> None:
@@ -445,40 +1132,39 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
 
         if not data.prices_today:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No price data available"
+            data.decision_reason = DecisionReason(REASON_NO_PRICE_DATA)
             _LOGGER.info("[balanced] no price data → idle")
             return
 
-        now = dt_util.now()
-        future_prices = [
-            p for p in data.prices_today
-            if self._parse_datetime(p.get("from", "")) >= now
-        ]
-
-        if not future_prices:
+        future_prices = self._future_price_stats()
+        if future_prices is None:
             data.next_action = ACTION_IDLE
-            data.decision_reason = "No future price entries found"
+            data.decision_reason = DecisionReason(REASON_NO_FUTURE_PRICES)
             _LOGGER.info("[balanced] no future prices → idle")
             return
 
-        avg_price = sum(float(p.get("price", 0)) for p in future_prices) / len(future_prices)
-        current_price = data.current_price or 0
-        charge_threshold = avg_price * 0.9
-        discharge_threshold = avg_price * 1.1
+        avg_price = future_prices.mean
+        current_price = data.import_price or 0
+        charge_factor = self._params.balanced_charge
+        discharge_factor = self._params.balanced_discharge
+        charge_threshold = avg_price * charge_factor
+        discharge_threshold = avg_price * discharge_factor
 
         _LOGGER.info(
             "[balanced] inputs:"
             " current_price=€%.4f"
             " | avg_price=€%.4f (over %d future periods)"
-            " | charge_threshold=€%.4f (avg×0.9)"
-            " | discharge_threshold=€%.4f (avg×1.1)"
+            " | charge_threshold=€%.4f (avg×%.2f)"
+            " | discharge_threshold=€%.4f (avg×%.2f)"
             " | SOC=%.1f%%"
             " | SOC_limits=[%.0f%%, %.0f%%]",
             current_price,
             avg_price,
-            len(future_prices),
+            future_prices.count,
             charge_threshold,
+            charge_factor,
             discharge_threshold,
+            discharge_factor,
             data.battery_soc if data.battery_soc is not None else -1,
             min_soc,
             max_soc,
@@ -487,30 +1173,228 @@ class EnergyOptimizerCoordinator(DataUpdateCoordinator[EnergyOptimizerData]):
         if current_price < charge_threshold and data.battery_soc is not None and data.battery_soc < max_soc:
             data.next_action = ACTION_CHARGE
             data.target_soc = max_soc
-            data.decision_reason = (
-                f"Price €{current_price:.4f} < charge threshold €{charge_threshold:.4f} (avg €{avg_price:.4f} × 0.9) "
-                f"and SOC {data.battery_soc:.1f}% < max {max_soc:.0f}%"
+            data.decision_reason = DecisionReason(
+                REASON_BELOW_AVERAGE,
+                {
+                    "price": current_price,
+                    "charge_threshold": charge_threshold,
+                    "avg_price": avg_price,
+                    "factor": charge_factor,
+                    "soc": data.battery_soc,
+                    "max_soc": max_soc,
+                },
             )
             _LOGGER.info("[balanced] CHARGE | €%.4f < charge_threshold €%.4f | SOC %.1f%% < max %.0f%%",
                          current_price, charge_threshold, data.battery_soc, max_soc)
         elif current_price > discharge_threshold and data.battery_soc is not None and data.battery_soc > min_soc:
             data.next_action = ACTION_DISCHARGE
             data.target_soc = min_soc
-            data.decision_reason = (
-                f"Price €{current_price:.4f} > discharge threshold €{discharge_threshold:.4f} (avg €{avg_price:.4f} × 1.1) "
-                f"and SOC {data.battery_soc:.1f}% > min {min_soc:.0f}%"
+            data.decision_reason = DecisionReason(
+                REASON_ABOVE_AVERAGE,
+                {
+                    "price": current_price,
+                    "discharge_threshold": discharge_threshold,
+                    "avg_price": avg_price,
+                    "factor": discharge_factor,
+                    "soc": data.battery_soc,
+                    "min_soc": min_soc,
+                },
             )
             _LOGGER.info("[balanced] DISCHARGE | €%.4f > discharge_threshold €%.4f | SOC %.1f%% > min %.0f%%",
                          current_price, discharge_threshold, data.battery_soc, min_soc)
         else:
             data.next_action = ACTION_IDLE
-            reason = (
-                f"Price €{current_price:.4f} in moderate range "
-                f"(charge=€{charge_threshold:.4f}, discharge=€{discharge_threshold:.4f}, avg=€{avg_price:.4f})"
+            reason = DecisionReason(
+                REASON_NEAR_AVERAGE,
+                {
+                    "price": current_price,
+                    "charge_threshold": charge_threshold,
+                    "discharge_threshold": discharge_threshold,
+                    "avg_price": avg_price,
+                },
             )
             data.decision_reason = reason
             _LOGGER.info("[balanced] IDLE | %s", reason)
 
+    def _optimize_robust(self, data: EnergyOptimizerData) -> None:
+        """Pick the schedule with the best risk-adjusted cost across sampled solar scenarios."""
+        self._robust_choice = None
+        if data.battery_soc is None:
+            data.next_action = ACTION_IDLE
+            data.decision_reason = DecisionReason(REASON_SOC_UNAVAILABLE)
+            _LOGGER.info("[robust] IDLE | battery SOC unavailable")
+            return
+
+        inputs = self._inputs.slice_from(dt_util.now().timestamp())
+        if not len(inputs):
+            data.next_action = ACTION_IDLE
+            data.decision_reason = DecisionReason(REASON_NO_FUTURE_PRICES)
+            _LOGGER.info("[robust] no future prices → idle")
+            return
+
+        horizon = compress_horizon(inputs)
+        choice = choose_robust_schedule(
+            horizon.inputs,
+            horizon.aggregate(resample_pv(data.solar_forecast, inputs.starts, inputs.ends, "pv_estimate10")),
+            horizon.aggregate(resample_pv(data.solar_forecast, inputs.starts, inputs.ends, "pv_estimate90")),
+            soc=data.battery_soc,
+            min_soc=self._min_soc,
+            max_soc=self._max_soc,
+            battery=self._battery,
+            params=self._params,
+            seed=int(inputs.starts[0]),
+        )
+        choice = replace(choice, action=horizon.expand(choice.action), target=horizon.expand(choice.target))
+        self._robust_choice = choice
+        code = int(choice.action[0])
+        data.next_action = ACTIONS[code]
+        data.target_soc = float(choice.target[0]) if code != CODE_IDLE else None
+        if code != CODE_IDLE:
+            data.last_action_time = dt_util.now()
+        data.decision_reason = DecisionReason(
+            REASON_ROBUST_PLAN,
+            {
+                "candidate": choice.name,
+                "scenarios": choice.scenarios,
+                "expected_cost": choice.expected_cost,
+                "cvar": choice.cvar,
+            },
+        )
+        _LOGGER.info(
+            "[robust] %s | schedule=%s | expected=€%.3f | CVaR10=€%.3f | %d candidates × %d scenarios × %d buckets"
+            " (%d slots) in %.1f ms",
+            data.next_action.upper(),
+            choice.name,
+            choice.expected_cost,
+            choice.cvar,
+            choice.candidates,
+            choice.scenarios,
+            len(horizon.inputs),
+            len(inputs),
+            choice.elapsed_ms,
+        )
+
+    def _optimize_optimal(self, data: EnergyOptimizerData) -> None:
+        """Follow the cost-optimal schedule of the warm-started DP solver."""
+        self._optimal = None
+        if data.battery_soc is None:
+            data.next_action = ACTION_IDLE
+            data.decision_reason = DecisionReason(REASON_SOC_UNAVAILABLE)
+            _LOGGER.info("[optimal] IDLE | battery SOC unavailable")
+            return
+
+        inputs = self._inputs.slice_from(dt_util.now().timestamp())
+        if not len(inputs):
+            data.next_action = ACTION_IDLE
+            data.decision_reason = DecisionReason(REASON_NO_FUTURE_PRICES)
+            _LOGGER.info("[optimal] no future prices → idle")
+            return
+
+        if self._fleet is not None and self._dispatch_fleet(data, inputs):
+            return
+
+        horizon = compress_horizon(inputs)
+        import_limit = data.peak_demand.limit_kw if data.peak_demand is not None else None
+        if self._flexible:
+            self._joint = solve_with_loads(
+                horizon.inputs,
+                self._flexible.loads(),
+                solver=self._solver,
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+                import_limit=import_limit,
+            )
+            solution = self._joint.solution
+            self._load_schedule = self._joint.loads.expand(horizon)
+            _LOGGER.info(
+                "[loads] planned with the battery in %d rounds, %.1f ms", self._joint.rounds, self._joint.elapsed_ms
+            )
+        else:
+            solution = self._solver.solve(
+                horizon.inputs,
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+                import_limit=import_limit,
+            )
+        solution = replace(
+            solution,
+            action=horizon.expand(solution.action),
+            target=horizon.expand(solution.target),
+            soc=horizon.expand(solution.soc),
+        )
+        self._optimal = solution
+        code = int(solution.action[0])
+        data.next_action = ACTIONS[code]
+        data.target_soc = float(solution.target[0]) if code != CODE_IDLE else None
+        if code != CODE_IDLE:
+            data.last_action_time = dt_util.now()
+        data.decision_reason = DecisionReason(
+            REASON_OPTIMAL_PLAN,
+            {
+                "slots": len(inputs),
+                "level": float(solution.soc[0]),
+                "expected_cost": solution.expected_cost,
+            },
+        )
+        stats = self._solver.stats
+        _LOGGER.info(
+            "[optimal] %s | SOC %.1f%% → %.0f%% | expected=€%.3f | %d buckets (%d slots), %d reused in %.1f ms"
+            " | hit rate %.0f%%",
+            data.next_action.upper(),
+            data.battery_soc,
+            solution.soc[0],
+            solution.expected_cost,
+            len(horizon.inputs),
+            len(inputs),
+            solution.reused_slots,
+            solution.elapsed_ms,
+            (stats.hit_rate or 0.0) * 100,
+        )
+
+    def _dispatch_fleet(self, data: EnergyOptimizerData, inputs: PlanningInputs) -> bool:
+        """Follow this battery's row of the fleet's joint schedule; False when not planned jointly."""
+        dispatched = self._fleet.dispatch(
+            FleetMember(
+                entry_id=self.config_entry.entry_id,
+                inputs=inputs,
+                soc=data.battery_soc,
+                battery=self._battery,
+                min_soc=self._min_soc,
+                max_soc=self._max_soc,
+            ),
+            dt_util.now().timestamp(),
+        )
+        if dispatched is None:
+            return False
+        solution, schedule = dispatched
+        self._optimal = solution
+        code = int(solution.action[0])
+        data.next_action = ACTIONS[code]
+        data.target_soc = float(solution.target[0]) if code != CODE_IDLE else None
+        if code != CODE_IDLE:
+            data.last_action_time = dt_util.now()
+        data.decision_reason = DecisionReason(
+            REASON_FLEET_PLAN,
+            {
+                "members": schedule.action.shape[0],
+                "level": float(solution.soc[0]),
+                "expected_cost": solution.expected_cost,
+            },
+        )
+        _LOGGER.info(
+            "[fleet] %s | SOC %.1f%% → %.0f%% | %d batteries | site grid now %.2f kW",
+            data.next_action.upper(),
+            data.battery_soc,
+            solution.soc[0],
+            schedule.action.shape[0],
+            schedule.grid_kw[0],
+        )
+        return True
+
     def _parse_datetime(self, time_str: str | datetime) -> datetime:
         """Parse an ISO 8601 string or passthrough an existing datetime."""
         try:
@@ -0,0 +1,118 @@
+"""Diagnostics support for Solar Energy Optimizer."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from . import EnergyOptimizerConfigEntry
+from .fleet import FleetCoordinator
+from .flexible_loads import FlexibleLoadTracker, JointPlan, LoadStatus
+from .peak_demand import PeakDemand
+
+
+def _fleet(fleet: FleetCoordinator | None) -> dict[str, Any] | None:
+    """Return the fleet's members, limits and solve statistics."""
+    if fleet is None:
+        return None
+    schedule = fleet.last_schedule
+    import_limit, export_limit = fleet.limits
+    return {
+        "group": fleet.name,
+        "members": fleet.entry_ids,
+        "import_limit_kw": import_limit,
+        "export_limit_kw": export_limit,
+        "stats": fleet.stats.as_dict(),
+        "last_schedule": {
+            "batteries": schedule.action.shape[0],
+            "buckets": schedule.action.shape[1],
+            "peak_import_kw": round(float(schedule.grid_kw.max()), 3),
+            "peak_export_kw": round(float(-schedule.grid_kw.min()), 3),
+            "expected_cost": round(float(schedule.cost.sum()), 3),
+        } if schedule is not None else None,
+    }
+
+
+def _peak_demand(demand: PeakDemand | None) -> dict[str, Any] | None:
+    """Return the last demand snapshot of the capacity-tariff tracker."""
+    if demand is None:
+        return None
+    return {
+        "rolling_kw": round(demand.rolling_kw, 3),
+        "quarter_kw": round(demand.quarter_kw, 3),
+        "peak_kw": round(demand.peak_kw, 3),
+        "peak_time": dt_util.utc_from_timestamp(demand.peak_time).isoformat() if demand.peak_time is not None else None,
+        "limit_kw": round(demand.limit_kw, 3),
+    }
+
+
+def _flexible_loads(
+    tracker: FlexibleLoadTracker, status: dict[str, LoadStatus], joint: JointPlan | None
+) -> dict[str, Any] | None:
+    """Return each flexible load's progress and plan and the last joint solve."""
+    if not tracker:
+        return None
+    delivered = tracker.delivered()
+    loads: dict[str, Any] = {}
+    for key in tracker.keys:
+        loads[key] = {"delivered_kwh": round(delivered[key], 3)}
+        if key in status:
+            loads[key].update(
+                remaining_kwh=round(status[key].remaining_kwh, 3),
+                planned_kwh=round(status[key].planned_kwh, 3),
+                unmet_kwh=round(status[key].unmet_kwh, 3),
+                runs=len(status[key].runs),
+            )
+    return {
+        "loads": loads,
+        "last_joint_solve": {
+            "rounds": joint.rounds,
+            "elapsed_ms": round(joint.elapsed_ms, 2),
+            "expected_cost": round(joint.solution.expected_cost, 3),
+        } if joint is not None else None,
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: EnergyOptimizerConfigEntry
+) -> dict[str, Any]:
+    """Return the optimizer's settings, inputs and solver statistics."""
+    coordinator = entry.runtime_data
+    data = coordinator.data
+    inputs = coordinator.planning_inputs
+    return {
+        "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+        "settings": {
+            "strategy": coordinator.current_strategy,
+            "min_soc": coordinator.min_soc,
+            "max_soc": coordinator.max_soc,
+            "automation_enabled": coordinator.automation_enabled,
+            "manual_override": coordinator.manual_override,
+            "dry_run_mode": coordinator.dry_run_mode,
+            "strategy_params": coordinator.strategy_params.as_options(),
+        },
+        "inputs": {
+            "slots": len(inputs),
+            "first_slot": dt_util.utc_from_timestamp(inputs.starts[0]).isoformat() if len(inputs) else None,
+            "last_slot_end": dt_util.utc_from_timestamp(inputs.ends[-1]).isoformat() if len(inputs) else None,
+        },
+        "decision": {
+            "battery_soc": data.battery_soc,
+            "current_price": data.current_price,
+            "next_action": data.next_action,
+            "target_soc": data.target_soc,
+            "reason": data.decision_reason.code,
+            "parameters": data.decision_reason.params,
+        } if data is not None else None,
+        "optimal_solver": coordinator.solver.stats.as_dict(),
+        "tariff": {**coordinator.tariff.tariff.as_dict(), "conversions": coordinator.tariff.conversions},
+        "fleet": _fleet(coordinator.fleet),
+        "peak_demand": _peak_demand(data.peak_demand if data is not None else None),
+        "flexible_loads": _flexible_loads(
+            coordinator.flexible_loads, data.flexible_loads if data is not None else {}, coordinator.joint_plan
+        ),
+        "plan_cache": coordinator.plan_cache.as_dict(),
+        "what_if": coordinator.what_if.stats(),
+        "update_count": coordinator.update_count,
+    }
@@ -0,0 +1,198 @@
+"""Energy/cost accounting and hourly long-term statistics import.
+
+Battery energy is derived from consecutive SOC readings: a rising SOC is
+charged energy, a falling SOC is discharged energy. Charging while the
+optimizer had commanded a grid charge is billed at the spot price; every
+discharged kWh is counted as import avoided at the spot price.
+
+Instead of leaving it to the recorder to compile statistics from 5-minute
+sensor states, completed hours are pushed straight into Home Assistant's
+long-term statistics as external statistics, one row per hour per series.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import ACTION_CHARGE, DOMAIN
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # Home Assistant before 2025.4 only knows has_mean
+    StatisticMeanType = None
+
+_LOGGER = logging.getLogger(__name__)
+
+STATISTIC_COST = "cost"
+STATISTIC_SAVINGS = "savings"
+STATISTIC_CHARGE = "charge_energy"
+STATISTIC_DISCHARGE = "discharge_energy"
+
+# (series key, display name, unit)
+STATISTIC_SERIES: tuple[tuple[str, str, str], ...] = (
+    (STATISTIC_COST, "Cost", CURRENCY_EURO),
+    (STATISTIC_SAVINGS, "Savings", CURRENCY_EURO),
+    (STATISTIC_CHARGE, "Battery charge energy", UnitOfEnergy.KILO_WATT_HOUR),
+    (STATISTIC_DISCHARGE, "Battery discharge energy", UnitOfEnergy.KILO_WATT_HOUR),
+)
+
+
+@dataclass
+class HourlyTotals:
+    """Energy and money accumulated during one clock hour."""
+
+    start: datetime
+    cost: float = 0.0
+    savings: float = 0.0
+    charge_kwh: float = 0.0
+    discharge_kwh: float = 0.0
+
+    def value(self, series: str) -> float:
+        """Return the hour's total for a statistic series key."""
+        return {
+            STATISTIC_COST: self.cost,
+            STATISTIC_SAVINGS: self.savings,
+            STATISTIC_CHARGE: self.charge_kwh,
+            STATISTIC_DISCHARGE: self.discharge_kwh,
+        }[series]
+
+
+class EnergyAccountant:
+    """Accumulate per-cycle energy, cost and savings into hourly, daily and monthly totals."""
+
+    def __init__(self, capacity_kwh: float) -> None:
+        """Initialize the accountant."""
+        self._capacity_kwh = capacity_kwh
+        self._last: tuple[datetime, float, float, str] | None = None
+        self._hour: HourlyTotals | None = None
+        self._day: tuple[int, int, int] | None = None
+        self._month: tuple[int, int] | None = None
+        self.daily_cost = 0.0
+        self.daily_savings = 0.0
+        self.monthly_cost = 0.0
+        self.monthly_savings = 0.0
+
+    def record(
+        self,
+        when: datetime,
+        soc: float | None,
+        price: float | None,
+        action: str,
+    ) -> HourlyTotals | None:
+        """Account for the interval since the previous reading.
+
+        The energy moved since the previous reading is attributed to the
+        action and price that were in force at that reading. Returns the
+        totals of the previous hour once ``when`` falls into a new hour.
+        """
+        local = dt_util.as_local(when)
+        if self._day != (local.year, local.month, local.day):
+            self._day = (local.year, local.month, local.day)
+            self.daily_cost = self.daily_savings = 0.0
+        if self._month != (local.year, local.month):
+            self._month = (local.year, local.month)
+            self.monthly_cost = self.monthly_savings = 0.0
+
+        hour_start = dt_util.as_utc(when).replace(minute=0, second=0, microsecond=0)
+        completed: HourlyTotals | None = None
+        if self._hour is None or self._hour.start != hour_start:
+            completed = self._hour
+            self._hour = HourlyTotals(start=hour_start)
+
+        if self._last is not None and soc is not None:
+            _, last_soc, last_price, last_action = self._last
+            delta_kwh = (soc - last_soc) / 100.0 * self._capacity_kwh
+            charge_kwh = max(delta_kwh, 0.0)
+            discharge_kwh = max(-delta_kwh, 0.0)
+            cost = charge_kwh * last_price if last_action == ACTION_CHARGE else 0.0
+            savings = discharge_kwh * last_price
+            self._hour.charge_kwh += charge_kwh
+            self._hour.discharge_kwh += discharge_kwh
+            self._hour.cost += cost
+            self._hour.savings += savings
+            self.daily_cost += cost
+            self.daily_savings += savings
+            self.monthly_cost += cost
+            self.monthly_savings += savings
+
+        if soc is not None:
+            self._last = (when, soc, price or 0.0, action)
+        return completed
+
+
+class EnergyStatisticsPublisher:
+    """Push completed hours into long-term statistics as external statistics."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the publisher."""
+        self.hass = hass
+        self._prefix = f"{DOMAIN}:{entry_id.lower()}"
+        self._sums: dict[str, float] | None = None
+        self._last_start: dict[str, float] = {}
+
+    def statistic_id(self, series: str) -> str:
+        """Return the external statistic ID for a series key."""
+        return f"{self._prefix}_{series}"
+
+    async def _async_load_sums(self) -> dict[str, float]:
+        """Read the running sum of each series from the last stored row."""
+        sums: dict[str, float] = {}
+        recorder = get_instance(self.hass)
+        for series, _, _ in STATISTIC_SERIES:
+            statistic_id = self.statistic_id(series)
+            last = await recorder.async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+            )
+            rows = last.get(statistic_id) or []
+            sums[series] = float(rows[0].get("sum") or 0.0) if rows else 0.0
+            if rows:
+                self._last_start[series] = float(rows[0]["start"])
+        _LOGGER.debug("[statistics] resumed running sums: %s", sums)
+        return sums
+
+    async def async_publish(self, hour: HourlyTotals) -> None:
+        """Import one hour of totals for every series in a single batch."""
+        if self._sums is None:
+            self._sums = await self._async_load_sums()
+
+        start_ts = hour.start.timestamp()
+        for series, name, unit in STATISTIC_SERIES:
+            if self._last_start.get(series, float("-inf")) >= start_ts:
+                continue  # already imported, e.g. before a restart
+            value = hour.value(series)
+            self._sums[series] += value
+            self._last_start[series] = start_ts
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"Solar Energy Optimizer {name}",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(series),
+                unit_of_measurement=unit,
+            )
+            if StatisticMeanType is not None:
+                metadata["mean_type"] = StatisticMeanType.NONE
+            async_add_external_statistics(
+                self.hass,
+                metadata,
+                [StatisticData(start=hour.start, state=value, sum=self._sums[series])],
+            )
+        _LOGGER.info(
+            "[statistics] imported hour %s: cost=%.4f savings=%.4f charge=%.3f kWh discharge=%.3f kWh",
+            hour.start.isoformat(),
+            hour.cost,
+            hour.savings,
+            hour.charge_kwh,
+            hour.discharge_kwh,
+        )
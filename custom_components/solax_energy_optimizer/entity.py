@@ -0,0 +1,57 @@
+"""Base entity for Solar Energy Optimizer."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import EnergyOptimizerCoordinator
+
+
+class EnergyOptimizerEntity(CoordinatorEntity[EnergyOptimizerCoordinator]):
+    """Coordinator entity that only writes state when its published values change.
+
+    Every refresh notifies all listeners, but most entities report the same
+    values cycle after cycle. Each entity remembers the snapshot it last
+    published and skips the write when the new snapshot is identical, which
+    avoids redundant state_changed events, recorder rows and websocket
+    traffic.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: ConfigEntry,
+        key: str,
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+        }
+        self._published_snapshot: tuple[Any, ...] | None = None
+
+    def _state_snapshot(self) -> tuple[Any, ...]:
+        """Return the values whose change warrants a state write."""
+        return (self.available, self.state, self.extra_state_attributes)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if the published snapshot changed."""
+        snapshot = self._state_snapshot()
+        if snapshot == self._published_snapshot:
+            return
+        self._published_snapshot = snapshot
+        super().async_write_ha_state()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write state and remember what was published."""
+        self._published_snapshot = self._state_snapshot()
+        super().async_write_ha_state()
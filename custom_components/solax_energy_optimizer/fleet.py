@@ -0,0 +1,472 @@
+"""Joint schedule for several batteries behind one grid connection.
+
+Config entries that share a fleet group name plan together: on a shared
+grid connection they must not all charge at full rate in the same cheap
+slot. ``solve_fleet`` extends the optimal strategy's dynamic program to a
+batch of batteries. Every battery gets the same number of SOC levels between
+its own min and max SOC, so the value/policy tables of the whole fleet are
+``(batteries, levels)`` arrays and one backward pass solves all of them.
+
+The shared import / export cap couples the batteries. Once the households'
+own net load is served, the room left under the cap in each slot is split
+into per-battery charge (and discharge) limits in proportion to their rates,
+so every plan respects the cap by construction. Rounds of re-planning then
+take the share a battery left unused in a slot and hand it to the batteries
+whose limit was binding there, until a round saves less than
+``FLEET_MIN_GAIN``. Without a cap the first round is every battery's own
+optimum. The cap limits battery charge and discharge only: a household load
+above it on its own is not covered by discharging. Limits apply to the mean
+power of a slot.
+
+A ``FleetCoordinator`` per group collects each member's latest readings
+from its update cycle, solves on the compressed horizon at most once per
+update interval and hands every member its row of the joint schedule. A
+member that leaves the optimal strategy withdraws its readings, and readings
+not refreshed for ``FLEET_MEMBER_TIMEOUT`` are dropped, so a battery that
+no longer follows the joint schedule does not keep a share of the cap.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DEFAULT_UPDATE_INTERVAL, DOMAIN
+from .horizon import compress_horizon
+from .inputs import PlanningInputs
+from .optimizer import Solution, _slot_costs, _to_actions, terminal_price
+from .planner import BatteryModel
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_FLEETS: HassKey[dict[str, FleetCoordinator]] = HassKey(f"{DOMAIN}_fleets")
+
+# SOC levels per battery between its min and max SOC
+FLEET_SOC_LEVELS = 41
+# Rounds of moving unused cap share to the batteries that want it
+FLEET_ITERATIONS = 10
+# Stop once a round saves less than this over the whole fleet (€)
+FLEET_MIN_GAIN = 0.01
+# A joint schedule is reused by the members for this long
+FLEET_REPLAN_SECONDS = DEFAULT_UPDATE_INTERVAL.total_seconds()
+# A member's readings are dropped when it has not dispatched for this long
+FLEET_MEMBER_TIMEOUT = 2 * FLEET_REPLAN_SECONDS
+# Slack (kWh) on the grid cap against floating point rounding
+_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class FleetSchedule:
+    """Joint schedule of a fleet; per-battery arrays are ``(batteries, slots)``.
+
+    Attributes:
+        action: Action code per battery and slot (int8).
+        target: Target SOC per battery and slot, NaN when idle.
+        soc: SOC each battery reaches by the end of each slot.
+        grid_kw: Mean site grid power per slot (positive = import).
+        cost: Grid cost of each battery's schedule minus the value of the
+            energy it stores (€).
+        iterations: Subgradient iterations run.
+        capped_slots: Slots in which the cap limited some battery's charge or
+            discharge rate.
+        elapsed_ms: Solve latency.
+    """
+
+    action: np.ndarray
+    target: np.ndarray
+    soc: np.ndarray
+    grid_kw: np.ndarray
+    cost: np.ndarray
+    iterations: int
+    capped_slots: int
+    elapsed_ms: float
+
+
+@dataclass(frozen=True, slots=True)
+class FleetMember:
+    """A member's readings and settings from its last update cycle."""
+
+    entry_id: str
+    inputs: PlanningInputs
+    soc: float
+    battery: BatteryModel
+    min_soc: float
+    max_soc: float
+
+    @property
+    def settings(self) -> tuple:
+        """Return what invalidates a joint schedule when it changes."""
+        return (self.battery, self.min_soc, self.max_soc)
+
+
+def _column(values: Sequence[float]) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def solve_fleet(
+    inputs: Sequence[PlanningInputs],
+    *,
+    soc: Sequence[float],
+    batteries: Sequence[BatteryModel],
+    min_soc: Sequence[float],
+    max_soc: Sequence[float],
+    import_limit: float | None = None,
+    export_limit: float | None = None,
+    levels: int = FLEET_SOC_LEVELS,
+    iterations: int = FLEET_ITERATIONS,
+) -> FleetSchedule:
+    """Return the joint schedule of batteries sharing one grid connection.
+
+    ``inputs`` holds every battery's PV and load on the same slots; prices
+    come from the first. The limits are site-wide mean power per slot in kW.
+    """
+    began = time.perf_counter()
+    shared = inputs[0]
+    count = len(shared)
+    hours = shared.durations_h
+    net = np.stack([member.load - member.pv for member in inputs]) * hours  # kWh, (B, T)
+    soc0 = _column(soc)
+    low, high = _column(min_soc), _column(max_soc)
+    kwh = _column([battery.capacity_kwh for battery in batteries]) / 100.0
+    rate_in = _column([battery.max_charge_kw for battery in batteries])[:, None] * hours  # kWh, (B, T)
+    rate_out = _column([battery.max_discharge_kw for battery in batteries])[:, None] * hours
+    fraction = np.linspace(0.0, 1.0, levels)
+    level = low[:, None] + (high - low)[:, None] * fraction[None, :]  # (B, L)
+    moves = (level[:, None, :] - level[:, :, None]) * kwh[:, None, None]  # (B, from, to)
+    final_price = terminal_price(shared)
+    price, export_price = shared.price, shared.export
+    rows = np.arange(level.shape[0])
+    step = ((high - low) * kwh / (levels - 1))[:, None]  # kWh between two levels, (B, 1)
+
+    def plan(max_in: np.ndarray, max_out: np.ndarray) -> np.ndarray:
+        """Return every battery's cheapest level path under per-slot energy limits."""
+        value = -level * kwh[:, None] * final_price
+        policy = np.zeros((count, level.shape[0], levels), dtype=np.int16)
+        for idx in range(count - 1, 0, -1):
+            total = _slot_costs(
+                moves, net[:, idx, None, None], price[idx], export_price[idx],
+                max_in[:, idx, None, None], max_out[:, idx, None, None],
+            ) + value[:, None, :]
+            best = np.argmin(total, axis=2)
+            policy[idx] = best
+            value = np.take_along_axis(total, best[..., None], axis=2)[..., 0]
+        first = _slot_costs(
+            (level - soc0[:, None]) * kwh[:, None], net[:, 0, None], price[0], export_price[0],
+            max_in[:, 0, None], max_out[:, 0, None],
+        )
+        # Outside the reachable range (e.g. max SOC just lowered): move as close as possible
+        stuck = ~np.isfinite(first).any(axis=1)
+        closest = np.argmin(np.abs(level - soc0[:, None]), axis=1)
+        first[stuck, closest[stuck]] = 0.0
+        path = np.empty((level.shape[0], count), dtype=np.intp)
+        path[:, 0] = np.argmin(first + value, axis=1)
+        for idx in range(1, count):
+            path[:, idx] = policy[idx, rows, path[:, idx - 1]]
+        return np.take_along_axis(level, path, axis=1)
+
+    def battery_moves(reached: np.ndarray) -> np.ndarray:
+        return np.diff(reached, axis=1, prepend=soc0[:, None]) * kwh[:, None]
+
+    # Room under each cap for battery charge / discharge once the households are served
+    import_room = np.maximum((import_limit or np.inf) * hours - net.sum(axis=0), 0.0)
+    export_room = np.maximum((export_limit or np.inf) * hours + net.sum(axis=0), 0.0)
+    share_in = _shares(import_room, rate_in)
+    share_out = _shares(export_room, rate_out)
+
+    best: tuple[float, np.ndarray, np.ndarray] | None = None
+    runs = 0
+    for runs in range(1, iterations + 1):
+        reached = plan(share_in, share_out)
+        move = battery_moves(reached)
+        cost = _cost(net + move, price, export_price, reached[:, -1] - soc0, kwh, final_price).sum()
+        gain = best[0] - cost if best is not None else np.inf
+        if gain > 0:
+            best = (cost, reached, (share_in < rate_in - _TOLERANCE) | (share_out < rate_out - _TOLERANCE))
+        if gain < FLEET_MIN_GAIN:
+            break
+        next_in = _reallocate(share_in, np.maximum(move, 0.0), import_room, rate_in, step)
+        next_out = _reallocate(share_out, np.maximum(-move, 0.0), export_room, rate_out, step)
+        if np.allclose(next_in, share_in) and np.allclose(next_out, share_out):
+            break
+        share_in, share_out = next_in, next_out
+
+    _, reached, limited = best
+    grid = net + battery_moves(reached)
+    action = np.empty(reached.shape, dtype=np.int8)
+    target = np.empty(reached.shape)
+    for row, member in enumerate(inputs):
+        action[row], target[row] = _to_actions(
+            member, reached[row], float(soc0[row]), batteries[row], float(low[row]), float(high[row]),
+            float(high[row] - low[row]) / (levels - 1),
+        )
+    return FleetSchedule(
+        action=action,
+        target=target,
+        soc=reached,
+        grid_kw=grid.sum(axis=0) / hours,
+        cost=_cost(grid, price, export_price, reached[:, -1] - soc0, kwh, final_price),
+        iterations=runs,
+        capped_slots=int(limited.any(axis=0).sum()),
+        elapsed_ms=(time.perf_counter() - began) * 1000.0,
+    )
+
+
+def _cost(
+    grid: np.ndarray,
+    price: np.ndarray,
+    export_price: np.ndarray,
+    gained: np.ndarray,
+    kwh: np.ndarray,
+    final_price: float,
+) -> np.ndarray:
+    """Return each battery's grid cost minus the value of the SOC it gained."""
+    billed = np.where(grid > 0, grid * price, grid * export_price)
+    return billed.sum(axis=1) - gained * kwh * final_price
+
+
+def _shares(room: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """Split the room per slot over the batteries in proportion to their rate."""
+    total = rate.sum(axis=0)
+    return np.minimum(rate, np.minimum(room, total) * rate / np.where(total > 0, total, 1.0))
+
+
+def _reallocate(
+    share: np.ndarray, used: np.ndarray, room: np.ndarray, rate: np.ndarray, step: np.ndarray
+) -> np.ndarray:
+    """Move the share batteries left unused to the batteries that used all of theirs.
+
+    A battery's limit is binding when one more SOC level (``step`` kWh) would
+    have exceeded it. In slots where some battery's limit was binding, the others are cut back
+    to what they used and the freed room goes to the binding ones in
+    proportion to how much more they could take. A battery's plan does not
+    change when only slack is taken away, so shares only ever move towards
+    the batteries that value them.
+    """
+    binding = (used > share - step) & (share < rate - _TOLERANCE)
+    kept = np.where(binding, share, np.minimum(used, share))
+    wanted = np.where(binding, rate - share, 0.0)
+    total = wanted.sum(axis=0)
+    spare = np.minimum(np.maximum(room - kept.sum(axis=0), 0.0), total)
+    extra = np.minimum(wanted, spare * wanted / np.where(total > 0, total, 1.0))
+    return np.where(binding.any(axis=0), kept + extra, share)
+
+
+@dataclass(slots=True)
+class FleetStats:
+    """Solve and reuse counters of a fleet."""
+
+    solves: int = 0
+    reused: int = 0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    last_iterations: int = 0
+    last_capped_slots: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a rounded mapping for diagnostics."""
+        return {
+            "solves": self.solves,
+            "reused": self.reused,
+            "last_ms": round(self.last_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "last_iterations": self.last_iterations,
+            "last_capped_slots": self.last_capped_slots,
+        }
+
+
+@dataclass(slots=True)
+class _Joint:
+    """The last joint schedule expanded onto native slots."""
+
+    created: float
+    starts: np.ndarray
+    members: dict[str, tuple]
+    limits: tuple[float | None, float | None]
+    schedule: FleetSchedule
+    action: np.ndarray
+    target: np.ndarray
+    soc: np.ndarray
+
+
+class FleetCoordinator:
+    """Plans the config entries of one fleet group jointly."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize an empty fleet."""
+        self.name = name
+        self._limits: dict[str, tuple[float | None, float | None]] = {}
+        self._members: dict[str, FleetMember] = {}
+        self._seen: dict[str, float] = {}
+        self._joint: _Joint | None = None
+        self.stats = FleetStats()
+
+    @property
+    def entry_ids(self) -> list[str]:
+        """Return the entry ids of the members."""
+        return list(self._limits)
+
+    @property
+    def limits(self) -> tuple[float | None, float | None]:
+        """Return the tightest import and export limit any member configured (kW)."""
+        imports = [limit for limit, _ in self._limits.values() if limit]
+        exports = [limit for _, limit in self._limits.values() if limit]
+        return (min(imports) if imports else None, min(exports) if exports else None)
+
+    @property
+    def last_schedule(self) -> FleetSchedule | None:
+        """Return the last joint schedule."""
+        return self._joint.schedule if self._joint is not None else None
+
+    def join(self, entry_id: str, import_limit: float | None, export_limit: float | None) -> None:
+        """Add a member with its configured grid limits."""
+        self._limits[entry_id] = (import_limit or None, export_limit or None)
+        self._joint = None
+
+    def leave(self, entry_id: str) -> bool:
+        """Remove a member; return True when the fleet is empty."""
+        self._limits.pop(entry_id, None)
+        self._members.pop(entry_id, None)
+        self._seen.pop(entry_id, None)
+        self._joint = None
+        return not self._limits
+
+    def withdraw(self, entry_id: str) -> None:
+        """Drop a member's readings while it plans on its own; its next dispatch brings it back."""
+        if self._members.pop(entry_id, None) is not None:
+            self._seen.pop(entry_id, None)
+            self._joint = None
+            _LOGGER.info("[fleet] %s: %s left the optimal strategy — planned without it", self.name, entry_id)
+
+    def dispatch(self, member: FleetMember, now: float) -> tuple[Solution, FleetSchedule] | None:
+        """Return the member's row of the joint schedule from ``now`` on.
+
+        The joint schedule is solved from the latest readings of every member
+        whose remaining slots match this member's, and reused until it is
+        ``FLEET_REPLAN_SECONDS`` old or a member's settings or the limits
+        change. Returns None when the member is not part of the fleet.
+        """
+        if member.entry_id not in self._limits or not len(member.inputs):
+            return None
+        self._members[member.entry_id] = member
+        self._seen[member.entry_id] = now
+        joint = self._joint
+        offset = int(np.searchsorted(joint.starts, now, side="right")) - 1 if joint is not None else -1
+        if (
+            joint is None
+            or now - joint.created >= FLEET_REPLAN_SECONDS
+            or joint.limits != self.limits
+            or joint.members.get(member.entry_id) != member.settings
+            or offset < 0
+            or joint.starts.size - offset != len(member.inputs)
+            or joint.starts[offset] != member.inputs.starts[0]
+        ):
+            joint = self._solve(member, now)
+            offset = 0
+        else:
+            self.stats.reused += 1
+        row = list(joint.members).index(member.entry_id)
+        solution = Solution(
+            action=joint.action[row, offset:],
+            target=joint.target[row, offset:],
+            soc=joint.soc[row, offset:],
+            expected_cost=float(joint.schedule.cost[row]),
+            reused_slots=0,
+            elapsed_ms=joint.schedule.elapsed_ms,
+        )
+        return solution, joint.schedule
+
+    def _solve(self, member: FleetMember, now: float) -> _Joint:
+        """Solve the fleet on the requesting member's remaining slots."""
+        native = member.inputs
+        for entry_id, seen in list(self._seen.items()):
+            if now - seen >= FLEET_MEMBER_TIMEOUT:
+                self._members.pop(entry_id, None)
+                del self._seen[entry_id]
+                _LOGGER.info("[fleet] %s: no readings from %s for %.0f s — left out", self.name, entry_id, now - seen)
+        members = []
+        for other in self._members.values():
+            remaining = other.inputs.slice_from(now)
+            if np.array_equal(remaining.starts, native.starts) and np.array_equal(remaining.ends, native.ends):
+                members.append(replace(other, inputs=remaining))
+            else:
+                _LOGGER.info("[fleet] %s: %s has other price slots — left out of this solve", self.name, other.entry_id)
+        horizon = compress_horizon(native)
+        bucketed = [
+            PlanningInputs(
+                starts=horizon.inputs.starts,
+                ends=horizon.inputs.ends,
+                price=horizon.inputs.price,
+                pv=horizon.aggregate(other.inputs.pv),
+                load=horizon.aggregate(other.inputs.load),
+                export_price=horizon.inputs.export_price,
+            )
+            for other in members
+        ]
+        import_limit, export_limit = self.limits
+        schedule = solve_fleet(
+            bucketed,
+            soc=[other.soc for other in members],
+            batteries=[other.battery for other in members],
+            min_soc=[other.min_soc for other in members],
+            max_soc=[other.max_soc for other in members],
+            import_limit=import_limit,
+            export_limit=export_limit,
+        )
+        self.stats.solves += 1
+        self.stats.last_ms = schedule.elapsed_ms
+        self.stats.max_ms = max(self.stats.max_ms, schedule.elapsed_ms)
+        self.stats.last_iterations = schedule.iterations
+        self.stats.last_capped_slots = schedule.capped_slots
+        self._joint = _Joint(
+            created=now,
+            starts=native.starts,
+            members={other.entry_id: other.settings for other in members},
+            limits=(import_limit, export_limit),
+            schedule=schedule,
+            action=horizon.expand(schedule.action),
+            target=horizon.expand(schedule.target),
+            soc=horizon.expand(schedule.soc),
+        )
+        _LOGGER.info(
+            "[fleet] %s: %d batteries × %d buckets (%d slots) | import ≤ %s kW, export ≤ %s kW"
+            " | %d iterations, %d capped slots | peak import %.1f kW in %.1f ms",
+            self.name,
+            len(members),
+            len(horizon.inputs),
+            len(native),
+            import_limit or "∞",
+            export_limit or "∞",
+            schedule.iterations,
+            schedule.capped_slots,
+            float(schedule.grid_kw.max()),
+            schedule.elapsed_ms,
+        )
+        return self._joint
+
+
+@callback
+def async_join_fleet(
+    hass: HomeAssistant, group: str, entry_id: str, import_limit: float | None, export_limit: float | None
+) -> FleetCoordinator:
+    """Add an entry to the fleet ``group``, creating the fleet on first use."""
+    fleets = hass.data.setdefault(DATA_FLEETS, {})
+    fleet = fleets.get(group)
+    if fleet is None:
+        fleet = fleets[group] = FleetCoordinator(group)
+    fleet.join(entry_id, import_limit, export_limit)
+    _LOGGER.info("[fleet] %s: %s joined (%d members)", group, entry_id, len(fleet.entry_ids))
+    return fleet
+
+
+@callback
+def async_leave_fleet(hass: HomeAssistant, fleet: FleetCoordinator, entry_id: str) -> None:
+    """Remove an entry from its fleet and drop the fleet once empty."""
+    if fleet.leave(entry_id):
+        hass.data.get(DATA_FLEETS, {}).pop(fleet.name, None)
+    _LOGGER.info("[fleet] %s: %s left (%d members)", fleet.name, entry_id, len(fleet.entry_ids))
@@ -0,0 +1,414 @@
+"""Deferrable loads planned together with the battery.
+
+A flexible load (an EV charger, a heat-pump boiler) needs a number of kWh
+before a daily deadline and runs at a fixed power when switched on. The
+loads are placed on whole slots by a greedy pass: a slot's cost for a load
+is what running it at full power there adds to the grid bill — kWh that
+would otherwise be exported cost the export price, the rest the import
+price — and the load takes the cheapest eligible slots until its energy is
+covered. A slot is eligible when it ends by the deadline and, under an
+import limit, the load fits below it. Loads are placed earliest deadline
+first, each against the grid left by the ones before, so two loads never
+both count on the same solar surplus. One pass is a sort of the eligible
+slots per load, O(loads × slots log slots).
+
+``solve_with_loads`` couples the loads to the optimal strategy's battery
+DP by alternating the two. The first round places the loads against the
+household alone and solves the battery with their power added to the load.
+Later rounds re-place the loads against the household plus that battery
+schedule, with the battery as a third source: the energy it could give up
+in a slot (charge less or discharge more) is priced at what a stored kWh
+is worth there, the slope of the DP's cost-to-go along the planned path.
+A load then leaves solar to the battery when the battery would save more
+with it, and runs off the battery when that is cheaper than importing.
+The best round is kept; rounds stop once the loads stay where they were,
+once a round saves less than ``FLEX_MIN_GAIN``, after ``FLEX_ROUNDS`` or
+once the rounds so far took ``FLEX_BUDGET_MS``. Each round costs one warm-started DP solve, whose
+tables are reused from the last slot a load moved in.
+
+``FlexibleLoadTracker`` turns the configured loads into the energy still
+needed before the next deadline. A load is assumed to run while its plan
+says so, the delivered energy is integrated from the planned power between
+updates and starts again from zero when a deadline passes.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from typing import Any
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_BOILER_DEADLINE,
+    CONF_BOILER_ENERGY,
+    CONF_BOILER_POWER,
+    CONF_EV_DEADLINE,
+    CONF_EV_ENERGY,
+    CONF_EV_POWER,
+    FLEXIBLE_LOAD_BOILER,
+    FLEXIBLE_LOAD_EV,
+)
+from .horizon import CompressedHorizon
+from .inputs import PlanningInputs
+from .optimizer import HorizonSolver, Solution
+from .planner import BatteryModel
+
+_LOGGER = logging.getLogger(__name__)
+
+# Rounds of re-placing the loads against the battery schedule
+FLEX_ROUNDS = 4
+# Stop once a round saves less than this (€)
+FLEX_MIN_GAIN = 0.01
+# Stop starting new rounds once the joint solve has taken this long
+FLEX_BUDGET_MS = 250.0
+# Slack (kWh) on the import limit against floating point rounding
+_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class FlexibleLoadOptions:
+    """Options describing one kind of flexible load."""
+
+    key: str
+    power: str
+    energy: str
+    deadline: str
+    default_deadline: str
+
+
+FLEXIBLE_LOAD_OPTIONS: tuple[FlexibleLoadOptions, ...] = (
+    FlexibleLoadOptions(FLEXIBLE_LOAD_EV, CONF_EV_POWER, CONF_EV_ENERGY, CONF_EV_DEADLINE, "07:00:00"),
+    FlexibleLoadOptions(FLEXIBLE_LOAD_BOILER, CONF_BOILER_POWER, CONF_BOILER_ENERGY, CONF_BOILER_DEADLINE, "18:00:00"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FlexibleLoad:
+    """Energy one load still needs before its deadline.
+
+    Attributes:
+        key: Load identifier (e.g. ``ev_charger``).
+        power_kw: Power drawn while running.
+        energy_kwh: Energy still needed.
+        deadline: POSIX time by which it is needed.
+    """
+
+    key: str
+    power_kw: float
+    energy_kwh: float
+    deadline: float
+
+
+@dataclass(frozen=True, slots=True)
+class LoadSchedule:
+    """Placement of the loads; per-load arrays are ``(loads, slots)``.
+
+    Attributes:
+        energy_kwh: Energy each load draws in each slot.
+        power_kw: Mean power of each load in each slot.
+        unmet_kwh: Energy per load that did not fit before its deadline.
+    """
+
+    energy_kwh: np.ndarray
+    power_kw: np.ndarray
+    unmet_kwh: np.ndarray
+
+    @property
+    def total_kw(self) -> np.ndarray:
+        """Return the summed power of all loads per slot."""
+        return self.power_kw.sum(axis=0)
+
+    def expand(self, horizon: CompressedHorizon) -> LoadSchedule:
+        """Return the placement on buckets spread over the native slots."""
+        power = horizon.expand(self.power_kw)
+        return LoadSchedule(
+            energy_kwh=power * horizon.native.durations_h, power_kw=power, unmet_kwh=self.unmet_kwh
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class LoadStatus:
+    """What one load is planned to do, for its sensor.
+
+    Attributes:
+        power_kw: Planned mean power in the current slot.
+        remaining_kwh: Energy still needed before the deadline.
+        deadline: POSIX deadline.
+        planned_kwh: Energy placed on the remaining slots.
+        unmet_kwh: Energy that did not fit before the deadline.
+        runs: (start, end, mean kW) of the contiguous stretches the load runs in.
+    """
+
+    power_kw: float
+    remaining_kwh: float
+    deadline: float
+    planned_kwh: float
+    unmet_kwh: float
+    runs: tuple[tuple[float, float, float], ...]
+
+    @property
+    def next_start(self) -> float | None:
+        """Return when the load next starts running, None when it is not planned."""
+        return self.runs[0][0] if self.runs else None
+
+
+def load_status(
+    loads: Sequence[FlexibleLoad], schedule: LoadSchedule, inputs: PlanningInputs
+) -> dict[str, LoadStatus]:
+    """Summarize the placement of every load on ``inputs``."""
+    status = {}
+    for row, load in enumerate(loads):
+        energy = schedule.energy_kwh[row]
+        running = np.flatnonzero(energy > 0)
+        # A run breaks at a slot without the load or a gap in the slots
+        opens = np.ones(running.size, dtype=bool)
+        opens[1:] = (running[1:] != running[:-1] + 1) | (inputs.starts[running[1:]] != inputs.ends[running[:-1]])
+        first = np.flatnonzero(opens)
+        last = np.append(first[1:], running.size) - 1
+        runs = tuple(
+            (
+                float(inputs.starts[running[head]]),
+                float(inputs.ends[running[tail]]),
+                float(energy[running[head] : running[tail] + 1].sum())
+                / ((inputs.ends[running[tail]] - inputs.starts[running[head]]) / 3600.0),
+            )
+            for head, tail in zip(first, last)
+        )
+        status[load.key] = LoadStatus(
+            power_kw=float(schedule.power_kw[row, 0]) if energy.size else 0.0,
+            remaining_kwh=load.energy_kwh,
+            deadline=load.deadline,
+            planned_kwh=float(energy.sum()),
+            unmet_kwh=float(schedule.unmet_kwh[row]),
+            runs=runs,
+        )
+    return status
+
+
+@dataclass(frozen=True, slots=True)
+class JointPlan:
+    """Battery schedule and load placement solved together.
+
+    Attributes:
+        solution: The battery schedule with the loads added to the household load.
+        loads: The load placement it was solved against.
+        rounds: Rounds run.
+        elapsed_ms: Latency of all rounds.
+    """
+
+    solution: Solution
+    loads: LoadSchedule
+    rounds: int
+    elapsed_ms: float
+
+
+def place_loads(
+    loads: Sequence[FlexibleLoad],
+    inputs: PlanningInputs,
+    grid_kwh: np.ndarray,
+    import_limit: float | None = None,
+    battery_kwh: np.ndarray | None = None,
+    battery_value: np.ndarray | None = None,
+) -> LoadSchedule:
+    """Place every load on the cheapest slots before its deadline.
+
+    ``grid_kwh`` is the site's grid energy per slot without the loads
+    (positive = import). A load is supplied from the cheapest of the solar
+    energy otherwise exported (at the export price), ``battery_kwh`` the
+    battery could give up in the slot (at ``battery_value`` per kWh) and
+    grid import. What each placed load uses is taken away before the next.
+    """
+    count = len(inputs)
+    hours = inputs.durations_h
+    price, export_price = inputs.price, inputs.export
+    grid = np.array(grid_kwh, dtype=np.float64)
+    spare = np.zeros(count) if battery_kwh is None else np.array(battery_kwh, dtype=np.float64)
+    value = price if battery_value is None else battery_value
+    energy = np.zeros((len(loads), count))
+    unmet = np.zeros(len(loads))
+    for row in sorted(range(len(loads)), key=lambda row: loads[row].deadline):
+        load = loads[row]
+        if load.energy_kwh <= 0 or load.power_kw <= 0:
+            continue
+        full = load.power_kw * hours
+        eligible = inputs.ends <= load.deadline
+        if import_limit is not None:
+            eligible &= grid + full <= import_limit * hours + _TOLERANCE
+        slots = np.flatnonzero(eligible)
+        if not slots.size:
+            unmet[row] = load.energy_kwh
+            continue
+        # Sources per slot: solar otherwise exported, battery energy, grid import
+        caps = np.stack((np.maximum(-grid[slots], 0.0), spare[slots], full[slots]))
+        unit = np.stack((export_price[slots], value[slots], price[slots]))
+        cost = (_fill(caps, unit, full[slots]) * unit).sum(axis=0) / full[slots]
+        # Cheapest first, earlier slots first among equal costs
+        order = np.lexsort((slots, cost))
+        before = np.cumsum(full[slots][order]) - full[slots][order]
+        taken = np.zeros(slots.size)
+        taken[order] = np.clip(load.energy_kwh - before, 0.0, full[slots][order])
+        used = _fill(caps, unit, taken)
+        energy[row, slots] = taken
+        unmet[row] = max(load.energy_kwh - float(taken.sum()), 0.0)
+        grid[slots] += used[0] + used[2]
+        spare[slots] -= used[1]
+    return LoadSchedule(energy_kwh=energy, power_kw=energy / hours, unmet_kwh=unmet)
+
+
+def _fill(caps: np.ndarray, unit: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    """Return how much of ``amount`` each source (row) supplies per slot, cheapest source first."""
+    order = np.argsort(unit, axis=0, kind="stable")
+    ordered = np.take_along_axis(caps, order, axis=0)
+    supplied = np.clip(amount - (np.cumsum(ordered, axis=0) - ordered), 0.0, ordered)
+    result = np.empty_like(supplied)
+    np.put_along_axis(result, order, supplied, axis=0)
+    return result
+
+
+def solve_with_loads(
+    inputs: PlanningInputs,
+    loads: Sequence[FlexibleLoad],
+    *,
+    solver: HorizonSolver,
+    soc: float,
+    battery: BatteryModel,
+    min_soc: float,
+    max_soc: float,
+    import_limit: float | None = None,
+    rounds: int = FLEX_ROUNDS,
+    budget_ms: float = FLEX_BUDGET_MS,
+) -> JointPlan:
+    """Return the battery schedule and load placement with the lowest expected cost."""
+    began = time.perf_counter()
+    hours = inputs.durations_h
+    household = (inputs.load - inputs.pv) * hours
+    kwh = battery.capacity_kwh / 100.0
+    # The first round plans the loads without the battery
+    charged = np.zeros(len(inputs))
+    spare: np.ndarray | None = None
+    value: np.ndarray | None = None
+    best: tuple[Solution, LoadSchedule] | None = None
+    runs = 0
+    for _ in range(rounds):
+        placed = place_loads(loads, inputs, household + charged, import_limit, spare, value)
+        if best is not None and np.array_equal(placed.energy_kwh, best[1].energy_kwh):
+            break  # the battery would be solved against the same loads again
+        solution = solver.solve(
+            inputs.with_load(inputs.load + placed.total_kw),
+            soc=soc,
+            battery=battery,
+            min_soc=min_soc,
+            max_soc=max_soc,
+            import_limit=import_limit,
+        )
+        runs += 1
+        gain = best[0].expected_cost - solution.expected_cost if best is not None else np.inf
+        if gain > 0:
+            best = (solution, placed)
+        if gain < FLEX_MIN_GAIN or (time.perf_counter() - began) * 1000.0 >= budget_ms:
+            break
+        # Next round: the loads see this battery schedule and what its stored energy is worth
+        charged = np.diff(solution.soc, prepend=soc) * kwh
+        spare = np.clip(
+            np.minimum(battery.max_discharge_kw * hours + charged, (solution.soc - min_soc) * kwh), 0.0, None
+        )
+        value = solver.energy_value(solution.soc)
+    solution, placed = best
+    return JointPlan(
+        solution=solution,
+        loads=placed,
+        rounds=runs,
+        elapsed_ms=(time.perf_counter() - began) * 1000.0,
+    )
+
+
+def _next_deadline(now: float, deadline: dt_time) -> float:
+    """Return the POSIX time the local ``deadline`` time of day next passes after ``now``."""
+    local = dt_util.as_local(dt_util.utc_from_timestamp(now))
+    when = local.replace(hour=deadline.hour, minute=deadline.minute, second=deadline.second, microsecond=0)
+    if when.timestamp() <= now:
+        when = datetime.combine(when.date() + timedelta(days=1), deadline, tzinfo=local.tzinfo)
+    return when.timestamp()
+
+
+@dataclass(slots=True)
+class _LoadState:
+    """Configuration and progress of one load."""
+
+    key: str
+    power_kw: float
+    energy_kwh: float
+    deadline: dt_time
+    next_deadline: float | None = None
+    delivered_kwh: float = 0.0
+    power_now_kw: float = 0.0
+
+
+class FlexibleLoadTracker:
+    """Energy each configured load still needs before its next deadline."""
+
+    def __init__(self, options: Mapping[str, Any]) -> None:
+        """Initialize from the options; loads without power or energy are left out."""
+        self._loads: list[_LoadState] = []
+        for config in FLEXIBLE_LOAD_OPTIONS:
+            power = float(options.get(config.power) or 0.0)
+            energy = float(options.get(config.energy) or 0.0)
+            if power > 0 and energy > 0:
+                deadline = dt_util.parse_time(str(options.get(config.deadline) or config.default_deadline))
+                self._loads.append(_LoadState(config.key, power, energy, deadline or dt_time(7)))
+        self._last: float | None = None
+
+    @property
+    def keys(self) -> list[str]:
+        """Return the configured loads."""
+        return [load.key for load in self._loads]
+
+    def __bool__(self) -> bool:
+        """Return True when any load is configured."""
+        return bool(self._loads)
+
+    def advance(self, now: float) -> None:
+        """Count the planned power since the last update as delivered and roll passed deadlines."""
+        for load in self._loads:
+            if self._last is not None and now > self._last:
+                load.delivered_kwh = min(
+                    load.delivered_kwh + load.power_now_kw * (now - self._last) / 3600.0, load.energy_kwh
+                )
+            if load.next_deadline is None or now >= load.next_deadline:
+                if load.next_deadline is not None:
+                    _LOGGER.info(
+                        "[loads] %s: deadline passed with %.2f of %.2f kWh delivered",
+                        load.key,
+                        load.delivered_kwh,
+                        load.energy_kwh,
+                    )
+                load.next_deadline = _next_deadline(now, load.deadline)
+                load.delivered_kwh = 0.0
+        self._last = now
+
+    def loads(self) -> list[FlexibleLoad]:
+        """Return the energy still needed per load."""
+        return [
+            FlexibleLoad(
+                key=load.key,
+                power_kw=load.power_kw,
+                energy_kwh=max(load.energy_kwh - load.delivered_kwh, 0.0),
+                deadline=load.next_deadline if load.next_deadline is not None else 0.0,
+            )
+            for load in self._loads
+        ]
+
+    def follow(self, power_now_kw: Sequence[float]) -> None:
+        """Record the power each load is planned to draw until the next update."""
+        for load, power in zip(self._loads, power_now_kw):
+            load.power_now_kw = float(power)
+
+    def delivered(self) -> dict[str, float]:
+        """Return the energy delivered per load since its last deadline."""
+        return {load.key: load.delivered_kwh for load in self._loads}
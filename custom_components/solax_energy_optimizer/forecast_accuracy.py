@@ -0,0 +1,231 @@
+"""Solar forecast accuracy tracking and online bias correction.
+
+The latest ``pv_estimate`` of each forecast period is frozen when the period
+starts. While it runs, the measured PV power is averaged; once it has ended
+the error is folded into statistics for the period's local hour of day:
+Welford's running mean/variance of the error, the mean absolute error and an
+exponentially smoothed measured/estimate ratio. Every update is O(1).
+
+The smoothed ratio becomes the hour's correction factor once enough periods
+were seen, and is applied to later forecasts before they reach the planner.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .inputs import solar_periods, to_timestamp
+from .load_forecast import read_power_kw
+
+_LOGGER = logging.getLogger(__name__)
+
+# Periods with a smaller estimate carry no useful ratio information
+MIN_ESTIMATE_KW = 0.1
+# Periods needed in an hour-of-day before its correction is applied
+MIN_CORRECTION_SAMPLES = 5
+# Weight of a new period in the smoothed measured/estimate ratio
+RATIO_SMOOTHING = 0.1
+CORRECTION_LIMITS = (0.25, 2.0)
+# Fallback forecast period length when it cannot be derived
+DEFAULT_PERIOD_SECONDS = 1800
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "forecast_accuracy"
+SAVE_DELAY = 600
+
+
+def _local_hour(when: float) -> int:
+    return dt_util.as_local(dt_util.utc_from_timestamp(when)).hour
+
+
+@dataclass(slots=True)
+class HourErrorStats:
+    """Running forecast error statistics for one hour of the day (kW)."""
+
+    count: int = 0
+    mean_error: float = 0.0
+    m2: float = 0.0
+    mean_abs_error: float = 0.0
+    ratio: float = 1.0
+    ratio_count: int = 0
+
+    def update(self, estimate: float, measured: float) -> None:
+        """Fold one finished period into the statistics."""
+        error = measured - estimate
+        self.count += 1
+        delta = error - self.mean_error
+        self.mean_error += delta / self.count
+        self.m2 += delta * (error - self.mean_error)
+        self.mean_abs_error += (abs(error) - self.mean_abs_error) / self.count
+        if estimate >= MIN_ESTIMATE_KW:
+            self.ratio += RATIO_SMOOTHING * (measured / estimate - self.ratio)
+            self.ratio_count += 1
+
+    @property
+    def std_error(self) -> float:
+        """Return the sample standard deviation of the error."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def correction(self) -> float:
+        """Return the factor applied to this hour's estimates."""
+        if self.ratio_count < MIN_CORRECTION_SAMPLES:
+            return 1.0
+        return min(max(self.ratio, CORRECTION_LIMITS[0]), CORRECTION_LIMITS[1])
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastAccuracy:
+    """Summary of the tracked forecast accuracy."""
+
+    periods: int
+    bias_kw: float | None
+    mae_kw: float | None
+    correction: float
+    hourly_correction: tuple[float, ...]
+
+
+class ForecastErrorTracker:
+    """Match forecast periods against measured PV and learn per-hour corrections."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.hours = [HourErrorStats() for _ in range(24)]
+        # period start → (end, frozen estimate, measured sum, sample count)
+        self._periods: dict[float, list[float]] = {}
+
+    def observe(self, now: float, forecast: list[dict], measured_kw: float | None) -> int:
+        """Register the latest estimates and one PV measurement; return periods closed."""
+        starts, estimates = solar_periods(forecast)
+        if starts.size:
+            steps = np.diff(starts)
+            step = float(np.median(steps)) if steps.size else float(DEFAULT_PERIOD_SECONDS)
+            ends = np.append(starts[1:], starts[-1] + step)
+            # Estimates keep updating until their period starts
+            upcoming = starts > now
+            for start, end, estimate in zip(starts[upcoming], ends[upcoming], estimates[upcoming]):
+                self._periods[float(start)] = [float(end), float(estimate), 0.0, 0.0]
+            # A running period seen for the first time is tracked from now on
+            running = (starts <= now) & (ends > now)
+            for start, end, estimate in zip(starts[running], ends[running], estimates[running]):
+                self._periods.setdefault(float(start), [float(end), float(estimate), 0.0, 0.0])
+
+        closed = 0
+        for start in [start for start, period in self._periods.items() if period[0] <= now]:
+            _, estimate, total, samples = self._periods.pop(start)
+            if samples:
+                self.hours[_local_hour(start)].update(estimate, total / samples)
+                closed += 1
+        if measured_kw is not None:
+            for start, period in self._periods.items():
+                if start <= now < period[0]:
+                    period[2] += measured_kw
+                    period[3] += 1
+        return closed
+
+    def correction_at(self, when: float) -> float:
+        """Return the correction factor for a period starting at ``when``."""
+        return self.hours[_local_hour(when)].correction
+
+    def correct(self, forecast: list[dict]) -> list[dict]:
+        """Return a copy of ``forecast`` with every pv_estimate scaled by its hour's factor."""
+        corrected: list[dict] = []
+        for entry in forecast:
+            start = to_timestamp(entry.get("period_start")) if isinstance(entry, dict) else None
+            factor = self.correction_at(start) if start is not None else 1.0
+            if factor == 1.0:
+                corrected.append(entry)
+                continue
+            entry = dict(entry)
+            for key in ("pv_estimate", "pv_estimate10", "pv_estimate90"):
+                if isinstance(entry.get(key), (int, float)):
+                    entry[key] = entry[key] * factor
+            corrected.append(entry)
+        return corrected
+
+    def summary(self, now: float) -> ForecastAccuracy:
+        """Return count-weighted bias/MAE over all hours and the current correction."""
+        counts = np.array([stats.count for stats in self.hours], dtype=np.float64)
+        total = float(counts.sum())
+        bias = mae = None
+        if total:
+            bias = float(np.dot(counts, [stats.mean_error for stats in self.hours]) / total)
+            mae = float(np.dot(counts, [stats.mean_abs_error for stats in self.hours]) / total)
+        return ForecastAccuracy(
+            periods=int(total),
+            bias_kw=bias,
+            mae_kw=mae,
+            correction=self.correction_at(now),
+            hourly_correction=tuple(round(stats.correction, 3) for stats in self.hours),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation for storage."""
+        return {
+            "hours": [
+                [s.count, s.mean_error, s.m2, s.mean_abs_error, s.ratio, s.ratio_count]
+                for s in self.hours
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any]) -> ForecastErrorTracker:
+        """Restore statistics saved with :meth:`as_dict`."""
+        tracker = cls()
+        hours = stored.get("hours") or []
+        if len(hours) == 24:
+            tracker.hours = [
+                HourErrorStats(int(c), float(me), float(m2), float(mae), float(r), int(rc))
+                for c, me, m2, mae, r, rc in hours
+            ]
+        return tracker
+
+
+class ForecastAccuracyTracker:
+    """Feeds the measured PV sensor into a persisted ForecastErrorTracker."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, entity_id: str) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.errors = ForecastErrorTracker()
+        self.loaded = False
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{STORAGE_KEY}"
+        )
+
+    async def async_load(self) -> None:
+        """Restore the stored statistics."""
+        stored = await self._store.async_load()
+        if stored:
+            self.errors = ForecastErrorTracker.from_dict(stored)
+        self.loaded = True
+        _LOGGER.info(
+            "[accuracy] %s: %d forecast periods of error statistics restored",
+            self.entity_id,
+            self.errors.summary(dt_util.utcnow().timestamp()).periods,
+        )
+
+    def observe(self, now: float, forecast: list[dict]) -> None:
+        """Match the raw forecast against the current PV measurement."""
+        if not self.loaded:
+            return
+        closed = self.errors.observe(now, forecast, read_power_kw(self.hass, self.entity_id))
+        if closed:
+            self._store.async_delay_save(self.errors.as_dict, SAVE_DELAY)
+
+    def correct(self, forecast: list[dict]) -> list[dict]:
+        """Return the forecast with the learned per-hour corrections applied."""
+        return self.errors.correct(forecast)
+
+    def summary(self, now: float) -> ForecastAccuracy:
+        """Return the current accuracy summary."""
+        return self.errors.summary(now)
@@ -0,0 +1,254 @@
+"""Local columnar cache of past SOC, price, PV and load history.
+
+Learning and backtesting features need months of history. Reading it from
+the recorder on every start is slow on SQLite / SD-card installs, so
+finalized (UTC) days are fetched once and kept on disk, one ``.npy`` file per
+day holding a float32 array of shape ``(len(HISTORY_COLUMNS), 24)`` — one row
+per column, one hourly mean per hour, NaN where nothing was recorded. Files
+are opened memory-mapped, and later syncs only fetch the days not on disk.
+A day counts as finalized ``HISTORY_FINALIZE_DELAY`` after its end, once the
+recorder has compiled the statistic of its last hour; a day cached earlier
+would keep that hour empty for good. Day files older than the longest window
+any feature reads (``HISTORY_MAX_DAYS``) are deleted when the cache opens,
+and the whole directory when its config entry is removed.
+
+History comes from the hourly long-term statistics, the only recorder data
+kept beyond the purge window. Missing days are fetched in batches of
+``HISTORY_BATCH_DAYS``, one executor job per batch covering every column.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.const import UnitOfPower
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTORY_COLUMNS: tuple[str, ...] = ("soc", "price", "pv", "load")
+HOURS_PER_DAY = 24
+# Days kept available for learning/backtesting
+HISTORY_DAYS = 90
+# Days kept on disk; the longest replay window reads this far back
+HISTORY_MAX_DAYS = 365
+# The recorder compiles an hour's statistics a few minutes after it ends
+HISTORY_FINALIZE_DELAY = timedelta(hours=1)
+# Days fetched per recorder executor job
+HISTORY_BATCH_DAYS = 14
+
+CACHE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def day_start(day: date) -> float:
+    """Return the POSIX timestamp of a UTC day's midnight."""
+    return datetime(day.year, day.month, day.day, tzinfo=UTC).timestamp()
+
+
+def last_final_day(now: datetime) -> date:
+    """Return the latest UTC day whose statistics are all compiled at ``now``."""
+    return (dt_util.as_utc(now) - HISTORY_FINALIZE_DELAY).date() - timedelta(days=1)
+
+
+def history_dir(hass: HomeAssistant, entry_id: str) -> Path:
+    """Return the cache directory of one config entry."""
+    return Path(hass.config.path(STORAGE_DIR, f"{DOMAIN}_history", entry_id))
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the cache directory of a removed config entry."""
+    await hass.async_add_executor_job(partial(shutil.rmtree, history_dir(hass, entry_id), ignore_errors=True))
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryArrays:
+    """Hourly history aligned on one time axis.
+
+    Attributes:
+        starts: Hour start times as POSIX seconds (float64).
+        values: Hourly means, shape ``(len(HISTORY_COLUMNS), len(starts))``.
+    """
+
+    starts: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        """Return the number of hours."""
+        return int(self.starts.size)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return one column (e.g. ``"price"``) as a 1-D array."""
+        return self.values[HISTORY_COLUMNS.index(name)]
+
+
+def _batches(days: list[date], size: int) -> list[tuple[date, int]]:
+    """Group sorted days into contiguous (first day, count) runs of at most ``size``."""
+    runs: list[tuple[date, int]] = []
+    for day in days:
+        if runs and runs[-1][0] + timedelta(days=runs[-1][1]) == day and runs[-1][1] < size:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((day, 1))
+    return runs
+
+
+def statistics_to_block(
+    stats: Mapping[str, list[Mapping]],
+    entities: Mapping[str, str | None],
+    first_day: date,
+    days: int,
+) -> np.ndarray:
+    """Scatter statistics rows into a ``(columns, days * 24)`` float32 block."""
+    block = np.full((len(HISTORY_COLUMNS), days * HOURS_PER_DAY), np.nan, dtype=np.float32)
+    origin = day_start(first_day)
+    for column, name in enumerate(HISTORY_COLUMNS):
+        entity_id = entities.get(name)
+        rows = [row for row in stats.get(entity_id, []) if row.get("mean") is not None] if entity_id else []
+        if not rows:
+            continue
+        starts = np.fromiter((row["start"] for row in rows), dtype=np.float64, count=len(rows))
+        means = np.fromiter((row["mean"] for row in rows), dtype=np.float64, count=len(rows))
+        offsets = ((starts - origin) // 3600).astype(np.int64)
+        valid = (offsets >= 0) & (offsets < block.shape[1])
+        block[column, offsets[valid]] = means[valid]
+    return block
+
+
+class HistoryCache:
+    """Fetch-once, on-disk cache of finalized days of hourly history."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        entities: Mapping[str, str | None],
+    ) -> None:
+        """Initialize the cache for the given column → entity mapping."""
+        self.hass = hass
+        self.entities = {name: entities.get(name) or None for name in HISTORY_COLUMNS}
+        self._dir = history_dir(hass, entry_id)
+        self._cached: set[date] | None = None
+        self._lock = asyncio.Lock()
+
+    def _path(self, day: date) -> Path:
+        return self._dir / f"{day.isoformat()}.npy"
+
+    def _prepare(self, oldest: date) -> set[date]:
+        """Create the cache directory, drop it if the sources changed, list cached days.
+
+        Day files before ``oldest`` are deleted.
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+        manifest = {"version": CACHE_VERSION, "columns": list(HISTORY_COLUMNS), "entities": self.entities}
+        manifest_path = self._dir / MANIFEST_FILE
+        try:
+            current = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            current = None
+        if current != manifest:
+            for path in self._dir.glob("*.npy"):
+                path.unlink()
+            manifest_path.write_text(json.dumps(manifest))
+            _LOGGER.info("[history] cache at %s (re)initialized for %s", self._dir, self.entities)
+            return set()
+
+        cached: set[date] = set()
+        pruned = 0
+        for path in self._dir.glob("*.npy"):
+            try:
+                day = date.fromisoformat(path.stem)
+            except ValueError:
+                continue
+            if day < oldest:
+                path.unlink()
+                pruned += 1
+            else:
+                cached.add(day)
+        if pruned:
+            _LOGGER.info("[history] pruned %d day(s) before %s", pruned, oldest.isoformat())
+        return cached
+
+    def _fetch(self, first_day: date, days: int) -> np.ndarray:
+        """Read ``days`` days of hourly means for every column (recorder executor)."""
+        entity_ids = {entity_id for entity_id in self.entities.values() if entity_id}
+        start = day_start(first_day)
+        stats = statistics_during_period(
+            self.hass,
+            dt_util.utc_from_timestamp(start),
+            dt_util.utc_from_timestamp(start + days * 86400.0),
+            entity_ids,
+            "hour",
+            {"power": UnitOfPower.KILO_WATT},
+            {"mean"},
+        )
+        return statistics_to_block(stats, self.entities, first_day, days)
+
+    def _write(self, first_day: date, block: np.ndarray) -> None:
+        """Store a fetched block as one file per day, each written atomically."""
+        for offset in range(block.shape[1] // HOURS_PER_DAY):
+            day = first_day + timedelta(days=offset)
+            path = self._path(day)
+            temp = path.with_suffix(".tmp")
+            with temp.open("wb") as file:
+                np.save(file, block[:, offset * HOURS_PER_DAY:(offset + 1) * HOURS_PER_DAY])
+            os.replace(temp, path)
+
+    def _read(self, days: list[date]) -> HistoryArrays:
+        """Concatenate memory-mapped day files into aligned arrays."""
+        blocks = [np.load(self._path(day), mmap_mode="r") for day in days]
+        values = np.concatenate(blocks, axis=1) if blocks else np.empty((len(HISTORY_COLUMNS), 0), np.float32)
+        starts = np.concatenate(
+            [day_start(day) + 3600.0 * np.arange(HOURS_PER_DAY, dtype=np.float64) for day in days]
+        ) if days else np.empty(0, dtype=np.float64)
+        return HistoryArrays(starts=starts, values=values)
+
+    async def async_sync(self, days: int = HISTORY_DAYS) -> int:
+        """Fetch the finalized days of the last ``days`` that are not cached yet."""
+        return await self._async_sync(days, last_final_day(dt_util.utcnow()))
+
+    async def _async_sync(self, days: int, last: date) -> int:
+        """Fetch the ``days`` days up to ``last`` that are not cached yet."""
+        async with self._lock:
+            if self._cached is None:
+                self._cached = await self.hass.async_add_executor_job(
+                    self._prepare, last - timedelta(days=HISTORY_MAX_DAYS - 1)
+                )
+            missing = [
+                day
+                for day in (last - timedelta(days=back) for back in range(days - 1, -1, -1))
+                if day not in self._cached
+            ]
+            recorder = get_instance(self.hass)
+            for first_day, count in _batches(missing, HISTORY_BATCH_DAYS):
+                block = await recorder.async_add_executor_job(self._fetch, first_day, count)
+                await self.hass.async_add_executor_job(self._write, first_day, block)
+                self._cached.update(first_day + timedelta(days=offset) for offset in range(count))
+                _LOGGER.debug("[history] cached %d day(s) from %s", count, first_day.isoformat())
+            if missing:
+                _LOGGER.info(
+                    "[history] fetched %d missing day(s); %d day(s) cached", len(missing), len(self._cached)
+                )
+            return len(missing)
+
+    async def async_load(self, days: int = HISTORY_DAYS) -> HistoryArrays:
+        """Return the last ``days`` finalized days, fetching only what is missing."""
+        last = last_final_day(dt_util.utcnow())
+        await self._async_sync(days, last)
+        wanted = [last - timedelta(days=back) for back in range(days - 1, -1, -1)]
+        return await self.hass.async_add_executor_job(self._read, wanted)
@@ -0,0 +1,104 @@
+"""Multi-resolution planning horizon.
+
+Planning cost grows with the number of slots, but slots a day or more ahead
+hardly affect what the battery does now. ``compress_horizon`` keeps the
+native slots for the first ``HORIZON_TIERS`` stretch and merges later slots
+into progressively coarser buckets; planners work on the buckets and their
+per-bucket schedule is expanded back onto the native slots for execution.
+
+Bucket boundaries are aligned to the clock (a 2-hour bucket always starts on
+an even UTC hour), so consecutive cycles produce the same buckets apart from
+the few slots crossing a tier boundary, and a bucket never spans a gap in
+the price series. Aggregation conserves energy: PV and load are averaged
+weighted by slot duration, so power × bucket length equals the summed slot
+energies, and the import and export prices are duration-weighted means, so a
+flat load costs the same on both grids.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from .inputs import PlanningInputs
+
+# (horizon hours up to which the tier applies, bucket hours); 0 keeps native slots
+HORIZON_TIERS: tuple[tuple[float, float], ...] = (
+    (4.0, 0.0),
+    (12.0, 1.0),
+    (24.0, 2.0),
+    (math.inf, 4.0),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CompressedHorizon:
+    """Bucketed planning inputs and the mapping back to native slots.
+
+    Attributes:
+        native: The original per-slot inputs.
+        inputs: One slot per bucket.
+        bucket: Bucket index of every native slot.
+        first: Index of the first native slot of every bucket.
+    """
+
+    native: PlanningInputs
+    inputs: PlanningInputs
+    bucket: np.ndarray
+    first: np.ndarray
+
+    @property
+    def ratio(self) -> float:
+        """Return native slots per bucket."""
+        return len(self.native) / len(self.inputs) if len(self.inputs) else 1.0
+
+    def aggregate(self, values: np.ndarray) -> np.ndarray:
+        """Return the duration-weighted mean of per-slot ``values`` per bucket."""
+        return _weighted_mean(values, self.native.durations_h, self.first)
+
+    def expand(self, values: np.ndarray) -> np.ndarray:
+        """Return per-bucket ``values`` repeated onto the native slots."""
+        return values[..., self.bucket]
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray, first: np.ndarray) -> np.ndarray:
+    return np.add.reduceat(values * weights, first) / np.add.reduceat(weights, first)
+
+
+def compress_horizon(
+    inputs: PlanningInputs, tiers: tuple[tuple[float, float], ...] = HORIZON_TIERS
+) -> CompressedHorizon:
+    """Merge the slots of ``inputs`` into buckets that widen with the distance from the first slot."""
+    count = len(inputs)
+    if not count:
+        empty = np.empty(0, dtype=np.intp)
+        return CompressedHorizon(inputs, inputs, empty, empty)
+    starts = inputs.starts
+    offset_h = (starts - starts[0]) / 3600.0
+    tier = np.searchsorted(np.array([until for until, _ in tiers]), offset_h, side="right")
+    tier = np.minimum(tier, len(tiers) - 1)
+    width = np.array([hours for _, hours in tiers])[tier] * 3600.0
+    native = width == 0.0
+    block = np.where(native, np.arange(count), np.floor(starts / np.where(native, 1.0, width)))
+    opens = np.ones(count, dtype=bool)
+    opens[1:] = (tier[1:] != tier[:-1]) | (block[1:] != block[:-1]) | (starts[1:] != inputs.ends[:-1])
+    first = np.flatnonzero(opens)
+    bucket = np.cumsum(opens) - 1
+    hours = inputs.durations_h
+    last = np.append(first[1:], count) - 1
+    return CompressedHorizon(
+        native=inputs,
+        inputs=PlanningInputs(
+            starts=starts[first],
+            ends=inputs.ends[last],
+            price=_weighted_mean(inputs.price, hours, first),
+            pv=_weighted_mean(inputs.pv, hours, first),
+            load=_weighted_mean(inputs.load, hours, first),
+            export_price=(
+                _weighted_mean(inputs.export_price, hours, first) if inputs.export_price is not None else None
+            ),
+        ),
+        bucket=bucket,
+        first=first,
+    )
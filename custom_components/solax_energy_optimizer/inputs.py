@@ -0,0 +1,186 @@
+"""Time-aligned planning inputs built from the adapters' normalized data.
+
+The adapters return lists of dicts keyed by provider timestamps. Planning
+code works on slots instead: one entry per price period, with the solar
+forecast resampled onto the same grid. Everything is stored as numpy arrays
+so horizon-wide computations stay vectorized.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fallback slot length when the price list has a single entry and no "till"
+DEFAULT_SLOT_SECONDS = 3600
+
+
+def to_timestamp(value: Any) -> float | None:
+    """Convert an ISO 8601 string or datetime to a POSIX timestamp."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        parsed = dt_util.parse_datetime(value.replace("Z", "+00:00"))
+        return parsed.timestamp() if parsed is not None else None
+    return None
+
+
+def solar_periods(forecast: list[dict], key: str = "pv_estimate") -> tuple[np.ndarray, np.ndarray]:
+    """Return sorted (period start, PV power) arrays of a normalized forecast.
+
+    ``key`` selects a quantile band; periods without it use "pv_estimate".
+    """
+    rows: list[tuple[float, float]] = []
+    for entry in forecast:
+        if not isinstance(entry, dict):
+            continue
+        start = to_timestamp(entry.get("period_start"))
+        if start is None:
+            continue
+        try:
+            rows.append((start, float(entry.get(key, entry.get("pv_estimate", 0)) or 0)))
+        except (ValueError, TypeError):
+            continue
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.copy()
+    table = np.array(sorted(rows), dtype=np.float64)
+    return table[:, 0], table[:, 1]
+
+
+@dataclass(frozen=True, slots=True)
+class PlanningInputs:
+    """Aligned per-slot arrays covering the planning horizon.
+
+    Attributes:
+        starts: Slot start times as POSIX seconds (float64).
+        ends: Slot end times as POSIX seconds (float64).
+        price: Import price per slot in currency/kWh (the spot price until a
+            tariff is applied).
+        pv: Expected average solar power per slot in kW.
+        load: Expected average household load per slot in kW.
+        export_price: Export price per slot, None when export earns the import price.
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    price: np.ndarray
+    pv: np.ndarray
+    load: np.ndarray
+    export_price: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return int(self.starts.size)
+
+    @property
+    def durations_h(self) -> np.ndarray:
+        """Return slot lengths in hours."""
+        return (self.ends - self.starts) / 3600.0
+
+    @property
+    def export(self) -> np.ndarray:
+        """Return the export price per slot."""
+        return self.price if self.export_price is None else self.export_price
+
+    @property
+    def surplus(self) -> np.ndarray:
+        """Return expected solar power left after household load, per slot in kW."""
+        return self.pv - self.load
+
+    def with_load(self, load: np.ndarray) -> PlanningInputs:
+        """Return a copy carrying the given per-slot load forecast."""
+        return replace(self, load=load)
+
+    def index_at(self, when: float) -> int | None:
+        """Return the index of the slot containing ``when`` or None."""
+        idx = int(np.searchsorted(self.starts, when, side="right")) - 1
+        if idx < 0 or when >= self.ends[idx]:
+            return None
+        return idx
+
+    def slice_from(self, when: float) -> PlanningInputs:
+        """Return the slots that have not ended yet at ``when``."""
+        first = int(np.searchsorted(self.ends, when, side="right"))
+        return PlanningInputs(
+            starts=self.starts[first:],
+            ends=self.ends[first:],
+            price=self.price[first:],
+            pv=self.pv[first:],
+            load=self.load[first:],
+            export_price=self.export_price[first:] if self.export_price is not None else None,
+        )
+
+
+def _price_arrays(prices: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return sorted (starts, ends, price) arrays from normalized price entries."""
+    rows: list[tuple[float, float, float]] = []
+    for entry in prices:
+        if not isinstance(entry, dict):
+            continue
+        start = to_timestamp(entry.get("from"))
+        if start is None:
+            continue
+        try:
+            price = float(entry.get("price", 0))
+        except (ValueError, TypeError):
+            continue
+        till = to_timestamp(entry.get("till"))
+        rows.append((start, till if till is not None else np.nan, price))
+
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.copy(), empty.copy()
+
+    table = np.array(sorted(rows, key=lambda row: row[0]), dtype=np.float64)
+    starts, ends, values = table[:, 0].copy(), table[:, 1].copy(), table[:, 2].copy()
+
+    # Missing "till" values: the next slot's start, or the typical step for the last one
+    steps = np.diff(starts)
+    step = float(np.median(steps)) if steps.size else float(DEFAULT_SLOT_SECONDS)
+    next_starts = np.append(starts[1:], starts[-1] + step)
+    missing = np.isnan(ends)
+    ends[missing] = next_starts[missing]
+    return starts, ends, values
+
+
+def resample_pv(
+    forecast: list[dict], starts: np.ndarray, ends: np.ndarray, key: str = "pv_estimate"
+) -> np.ndarray:
+    """Return the time-weighted average PV power of ``forecast`` over each slot.
+
+    The forecast is a step function; its cumulative energy is piecewise
+    linear, so interpolating the cumulative curve at slot edges gives the
+    exact energy per slot regardless of the two grids' resolutions.
+    ``key`` selects a quantile band as in ``solar_periods``.
+    """
+    if starts.size == 0:
+        return np.empty(0, dtype=np.float64)
+
+    f_starts, f_power = solar_periods(forecast, key)
+    if not f_starts.size:
+        return np.zeros(starts.size, dtype=np.float64)
+
+    steps = np.diff(f_starts)
+    step = float(np.median(steps)) if steps.size else 1800.0
+    edges = np.append(f_starts, f_starts[-1] + step)
+    cumulative = np.concatenate(([0.0], np.cumsum(f_power * np.diff(edges))))
+
+    energy = np.interp(ends, edges, cumulative) - np.interp(starts, edges, cumulative)
+    return energy / np.maximum(ends - starts, 1.0)
+
+
+def build_planning_inputs(prices: list[dict], forecast: list[dict]) -> PlanningInputs:
+    """Build aligned planning inputs from normalized price and forecast lists."""
+    starts, ends, values = _price_arrays(prices)
+    pv = resample_pv(forecast, starts, ends)
+    _LOGGER.debug("[inputs] built %d aligned slots", starts.size)
+    return PlanningInputs(
+        starts=starts, ends=ends, price=values, pv=pv, load=np.zeros(starts.size, dtype=np.float64)
+    )
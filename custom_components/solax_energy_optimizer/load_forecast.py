@@ -0,0 +1,248 @@
+"""Household load forecast from a weekday × hour-of-day consumption profile.
+
+The profile holds one average power value per (weekday, local hour) cell.
+It is seeded once from the recorder's hourly long-term statistics of the
+configured load entity, fetched in a single executor job. After that every
+completed clock hour of live samples is folded into its cell with an
+exponential moving average, so each update is O(1) and the history is never
+queried again. The profile and the last folded hour are persisted, so a
+restart only fetches the hours missed while Home Assistant was down.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from datetime import timedelta
+from typing import Any
+
+import numpy as np
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfPower
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import PowerConverter
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_DAYS = 7
+PROFILE_HOURS = 24
+# Weight of a newly completed hour in its profile cell
+LOAD_SMOOTHING = 0.2
+# History fetched when no stored profile exists
+LOAD_HISTORY_DAYS = 28
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "load_profile"
+SAVE_DELAY = 600
+
+
+def _hour_start(when: float) -> float:
+    """Return the start of the clock hour containing ``when`` (POSIX seconds)."""
+    return when - when % 3600.0
+
+
+def read_power_kw(hass: HomeAssistant, entity_id: str) -> float | None:
+    """Return a power sensor's current state in kW, or None if unusable."""
+    state = hass.states.get(entity_id)
+    if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+    try:
+        return PowerConverter.convert(
+            float(state.state),
+            state.attributes.get("unit_of_measurement") or UnitOfPower.WATT,
+            UnitOfPower.KILO_WATT,
+        )
+    except (ValueError, HomeAssistantError):
+        _LOGGER.debug("[power] %s: unusable state %r", entity_id, state.state)
+        return None
+
+
+def profile_cell(when: float) -> tuple[int, int]:
+    """Return the (weekday, local hour) profile cell of a POSIX timestamp."""
+    local = dt_util.as_local(dt_util.utc_from_timestamp(when))
+    return local.weekday(), local.hour
+
+
+class LoadProfile:
+    """Weekday × hour-of-day average household load in kW."""
+
+    def __init__(self, smoothing: float = LOAD_SMOOTHING) -> None:
+        """Initialize an empty profile."""
+        self.smoothing = smoothing
+        self.values = np.full((PROFILE_DAYS, PROFILE_HOURS), np.nan, dtype=np.float64)
+        self.last_hour: float | None = None
+        self._hour: float | None = None
+        self._hour_sum = 0.0
+        self._hour_count = 0
+
+    @property
+    def is_empty(self) -> bool:
+        """Return True while no cell has been learned yet."""
+        return not np.isfinite(self.values).any()
+
+    def fold(self, hour_start: float, mean_kw: float) -> bool:
+        """Blend the mean load of one completed hour into its cell.
+
+        Hours at or before the last folded hour are ignored, so overlapping
+        history fetches and live samples never count an hour twice.
+        """
+        if self.last_hour is not None and hour_start <= self.last_hour:
+            return False
+        if not math.isfinite(mean_kw):
+            return False
+        day, hour = profile_cell(hour_start)
+        current = self.values[day, hour]
+        if np.isnan(current):
+            self.values[day, hour] = mean_kw
+        else:
+            self.values[day, hour] = current + self.smoothing * (mean_kw - current)
+        self.last_hour = hour_start
+        return True
+
+    def seed(self, hour_starts: np.ndarray, means_kw: np.ndarray) -> int:
+        """Fold a batch of hourly means in time order; return how many were used."""
+        order = np.argsort(hour_starts, kind="stable")
+        return sum(self.fold(float(hour_starts[idx]), float(means_kw[idx])) for idx in order)
+
+    def add_sample(self, when: float, power_kw: float) -> bool:
+        """Accumulate a live sample; return True when a completed hour was folded."""
+        hour = _hour_start(when)
+        folded = False
+        if self._hour is not None and hour != self._hour and self._hour_count:
+            folded = self.fold(self._hour, self._hour_sum / self._hour_count)
+        if hour != self._hour:
+            self._hour, self._hour_sum, self._hour_count = hour, 0.0, 0
+        self._hour_sum += power_kw
+        self._hour_count += 1
+        return folded
+
+    def power_at(self, when: float) -> float:
+        """Return the expected load at ``when`` in kW (0 while nothing is known)."""
+        if self.is_empty:
+            return 0.0
+        value = self.values[profile_cell(when)]
+        return float(value) if np.isfinite(value) else float(np.nanmean(self.values))
+
+    def forecast(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Return the expected average load per slot in kW, aligned with ``starts``.
+
+        Slots longer than an hour average the cells of every hour they cover.
+        """
+        result = np.zeros(starts.size, dtype=np.float64)
+        if self.is_empty or not starts.size:
+            return result
+        filled = np.where(np.isfinite(self.values), self.values, np.nanmean(self.values))
+        cells: dict[float, float] = {}
+        for idx in range(starts.size):
+            steps = max(1, math.ceil((ends[idx] - starts[idx]) / 3600.0 - 1e-9))
+            width = (ends[idx] - starts[idx]) / steps
+            total = 0.0
+            for step in range(steps):
+                hour = _hour_start(starts[idx] + (step + 0.5) * width)
+                if hour not in cells:
+                    cells[hour] = float(filled[profile_cell(hour)])
+                total += cells[hour]
+            result[idx] = total / steps
+        return result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation for storage."""
+        return {
+            "values": [[None if np.isnan(v) else round(float(v), 4) for v in row] for row in self.values],
+            "last_hour": self.last_hour,
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any], smoothing: float = LOAD_SMOOTHING) -> LoadProfile:
+        """Restore a profile saved with :meth:`as_dict`."""
+        profile = cls(smoothing)
+        values = np.array(stored.get("values") or [], dtype=np.float64)
+        if values.shape == profile.values.shape:
+            profile.values = values
+            profile.last_hour = stored.get("last_hour")
+        return profile
+
+
+class LoadForecaster:
+    """Keeps the load profile of one entity current and serves per-slot forecasts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, entity_id: str) -> None:
+        """Initialize the forecaster."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.profile = LoadProfile()
+        self.loaded = False
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{STORAGE_KEY}"
+        )
+
+    def _fetch_hourly_means(self, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Read hourly mean power (kW) in [start, end) from long-term statistics."""
+        stats = statistics_during_period(
+            self.hass,
+            dt_util.utc_from_timestamp(start),
+            dt_util.utc_from_timestamp(end),
+            {self.entity_id},
+            "hour",
+            {"power": UnitOfPower.KILO_WATT},
+            {"mean"},
+        )
+        rows = [row for row in stats.get(self.entity_id, []) if row.get("mean") is not None]
+        starts = np.fromiter((row["start"] for row in rows), dtype=np.float64, count=len(rows))
+        means = np.fromiter((row["mean"] for row in rows), dtype=np.float64, count=len(rows))
+        return starts, means
+
+    async def async_load(self) -> None:
+        """Restore the stored profile and fold in the hours recorded since."""
+        stored = await self._store.async_load()
+        if stored:
+            self.profile = LoadProfile.from_dict(stored)
+
+        end = _hour_start(dt_util.utcnow().timestamp())
+        if self.profile.last_hour is not None:
+            start = self.profile.last_hour + 3600.0
+        else:
+            start = end - timedelta(days=LOAD_HISTORY_DAYS).total_seconds()
+
+        folded = 0
+        if start < end:
+            try:
+                starts, means = await get_instance(self.hass).async_add_executor_job(
+                    self._fetch_hourly_means, start, end
+                )
+            except HomeAssistantError as err:
+                _LOGGER.warning("[load] could not read statistics for %s: %s", self.entity_id, err)
+            else:
+                folded = self.profile.seed(starts, means)
+        self.loaded = True
+        _LOGGER.info(
+            "[load] %s: profile ready — %d hours folded from statistics since %s",
+            self.entity_id,
+            folded,
+            dt_util.utc_from_timestamp(start).isoformat(),
+        )
+        if folded:
+            self._store.async_delay_save(self.profile.as_dict, SAVE_DELAY)
+
+    def sample(self, when: float) -> None:
+        """Feed the entity's current power into the profile."""
+        if not self.loaded:
+            return  # seeding decides which hours are already covered
+        power_kw = read_power_kw(self.hass, self.entity_id)
+        if power_kw is None:
+            return
+        if self.profile.add_sample(when, power_kw):
+            self._store.async_delay_save(self.profile.as_dict, SAVE_DELAY)
+
+    def power_at(self, when: float) -> float:
+        """Return the expected load at ``when`` in kW."""
+        return self.profile.power_at(when)
+
+    def forecast(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Return the expected average load per slot in kW."""
+        return self.profile.forecast(starts, ends)
@@ -0,0 +1,389 @@
+"""Monte Carlo evaluation of strategies and candidate schedules in a process pool.
+
+Thousands of price / PV / load trajectories are sampled around the current
+planning inputs and every candidate schedule (the rule-based strategy
+rollouts plus the threshold schedules of the robust planner) is simulated
+against each of them, giving a cost distribution per candidate. The price
+noise is sampled on the spot price and passed through the compiled tariff,
+so every sampled import price moves with its export price; imported energy
+is billed at the one and exported energy credited at the other.
+
+The base arrays and candidate schedules are written once into a shared memory
+block; worker processes attach to it, sample their own chunk of trajectories
+from a per-chunk seed and send back only the (candidates × chunk) cost
+matrix. Only as many chunks as there are workers are in flight at a time, so
+a time limit or a cancellation stops the work within one chunk.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+
+from .inputs import PlanningInputs
+from .planner import DEFAULT_PARAMS, BatteryModel, StrategyParams
+from .scenarios import (
+    BASE_STRATEGIES,
+    CVAR_TAIL,
+    SCENARIO_CORRELATION,
+    CandidateSet,
+    build_candidates,
+    expected_shortfall,
+    sample_pv_scenarios,
+)
+from .simulation import simulate_schedules
+from .tariff import SPOT_TARIFF, CompiledTariff
+
+_LOGGER = logging.getLogger(__name__)
+
+MC_DEFAULT_SAMPLES = 2000
+MC_MAX_SAMPLES = 20000
+MC_CHUNK_SAMPLES = 250
+# Wall-clock limit of one evaluation in seconds
+MC_DEFAULT_TIME_LIMIT = 20.0
+MC_MAX_TIME_LIMIT = 120.0
+# Never use more than this many worker processes, and always leave one core free
+MC_MAX_WORKERS = 2
+# Price deviation as a share of the mean absolute price
+PRICE_NOISE = 0.1
+# Relative deviation of the household load
+LOAD_NOISE = 0.2
+COST_PERCENTILES = (5, 50, 95)
+
+# Rows of the shared base matrix
+_ROWS = ("price", "export", "pv", "pv10", "pv90", "load", "hours")
+# SharedMemory takes track=False from Python 3.13 on
+_SHM_TRACK_KEYWORD = sys.version_info >= (3, 13)
+
+
+def worker_count() -> int:
+    """Return the number of worker processes to use on this machine."""
+    return max(1, min(MC_MAX_WORKERS, (os.cpu_count() or 2) - 1))
+
+
+def sample_trajectories(
+    price: np.ndarray,
+    pv: np.ndarray,
+    pv10: np.ndarray,
+    pv90: np.ndarray,
+    load: np.ndarray,
+    count: int,
+    rng: np.random.Generator,
+    correlation: float = SCENARIO_CORRELATION,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``count`` sampled (price, pv, load) trajectories, each ``(count, slots)``."""
+    slots = price.size
+    pv_samples = sample_pv_scenarios(pv, pv10, pv90, count, rng, correlation)
+    spread = math.sqrt(1.0 - correlation**2)
+    price_z = correlation * rng.standard_normal((count, 1)) + spread * rng.standard_normal((count, slots))
+    load_z = correlation * rng.standard_normal((count, 1)) + spread * rng.standard_normal((count, slots))
+    scale = PRICE_NOISE * float(np.mean(np.abs(price))) if slots else 0.0
+    price_samples = price + scale * price_z
+    load_samples = load * np.maximum(1.0 + LOAD_NOISE * load_z, 0.0)
+    return price_samples, pv_samples, load_samples
+
+
+def _attach(block: str) -> SharedMemory:
+    """Attach to an existing shared memory block without tracking it in this process.
+
+    The creator unlinks the block; a worker's resource tracker must not, or
+    the block would vanish (with a leak warning) when the worker exits.
+    """
+    if _SHM_TRACK_KEYWORD:
+        return SharedMemory(name=block, track=False)
+    shared = SharedMemory(name=block)
+    if os.name == "posix":
+        # Before 3.13 attaching registers the block with the resource tracker
+        resource_tracker.unregister(shared._name, "shared_memory")
+    return shared
+
+
+def evaluate_chunk(
+    block: str,
+    slots: int,
+    candidates: int,
+    samples: int,
+    seed: int,
+    battery: BatteryModel,
+    soc: float,
+    min_soc: float,
+    max_soc: float,
+    tariff: CompiledTariff,
+) -> np.ndarray:
+    """Simulate every candidate over one chunk of sampled trajectories.
+
+    Runs in a worker process. ``block`` names the shared memory block holding
+    the base rows (import and export price included) followed by the
+    candidate actions and targets. The sampled spot price deviations reach
+    the import and export prices through ``tariff``'s scales. Returns the
+    cost matrix ``(candidates, samples)``.
+    """
+    shared = _attach(block)
+    try:
+        matrix = np.ndarray((len(_ROWS) + 2 * candidates, slots), dtype=np.float64, buffer=shared.buf)
+        base = dict(zip(_ROWS, matrix[: len(_ROWS)].copy()))
+        action = matrix[len(_ROWS) : len(_ROWS) + candidates].astype(np.int8)
+        target = matrix[len(_ROWS) + candidates :].copy()
+    finally:
+        del matrix
+        shared.close()
+
+    spot = (base["price"] - tariff.import_offset) / tariff.import_scale
+    spot_samples, pv, load = sample_trajectories(
+        spot, base["pv"], base["pv10"], base["pv90"], base["load"],
+        samples, np.random.default_rng(seed),
+    )
+    deviation = spot_samples - spot
+    price = base["price"] + tariff.import_scale * deviation
+    export = base["export"] + tariff.export_scale * deviation
+    result = simulate_schedules(
+        action[:, None, :],
+        target[:, None, :],
+        price=price[None, :, :],
+        export_price=export[None, :, :],
+        pv=pv[None, :, :],
+        load=load[None, :, :],
+        hours=base["hours"],
+        soc=soc,
+        battery=battery,
+        min_soc=min_soc,
+        max_soc=max_soc,
+        terminal_price=price.mean(axis=-1)[None, :],
+    )
+    return result.cost
+
+
+@dataclass(frozen=True, slots=True)
+class CostDistribution:
+    """Summary of one candidate's simulated cost distribution (€)."""
+
+    mean: float
+    std: float
+    p5: float
+    p50: float
+    p95: float
+    cvar: float
+
+    @classmethod
+    def from_costs(cls, costs: np.ndarray) -> CostDistribution:
+        """Summarize a 1-D array of sampled costs."""
+        p5, p50, p95 = np.percentile(costs, COST_PERCENTILES)
+        return cls(
+            mean=float(costs.mean()),
+            std=float(costs.std()),
+            p5=float(p5),
+            p50=float(p50),
+            p95=float(p95),
+            cvar=float(expected_shortfall(costs, CVAR_TAIL)),
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        """Return a rounded mapping for service responses."""
+        return {
+            "mean": round(self.mean, 4),
+            "std": round(self.std, 4),
+            "p5": round(self.p5, 4),
+            "p50": round(self.p50, 4),
+            "p95": round(self.p95, 4),
+            "cvar": round(self.cvar, 4),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class MonteCarloResult:
+    """Cost distributions of all candidates over the evaluated samples."""
+
+    samples: int
+    requested: int
+    slots: int
+    elapsed_s: float
+    distributions: dict[str, CostDistribution]
+
+    @property
+    def completed(self) -> bool:
+        """Return True when every requested sample was evaluated."""
+        return self.samples >= self.requested
+
+    @property
+    def best(self) -> str | None:
+        """Return the candidate with the lowest expected cost."""
+        if not self.distributions:
+            return None
+        return min(self.distributions, key=lambda name: self.distributions[name].mean)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the service response payload."""
+        best = self.best
+        return {
+            "samples": self.samples,
+            "requested_samples": self.requested,
+            "completed": self.completed,
+            "slots": self.slots,
+            "elapsed_seconds": round(self.elapsed_s, 3),
+            "strategies": {
+                name: dist.as_dict()
+                for name, dist in self.distributions.items()
+                if name in BASE_STRATEGIES or name == "idle"
+            },
+            "best_candidate": {"name": best, **self.distributions[best].as_dict()} if best else None,
+        }
+
+
+class MonteCarloEvaluator:
+    """Runs one Monte Carlo evaluation at a time in a lazily started process pool."""
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        """Initialize the evaluator; worker processes start on first use."""
+        self._max_workers = max_workers or worker_count()
+        self._pool: ProcessPoolExecutor | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while an evaluation is in progress."""
+        return self._task is not None and not self._task.done()
+
+    async def async_evaluate(
+        self,
+        inputs: PlanningInputs,
+        pv10: np.ndarray,
+        pv90: np.ndarray,
+        *,
+        soc: float,
+        min_soc: float,
+        max_soc: float,
+        battery: BatteryModel,
+        params: StrategyParams = DEFAULT_PARAMS,
+        samples: int = MC_DEFAULT_SAMPLES,
+        time_limit: float = MC_DEFAULT_TIME_LIMIT,
+        seed: int | None = None,
+        tariff: CompiledTariff = SPOT_TARIFF,
+    ) -> MonteCarloResult:
+        """Evaluate every candidate over ``samples`` trajectories, within ``time_limit`` seconds.
+
+        ``inputs`` hold the import and export prices ``tariff`` made of the
+        spot price.
+        Stops early and summarizes the chunks finished so far when the time
+        limit is reached. Cancelling the awaiting task cancels queued chunks.
+        """
+        if self.running:
+            raise RuntimeError("A Monte Carlo evaluation is already running")
+        self._task = asyncio.current_task()
+        began = time.monotonic()
+        candidates = build_candidates(
+            inputs, soc=soc, min_soc=min_soc, max_soc=max_soc, battery=battery, params=params
+        )
+        block = _share_inputs(inputs, pv10, pv90, candidates)
+        try:
+            costs = await self._async_run_chunks(
+                block.name, len(inputs), candidates, samples, began + time_limit,
+                seed, battery, soc, min_soc, max_soc, tariff,
+            )
+        finally:
+            block.close()
+            block.unlink()
+            self._task = None
+
+        elapsed = time.monotonic() - began
+        done = costs.shape[1]
+        result = MonteCarloResult(
+            samples=done,
+            requested=samples,
+            slots=len(inputs),
+            elapsed_s=elapsed,
+            distributions={
+                name: CostDistribution.from_costs(costs[idx])
+                for idx, name in enumerate(candidates.names)
+            } if done else {},
+        )
+        _LOGGER.info(
+            "[monte_carlo] %d/%d samples × %d candidates × %d slots in %.1f s → best %s",
+            done, samples, len(candidates.names), len(inputs), elapsed, result.best,
+        )
+        return result
+
+    async def _async_run_chunks(
+        self,
+        block: str,
+        slots: int,
+        candidates: CandidateSet,
+        samples: int,
+        deadline: float,
+        seed: int | None,
+        battery: BatteryModel,
+        soc: float,
+        min_soc: float,
+        max_soc: float,
+        tariff: CompiledTariff,
+    ) -> np.ndarray:
+        """Feed chunks to the pool, at most one per worker in flight, until done or out of time."""
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        seeds = np.random.SeedSequence(seed).generate_state(math.ceil(samples / MC_CHUNK_SAMPLES))
+        sizes = [min(MC_CHUNK_SAMPLES, samples - start) for start in range(0, samples, MC_CHUNK_SAMPLES)]
+        count = len(candidates.names)
+        results: list[np.ndarray] = []
+        pending: set[asyncio.Future] = set()
+        queued = 0
+        try:
+            while queued < len(sizes) or pending:
+                while queued < len(sizes) and len(pending) < self._max_workers and time.monotonic() < deadline:
+                    pending.add(
+                        loop.run_in_executor(
+                            self._pool, evaluate_chunk, block, slots, count, sizes[queued],
+                            int(seeds[queued]), battery, soc, min_soc, max_soc, tariff,
+                        )
+                    )
+                    queued += 1
+                if not pending:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    _LOGGER.info("[monte_carlo] time limit reached after %d of %d chunks", len(results), len(sizes))
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+        finally:
+            for future in pending:
+                future.cancel()
+        if not results:
+            return np.empty((count, 0), dtype=np.float64)
+        return np.concatenate(results, axis=1)
+
+    def shutdown(self) -> None:
+        """Cancel a running evaluation and stop the worker processes without waiting."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _share_inputs(
+    inputs: PlanningInputs, pv10: np.ndarray, pv90: np.ndarray, candidates: CandidateSet
+) -> SharedMemory:
+    """Copy the base rows and candidate schedules into a new shared memory block."""
+    rows = len(_ROWS) + 2 * len(candidates.names)
+    slots = max(len(inputs), 1)
+    block = SharedMemory(create=True, size=rows * slots * np.dtype(np.float64).itemsize)
+    matrix = np.ndarray((rows, len(inputs)), dtype=np.float64, buffer=block.buf)
+    base = (inputs.price, inputs.export, inputs.pv, pv10, pv90, inputs.load, inputs.durations_h)
+    matrix[: len(_ROWS)] = np.stack(base)
+    matrix[len(_ROWS) : len(_ROWS) + len(candidates.names)] = candidates.action
+    matrix[len(_ROWS) + len(candidates.names) :] = candidates.target
+    del matrix
+    return block
@@ -5,7 +5,6 @@ from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.const import PERCENTAGE
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import EnergyOptimizerConfigEntry
 from .const import (
@@ -13,11 +12,11 @@ from .const import (
     CONF_MIN_SOC,
     DEFAULT_MAX_SOC,
     DEFAULT_MIN_SOC,
-    DOMAIN,
     ENTITY_MAX_SOC,
     ENTITY_MIN_SOC,
 )
 from .coordinator import EnergyOptimizerCoordinator
+from .entity import EnergyOptimizerEntity
 
 
 async def async_setup_entry(
@@ -33,10 +32,9 @@ async def async_setup_entry(
     ])
 
 
-class MinSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
+class MinSocNumber(EnergyOptimizerEntity, NumberEntity):
     """Minimum state of charge control."""
 
-    _attr_has_entity_name = True
     _attr_name = "Minimum SOC"
     _attr_icon = "mdi:battery-low"
     _attr_native_min_value = 0
@@ -51,9 +49,7 @@ class MinSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_MIN_SOC}"
-        self._attr_device_info = {"identifiers": {(DOMAIN, entry.entry_id)}}
+        super().__init__(coordinator, entry, ENTITY_MIN_SOC)
 
     @property
     def native_value(self) -> float:
@@ -64,12 +60,12 @@ class MinSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
         """Set new minimum SOC."""
         self.coordinator.set_min_soc(value)
         self.async_write_ha_state()
+        self.coordinator.async_replan("min_soc")
 
 
-class MaxSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
+class MaxSocNumber(EnergyOptimizerEntity, NumberEntity):
     """Maximum state of charge control."""
 
-    _attr_has_entity_name = True
     _attr_name = "Maximum SOC"
     _attr_icon = "mdi:battery-high"
     _attr_native_min_value = 0
@@ -84,9 +80,7 @@ class MaxSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_MAX_SOC}"
-        self._attr_device_info = {"identifiers": {(DOMAIN, entry.entry_id)}}
+        super().__init__(coordinator, entry, ENTITY_MAX_SOC)
 
     @property
     def native_value(self) -> float:
@@ -97,3 +91,4 @@ class MaxSocNumber(CoordinatorEntity[EnergyOptimizerCoordinator], NumberEntity):
         """Set new maximum SOC."""
         self.coordinator.set_max_soc(value)
         self.async_write_ha_state()
+        self.coordinator.async_replan("max_soc")
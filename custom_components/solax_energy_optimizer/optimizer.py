@@ -0,0 +1,325 @@
+"""Cost-optimal schedule by dynamic programming, warm-started across cycles.
+
+The SOC between min and max SOC is discretized into levels ``DP_SOC_STEP``
+percentage points apart. A backward pass over the horizon computes per slot
+and level the cheapest cost-to-go ``V[t, level]`` and the best level to move
+to; a forward pass from the measured SOC follows that policy. A move between
+two levels is feasible when the energy difference is within the charge /
+discharge rate for the slot, and it is billed as the grid energy it implies
+(load - PV + battery energy) at the import price, or the export price when
+the slot exports. An optional grid import limit lowers the charge rate of
+each slot to what keeps the slot's mean import under it, so charging never
+raises a capacity-tariff peak; discharging is never limited.
+
+``V[t]`` only depends on the slots from ``t`` on and on the value of the
+energy left at the end, which is priced at the duration-weighted mean price
+of the horizon's last ``DP_TERMINAL_HOURS``. Consecutive cycles see the same horizon with
+elapsed slots dropped from the front and a new SOC reading, so the solver
+keeps the previous tables and reuses them for the longest common tail of
+the two horizons, recomputing ``V`` only for the slots up to the last one
+whose boundaries or inputs differ. The measured SOC
+only enters the forward pass. A re-plan with unchanged inputs therefore costs
+one forward pass whatever the horizon length; new prices extending the
+horizon, different SOC limits or a different battery force a full solve.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from .inputs import PlanningInputs
+from .planner import CODE_CHARGE, CODE_DISCHARGE, CODE_IDLE, BatteryModel
+
+_LOGGER = logging.getLogger(__name__)
+
+# Distance between SOC levels in percentage points
+DP_SOC_STEP = 1.0
+# The energy left at the end is valued at the mean price of this last stretch
+DP_TERMINAL_HOURS = 24.0
+# Slack (kWh) on the rate limits against floating point rounding
+_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class Solution:
+    """Per-slot schedule of an optimal solve.
+
+    Attributes:
+        action: Action code per slot (int8).
+        target: Target SOC per slot, NaN when idle.
+        soc: SOC level the schedule reaches by the end of each slot.
+        expected_cost: Cost-to-go of the schedule from the measured SOC (€).
+        reused_slots: Slots whose cost-to-go came from the previous solve.
+        elapsed_ms: Solve latency.
+    """
+
+    action: np.ndarray
+    target: np.ndarray
+    soc: np.ndarray
+    expected_cost: float
+    reused_slots: int
+    elapsed_ms: float
+
+    @property
+    def warm(self) -> bool:
+        """Return True when part of the previous solve was reused."""
+        return self.reused_slots > 0
+
+
+@dataclass(slots=True)
+class SolverStats:
+    """Running latency and warm-start counters of a solver."""
+
+    solves: int = 0
+    warm_starts: int = 0
+    slots: int = 0
+    reused_slots: int = 0
+    last_ms: float = 0.0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, solution: Solution, slots: int) -> None:
+        """Account one solve."""
+        self.solves += 1
+        self.warm_starts += solution.warm
+        self.slots += slots
+        self.reused_slots += solution.reused_slots
+        self.last_ms = solution.elapsed_ms
+        self.total_ms += solution.elapsed_ms
+        self.max_ms = max(self.max_ms, solution.elapsed_ms)
+
+    @property
+    def hit_rate(self) -> float | None:
+        """Return the share of solves that reused part of the previous one."""
+        return self.warm_starts / self.solves if self.solves else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a rounded mapping for diagnostics."""
+        return {
+            "solves": self.solves,
+            "warm_starts": self.warm_starts,
+            "hit_rate": round(self.hit_rate, 3) if self.hit_rate is not None else None,
+            "reused_slot_share": round(self.reused_slots / self.slots, 3) if self.slots else None,
+            "last_ms": round(self.last_ms, 2),
+            "mean_ms": round(self.total_ms / self.solves, 2) if self.solves else None,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+@dataclass(slots=True)
+class _Tables:
+    """Inputs and value/policy tables of the previous solve."""
+
+    key: tuple
+    starts: np.ndarray
+    ends: np.ndarray
+    rows: np.ndarray
+    terminal_price: float
+    value: np.ndarray
+    policy: np.ndarray = field(repr=False)
+
+
+def soc_levels(min_soc: float, max_soc: float, step: float = DP_SOC_STEP) -> np.ndarray:
+    """Return the SOC levels the solver moves between, min and max SOC included."""
+    count = max(round((max_soc - min_soc) / step), 1) + 1
+    return np.linspace(min_soc, max_soc, count)
+
+
+def terminal_price(inputs: PlanningInputs, hours: float = DP_TERMINAL_HOURS) -> float:
+    """Return the duration-weighted mean price of the last ``hours`` of the horizon."""
+    since = inputs.ends[-1] - hours * 3600.0
+    overlap = np.maximum(inputs.ends - np.maximum(inputs.starts, since), 0.0)
+    return float((inputs.price * overlap).sum() / overlap.sum())
+
+
+def _slot_costs(
+    moves: np.ndarray, net: float, price: float, export_price: float, max_in: float, max_out: float
+) -> np.ndarray:
+    """Return the grid cost of every battery move (kWh) in one slot; infeasible moves are inf."""
+    grid = net + moves
+    cost = np.where(grid > 0, grid * price, grid * export_price)
+    return np.where((moves <= max_in + _TOLERANCE) & (moves >= -max_out - _TOLERANCE), cost, np.inf)
+
+
+def _backward(
+    rows: np.ndarray,
+    hours: np.ndarray,
+    moves: np.ndarray,
+    battery: BatteryModel,
+    value: np.ndarray,
+    policy: np.ndarray,
+    last: int,
+) -> None:
+    """Fill ``value[t]`` / ``policy[t]`` for ``t = last .. 1`` from ``value[last + 1]``.
+
+    Slot 0 is solved by the forward pass from the measured SOC.
+    """
+    for idx in range(last, 0, -1):
+        price, export_price, net_kw, charge_kw = rows[:, idx]
+        total = _slot_costs(
+            moves, net_kw * hours[idx], price, export_price,
+            charge_kw * hours[idx], battery.max_discharge_kw * hours[idx],
+        ) + value[idx + 1][None, :]
+        best = np.argmin(total, axis=1)
+        policy[idx] = best
+        value[idx] = total[np.arange(best.size), best]
+
+
+class HorizonSolver:
+    """Receding-horizon DP solver that keeps its tables between cycles."""
+
+    def __init__(self, step: float = DP_SOC_STEP) -> None:
+        """Initialize an empty solver."""
+        self._step = step
+        self._tables: _Tables | None = None
+        self.stats = SolverStats()
+
+    def reset(self) -> None:
+        """Forget the previous solve."""
+        self._tables = None
+
+    def solve(
+        self,
+        inputs: PlanningInputs,
+        *,
+        soc: float,
+        battery: BatteryModel,
+        min_soc: float,
+        max_soc: float,
+        export_price: np.ndarray | None = None,
+        import_limit: float | None = None,
+    ) -> Solution:
+        """Return the cost-optimal schedule over ``inputs`` starting from ``soc``.
+
+        ``import_limit`` (kW) caps the mean grid import of the slots the
+        battery charges in; slots whose load alone exceeds it cannot charge.
+        """
+        began = time.perf_counter()
+        count = len(inputs)
+        levels = soc_levels(min_soc, max_soc, self._step)
+        kwh = battery.capacity_kwh / 100.0
+        moves = (levels[None, :] - levels[:, None]) * kwh
+        hours = inputs.durations_h
+        net = inputs.load - inputs.pv
+        charge = np.full(count, battery.max_charge_kw)
+        if import_limit is not None:
+            charge = np.clip(import_limit - net, 0.0, charge)
+        rows = np.stack((inputs.price, inputs.export if export_price is None else export_price, net, charge))
+        key = (battery, float(min_soc), float(max_soc), self._step)
+        final_price = terminal_price(inputs)
+
+        value = np.empty((count + 1, levels.size), dtype=np.float64)
+        policy = np.zeros((count, levels.size), dtype=np.int16)
+        reused = self._common_tail(key, inputs, rows, final_price)
+        if reused:
+            cached = self._tables
+            value[count - reused:] = cached.value[cached.value.shape[0] - reused - 1:]
+            policy[count - reused:] = cached.policy[cached.policy.shape[0] - reused:]
+        else:
+            value[count] = -levels * kwh * final_price
+        _backward(rows, hours, moves, battery, value, policy, count - 1 - reused)
+        self._tables = _Tables(key, inputs.starts, inputs.ends, rows, final_price, value, policy)
+
+        # Slot 0 from the measured SOC, then follow the policy
+        path = np.empty(count, dtype=np.intp)
+        first = _slot_costs(
+            (levels - soc) * kwh, rows[2, 0] * hours[0], rows[0, 0], rows[1, 0],
+            rows[3, 0] * hours[0], battery.max_discharge_kw * hours[0],
+        )
+        if not np.isfinite(first).any():
+            # Outside the reachable range (e.g. max SOC just lowered): move as close as possible
+            first[np.argmin(np.abs(levels - soc))] = 0.0
+        total = first + value[1]
+        path[0] = int(np.argmin(total))
+        for idx in range(1, count):
+            path[idx] = policy[idx, path[idx - 1]]
+
+        reached = levels[path]
+        action, target = _to_actions(inputs, reached, soc, battery, min_soc, max_soc, self._step)
+        solution = Solution(
+            action=action,
+            target=target,
+            soc=reached,
+            expected_cost=float(total[path[0]]),
+            reused_slots=min(reused, count - 1),
+            elapsed_ms=(time.perf_counter() - began) * 1000.0,
+        )
+        self.stats.record(solution, count)
+        _LOGGER.debug(
+            "[optimal] %d slots × %d levels, %d reused, %.1f ms",
+            count, levels.size, solution.reused_slots, solution.elapsed_ms,
+        )
+        return solution
+
+    def energy_value(self, reached: np.ndarray) -> np.ndarray:
+        """Return what one kWh more in the battery after each slot is worth along an SOC path (€/kWh).
+
+        ``reached`` is the ``soc`` of the last solution; the value is the slope
+        of that solve's cost-to-go between the neighbouring levels.
+        """
+        tables = self._tables
+        battery, min_soc, max_soc, step = tables.key
+        levels = soc_levels(min_soc, max_soc, step)
+        if levels.size < 2:
+            return np.zeros(reached.size)
+        index = np.clip(np.rint((reached - min_soc) / (levels[1] - levels[0])).astype(np.intp), 0, levels.size - 1)
+        lower = np.maximum(index - 1, 0)
+        upper = np.minimum(index + 1, levels.size - 1)
+        rows = np.arange(reached.size)
+        after = tables.value[1:]
+        kwh = (levels[upper] - levels[lower]) * battery.capacity_kwh / 100.0
+        return (after[rows, lower] - after[rows, upper]) / kwh
+
+    def _common_tail(self, key: tuple, inputs: PlanningInputs, rows: np.ndarray, final_price: float) -> int:
+        """Return how many trailing slots match the previous solve in boundaries and inputs."""
+        cached = self._tables
+        if (
+            cached is None
+            or cached.key != key
+            # Bucketed horizons regroup the same prices; equal up to rounding
+            or not math.isclose(cached.terminal_price, final_price, rel_tol=1e-9)
+        ):
+            return 0
+        tail = min(len(inputs), cached.starts.size)
+        same = (
+            (cached.starts[-tail:] == inputs.starts[-tail:])
+            & (cached.ends[-tail:] == inputs.ends[-tail:])
+            & (cached.rows[:, -tail:] == rows[:, -tail:]).all(axis=0)
+        )
+        differing = np.flatnonzero(~same)
+        return tail - 1 - int(differing[-1]) if differing.size else tail
+
+
+def _to_actions(
+    inputs: PlanningInputs,
+    reached: np.ndarray,
+    soc: float,
+    battery: BatteryModel,
+    min_soc: float,
+    max_soc: float,
+    step: float = DP_SOC_STEP,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Express the SOC path as charge / discharge / idle actions with targets.
+
+    A slot is idle when self-use (battery absorbs the solar surplus / covers
+    the load) already reaches the level, charge when the level is at or above
+    the SOC at the start of the slot, discharge otherwise.
+    """
+    kwh = battery.capacity_kwh / 100.0
+    hours = inputs.durations_h
+    before = np.concatenate(([soc], reached[:-1]))
+    surplus = (inputs.pv - inputs.load) * hours
+    room = np.maximum(max_soc - before, 0.0) * kwh
+    reserve = np.maximum(before - min_soc, 0.0) * kwh
+    self_use = np.minimum(np.minimum(np.maximum(surplus, 0.0), room), battery.max_charge_kw * hours) - np.minimum(
+        np.minimum(np.maximum(-surplus, 0.0), reserve), battery.max_discharge_kw * hours
+    )
+    move = (reached - before) * kwh
+    idle = np.abs(move - self_use) <= kwh * step / 2
+    action = np.where(idle, CODE_IDLE, np.where(move >= 0, CODE_CHARGE, CODE_DISCHARGE)).astype(np.int8)
+    return action, np.where(idle, np.nan, reached)
@@ -0,0 +1,265 @@
+"""Capacity-tariff peak tracking from a grid power sensor.
+
+Capacity tariffs bill the highest quarter-hour mean grid import of the
+month, usually with a minimum billed peak. Every state change of the grid
+power entity is one sample, held until the next one as an energy meter would
+integrate it, and each sample costs O(1):
+
+* the rolling 15-minute demand keeps the held segments of the last window
+  in a deque together with their running energy sum. Segments that leave the
+  window are popped from the front, and only the oldest one is counted in
+  part, so the mean is one subtraction and one division;
+* the billed demand integrates the import energy of the clock-aligned
+  quarter-hour in progress. When a sample crosses a quarter boundary, the
+  closed quarter's mean is compared against the monthly peak, which starts
+  again from zero with the first quarter of a new (local) month. Quarters
+  skipped by a long gap all held the same power and are folded in as one.
+
+Export (negative power) counts as zero import. The monthly peak and when it
+was set are persisted, so a restart mid-month keeps the peak to stay under.
+"""
+from __future__ import annotations
+
+import logging
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .load_forecast import read_power_kw
+
+_LOGGER = logging.getLogger(__name__)
+
+# Length of a demand interval in seconds
+DEMAND_WINDOW = 900.0
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "peak_demand"
+SAVE_DELAY = 60
+
+
+def _quarter_start(when: float) -> float:
+    """Return the start of the clock-aligned demand interval containing ``when``."""
+    return when - when % DEMAND_WINDOW
+
+
+def _month(when: float) -> str:
+    """Return the local calendar month of a POSIX timestamp as ``YYYY-MM``."""
+    return dt_util.as_local(dt_util.utc_from_timestamp(when)).strftime("%Y-%m")
+
+
+@dataclass(frozen=True, slots=True)
+class PeakDemand:
+    """Grid demand snapshot for the sensors and the planners.
+
+    Attributes:
+        rolling_kw: Mean import over the last 15 minutes.
+        quarter_kw: Mean import of the current quarter-hour over its elapsed part.
+        quarter_kwh: Import energy of the current quarter-hour so far.
+        quarter_end: POSIX end of the current quarter-hour.
+        peak_kw: Highest completed quarter-hour mean of the month (0 at month start).
+        peak_time: POSIX start of that quarter-hour, None before the first one.
+        limit_kw: Import the planners stay under — the monthly peak, at least the floor.
+    """
+
+    rolling_kw: float
+    quarter_kw: float
+    quarter_kwh: float
+    quarter_end: float
+    peak_kw: float
+    peak_time: float | None
+    limit_kw: float
+
+    def projected_kw(self, now: float, power_kw: float) -> float:
+        """Return the quarter-hour mean if the import stays at ``power_kw`` until it ends."""
+        remaining = max(self.quarter_end - now, 0.0)
+        return (self.quarter_kwh + max(power_kw, 0.0) * remaining / 3600.0) / (DEMAND_WINDOW / 3600.0)
+
+
+class DemandMeter:
+    """Rolling 15-minute demand and monthly peak of quarter-hour means."""
+
+    def __init__(self) -> None:
+        """Initialize an empty meter."""
+        # (start, end, kW) of the held segments overlapping the rolling window
+        self._segments: deque[tuple[float, float, float]] = deque()
+        self._window_kwh = 0.0
+        self._first: float | None = None
+        self._last: float | None = None
+        self._power = 0.0
+        self._quarter = 0.0
+        self._quarter_kwh = 0.0
+        self.month: str | None = None
+        self.peak_kw = 0.0
+        self.peak_time: float | None = None
+
+    def sample(self, when: float, power_kw: float) -> bool:
+        """Account the held power up to ``when``, then hold ``power_kw``.
+
+        Returns True when the monthly peak changed.
+        """
+        changed = self.advance(when)
+        self._power = max(power_kw, 0.0)
+        return changed
+
+    def advance(self, when: float) -> bool:
+        """Account the held power up to ``when``; True when the monthly peak changed."""
+        if self._last is None:
+            self._first = self._last = when
+            self._quarter = _quarter_start(when)
+            return self._roll(self._quarter)
+        if when <= self._last:
+            return False
+        start, self._last = self._last, when
+        self._extend_window(start, when)
+        return self._integrate(start, when)
+
+    def rolling_kw(self) -> float:
+        """Return the mean import over the last window up to the latest sample."""
+        if self._last is None or self._last <= self._first:
+            return self._power
+        cutoff = self._last - DEMAND_WINDOW
+        energy = self._window_kwh
+        if self._segments:
+            head_start, _, head_kw = self._segments[0]
+            energy -= head_kw * max(cutoff - head_start, 0.0) / 3600.0
+        span = min(DEMAND_WINDOW, self._last - self._first)
+        return max(energy, 0.0) / (span / 3600.0)
+
+    def snapshot(self, floor_kw: float = 0.0) -> PeakDemand:
+        """Return the demand up to the latest sample."""
+        elapsed = (self._last - self._quarter) if self._last is not None else 0.0
+        return PeakDemand(
+            rolling_kw=self.rolling_kw(),
+            quarter_kw=self._quarter_kwh / (elapsed / 3600.0) if elapsed > 0 else self._power,
+            quarter_kwh=self._quarter_kwh,
+            quarter_end=self._quarter + DEMAND_WINDOW,
+            peak_kw=self.peak_kw,
+            peak_time=self.peak_time,
+            limit_kw=max(self.peak_kw, floor_kw),
+        )
+
+    def _extend_window(self, start: float, end: float) -> None:
+        """Append the held segment [start, end) and drop segments older than the window."""
+        energy = self._power * (end - start) / 3600.0
+        if self._segments and self._segments[-1][2] == self._power:
+            first, _, power = self._segments.pop()
+            self._segments.append((first, end, power))
+        else:
+            self._segments.append((start, end, self._power))
+        self._window_kwh += energy
+        cutoff = end - DEMAND_WINDOW
+        while self._segments and self._segments[0][1] <= cutoff:
+            head_start, head_end, head_kw = self._segments.popleft()
+            self._window_kwh -= head_kw * (head_end - head_start) / 3600.0
+        if not self._segments:
+            self._window_kwh = 0.0
+
+    def _integrate(self, start: float, end: float) -> bool:
+        """Add the held power over [start, end) to the quarter-hour(s) it falls in."""
+        boundary = self._quarter + DEMAND_WINDOW
+        if end < boundary:
+            self._quarter_kwh += self._power * (end - start) / 3600.0
+            return False
+        self._quarter_kwh += self._power * (boundary - start) / 3600.0
+        changed = self._close(self._quarter, self._quarter_kwh / (DEMAND_WINDOW / 3600.0))
+        current = _quarter_start(end)
+        if current > boundary:
+            # Every skipped quarter held the same power; the latest decides the month
+            changed |= self._close(current - DEMAND_WINDOW, self._power)
+        self._quarter = current
+        self._quarter_kwh = self._power * (end - current) / 3600.0
+        return self._roll(current) or changed
+
+    def _close(self, start: float, mean_kw: float) -> bool:
+        """Compare a completed quarter-hour against the monthly peak."""
+        changed = self._roll(start)
+        if mean_kw > self.peak_kw:
+            self.peak_kw = mean_kw
+            self.peak_time = start
+            changed = True
+        return changed
+
+    def _roll(self, start: float) -> bool:
+        """Start a new monthly peak when ``start`` lies in another month."""
+        month = _month(start)
+        if month == self.month:
+            return False
+        self.month = month
+        self.peak_kw = 0.0
+        self.peak_time = None
+        return True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the monthly peak for storage."""
+        return {"month": self.month, "peak_kw": self.peak_kw, "peak_time": self.peak_time}
+
+    def restore(self, stored: dict[str, Any]) -> None:
+        """Restore a monthly peak saved with :meth:`as_dict`."""
+        self.month = stored.get("month")
+        self.peak_kw = float(stored.get("peak_kw") or 0.0)
+        self.peak_time = stored.get("peak_time")
+
+
+class PeakDemandTracker:
+    """Feeds every state change of the grid power entity into a persisted DemandMeter."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, entity_id: str, floor_kw: float) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.floor_kw = floor_kw
+        self.meter = DemandMeter()
+        self.loaded = False
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{STORAGE_KEY}")
+
+    async def async_load(self) -> None:
+        """Restore the stored monthly peak and start metering."""
+        stored = await self._store.async_load()
+        if stored:
+            self.meter.restore(stored)
+        self.loaded = True
+        power_kw = read_power_kw(self.hass, self.entity_id)
+        if power_kw is not None:
+            self.sample(dt_util.utcnow().timestamp(), power_kw)
+        _LOGGER.info(
+            "[peak] %s: monthly peak %.2f kW (%s) restored, billing floor %.2f kW",
+            self.entity_id,
+            self.meter.peak_kw,
+            self.meter.month or "new month",
+            self.floor_kw,
+        )
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Sample the grid power on every state change; returns the unsubscribe callback."""
+        return async_track_state_change_event(self.hass, [self.entity_id], self._handle_state_change)
+
+    @callback
+    def _handle_state_change(self, event: Event[EventStateChangedData]) -> None:
+        """Feed one state change into the meter."""
+        new_state = event.data["new_state"]
+        if new_state is None:
+            return
+        power_kw = read_power_kw(self.hass, self.entity_id)
+        if power_kw is not None:
+            self.sample(new_state.last_updated_timestamp, power_kw)
+
+    def sample(self, when: float, power_kw: float) -> None:
+        """Account one grid power reading in kW (positive = import)."""
+        if not self.loaded:
+            return  # the stored peak decides which month is being metered
+        if self.meter.sample(when, power_kw):
+            self._store.async_delay_save(self.meter.as_dict, SAVE_DELAY)
+
+    def summary(self, now: float) -> PeakDemand:
+        """Return the demand up to ``now``; a steady power sends no state changes."""
+        if self.loaded and self.meter.advance(now):
+            self._store.async_delay_save(self.meter.as_dict, SAVE_DELAY)
+        return self.meter.snapshot(self.floor_kw)
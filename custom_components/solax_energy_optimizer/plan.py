@@ -0,0 +1,181 @@
+"""Run-length encoded representation of the optimizer's horizon plan.
+
+The plan also answers per-slot queries (action, target SOC, prices, solar,
+load and expected cost) for the ``get_plan`` service. The slot rows and a
+running sum of the expected cost are built once per plan, on the first
+query; a time-range query then is two binary searches over the sorted slot
+bounds and a slice.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from itertools import pairwise
+from typing import Any
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_SEGMENTS
+from .planner import ACTIONS, SlotPlan
+
+
+@dataclass(frozen=True, slots=True)
+class PlanSegment:
+    """A run of consecutive slots sharing the same action and target SOC."""
+
+    start: datetime
+    end: datetime
+    action: str
+    target_soc: float | None
+    expected_price: float | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "action": self.action,
+            "target_soc": self.target_soc,
+            "expected_price": self.expected_price,
+        }
+
+
+def slot_costs(slot_plan: SlotPlan) -> np.ndarray:
+    """Return the expected grid cost of every slot in currency.
+
+    The grid covers the household load net of solar plus the planned battery
+    energy; imports are billed at the import price and exports earn the
+    export price.
+    """
+    hours = (slot_plan.ends - slot_plan.starts) / 3600.0
+    grid = -slot_plan.pv * hours
+    if slot_plan.load is not None:
+        grid = grid + slot_plan.load * hours
+    if slot_plan.battery_kwh is not None:
+        grid = grid + slot_plan.battery_kwh
+    export_price = slot_plan.price if slot_plan.export_price is None else slot_plan.export_price
+    return np.where(grid > 0, grid * slot_plan.price, grid * export_price)
+
+
+def encode_segments(slot_plan: SlotPlan) -> list[PlanSegment]:
+    """Collapse per-slot plan arrays into run-length encoded segments."""
+    count = len(slot_plan)
+    if count == 0:
+        return []
+
+    # NaN never compares equal, so idle targets are mapped to a sentinel first
+    targets = np.where(np.isnan(slot_plan.target_soc), -1.0, slot_plan.target_soc)
+    changed = (slot_plan.action[1:] != slot_plan.action[:-1]) | (targets[1:] != targets[:-1])
+    bounds = np.concatenate(([0], np.flatnonzero(changed) + 1, [count]))
+
+    weights = slot_plan.ends - slot_plan.starts
+    weighted_price = np.concatenate(([0.0], np.cumsum(slot_plan.price * weights)))
+    cumulative_time = np.concatenate(([0.0], np.cumsum(weights)))
+
+    segments: list[PlanSegment] = []
+    for first, stop in pairwise(bounds):
+        duration = cumulative_time[stop] - cumulative_time[first]
+        target = slot_plan.target_soc[first]
+        segments.append(
+            PlanSegment(
+                start=dt_util.utc_from_timestamp(float(slot_plan.starts[first])),
+                end=dt_util.utc_from_timestamp(float(slot_plan.ends[stop - 1])),
+                action=ACTIONS[int(slot_plan.action[first])],
+                target_soc=None if np.isnan(target) else round(float(target), 1),
+                expected_price=(
+                    round(float((weighted_price[stop] - weighted_price[first]) / duration), 4)
+                    if duration > 0
+                    else None
+                ),
+            )
+        )
+    return segments
+
+
+class Plan:
+    """Immutable horizon plan produced once per optimization run."""
+
+    def __init__(self, slots: SlotPlan, strategy: str, generated_at: datetime) -> None:
+        """Initialize the plan from per-slot arrays."""
+        self.slots = slots
+        self.strategy = strategy
+        self.generated_at = generated_at
+        self.segments: list[PlanSegment] = encode_segments(slots)
+
+    def segment_at(self, when: datetime) -> PlanSegment | None:
+        """Return the segment covering ``when``, if any."""
+        for segment in self.segments:
+            if segment.start <= when < segment.end:
+                return segment
+        return None
+
+    def next_change(self, when: datetime) -> datetime | None:
+        """Return the time the planned action next changes after ``when``."""
+        for segment in self.segments:
+            if segment.end > when:
+                return segment.end if segment is not self.segments[-1] else None
+        return None
+
+    @cached_property
+    def _slot_rows(self) -> tuple[list[dict[str, Any]], np.ndarray]:
+        """Return one serialized row per slot and the running sum of their cost."""
+        slots = self.slots
+        cost = slot_costs(slots)
+        export_price = slots.price if slots.export_price is None else slots.export_price
+        load = slots.load if slots.load is not None else np.zeros(len(slots))
+        columns = zip(
+            slots.starts.tolist(),
+            slots.ends.tolist(),
+            slots.action.tolist(),
+            slots.target_soc.tolist(),
+            slots.soc.tolist(),
+            slots.price.tolist(),
+            export_price.tolist(),
+            slots.pv.tolist(),
+            load.tolist(),
+            cost.tolist(),
+        )
+        rows = [
+            {
+                "start": dt_util.utc_from_timestamp(start).isoformat(),
+                "end": dt_util.utc_from_timestamp(end).isoformat(),
+                "action": ACTIONS[action],
+                "target_soc": None if np.isnan(target) else round(target, 1),
+                "soc": round(soc, 1),
+                "import_price": round(import_price, 4),
+                "export_price": round(export, 4),
+                "pv": round(pv, 3),
+                "load": round(household, 3),
+                "expected_cost": round(slot_cost, 4),
+            }
+            for start, end, action, target, soc, import_price, export, pv, household, slot_cost in columns
+        ]
+        return rows, np.concatenate(([0.0], np.cumsum(cost)))
+
+    def slot_table(self, start: float | None = None, end: float | None = None) -> dict[str, Any]:
+        """Return the slots overlapping ``[start, end)`` (POSIX seconds) and their total cost."""
+        rows, cumulative = self._slot_rows
+        first = int(np.searchsorted(self.slots.ends, start, side="right")) if start is not None else 0
+        stop = int(np.searchsorted(self.slots.starts, end, side="left")) if end is not None else len(rows)
+        stop = max(first, stop)
+        return {
+            "strategy": self.strategy,
+            "generated_at": self.generated_at.isoformat(),
+            "expected_cost": round(float(cumulative[stop] - cumulative[first]), 4),
+            "slot_count": stop - first,
+            "slots": rows[first:stop],
+        }
+
+    @cached_property
+    def attributes(self) -> dict[str, Any]:
+        """Return the serialized plan; computed once and reused for every state write."""
+        return {
+            "strategy": self.strategy,
+            "generated_at": self.generated_at.isoformat(),
+            "horizon_start": self.segments[0].start.isoformat() if self.segments else None,
+            "horizon_end": self.segments[-1].end.isoformat() if self.segments else None,
+            "segment_count": len(self.segments),
+            ATTR_SEGMENTS: [segment.as_dict() for segment in self.segments],
+        }
@@ -0,0 +1,274 @@
+"""Horizon planner: rolls the selected strategy forward over every price slot.
+
+The coordinator only decides what to do right now. To show what the
+optimizer intends to do for the rest of the horizon, the planner applies the
+same strategy rules slot by slot while projecting the battery SOC forward
+with the configured charge/discharge rates.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from .const import (
+    ACTION_CHARGE,
+    ACTION_DISCHARGE,
+    ACTION_IDLE,
+    CONF_BALANCED_CHARGE,
+    CONF_BALANCED_DISCHARGE,
+    CONF_BATTERY_CAPACITY,
+    CONF_CHEAP_BAND,
+    CONF_EXPENSIVE_BAND,
+    CONF_MAX_CHARGE_RATE,
+    CONF_MAX_DISCHARGE_RATE,
+    CONF_SOLAR_HEADROOM,
+    CONF_SOLAR_SURPLUS,
+    DEFAULT_BATTERY_CAPACITY,
+    DEFAULT_MAX_CHARGE_RATE,
+    DEFAULT_MAX_DISCHARGE_RATE,
+    STRATEGY_BALANCED,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_MINIMIZE_COST,
+)
+from .inputs import PlanningInputs
+
+_LOGGER = logging.getLogger(__name__)
+
+# Compact per-slot action encoding used in plan arrays
+ACTIONS: tuple[str, ...] = (ACTION_IDLE, ACTION_CHARGE, ACTION_DISCHARGE)
+ACTION_CODES: dict[str, int] = {action: code for code, action in enumerate(ACTIONS)}
+CODE_IDLE = ACTION_CODES[ACTION_IDLE]
+CODE_CHARGE = ACTION_CODES[ACTION_CHARGE]
+CODE_DISCHARGE = ACTION_CODES[ACTION_DISCHARGE]
+
+
+@dataclass(frozen=True, slots=True)
+class BatteryModel:
+    """Battery hardware limits taken from the config entry."""
+
+    capacity_kwh: float
+    max_charge_kw: float
+    max_discharge_kw: float
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> BatteryModel:
+        """Build a battery model from config entry data."""
+        return cls(
+            capacity_kwh=float(config.get(CONF_BATTERY_CAPACITY) or DEFAULT_BATTERY_CAPACITY),
+            max_charge_kw=float(config.get(CONF_MAX_CHARGE_RATE) or DEFAULT_MAX_CHARGE_RATE),
+            max_discharge_kw=float(config.get(CONF_MAX_DISCHARGE_RATE) or DEFAULT_MAX_DISCHARGE_RATE),
+        )
+
+    def charge_step(self, hours: float) -> float:
+        """Return the SOC gain in % from charging at full rate for ``hours``."""
+        return self.max_charge_kw * hours / self.capacity_kwh * 100.0
+
+    def discharge_step(self, hours: float) -> float:
+        """Return the SOC loss in % from discharging at full rate for ``hours``."""
+        return self.max_discharge_kw * hours / self.capacity_kwh * 100.0
+
+
+@dataclass(frozen=True, slots=True)
+class StrategyParams:
+    """Thresholds of the rule-based strategies, tunable through the options.
+
+    Attributes:
+        cheap_band: minimize_cost charges in this share of the future price
+            range above its minimum.
+        expensive_band: minimize_cost discharges in this share below its maximum.
+        balanced_charge: balanced charges below this fraction of the future mean.
+        balanced_discharge: balanced discharges above this fraction of the mean.
+        solar_headroom: SOC percentage points maximize_self_consumption keeps
+            free below max SOC ahead of solar.
+        solar_surplus_kw: Solar surplus over the load that counts as solar.
+    """
+
+    cheap_band: float = 0.25
+    expensive_band: float = 0.25
+    balanced_charge: float = 0.9
+    balanced_discharge: float = 1.1
+    solar_headroom: float = 20.0
+    solar_surplus_kw: float = 1.0
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> StrategyParams:
+        """Build parameters from config entry options, defaulting missing ones."""
+        defaults = cls()
+        return cls(
+            cheap_band=float(options.get(CONF_CHEAP_BAND, defaults.cheap_band)),
+            expensive_band=float(options.get(CONF_EXPENSIVE_BAND, defaults.expensive_band)),
+            balanced_charge=float(options.get(CONF_BALANCED_CHARGE, defaults.balanced_charge)),
+            balanced_discharge=float(options.get(CONF_BALANCED_DISCHARGE, defaults.balanced_discharge)),
+            solar_headroom=float(options.get(CONF_SOLAR_HEADROOM, defaults.solar_headroom)),
+            solar_surplus_kw=float(options.get(CONF_SOLAR_SURPLUS, defaults.solar_surplus_kw)),
+        )
+
+    def as_options(self) -> dict[str, float]:
+        """Return the parameters keyed by their option names."""
+        return {
+            CONF_CHEAP_BAND: self.cheap_band,
+            CONF_EXPENSIVE_BAND: self.expensive_band,
+            CONF_BALANCED_CHARGE: self.balanced_charge,
+            CONF_BALANCED_DISCHARGE: self.balanced_discharge,
+            CONF_SOLAR_HEADROOM: self.solar_headroom,
+            CONF_SOLAR_SURPLUS: self.solar_surplus_kw,
+        }
+
+
+DEFAULT_PARAMS = StrategyParams()
+
+
+@dataclass(frozen=True, slots=True)
+class SlotPlan:
+    """Per-slot plan arrays aligned with the planning inputs.
+
+    Attributes:
+        starts: Slot start times as POSIX seconds.
+        ends: Slot end times as POSIX seconds.
+        action: Action code per slot (index into ACTIONS).
+        target_soc: Target SOC per slot in %, NaN for idle slots.
+        soc: Projected SOC at the start of each slot in %.
+        price: Import price per slot in currency/kWh.
+        pv: Expected average solar power per slot in kW.
+        export_price: Export price per slot, None when export earns the import price.
+        load: Expected average household load per slot in kW.
+        battery_kwh: Energy into (+) or out of (-) the battery per slot in
+            kWh, the SOC change the plan projects.
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    action: np.ndarray
+    target_soc: np.ndarray
+    soc: np.ndarray
+    price: np.ndarray
+    pv: np.ndarray
+    export_price: np.ndarray | None = None
+    load: np.ndarray | None = None
+    battery_kwh: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return int(self.starts.size)
+
+
+def _suffix_stats(price: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the min, max and mean of price[k:] for every k."""
+    reversed_price = price[::-1]
+    suffix_min = np.minimum.accumulate(reversed_price)[::-1]
+    suffix_max = np.maximum.accumulate(reversed_price)[::-1]
+    counts = np.arange(price.size, 0, -1, dtype=np.float64)
+    suffix_mean = np.cumsum(reversed_price)[::-1] / counts
+    return suffix_min, suffix_max, suffix_mean
+
+
+def _next_solar(surplus: np.ndarray, threshold: float = 1.0) -> np.ndarray:
+    """Return, per slot, the index of the next later slot with solar surplus above ``threshold`` (-1 if none)."""
+    result = np.full(surplus.size, -1, dtype=np.int64)
+    upcoming = -1
+    for idx in range(surplus.size - 1, -1, -1):
+        result[idx] = upcoming
+        if surplus[idx] > threshold:
+            upcoming = idx
+    return result
+
+
+def _decide(
+    strategy: str,
+    idx: int,
+    soc: float,
+    price: np.ndarray,
+    stats: tuple[np.ndarray, np.ndarray, np.ndarray],
+    next_solar: np.ndarray,
+    min_soc: float,
+    max_soc: float,
+    params: StrategyParams = DEFAULT_PARAMS,
+) -> tuple[int, float]:
+    """Return (action code, target SOC) for slot ``idx`` at projected ``soc``."""
+    if soc < min_soc:
+        return CODE_CHARGE, min_soc
+
+    current = float(price[idx])
+    suffix_min, suffix_max, suffix_mean = stats
+
+    if strategy == STRATEGY_MINIMIZE_COST:
+        price_range = suffix_max[idx] - suffix_min[idx]
+        if current <= suffix_min[idx] + price_range * params.cheap_band and soc < max_soc:
+            return CODE_CHARGE, max_soc
+        if current >= suffix_max[idx] - price_range * params.expensive_band and soc > min_soc:
+            return CODE_DISCHARGE, min_soc
+    elif strategy == STRATEGY_MAXIMIZE_SELF_CONSUMPTION:
+        if next_solar[idx] >= 0 and soc > max_soc - params.solar_headroom:
+            return CODE_DISCHARGE, max_soc - params.solar_headroom
+    elif strategy == STRATEGY_GRID_INDEPENDENCE:
+        if soc < max_soc:
+            return CODE_CHARGE, max_soc
+    elif strategy == STRATEGY_BALANCED:
+        if current < suffix_mean[idx] * params.balanced_charge and soc < max_soc:
+            return CODE_CHARGE, max_soc
+        if current > suffix_mean[idx] * params.balanced_discharge and soc > min_soc:
+            return CODE_DISCHARGE, min_soc
+    return CODE_IDLE, np.nan
+
+
+def build_slot_plan(
+    inputs: PlanningInputs,
+    strategy: str,
+    *,
+    soc: float,
+    min_soc: float,
+    max_soc: float,
+    battery: BatteryModel,
+    first_action: str | None = None,
+    first_target: float | None = None,
+    params: StrategyParams = DEFAULT_PARAMS,
+) -> SlotPlan:
+    """Roll ``strategy`` forward over ``inputs`` starting from ``soc``.
+
+    ``first_action``/``first_target`` pin the first slot to the decision the
+    coordinator already made, so the plan always agrees with next_action.
+    """
+    count = len(inputs)
+    actions = np.zeros(count, dtype=np.int8)
+    targets = np.full(count, np.nan, dtype=np.float64)
+    socs = np.empty(count, dtype=np.float64)
+    stats = _suffix_stats(inputs.price)
+    next_solar = _next_solar(inputs.surplus, params.solar_surplus_kw)
+    hours = inputs.durations_h
+
+    projected = float(soc)
+    for idx in range(count):
+        socs[idx] = projected
+        if idx == 0 and first_action is not None:
+            code = ACTION_CODES.get(first_action, CODE_IDLE)
+            target = float(first_target) if first_target is not None and code != CODE_IDLE else np.nan
+        else:
+            code, target = _decide(
+                strategy, idx, projected, inputs.price, stats, next_solar, min_soc, max_soc, params
+            )
+        actions[idx] = code
+        targets[idx] = target
+        if code == CODE_CHARGE:
+            projected = min(target, projected + battery.charge_step(hours[idx]))
+        elif code == CODE_DISCHARGE:
+            projected = max(target, projected - battery.discharge_step(hours[idx]))
+
+    _LOGGER.debug("[planner] %s: rolled out %d slots from SOC %.1f%%", strategy, count, soc)
+    return SlotPlan(
+        starts=inputs.starts,
+        ends=inputs.ends,
+        action=actions,
+        target_soc=targets,
+        soc=socs,
+        price=inputs.price,
+        pv=inputs.pv,
+        export_price=inputs.export_price,
+        load=inputs.load,
+        battery_kwh=np.diff(socs, append=projected) * (battery.capacity_kwh / 100.0),
+    )
+
@@ -0,0 +1,81 @@
+"""Order-statistics index over the current price series.
+
+Built once per price update: one argsort yields every slot's rank,
+percentile and quantile band, and suffix scans yield the min/max/mean of
+all slots from any point onwards. Strategies and sensors query the index
+instead of re-sorting the price list every cycle.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .inputs import PlanningInputs
+
+# Number of quantile bands; 5 gives quintiles (band 1 = cheapest 20 %)
+PRICE_BANDS = 5
+
+
+@dataclass(frozen=True, slots=True)
+class FuturePriceStats:
+    """Summary of the price slots starting at or after a point in time."""
+
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+
+class PriceRankIndex:
+    """Per-slot rank, percentile and quantile band of one price series."""
+
+    def __init__(self, inputs: PlanningInputs, bands: int = PRICE_BANDS) -> None:
+        """Precompute ranks and suffix statistics for ``inputs``."""
+        self.inputs = inputs
+        self.bands = bands
+        price = inputs.price
+        count = price.size
+        self.sorted_prices = np.sort(price, kind="stable")
+        # Rank = number of strictly cheaper slots, so equal prices share a rank
+        self.ranks = np.searchsorted(self.sorted_prices, price, side="left").astype(np.int64)
+        self.percentiles = (
+            self.ranks * (100.0 / (count - 1)) if count > 1 else np.zeros(count, dtype=np.float64)
+        )
+        self.quantile_bands = np.minimum(
+            (self.percentiles * bands / 100.0).astype(np.int64) + 1, bands
+        )
+
+        reversed_price = price[::-1]
+        self._suffix_min = np.minimum.accumulate(reversed_price)[::-1]
+        self._suffix_max = np.maximum.accumulate(reversed_price)[::-1]
+        self._suffix_mean = np.cumsum(reversed_price)[::-1] / np.arange(count, 0, -1, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Return the number of indexed slots."""
+        return int(self.inputs.price.size)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the price at ``fraction`` (0–1) of the sorted series."""
+        if not len(self):
+            return None
+        return float(np.quantile(self.sorted_prices, fraction))
+
+    def future_stats(self, when: float) -> FuturePriceStats | None:
+        """Return min/max/mean of the slots starting at or after ``when``."""
+        first = int(np.searchsorted(self.inputs.starts, when, side="left"))
+        if first >= len(self):
+            return None
+        return FuturePriceStats(
+            count=len(self) - first,
+            minimum=float(self._suffix_min[first]),
+            maximum=float(self._suffix_max[first]),
+            mean=float(self._suffix_mean[first]),
+        )
+
+    def slot_stats(self, when: float) -> tuple[int, float, int] | None:
+        """Return (1-based rank, percentile, quantile band) of the slot containing ``when``."""
+        idx = self.inputs.index_at(when)
+        if idx is None:
+            return None
+        return int(self.ranks[idx]) + 1, float(self.percentiles[idx]), int(self.quantile_bands[idx])
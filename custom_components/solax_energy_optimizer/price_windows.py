@@ -0,0 +1,147 @@
+"""Cheapest / most expensive contiguous price window search.
+
+Built once per price update from the aligned planning inputs. Window sums
+come from prefix sums, so the average price of every window of a given
+length is computed in one O(n) pass; the peak (or trough) slot price inside
+each window comes from a sliding-window monotonic deque, also O(n). Query
+results are memoized until the prices change.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+from .inputs import PlanningInputs
+
+_LOGGER = logging.getLogger(__name__)
+
+WINDOW_MODE_CHEAPEST = "cheapest"
+WINDOW_MODE_MOST_EXPENSIVE = "most_expensive"
+WINDOW_MODES = [WINDOW_MODE_CHEAPEST, WINDOW_MODE_MOST_EXPENSIVE]
+
+
+@dataclass(frozen=True, slots=True)
+class PriceWindow:
+    """A contiguous run of price slots."""
+
+    start: float
+    end: float
+    average_price: float
+    extreme_price: float
+    slots: int
+
+    def as_dict(self, mode: str) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "end": dt_util.utc_from_timestamp(self.end).isoformat(),
+            "average_price": round(self.average_price, 5),
+            "peak_price" if mode == WINDOW_MODE_CHEAPEST else "lowest_price": round(self.extreme_price, 5),
+            "slots": self.slots,
+        }
+
+
+def sliding_max(values: np.ndarray, width: int) -> np.ndarray:
+    """Return the maximum of every window ``values[i:i + width]`` using a monotonic deque."""
+    count = values.size - width + 1
+    if width <= 0 or count <= 0:
+        return np.empty(0, dtype=values.dtype)
+    result = np.empty(count, dtype=values.dtype)
+    window: deque[int] = deque()
+    for idx in range(values.size):
+        while window and values[window[-1]] <= values[idx]:
+            window.pop()
+        window.append(idx)
+        if window[0] <= idx - width:
+            window.popleft()
+        if idx >= width - 1:
+            result[idx - width + 1] = values[window[0]]
+    return result
+
+
+class PriceWindowEngine:
+    """Answers contiguous window queries over one price series."""
+
+    def __init__(self, inputs: PlanningInputs) -> None:
+        """Precompute prefix sums for ``inputs``."""
+        self.inputs = inputs
+        durations = inputs.ends - inputs.starts
+        self._slot_seconds = float(np.median(durations)) if durations.size else 0.0
+        self._cost_prefix = np.concatenate(([0.0], np.cumsum(inputs.price * durations)))
+        self._time_prefix = np.concatenate(([0.0], np.cumsum(durations)))
+        # A gap between slot i-1 and i breaks contiguity for windows spanning it
+        gaps = np.concatenate(([0], (inputs.starts[1:] > inputs.ends[:-1] + 1).astype(np.int64)))
+        self._gap_prefix = np.cumsum(gaps)
+        self._cache: dict[tuple[int, str, int, int], PriceWindow | None] = {}
+
+    def matches(self, inputs: PlanningInputs) -> bool:
+        """Return True if ``inputs`` carries the same price series."""
+        return np.array_equal(self.inputs.starts, inputs.starts) and np.array_equal(
+            self.inputs.price, inputs.price
+        )
+
+    def slots_for(self, hours: float) -> int:
+        """Return the number of slots needed to cover ``hours``."""
+        if self._slot_seconds <= 0:
+            return 0
+        return max(1, math.ceil(hours * 3600.0 / self._slot_seconds - 1e-9))
+
+    def find(
+        self,
+        hours: float,
+        mode: str = WINDOW_MODE_CHEAPEST,
+        *,
+        start_after: float | None = None,
+        end_before: float | None = None,
+    ) -> PriceWindow | None:
+        """Return the cheapest/most expensive window of ``hours`` within the bounds.
+
+        ``start_after`` may fall inside a slot; that slot still qualifies so
+        "from now" queries include the running slot.
+        """
+        width = self.slots_for(hours)
+        starts, ends = self.inputs.starts, self.inputs.ends
+        first = 0 if start_after is None else int(np.searchsorted(ends, start_after, side="right"))
+        stop = len(self.inputs) if end_before is None else int(np.searchsorted(ends, end_before, side="right"))
+        if width == 0 or stop - first < width:
+            return None
+
+        key = (width, mode, first, stop)
+        if key in self._cache:
+            return self._cache[key]
+
+        prices = self.inputs.price[first:stop]
+        lo = np.arange(first, stop - width + 1)
+        hi = lo + width
+        averages = (self._cost_prefix[hi] - self._cost_prefix[lo]) / (self._time_prefix[hi] - self._time_prefix[lo])
+        # Windows whose interior contains a gap are not contiguous
+        contiguous = (self._gap_prefix[hi - 1] - self._gap_prefix[lo]) == 0
+
+        if mode == WINDOW_MODE_MOST_EXPENSIVE:
+            scores = np.where(contiguous, averages, -np.inf)
+            extremes = -sliding_max(-prices, width)
+            best = int(np.argmax(scores))
+        else:
+            scores = np.where(contiguous, averages, np.inf)
+            extremes = sliding_max(prices, width)
+            best = int(np.argmin(scores))
+
+        result: PriceWindow | None = None
+        if np.isfinite(scores[best]):
+            begin = first + best
+            result = PriceWindow(
+                start=float(starts[begin]),
+                end=float(ends[begin + width - 1]),
+                average_price=float(averages[best]),
+                extreme_price=float(extremes[best]),
+                slots=width,
+            )
+        self._cache[key] = result
+        _LOGGER.debug("[windows] %s %.2fh in slots [%d, %d) → %s", mode, hours, first, stop, result)
+        return result
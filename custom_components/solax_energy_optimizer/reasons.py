@@ -0,0 +1,143 @@
+"""Compact decision reasons with lazily rendered descriptions.
+
+The optimizer records *why* it chose an action as an enumerated code plus
+the numeric inputs that led to it. Only the code becomes entity state, so
+the recorder sees a small, stable set of values; the frontend shows the
+code's translated label. The English sentence is rendered on first access,
+which in practice means only when it is logged or asked for through the
+``get_plan`` service.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any
+
+from .const import (
+    REASON_ABOVE_AVERAGE,
+    REASON_AUTOMATION_DISABLED,
+    REASON_BATTERY_FULL,
+    REASON_BELOW_AVERAGE,
+    REASON_CHARGE_TO_MAX,
+    REASON_CHEAP_BUT_FULL,
+    REASON_CHEAP_PRICE,
+    REASON_EXPENSIVE_BUT_EMPTY,
+    REASON_EXPENSIVE_PRICE,
+    REASON_FLEET_PLAN,
+    REASON_MANUAL_OVERRIDE,
+    REASON_MODERATE_PRICE,
+    REASON_NEAR_AVERAGE,
+    REASON_NO_FUTURE_PRICES,
+    REASON_NO_PRICE_DATA,
+    REASON_NO_SIGNIFICANT_SOLAR,
+    REASON_NO_SOLAR_FORECAST,
+    REASON_NONE,
+    REASON_OPTIMAL_PLAN,
+    REASON_PEAK_LIMIT,
+    REASON_ROBUST_PLAN,
+    REASON_SAFETY_OVERRIDE,
+    REASON_SOC_UNAVAILABLE,
+    REASON_SOLAR_HAS_ROOM,
+    REASON_SOLAR_MAKE_ROOM,
+)
+
+REASON_TEMPLATES: dict[str, str] = {
+    REASON_NONE: "No decision yet",
+    REASON_AUTOMATION_DISABLED: "automation disabled",
+    REASON_MANUAL_OVERRIDE: "manual override active",
+    REASON_SAFETY_OVERRIDE: "Safety override — SOC {soc:.1f}% is below minimum {min_soc:.0f}%",
+    REASON_SOC_UNAVAILABLE: "Battery SOC unavailable",
+    REASON_NO_PRICE_DATA: "No price data available",
+    REASON_NO_FUTURE_PRICES: "No future price entries found",
+    REASON_CHEAP_PRICE: (
+        "Price €{price:.4f} ≤ cheap threshold €{cheap_threshold:.4f} "
+        "and SOC {soc:.1f}% < max {max_soc:.0f}%"
+    ),
+    REASON_EXPENSIVE_PRICE: (
+        "Price €{price:.4f} ≥ expensive threshold €{expensive_threshold:.4f} "
+        "and SOC {soc:.1f}% > min {min_soc:.0f}%"
+    ),
+    REASON_MODERATE_PRICE: (
+        "Price €{price:.4f} is in moderate range "
+        "(€{cheap_threshold:.4f}–€{expensive_threshold:.4f})"
+    ),
+    REASON_CHEAP_BUT_FULL: "Price is cheap but battery already at max SOC ({soc:.1f}%)",
+    REASON_EXPENSIVE_BUT_EMPTY: "Price is expensive but battery already at min SOC ({soc:.1f}%)",
+    REASON_NO_SOLAR_FORECAST: "No solar forecast data available",
+    REASON_SOLAR_MAKE_ROOM: (
+        "Solar expected {pv:.2f} kW at {period_start} — discharging to {threshold:.0f}% "
+        "to make room (SOC {soc:.1f}% > headroom threshold {threshold:.0f}%)"
+    ),
+    REASON_SOLAR_HAS_ROOM: (
+        "Solar expected {pv:.2f} kW at {period_start} — "
+        "battery has enough room (SOC {soc:.1f}% ≤ {threshold:.0f}%)"
+    ),
+    REASON_NO_SIGNIFICANT_SOLAR: "No significant solar production expected (all periods < {surplus_kw:.1f} kW)",
+    REASON_CHARGE_TO_MAX: "Grid independence — charging to max {max_soc:.0f}% (SOC {soc:.1f}% < {max_soc:.0f}%)",
+    REASON_BATTERY_FULL: "Battery already at max SOC ({soc:.1f}% ≥ {max_soc:.0f}%)",
+    REASON_BELOW_AVERAGE: (
+        "Price €{price:.4f} < charge threshold €{charge_threshold:.4f} (avg €{avg_price:.4f} × {factor:.2f}) "
+        "and SOC {soc:.1f}% < max {max_soc:.0f}%"
+    ),
+    REASON_ABOVE_AVERAGE: (
+        "Price €{price:.4f} > discharge threshold €{discharge_threshold:.4f} (avg €{avg_price:.4f} × {factor:.2f}) "
+        "and SOC {soc:.1f}% > min {min_soc:.0f}%"
+    ),
+    REASON_NEAR_AVERAGE: (
+        "Price €{price:.4f} in moderate range "
+        "(charge=€{charge_threshold:.4f}, discharge=€{discharge_threshold:.4f}, avg=€{avg_price:.4f})"
+    ),
+    REASON_ROBUST_PLAN: (
+        "Schedule '{candidate}' has the best risk-adjusted cost over {scenarios} solar scenarios "
+        "(expected €{expected_cost:.2f}, worst 10% €{cvar:.2f})"
+    ),
+    REASON_OPTIMAL_PLAN: (
+        "Cost-optimal schedule over {slots} slots moves to SOC {level:.0f}% "
+        "(expected €{expected_cost:.2f})"
+    ),
+    REASON_FLEET_PLAN: (
+        "Joint schedule of {members} batteries on one grid connection moves to SOC {level:.0f}% "
+        "(expected €{expected_cost:.2f})"
+    ),
+    REASON_PEAK_LIMIT: (
+        "Charging held — it would lift this quarter-hour to {projected:.2f} kW, "
+        "above the peak limit of {limit:.2f} kW (monthly peak {peak:.2f} kW)"
+    ),
+}
+
+
+# Parameters that are readings of the moment rather than part of the
+# decision: they change every cycle while the decision stays the same
+READING_PARAMS = frozenset(
+    {"soc", "price", "pv", "load", "projected", "level", "slots", "scenarios", "expected_cost", "cvar"}
+)
+
+
+@dataclass(frozen=True)
+class DecisionReason:
+    """Why the optimizer chose its action: an enumerated code plus its inputs."""
+
+    code: str = REASON_NONE
+    params: dict[str, Any] = field(default_factory=dict)
+
+    @cached_property
+    def text(self) -> str:
+        """Render the human-readable description (only done on first access)."""
+        template = REASON_TEMPLATES.get(self.code, self.code)
+        try:
+            return template.format(**self.params)
+        except (KeyError, ValueError, TypeError):
+            return template
+
+    @property
+    def decision_params(self) -> tuple[tuple[str, Any], ...]:
+        """Return the parameters that define the decision (thresholds, limits), without readings."""
+        return tuple(sorted((key, value) for key, value in self.params.items() if key not in READING_PARAMS))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the code, the rendered description and the parameters."""
+        return {"code": self.code, "description": self.text, "parameters": self.params}
+
+    def __str__(self) -> str:
+        """Return the rendered description, so %s logging stays lazy."""
+        return self.text
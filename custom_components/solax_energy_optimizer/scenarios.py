@@ -0,0 +1,227 @@
+"""Scenario-based (robust) planning over sampled solar scenarios.
+
+The forecast's 10th / 50th / 90th percentile estimates describe how uncertain
+each slot's solar production is. Scenarios are sampled from those bands with
+a strongly correlated day-level draw (a cloudy day is cloudy all day) plus a
+smaller independent per-slot component.
+
+A fixed set of candidate schedules — the rollouts of the four rule-based
+strategies, "always idle", and a grid of price-quantile threshold
+schedules — is simulated against every scenario in one vectorized pass.
+The chosen candidate minimizes the expected cost plus a penalty on the
+expected cost of the worst scenarios (CVaR). The number of scenarios is
+capped so candidates × scenarios × slots stays within a per-cycle budget.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .const import (
+    STRATEGY_BALANCED,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_MINIMIZE_COST,
+)
+from .inputs import PlanningInputs
+from .planner import (
+    CODE_CHARGE,
+    CODE_DISCHARGE,
+    CODE_IDLE,
+    DEFAULT_PARAMS,
+    BatteryModel,
+    StrategyParams,
+    build_slot_plan,
+)
+from .simulation import simulate_schedules
+
+_LOGGER = logging.getLogger(__name__)
+
+# z-score of the 90th percentile of a standard normal
+Z90 = 1.2815515655446004
+# Correlation of a slot's deviation with the scenario's day-level deviation
+SCENARIO_CORRELATION = 0.8
+# Upper bound on candidates × scenarios × slots evaluated per cycle
+ROBUST_BUDGET = 1_000_000
+ROBUST_MAX_SCENARIOS = 128
+ROBUST_MIN_SCENARIOS = 8
+# Weight of (CVaR − mean) in the objective; 0 = risk neutral
+ROBUST_RISK_WEIGHT = 0.5
+# Share of worst scenarios averaged by the CVaR
+CVAR_TAIL = 0.1
+# Price quantiles tried as charge / discharge thresholds
+CHARGE_QUANTILES = (0.1, 0.2, 0.3, 0.4)
+DISCHARGE_QUANTILES = (0.6, 0.7, 0.8, 0.9)
+
+BASE_STRATEGIES = (
+    STRATEGY_MINIMIZE_COST,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_BALANCED,
+)
+
+
+def sample_pv_scenarios(
+    pv: np.ndarray,
+    pv10: np.ndarray,
+    pv90: np.ndarray,
+    count: int,
+    rng: np.random.Generator,
+    correlation: float = SCENARIO_CORRELATION,
+) -> np.ndarray:
+    """Return ``count`` sampled PV trajectories, shape ``(count, slots)``.
+
+    Each slot's distribution is a two-piece normal through the 10/50/90
+    percentiles, so asymmetric bands are preserved.
+    """
+    slots = pv.size
+    day = rng.standard_normal((count, 1))
+    noise = rng.standard_normal((count, slots))
+    z = correlation * day + np.sqrt(1.0 - correlation**2) * noise
+    upper = np.maximum(pv90 - pv, 0.0) / Z90
+    lower = np.maximum(pv - pv10, 0.0) / Z90
+    return np.maximum(pv + np.where(z > 0, z * upper, z * lower), 0.0)
+
+
+def expected_shortfall(costs: np.ndarray, tail: float = CVAR_TAIL) -> np.ndarray:
+    """Return the mean of the worst ``tail`` share of costs along the last axis."""
+    worst = max(1, int(np.ceil(costs.shape[-1] * tail)))
+    return np.mean(np.sort(costs, axis=-1)[..., -worst:], axis=-1)
+
+
+@dataclass(frozen=True, slots=True)
+class CandidateSet:
+    """Candidate schedules, shape ``(candidates, slots)``, with their names."""
+
+    names: tuple[str, ...]
+    action: np.ndarray
+    target: np.ndarray
+
+
+def build_candidates(
+    inputs: PlanningInputs,
+    *,
+    soc: float,
+    min_soc: float,
+    max_soc: float,
+    battery: BatteryModel,
+    params: StrategyParams = DEFAULT_PARAMS,
+) -> CandidateSet:
+    """Return the rule-based rollouts plus price-threshold schedules."""
+    names: list[str] = []
+    actions: list[np.ndarray] = []
+    targets: list[np.ndarray] = []
+
+    for strategy in BASE_STRATEGIES:
+        plan = build_slot_plan(
+            inputs, strategy, soc=soc, min_soc=min_soc, max_soc=max_soc, battery=battery, params=params
+        )
+        names.append(strategy)
+        actions.append(plan.action)
+        targets.append(plan.target_soc)
+
+    slots = len(inputs)
+    names.append("idle")
+    actions.append(np.full(slots, CODE_IDLE, dtype=np.int8))
+    targets.append(np.full(slots, np.nan))
+
+    # Threshold schedules in one shot: (charge quantile × discharge quantile, slots)
+    low = np.quantile(inputs.price, CHARGE_QUANTILES) if slots else np.zeros(len(CHARGE_QUANTILES))
+    high = np.quantile(inputs.price, DISCHARGE_QUANTILES) if slots else np.zeros(len(DISCHARGE_QUANTILES))
+    charge = inputs.price[None, None, :] <= low[:, None, None]
+    discharge = (inputs.price[None, None, :] >= high[None, :, None]) & ~charge
+    grid_action = np.where(charge, CODE_CHARGE, np.where(discharge, CODE_DISCHARGE, CODE_IDLE)).astype(np.int8)
+    grid_target = np.where(charge, max_soc, np.where(discharge, min_soc, np.nan))
+    names.extend(
+        f"p{low_q * 100:.0f}/p{high_q * 100:.0f}"
+        for low_q in CHARGE_QUANTILES
+        for high_q in DISCHARGE_QUANTILES
+    )
+    actions.extend(grid_action.reshape(-1, slots))
+    targets.extend(grid_target.reshape(-1, slots))
+
+    return CandidateSet(names=tuple(names), action=np.stack(actions), target=np.stack(targets))
+
+
+@dataclass(frozen=True, slots=True)
+class RobustChoice:
+    """The selected candidate schedule and its cost distribution summary."""
+
+    name: str
+    action: np.ndarray
+    target: np.ndarray
+    expected_cost: float
+    cvar: float
+    objective: float
+    scenarios: int
+    candidates: int
+    elapsed_ms: float
+
+
+def choose_robust_schedule(
+    inputs: PlanningInputs,
+    pv10: np.ndarray,
+    pv90: np.ndarray,
+    *,
+    soc: float,
+    min_soc: float,
+    max_soc: float,
+    battery: BatteryModel,
+    params: StrategyParams = DEFAULT_PARAMS,
+    risk_weight: float = ROBUST_RISK_WEIGHT,
+    budget: int = ROBUST_BUDGET,
+    seed: int | None = None,
+) -> RobustChoice | None:
+    """Evaluate every candidate across sampled PV scenarios and pick the best."""
+    slots = len(inputs)
+    if not slots:
+        return None
+    began = time.perf_counter()
+    candidates = build_candidates(
+        inputs, soc=soc, min_soc=min_soc, max_soc=max_soc, battery=battery, params=params
+    )
+    count = len(candidates.names)
+    scenarios = min(ROBUST_MAX_SCENARIOS, budget // (count * slots))
+    if scenarios < ROBUST_MIN_SCENARIOS:
+        # Horizon too long for the budget: keep fewer candidates, rule-based ones first
+        scenarios = ROBUST_MIN_SCENARIOS
+        count = max(1, min(count, budget // (scenarios * slots)))
+
+    rng = np.random.default_rng(seed)
+    pv = sample_pv_scenarios(inputs.pv, pv10, pv90, scenarios, rng)
+    result = simulate_schedules(
+        candidates.action[:count, None, :],
+        candidates.target[:count, None, :],
+        price=inputs.price,
+        pv=pv[None, :, :],
+        load=inputs.load,
+        hours=inputs.durations_h,
+        soc=soc,
+        battery=battery,
+        min_soc=min_soc,
+        max_soc=max_soc,
+        export_price=inputs.export_price,
+    )
+    expected = result.cost.mean(axis=1)
+    cvar = expected_shortfall(result.cost)
+    objective = expected + risk_weight * (cvar - expected)
+    best = int(np.argmin(objective))
+    elapsed_ms = (time.perf_counter() - began) * 1000.0
+    _LOGGER.debug(
+        "[robust] %d candidates × %d scenarios × %d slots in %.1f ms → %s",
+        count, scenarios, slots, elapsed_ms, candidates.names[best],
+    )
+    return RobustChoice(
+        name=candidates.names[best],
+        action=candidates.action[best],
+        target=candidates.target[best],
+        expected_cost=float(expected[best]),
+        cvar=float(cvar[best]),
+        objective=float(objective[best]),
+        scenarios=scenarios,
+        candidates=count,
+        elapsed_ms=elapsed_ms,
+    )
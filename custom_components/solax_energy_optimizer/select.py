@@ -4,11 +4,11 @@ from __future__ import annotations
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, ENTITY_CURRENT_STRATEGY, STRATEGIES
-from .coordinator import EnergyOptimizerCoordinator
 from . import EnergyOptimizerConfigEntry
+from .const import ENTITY_CURRENT_STRATEGY, STRATEGIES
+from .coordinator import EnergyOptimizerCoordinator
+from .entity import EnergyOptimizerEntity
 
 
 async def async_setup_entry(
@@ -22,10 +22,9 @@ async def async_setup_entry(
     async_add_entities([StrategySelect(coordinator, entry)])
 
 
-class StrategySelect(CoordinatorEntity[EnergyOptimizerCoordinator], SelectEntity):
+class StrategySelect(EnergyOptimizerEntity, SelectEntity):
     """Select entity for choosing optimization strategy."""
 
-    _attr_has_entity_name = True
     _attr_translation_key = "strategy"
     _attr_icon = "mdi:strategy"
     _attr_options = STRATEGIES
@@ -36,12 +35,8 @@ class StrategySelect(CoordinatorEntity[EnergyOptimizerCoordinator], SelectEntity
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the select."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_CURRENT_STRATEGY}"
+        super().__init__(coordinator, entry, ENTITY_CURRENT_STRATEGY)
         self._attr_name = "Strategy"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
 
     @property
     def current_option(self) -> str:
@@ -52,4 +47,4 @@ class StrategySelect(CoordinatorEntity[EnergyOptimizerCoordinator], SelectEntity
         """Change the strategy."""
         self.coordinator.set_strategy(option)
         self.async_write_ha_state()
-        await self.coordinator.async_request_refresh()
+        self.coordinator.async_replan("strategy")
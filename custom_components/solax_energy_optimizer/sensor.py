@@ -15,32 +15,56 @@ from homeassistant.components.sensor import (
 from homeassistant.const import (
     CURRENCY_EURO,
     PERCENTAGE,
+    EntityCategory,
+    UnitOfPower,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
+from . import EnergyOptimizerConfigEntry
 from .const import (
     ATTR_BATTERY_SOC,
     ATTR_CURRENT_PRICE,
     ATTR_DRY_RUN_MODE,
-    DOMAIN,
+    ATTR_PRICE_BAND,
+    ATTR_PRICE_PERCENTILE,
+    ATTR_PRICE_RANK,
+    ATTR_REASON_PARAMS,
+    ATTR_SEGMENTS,
     ENTITY_BATTERY_SOC,
+    ENTITY_CHEAPEST_WINDOW,
     ENTITY_CURRENT_PRICE,
     ENTITY_DAILY_COST,
     ENTITY_DAILY_SAVINGS,
     ENTITY_DECISION_REASON,
+    ENTITY_FLEXIBLE_LOAD,
+    ENTITY_FORECAST_BIAS,
+    ENTITY_FORECAST_CORRECTION,
+    ENTITY_FORECAST_MAE,
+    ENTITY_GRID_DEMAND,
     ENTITY_LAST_ACTION_TIME,
     ENTITY_MONTHLY_COST,
+    ENTITY_MONTHLY_PEAK,
     ENTITY_MONTHLY_SAVINGS,
     ENTITY_NEXT_ACTION,
     ENTITY_NEXT_UPDATE_TIME,
+    ENTITY_PRICE_PERCENTILE,
+    ENTITY_PRICE_RANK,
+    ENTITY_SCHEDULE,
+    ENTITY_SHADOW_COST,
     ENTITY_SOLAR_FORECAST_TODAY,
     ENTITY_TARGET_SOC,
     ENTITY_UPDATE_COUNT,
+    FLEXIBLE_LOAD_BOILER,
+    FLEXIBLE_LOAD_EV,
+    REASON_CODES,
 )
 from .coordinator import EnergyOptimizerCoordinator, EnergyOptimizerData
-from . import EnergyOptimizerConfigEntry
+from .entity import EnergyOptimizerEntity
+from .price_index import PRICE_BANDS
+from .price_windows import WINDOW_MODE_CHEAPEST
+from .scenarios import BASE_STRATEGIES
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -78,7 +102,6 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
         name="Daily cost",
         device_class=SensorDeviceClass.MONETARY,
         native_unit_of_measurement=CURRENCY_EURO,
-        state_class=SensorStateClass.TOTAL,
         value_fn=lambda data: round(data.daily_cost, 2),
     ),
     EnergyOptimizerSensorDescription(
@@ -87,7 +110,6 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
         name="Daily savings",
         device_class=SensorDeviceClass.MONETARY,
         native_unit_of_measurement=CURRENCY_EURO,
-        state_class=SensorStateClass.TOTAL,
         icon="mdi:piggy-bank",
         value_fn=lambda data: round(data.daily_savings, 2),
     ),
@@ -97,7 +119,6 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
         name="Monthly cost",
         device_class=SensorDeviceClass.MONETARY,
         native_unit_of_measurement=CURRENCY_EURO,
-        state_class=SensorStateClass.TOTAL,
         value_fn=lambda data: round(data.monthly_cost, 2),
     ),
     EnergyOptimizerSensorDescription(
@@ -106,7 +127,6 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
         name="Monthly savings",
         device_class=SensorDeviceClass.MONETARY,
         native_unit_of_measurement=CURRENCY_EURO,
-        state_class=SensorStateClass.TOTAL,
         icon="mdi:piggy-bank",
         value_fn=lambda data: round(data.monthly_savings, 2),
     ),
@@ -131,6 +151,24 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
             round(data.current_price, 4) if data.current_price is not None else None
         ),
     ),
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_PRICE_PERCENTILE,
+        translation_key="price_percentile",
+        name="Price percentile",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:chart-bell-curve-cumulative",
+        value_fn=lambda data: (
+            round(data.price_percentile, 1) if data.price_percentile is not None else None
+        ),
+    ),
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_PRICE_RANK,
+        translation_key="price_rank",
+        name="Price rank",
+        icon="mdi:sort-numeric-ascending",
+        value_fn=lambda data: data.price_rank,
+    ),
     EnergyOptimizerSensorDescription(
         key=ENTITY_SOLAR_FORECAST_TODAY,
         translation_key="solar_forecast_today",
@@ -153,16 +191,96 @@ SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
         icon="mdi:battery-arrow-up",
         value_fn=lambda data: data.target_soc,
     ),
+)
+
+DECISION_REASON_SENSOR = EnergyOptimizerSensorDescription(
+    key=ENTITY_DECISION_REASON,
+    translation_key="decision_reason",
+    name="Decision reason",
+    icon="mdi:comment-question",
+    device_class=SensorDeviceClass.ENUM,
+    options=REASON_CODES,
+    value_fn=lambda data: data.decision_reason.code,
+)
+
+# Only created when a measured PV power sensor is configured
+FORECAST_ACCURACY_SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_FORECAST_BIAS,
+        translation_key="forecast_bias",
+        name="Forecast bias",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:plus-minus-variant",
+        value_fn=lambda data: (
+            round(data.forecast_accuracy.bias_kw, 3)
+            if data.forecast_accuracy is not None and data.forecast_accuracy.bias_kw is not None
+            else None
+        ),
+    ),
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_FORECAST_MAE,
+        translation_key="forecast_mae",
+        name="Forecast mean absolute error",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:target",
+        value_fn=lambda data: (
+            round(data.forecast_accuracy.mae_kw, 3)
+            if data.forecast_accuracy is not None and data.forecast_accuracy.mae_kw is not None
+            else None
+        ),
+    ),
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_FORECAST_CORRECTION,
+        translation_key="forecast_correction",
+        name="Forecast correction factor",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:tune-variant",
+        value_fn=lambda data: (
+            round(data.forecast_accuracy.correction, 3) if data.forecast_accuracy is not None else None
+        ),
+    ),
+)
+
+# Only created when a grid power sensor is configured
+PEAK_DEMAND_SENSORS: tuple[EnergyOptimizerSensorDescription, ...] = (
+    EnergyOptimizerSensorDescription(
+        key=ENTITY_GRID_DEMAND,
+        translation_key="grid_demand",
+        name="Grid demand (15 min)",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:transmission-tower-import",
+        value_fn=lambda data: (
+            round(data.peak_demand.rolling_kw, 3) if data.peak_demand is not None else None
+        ),
+    ),
     EnergyOptimizerSensorDescription(
-        key=ENTITY_DECISION_REASON,
-        translation_key="decision_reason",
-        name="Decision reason",
-        icon="mdi:comment-question",
-        value_fn=lambda data: data.decision_reason,
+        key=ENTITY_MONTHLY_PEAK,
+        translation_key="monthly_peak_demand",
+        name="Monthly peak demand",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:chart-bell-curve",
+        value_fn=lambda data: (
+            round(data.peak_demand.peak_kw, 3) if data.peak_demand is not None else None
+        ),
     ),
 )
 
 
+FLEXIBLE_LOAD_NAMES: dict[str, str] = {
+    FLEXIBLE_LOAD_EV: "EV charger",
+    FLEXIBLE_LOAD_BOILER: "Boiler",
+}
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: EnergyOptimizerConfigEntry,
@@ -175,17 +293,33 @@ async def async_setup_entry(
         EnergyOptimizerSensor(coordinator, description, entry)
         for description in SENSORS
     ]
+    entities.append(DecisionReasonSensor(coordinator, DECISION_REASON_SENSOR, entry))
+    if coordinator.forecast_accuracy is not None:
+        entities.extend(
+            EnergyOptimizerSensor(coordinator, description, entry)
+            for description in FORECAST_ACCURACY_SENSORS
+        )
+    if coordinator.peak_demand is not None:
+        entities.extend(
+            EnergyOptimizerSensor(coordinator, description, entry)
+            for description in PEAK_DEMAND_SENSORS
+        )
     entities.append(UpdateCountSensor(coordinator, entry))
+    entities.append(ScheduleSensor(coordinator, entry))
+    entities.extend(
+        CheapestWindowSensor(coordinator, entry, hours)
+        for hours in coordinator.window_hours
+    )
+    entities.extend(ShadowCostSensor(coordinator, entry, strategy) for strategy in BASE_STRATEGIES)
+    entities.extend(FlexibleLoadSensor(coordinator, entry, key) for key in coordinator.flexible_loads.keys)
     async_add_entities(entities)
 
 
-class EnergyOptimizerSensor(
-    CoordinatorEntity[EnergyOptimizerCoordinator], SensorEntity
-):
+class EnergyOptimizerSensor(EnergyOptimizerEntity, SensorEntity):
     """Representation of a Solar Energy Optimizer sensor."""
 
     entity_description: EnergyOptimizerSensorDescription
-    _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({ATTR_REASON_PARAMS, "hourly_correction"})
 
     def __init__(
         self,
@@ -194,12 +328,8 @@ class EnergyOptimizerSensor(
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, entry, description.key)
         self.entity_description = description
-        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
 
     @property
     def native_value(self) -> str | float | datetime | None:
@@ -217,22 +347,75 @@ class EnergyOptimizerSensor(
                 "strategy": self.coordinator.current_strategy,
                 ATTR_DRY_RUN_MODE: self.coordinator.dry_run_mode,
             }
-        if self.entity_description.key == ENTITY_DECISION_REASON:
+        if self.entity_description.key in (ENTITY_CURRENT_PRICE, ENTITY_PRICE_RANK):
+            index = self.coordinator.price_index
+            data = self.coordinator.data
             return {
-                ATTR_BATTERY_SOC: self.coordinator.data.battery_soc,
-                ATTR_CURRENT_PRICE: self.coordinator.data.current_price,
-                "target_soc": self.coordinator.data.target_soc,
-                "strategy": self.coordinator.current_strategy,
-                "update_count": self.coordinator.update_count,
-                "last_action_time": self.coordinator.data.last_action_time,
+                ATTR_PRICE_RANK: data.price_rank,
+                ATTR_PRICE_PERCENTILE: data.price_percentile,
+                ATTR_PRICE_BAND: data.price_band,
+                "price_bands": PRICE_BANDS,
+                "slots": len(index) if index is not None else 0,
+                "import_price": round(data.import_price, 4) if data.import_price is not None else None,
+                "export_price": round(data.export_price, 4) if data.export_price is not None else None,
+            }
+        if self.entity_description.key == ENTITY_FORECAST_CORRECTION:
+            accuracy = self.coordinator.data.forecast_accuracy
+            if accuracy is None:
+                return {}
+            return {
+                "periods": accuracy.periods,
+                "hourly_correction": list(accuracy.hourly_correction),
+            }
+        if self.entity_description.key == ENTITY_MONTHLY_PEAK:
+            demand = self.coordinator.data.peak_demand
+            if demand is None:
+                return {}
+            return {
+                "peak_time": dt_util.utc_from_timestamp(demand.peak_time) if demand.peak_time is not None else None,
+                "quarter_hour_demand": round(demand.quarter_kw, 3),
+                "limit": round(demand.limit_kw, 3),
             }
         return {}
 
 
-class UpdateCountSensor(CoordinatorEntity[EnergyOptimizerCoordinator], SensorEntity):
+class DecisionReasonSensor(EnergyOptimizerSensor):
+    """Sensor whose state is the code of the reason behind the current decision.
+
+    Only the decision is published; the SOC, price, update count and last
+    action time that change every cycle have their own sensors.
+    """
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the decision's target, strategy and reason parameters."""
+        data = self.coordinator.data
+        return {
+            "target_soc": data.target_soc,
+            "strategy": self.coordinator.current_strategy,
+            ATTR_REASON_PARAMS: data.decision_reason.params,
+        }
+
+    def _state_snapshot(self) -> tuple[Any, ...]:
+        """Write when the decision changes, not on every cycle's new readings.
+
+        The reason's SOC, price and forecast parameters move every cycle while
+        charging or discharging, so only its thresholds and limits count.
+        """
+        data = self.coordinator.data
+        reason = data.decision_reason
+        return (
+            self.available,
+            reason.code,
+            reason.decision_params,
+            data.target_soc,
+            self.coordinator.current_strategy,
+        )
+
+
+class UpdateCountSensor(EnergyOptimizerEntity, SensorEntity):
     """Sensor that counts how many times a charge/discharge action was issued to the inverter."""
 
-    _attr_has_entity_name = True
     _attr_name = "Inverter update count"
     _attr_icon = "mdi:counter"
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
@@ -244,13 +427,188 @@ class UpdateCountSensor(CoordinatorEntity[EnergyOptimizerCoordinator], SensorEnt
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the update count sensor."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_UPDATE_COUNT}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
+        super().__init__(coordinator, entry, ENTITY_UPDATE_COUNT)
 
     @property
     def native_value(self) -> int:
         """Return the number of completed update cycles."""
         return self.coordinator.update_count
+
+
+class ScheduleSensor(EnergyOptimizerEntity, SensorEntity):
+    """Sensor exposing the full horizon plan as run-length encoded segments.
+
+    The state is the time the planned action next changes. The segment list
+    can be large, so it is kept out of the recorder.
+    """
+
+    _attr_translation_key = "schedule"
+    _attr_name = "Schedule"
+    _attr_icon = "mdi:calendar-clock"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _unrecorded_attributes = frozenset(
+        {ATTR_SEGMENTS, "horizon_start", "horizon_end", "generated_at"}
+    )
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: EnergyOptimizerConfigEntry,
+    ) -> None:
+        """Initialize the schedule sensor."""
+        super().__init__(coordinator, entry, ENTITY_SCHEDULE)
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return when the planned action next changes."""
+        plan = self.coordinator.data.plan
+        if plan is None:
+            return None
+        return plan.next_change(dt_util.utcnow())
+
+    def _state_snapshot(self) -> tuple[Any, ...]:
+        """Compare plans by content; generated_at alone is not a change."""
+        plan = self.coordinator.data.plan
+        if plan is None:
+            return (self.available, None)
+        return (self.available, self.state, plan.strategy, tuple(plan.segments))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the cached, serialized plan."""
+        plan = self.coordinator.data.plan
+        if plan is None:
+            return {}
+        return plan.attributes
+
+
+class CheapestWindowSensor(EnergyOptimizerEntity, SensorEntity):
+    """Sensor reporting the start of the cheapest upcoming window of a fixed length."""
+
+    _attr_icon = "mdi:timer-sand"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: EnergyOptimizerConfigEntry,
+        hours: float,
+    ) -> None:
+        """Initialize the window sensor."""
+        super().__init__(
+            coordinator, entry, f"{ENTITY_CHEAPEST_WINDOW}_{hours:g}h".replace(".", "_")
+        )
+        self._hours = hours
+        self._attr_name = f"Cheapest {hours:g}h window"
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return when the cheapest window starts."""
+        window = self.coordinator.data.price_windows.get(self._hours)
+        if window is None:
+            return None
+        return dt_util.utc_from_timestamp(window.start)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the window end and prices."""
+        window = self.coordinator.data.price_windows.get(self._hours)
+        if window is None:
+            return {}
+        return window.as_dict(WINDOW_MODE_CHEAPEST)
+
+
+class ShadowCostSensor(EnergyOptimizerEntity, SensorEntity):
+    """Sensor reporting what one strategy would have cost had it been running."""
+
+    _attr_icon = "mdi:scale-balance"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_native_unit_of_measurement = CURRENCY_EURO
+    _attr_state_class = SensorStateClass.TOTAL
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: EnergyOptimizerConfigEntry,
+        strategy: str,
+    ) -> None:
+        """Initialize the shadow cost sensor."""
+        super().__init__(coordinator, entry, f"{ENTITY_SHADOW_COST}_{strategy}")
+        self._strategy = strategy
+        self._attr_name = f"Shadow cost {strategy.replace('_', ' ')}"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the strategy's cumulative counterfactual grid cost."""
+        shadow = self.coordinator.data.shadow
+        if shadow is None or shadow.since is None:
+            return None
+        return round(shadow.cost[self._strategy], 3)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the strategy's virtual SOC and current shadow decision."""
+        shadow = self.coordinator.data.shadow
+        if shadow is None or shadow.since is None:
+            return {}
+        soc = shadow.soc[self._strategy]
+        return {
+            "virtual_soc": round(soc, 1) if soc is not None else None,
+            "action": shadow.action[self._strategy],
+            "since": dt_util.utc_from_timestamp(shadow.since),
+            "best_strategy": shadow.best,
+        }
+
+
+class FlexibleLoadSensor(EnergyOptimizerEntity, SensorEntity):
+    """Sensor reporting the power a flexible load is planned to draw now.
+
+    Automations switch the load on while the state is above zero. The runs
+    until the deadline are kept out of the recorder.
+    """
+
+    _attr_icon = "mdi:ev-plug-type2"
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _unrecorded_attributes = frozenset({"runs"})
+
+    def __init__(
+        self,
+        coordinator: EnergyOptimizerCoordinator,
+        entry: EnergyOptimizerConfigEntry,
+        key: str,
+    ) -> None:
+        """Initialize the flexible load sensor."""
+        super().__init__(coordinator, entry, f"{ENTITY_FLEXIBLE_LOAD}_{key}")
+        self._key = key
+        self._attr_name = f"{FLEXIBLE_LOAD_NAMES.get(key, key)} plan"
+        if key == FLEXIBLE_LOAD_BOILER:
+            self._attr_icon = "mdi:water-boiler"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the planned power for the current slot."""
+        status = self.coordinator.data.flexible_loads.get(self._key)
+        return round(status.power_kw, 3) if status is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the energy still needed, the deadline and the planned runs."""
+        status = self.coordinator.data.flexible_loads.get(self._key)
+        if status is None:
+            return {}
+        return {
+            "remaining_energy": round(status.remaining_kwh, 3),
+            "planned_energy": round(status.planned_kwh, 3),
+            "unmet_energy": round(status.unmet_kwh, 3),
+            "deadline": dt_util.utc_from_timestamp(status.deadline),
+            "next_start": dt_util.utc_from_timestamp(status.next_start) if status.next_start is not None else None,
+            "runs": [
+                {
+                    "start": dt_util.utc_from_timestamp(start).isoformat(),
+                    "end": dt_util.utc_from_timestamp(end).isoformat(),
+                    "power": round(power, 3),
+                }
+                for start, end, power in status.runs
+            ],
+        }
@@ -0,0 +1,299 @@
+"""Services of the Solar Energy Optimizer integration.
+
+The services are registered once for the domain, not per config entry, and
+every call names the entry it is for with ``config_entry_id``: with several
+batteries (one entry each, as in fleet mode) each call is answered by that
+entry's coordinator, and a reloaded entry is found again through its new
+runtime data.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import replace
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_CONFIG_ENTRY_ID, DOMAIN, STRATEGIES
+from .coordinator import EnergyOptimizerCoordinator
+from .monte_carlo import (
+    MC_DEFAULT_SAMPLES,
+    MC_DEFAULT_TIME_LIMIT,
+    MC_MAX_SAMPLES,
+    MC_MAX_TIME_LIMIT,
+)
+from .price_windows import WINDOW_MODE_CHEAPEST, WINDOW_MODES
+from .tuner import TUNER_DEFAULT_DAYS, TUNER_MAX_DAYS
+from .what_if import summarize
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_TRIGGER_OPTIMIZATION = "trigger_optimization"
+SERVICE_FIND_PRICE_WINDOW = "find_price_window"
+SERVICE_EVALUATE_STRATEGIES = "evaluate_strategies"
+SERVICE_TUNE_PARAMETERS = "tune_parameters"
+SERVICE_GET_PLAN = "get_plan"
+SERVICE_WHAT_IF = "what_if"
+
+ENTRY_SCHEMA = {vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string}
+
+# Without an entry every loaded entry is refreshed; entity_id is still accepted
+TRIGGER_OPTIMIZATION_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
+    }
+)
+
+FIND_PRICE_WINDOW_SCHEMA = vol.Schema(
+    {
+        **ENTRY_SCHEMA,
+        vol.Required("duration"): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=48)),
+        vol.Optional("mode", default=WINDOW_MODE_CHEAPEST): vol.In(WINDOW_MODES),
+        vol.Optional("start_after"): cv.datetime,
+        vol.Optional("end_before"): cv.datetime,
+    }
+)
+
+EVALUATE_STRATEGIES_SCHEMA = vol.Schema(
+    {
+        **ENTRY_SCHEMA,
+        vol.Optional("samples", default=MC_DEFAULT_SAMPLES): vol.All(
+            vol.Coerce(int), vol.Range(min=100, max=MC_MAX_SAMPLES)
+        ),
+        vol.Optional("time_limit", default=MC_DEFAULT_TIME_LIMIT): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=MC_MAX_TIME_LIMIT)
+        ),
+    }
+)
+
+TUNE_PARAMETERS_SCHEMA = vol.Schema(
+    {
+        **ENTRY_SCHEMA,
+        vol.Optional("days", default=TUNER_DEFAULT_DAYS): vol.All(
+            vol.Coerce(int), vol.Range(min=7, max=TUNER_MAX_DAYS)
+        ),
+        vol.Optional("apply", default=False): cv.boolean,
+    }
+)
+
+GET_PLAN_SCHEMA = vol.Schema(
+    {
+        **ENTRY_SCHEMA,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
+WHAT_IF_SCHEMA = vol.Schema(
+    {
+        **ENTRY_SCHEMA,
+        vol.Optional("strategy"): vol.In(STRATEGIES),
+        vol.Optional("min_soc"): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        vol.Optional("max_soc"): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        vol.Optional("battery_capacity"): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000)),
+        vol.Optional("max_charge_rate"): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=100)),
+        vol.Optional("max_discharge_rate"): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=100)),
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+
+
+def get_coordinator(hass: HomeAssistant, entry_id: str) -> EnergyOptimizerCoordinator:
+    """Return the coordinator of a loaded entry of this integration."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Config entry {entry_id} is not a Solar Energy Optimizer entry")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"Config entry {entry.title} is not loaded")
+    return entry.runtime_data
+
+
+def _trigger_targets(hass: HomeAssistant, call: ServiceCall) -> list[EnergyOptimizerCoordinator]:
+    """Return the coordinators a trigger_optimization call refreshes."""
+    if ATTR_CONFIG_ENTRY_ID in call.data:
+        return [get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID])]
+    if entity_ids := call.data.get(ATTR_ENTITY_ID):
+        registry = er.async_get(hass)
+        entry_ids = {
+            entity.config_entry_id
+            for entity_id in entity_ids
+            if (entity := registry.async_get(entity_id)) is not None and entity.platform == DOMAIN
+        }
+        if not entry_ids:
+            raise ServiceValidationError(f"No Solar Energy Optimizer entity among {entity_ids}")
+        return [get_coordinator(hass, entry_id) for entry_id in entry_ids]
+    return [
+        entry.runtime_data
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def handle_trigger_optimization(call: ServiceCall) -> None:
+        """Handle trigger optimization service call."""
+        for coordinator in _trigger_targets(hass, call):
+            _LOGGER.info(
+                "Manual optimization triggered via service call (entry_id=%s)", coordinator.config_entry.entry_id
+            )
+            await coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRIGGER_OPTIMIZATION,
+        handle_trigger_optimization,
+        schema=TRIGGER_OPTIMIZATION_SCHEMA,
+    )
+
+    async def handle_find_price_window(call: ServiceCall) -> ServiceResponse:
+        """Answer a cheapest/most expensive window query from the cached engine."""
+        engine = get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID]).window_engine
+        if engine is None:
+            raise ServiceValidationError("No price data available yet")
+        mode = call.data["mode"]
+        start_after = call.data.get("start_after")
+        end_before = call.data.get("end_before")
+        window = engine.find(
+            call.data["duration"],
+            mode,
+            start_after=dt_util.as_utc(start_after).timestamp() if start_after else dt_util.utcnow().timestamp(),
+            end_before=dt_util.as_utc(end_before).timestamp() if end_before else None,
+        )
+        _LOGGER.info("Price window query (%s, %.2fh) → %s", mode, call.data["duration"], window)
+        return {"window": window.as_dict(mode) if window is not None else None}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_PRICE_WINDOW,
+        handle_find_price_window,
+        schema=FIND_PRICE_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_evaluate_strategies(call: ServiceCall) -> ServiceResponse:
+        """Return per-strategy cost distributions from a Monte Carlo evaluation."""
+        coordinator = get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        if coordinator.monte_carlo.running:
+            raise ServiceValidationError("A strategy evaluation is already running")
+        result = await coordinator.async_evaluate_strategies(call.data["samples"], call.data["time_limit"])
+        if result is None:
+            raise ServiceValidationError("Battery SOC or future prices not available yet")
+        return result.as_dict()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EVALUATE_STRATEGIES,
+        handle_evaluate_strategies,
+        schema=EVALUATE_STRATEGIES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_tune_parameters(call: ServiceCall) -> ServiceResponse:
+        """Grid-search the strategy thresholds over cached history; optionally store them."""
+        coordinator = get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        if coordinator.tuner.running:
+            raise ServiceValidationError("A parameter tuning is already running")
+        result = await coordinator.async_tune_parameters(call.data["days"])
+        if result is None:
+            raise ServiceValidationError("No price history available to replay")
+        if call.data["apply"]:
+            # The update listener reloads the entry with the new thresholds
+            entry = coordinator.config_entry
+            hass.config_entries.async_update_entry(
+                entry, options={**entry.options, **result.params.as_options()}
+            )
+        return {**result.as_dict(), "applied": call.data["apply"]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TUNE_PARAMETERS,
+        handle_tune_parameters,
+        schema=TUNE_PARAMETERS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_get_plan(call: ServiceCall) -> ServiceResponse:
+        """Return the cached plan's slots without refreshing."""
+        data = get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID]).data
+        if data is None or data.plan is None:
+            raise ServiceValidationError("No plan available yet")
+        start = call.data.get("start")
+        end = call.data.get("end")
+        return {
+            **data.plan.slot_table(
+                start=dt_util.as_utc(start).timestamp() if start else None,
+                end=dt_util.as_utc(end).timestamp() if end else None,
+            ),
+            "decision_reason": data.decision_reason.as_dict(),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PLAN,
+        handle_get_plan,
+        schema=GET_PLAN_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_what_if(call: ServiceCall) -> ServiceResponse:
+        """Plan other settings from the cached inputs and compare them with the current ones."""
+        coordinator = get_coordinator(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        current = coordinator.current_scenario
+        battery = replace(
+            current.battery,
+            capacity_kwh=call.data.get("battery_capacity", current.battery.capacity_kwh),
+            max_charge_kw=call.data.get("max_charge_rate", current.battery.max_charge_kw),
+            max_discharge_kw=call.data.get("max_discharge_rate", current.battery.max_discharge_kw),
+        )
+        scenario = replace(
+            current,
+            strategy=call.data.get("strategy", current.strategy),
+            min_soc=call.data.get("min_soc", current.min_soc),
+            max_soc=call.data.get("max_soc", current.max_soc),
+            battery=battery,
+        )
+        if scenario.min_soc >= scenario.max_soc:
+            raise ServiceValidationError("min_soc must be below max_soc")
+        simulated = await coordinator.async_what_if(scenario)
+        baseline = await coordinator.async_what_if(current)
+        if simulated is None or baseline is None:
+            raise ServiceValidationError("Battery SOC or future prices not available yet")
+        start = call.data.get("start")
+        end = call.data.get("end")
+        bounds = (
+            dt_util.as_utc(start).timestamp() if start else None,
+            dt_util.as_utc(end).timestamp() if end else None,
+        )
+        result = summarize(simulated[0], scenario, *bounds)
+        reference = summarize(baseline[0], current, *bounds)
+        return {
+            "scenario": result,
+            "current": {key: value for key, value in reference.items() if key != "segments"},
+            "difference": round(result["expected_cost"] - reference["expected_cost"], 4),
+            "memoized": simulated[1],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WHAT_IF,
+        handle_what_if,
+        schema=WHAT_IF_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
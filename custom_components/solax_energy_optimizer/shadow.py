@@ -0,0 +1,192 @@
+"""Shadow mode: counterfactual cost of every strategy against actual prices.
+
+Each update cycle every base strategy decides, through the batched strategy
+functions, what it would do from its own virtual battery SOC. Over the
+following interval the four decisions are simulated together — one
+vectorized step — against the actual price, solar and household load
+observed when the decision was taken, and each strategy's grid cost is
+added to its running total. The virtual SOCs start
+from the real battery SOC.
+
+Only the simulation is batched across strategies. Each strategy is its own
+rule function, so the decisions take one ``decide_batch`` call per strategy
+with a single decision time; a combined pass would still run every rule.
+The four calls take about 0.4 ms per cycle, and the rest of the work is a
+handful of numpy operations on length-4 arrays.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .planner import ACTIONS, DEFAULT_PARAMS, BatteryModel, StrategyParams
+from .scenarios import BASE_STRATEGIES
+from .simulation import simulate_schedules
+from .strategies import MarketSeries, decide_batch
+
+_LOGGER = logging.getLogger(__name__)
+
+# Intervals longer than this (restarts, stalls) are not accounted
+MAX_STEP_SECONDS = 1800
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "shadow"
+SAVE_DELAY = 600
+
+
+@dataclass(frozen=True, slots=True)
+class ShadowSummary:
+    """Running counterfactual totals per strategy."""
+
+    since: float | None
+    cost: dict[str, float]
+    soc: dict[str, float | None]
+    action: dict[str, str]
+
+    @property
+    def best(self) -> str | None:
+        """Return the strategy with the lowest cumulative cost so far."""
+        if self.since is None:
+            return None
+        return min(self.cost, key=self.cost.__getitem__)
+
+
+class ShadowBook:
+    """Virtual battery state and cumulative cost of each shadow strategy."""
+
+    def __init__(self, strategies: tuple[str, ...] = BASE_STRATEGIES) -> None:
+        """Initialize an empty book."""
+        count = len(strategies)
+        self.strategies = strategies
+        self.soc = np.full(count, np.nan)
+        self.cost = np.zeros(count)
+        self.since: float | None = None
+        self._action = np.zeros(count, dtype=np.int8)
+        self._target = np.full(count, np.nan)
+        # (time, import price, export price, pv kW, load kW) the pending decisions were taken at
+        self._pending: tuple[float, float, float, float, float] | None = None
+
+    def step(
+        self,
+        now: float,
+        series: MarketSeries,
+        *,
+        price: float | None,
+        export_price: float | None = None,
+        pv_kw: float,
+        load_kw: float,
+        soc: float | None,
+        battery: BatteryModel,
+        min_soc: float,
+        max_soc: float,
+        params: StrategyParams = DEFAULT_PARAMS,
+    ) -> bool:
+        """Account the interval since the last step and take new decisions.
+
+        ``price`` is the import price the strategies decide on; export is
+        billed at ``export_price``, or at ``price`` when it is None.
+        Returns True when an interval was added to the totals.
+        """
+        accounted = False
+        if self._pending is not None and not np.isnan(self.soc).any():
+            began, held_price, held_export, held_pv, held_load = self._pending
+            if 0 < now - began <= MAX_STEP_SECONDS:
+                result = simulate_schedules(
+                    self._action[:, None],
+                    self._target[:, None],
+                    price=np.array([held_price]),
+                    pv=np.array([held_pv]),
+                    load=np.array([held_load]),
+                    hours=np.array([(now - began) / 3600.0]),
+                    soc=self.soc,
+                    battery=battery,
+                    min_soc=min_soc,
+                    max_soc=max_soc,
+                    export_price=np.array([held_export]),
+                    terminal_price=0.0,
+                )
+                self.cost += result.grid_cost
+                self.soc = result.final_soc
+                accounted = True
+        self._pending = None
+
+        if np.isnan(self.soc).any():
+            if soc is None:
+                return accounted
+            self.soc = np.where(np.isnan(self.soc), soc, self.soc)
+            if self.since is None:
+                self.since = now
+        if price is None:
+            return accounted
+        for idx, strategy in enumerate(self.strategies):
+            action, target = decide_batch(
+                strategy, np.array([now]), price, self.soc[idx], series,
+                min_soc=min_soc, max_soc=max_soc, params=params,
+            )
+            self._action[idx], self._target[idx] = action[0], target[0]
+        self._pending = (now, price, price if export_price is None else export_price, pv_kw, load_kw)
+        return accounted
+
+    def summary(self) -> ShadowSummary:
+        """Return the totals keyed by strategy."""
+        return ShadowSummary(
+            since=self.since,
+            cost={name: float(cost) for name, cost in zip(self.strategies, self.cost)},
+            soc={name: None if np.isnan(soc) else float(soc) for name, soc in zip(self.strategies, self.soc)},
+            action={name: ACTIONS[int(code)] for name, code in zip(self.strategies, self._action)},
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation for storage."""
+        return {
+            "since": self.since,
+            "strategies": {
+                name: [float(cost), None if np.isnan(soc) else float(soc)]
+                for name, cost, soc in zip(self.strategies, self.cost, self.soc)
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any], strategies: tuple[str, ...] = BASE_STRATEGIES) -> ShadowBook:
+        """Restore totals saved with :meth:`as_dict`; unknown strategies start fresh."""
+        book = cls(strategies)
+        book.since = stored.get("since")
+        saved = stored.get("strategies") or {}
+        for idx, name in enumerate(strategies):
+            if name in saved:
+                cost, soc = saved[name]
+                book.cost[idx] = float(cost)
+                book.soc[idx] = np.nan if soc is None else float(soc)
+        return book
+
+
+class ShadowTracker:
+    """Persists a ShadowBook across restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the tracker."""
+        self.book = ShadowBook()
+        self.loaded = False
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.{STORAGE_KEY}")
+
+    async def async_load(self) -> None:
+        """Restore the stored totals."""
+        stored = await self._store.async_load()
+        if stored:
+            self.book = ShadowBook.from_dict(stored)
+        self.loaded = True
+        _LOGGER.info("[shadow] totals restored: %s", {k: round(v, 2) for k, v in self.book.summary().cost.items()})
+
+    def step(self, now: float, series: MarketSeries, **kwargs: Any) -> ShadowSummary | None:
+        """Advance the book; returns None until the stored totals are loaded."""
+        if not self.loaded:
+            return None
+        if self.book.step(now, series, **kwargs):
+            self._store.async_delay_save(self.book.as_dict, SAVE_DELAY)
+        return self.book.summary()
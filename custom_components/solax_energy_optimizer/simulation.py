@@ -0,0 +1,165 @@
+"""Vectorized battery/grid simulation of slot schedules.
+
+A schedule is an action code and target SOC per slot. Simulating it under
+given prices, solar and load yields the grid cost of following it. All
+arrays share a trailing time axis and broadcast over any leading batch
+dimensions, so many candidate schedules × many scenarios are simulated in
+one pass: the loop runs over time slots only, every step is a numpy
+operation over the whole batch.
+
+Battery model, per slot:
+  - charge: charge from the grid at full rate towards the target SOC
+  - discharge: discharge at full rate towards the target SOC
+  - idle: self-use — solar surplus charges the battery up to max SOC and a
+    deficit is covered from the battery down to min SOC
+Grid energy is billed at the slot price and exported energy earns the export
+price (the import price unless given).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .inputs import PlanningInputs
+from .planner import CODE_CHARGE, CODE_DISCHARGE, CODE_IDLE, BatteryModel, SlotPlan
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationResult:
+    """Outcome of simulating a batch of schedules.
+
+    Attributes:
+        cost: Grid cost per batch element, including the value of the SOC
+            change at the horizon end.
+        grid_cost: Grid cost per batch element without the terminal value.
+        final_soc: SOC at the horizon end per batch element in %.
+        soc: SOC at the start of every slot, shape ``batch + (slots,)``; only
+            filled when requested.
+    """
+
+    cost: np.ndarray
+    grid_cost: np.ndarray
+    final_soc: np.ndarray
+    soc: np.ndarray | None = None
+
+
+def simulate_schedules(
+    action: np.ndarray,
+    target: np.ndarray,
+    *,
+    price: np.ndarray,
+    pv: np.ndarray,
+    load: np.ndarray,
+    hours: np.ndarray,
+    soc: float | np.ndarray,
+    battery: BatteryModel,
+    min_soc: float,
+    max_soc: float,
+    export_price: np.ndarray | None = None,
+    terminal_price: float | np.ndarray | None = None,
+    keep_soc: bool = False,
+) -> SimulationResult:
+    """Simulate schedules over slots; every array's last axis is time.
+
+    ``terminal_price`` values the stored energy gained or lost over the
+    horizon (default: the mean price), so schedules are not rewarded for
+    simply emptying the battery before the horizon ends.
+    """
+    export_price = price if export_price is None else export_price
+    slots = hours.shape[-1]
+    batch = np.broadcast_shapes(
+        action.shape[:-1],
+        target.shape[:-1],
+        price.shape[:-1],
+        export_price.shape[:-1],
+        pv.shape[:-1],
+        load.shape[:-1],
+        np.shape(soc),
+    )
+    capacity = battery.capacity_kwh
+    initial = np.broadcast_to(np.asarray(soc, dtype=np.float64), batch)
+    state = initial.copy()
+    grid_cost = np.zeros(batch, dtype=np.float64)
+    history = np.empty(batch + (slots,), dtype=np.float64) if keep_soc else None
+
+    for idx in range(slots):
+        if history is not None:
+            history[..., idx] = state
+        step = hours[..., idx]
+        code = action[..., idx]
+        solar = pv[..., idx] * step
+        demand = load[..., idx] * step
+        max_in = battery.max_charge_kw * step
+        max_out = battery.max_discharge_kw * step
+        room = np.maximum(max_soc - state, 0.0) * (capacity / 100.0)
+        reserve = np.maximum(state - min_soc, 0.0) * (capacity / 100.0)
+
+        # Self-use by default
+        surplus = solar - demand
+        energy_in = np.minimum(np.minimum(np.maximum(surplus, 0.0), room), max_in)
+        energy_out = np.minimum(np.minimum(np.maximum(-surplus, 0.0), reserve), max_out)
+
+        with np.errstate(invalid="ignore"):
+            to_target = (target[..., idx] - state) * (capacity / 100.0)
+        charging = code == CODE_CHARGE
+        discharging = code == CODE_DISCHARGE
+        energy_in = np.where(charging, np.minimum(max_in, np.nan_to_num(np.maximum(to_target, 0.0))), energy_in)
+        energy_out = np.where(
+            discharging, np.minimum(max_out, np.nan_to_num(np.maximum(-to_target, 0.0))), energy_out
+        )
+        energy_out = np.where(charging, 0.0, energy_out)
+        energy_in = np.where(discharging, 0.0, energy_in)
+
+        grid = demand - solar + energy_in - energy_out
+        grid_cost += np.where(grid > 0, grid * price[..., idx], grid * export_price[..., idx])
+        state = state + (energy_in - energy_out) * (100.0 / capacity)
+
+    if terminal_price is None:
+        terminal_price = np.mean(price, axis=-1) if slots else 0.0
+    stored_value = (state - initial) * (capacity / 100.0) * terminal_price
+    return SimulationResult(
+        cost=grid_cost - stored_value,
+        grid_cost=grid_cost,
+        final_soc=state,
+        soc=history,
+    )
+
+
+def simulate_slot_plan(
+    inputs: PlanningInputs,
+    action: np.ndarray,
+    target: np.ndarray,
+    *,
+    soc: float,
+    battery: BatteryModel,
+    min_soc: float,
+    max_soc: float,
+) -> SlotPlan:
+    """Return a SlotPlan for a fixed schedule with SOC projected by the simulation."""
+    result = simulate_schedules(
+        action,
+        target,
+        price=inputs.price,
+        pv=inputs.pv,
+        load=inputs.load,
+        hours=inputs.durations_h,
+        soc=soc,
+        battery=battery,
+        min_soc=min_soc,
+        max_soc=max_soc,
+        export_price=inputs.export_price,
+        keep_soc=True,
+    )
+    return SlotPlan(
+        starts=inputs.starts,
+        ends=inputs.ends,
+        action=action.astype(np.int8),
+        target_soc=np.where(action == CODE_IDLE, np.nan, target),
+        soc=result.soc,
+        price=inputs.price,
+        pv=inputs.pv,
+        export_price=inputs.export_price,
+        load=inputs.load,
+        battery_kwh=np.diff(result.soc, append=result.final_soc) * (battery.capacity_kwh / 100.0),
+    )
@@ -0,0 +1,218 @@
+"""Batched, vectorized form of the rule-based strategies.
+
+The coordinator's ``_optimize_*`` methods decide for one moment and write
+the result into ``EnergyOptimizerData``. The functions here take aligned
+arrays of decision times, current prices and SOCs and return the action
+code and target SOC for every element at once, with the same rules:
+
+  - minimize_cost: charge when the price is in the bottom band of the
+    future price range, discharge in the top band
+  - maximize_self_consumption: make room below max SOC ahead of the next
+    forecast period whose solar surplus over the load exceeds a cutoff
+  - grid_independence: charge whenever below max SOC
+  - balanced: charge below / discharge above a fraction of the future mean
+
+"Future" prices are the slots starting at or after the decision time, as in
+``PriceRankIndex.future_stats``. A NaN SOC means "unavailable" and yields
+idle, like ``None`` does in the coordinator.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+from .const import (
+    STRATEGY_BALANCED,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_MINIMIZE_COST,
+)
+from .inputs import PlanningInputs, solar_periods
+from .planner import (
+    CODE_CHARGE,
+    CODE_DISCHARGE,
+    CODE_IDLE,
+    DEFAULT_PARAMS,
+    StrategyParams,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class MarketSeries:
+    """The price slots and solar forecast periods strategies look ahead into.
+
+    Suffix statistics of the prices and the "next qualifying solar period"
+    lookup are precomputed once, so every decision is an O(log n) search.
+    """
+
+    price_starts: np.ndarray
+    prices: np.ndarray
+    solar_starts: np.ndarray
+    solar_surplus: np.ndarray
+    suffix_min: np.ndarray
+    suffix_max: np.ndarray
+    suffix_mean: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        price_starts: np.ndarray,
+        prices: np.ndarray,
+        solar_starts: np.ndarray,
+        solar_surplus: np.ndarray,
+    ) -> MarketSeries:
+        """Precompute suffix statistics; all arrays must be sorted by start."""
+        reversed_price = prices[::-1]
+        count = prices.size
+        return cls(
+            price_starts=price_starts,
+            prices=prices,
+            solar_starts=solar_starts,
+            solar_surplus=solar_surplus,
+            suffix_min=np.minimum.accumulate(reversed_price)[::-1],
+            suffix_max=np.maximum.accumulate(reversed_price)[::-1],
+            suffix_mean=np.cumsum(reversed_price)[::-1] / np.arange(count, 0, -1, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_inputs(
+        cls,
+        inputs: PlanningInputs,
+        solar_forecast: list[dict] | None = None,
+        load_fn: Callable[[np.ndarray], np.ndarray] | None = None,
+    ) -> MarketSeries:
+        """Build from planning inputs, using the raw forecast periods when given.
+
+        ``load_fn`` maps period start times to the expected load in kW.
+        Without a forecast the aligned slots' PV and load stand in for it.
+        """
+        if solar_forecast is None:
+            return cls.build(inputs.starts, inputs.price, inputs.starts, inputs.surplus)
+        starts, pv = solar_periods(solar_forecast)
+        load = load_fn(starts) if load_fn is not None else np.zeros(starts.size)
+        return cls.build(inputs.starts, inputs.price, starts, pv - load)
+
+    def future_index(self, times: np.ndarray) -> np.ndarray:
+        """Return the first price slot starting at or after each time."""
+        return np.searchsorted(self.price_starts, times, side="left")
+
+
+def _idle(count: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.full(count, CODE_IDLE, dtype=np.int8), np.full(count, np.nan)
+
+
+def _future_stats(series: MarketSeries, times: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return (has future slots, min, max, mean) of the future prices per time."""
+    first = series.future_index(times)
+    valid = first < series.prices.size
+    safe = np.minimum(first, max(series.prices.size - 1, 0))
+    if not series.prices.size:
+        nan = np.full(times.shape, np.nan)
+        return valid, nan, nan, nan
+    return valid, series.suffix_min[safe], series.suffix_max[safe], series.suffix_mean[safe]
+
+
+def _choose(
+    charge: np.ndarray, discharge: np.ndarray, charge_to: float, discharge_to: float
+) -> tuple[np.ndarray, np.ndarray]:
+    action = np.where(charge, CODE_CHARGE, np.where(discharge, CODE_DISCHARGE, CODE_IDLE)).astype(np.int8)
+    target = np.where(charge, charge_to, np.where(discharge, discharge_to, np.nan))
+    return action, target
+
+
+def minimize_cost(
+    times: np.ndarray, price: np.ndarray, soc: np.ndarray, series: MarketSeries,
+    min_soc: float, max_soc: float, params: StrategyParams,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Charge in the cheap band of the future price range, discharge in the expensive band."""
+    valid, low, high, _ = _future_stats(series, times)
+    price_range = high - low
+    with np.errstate(invalid="ignore"):
+        charge = valid & (price <= low + price_range * params.cheap_band) & (soc < max_soc)
+        discharge = valid & ~charge & (price >= high - price_range * params.expensive_band) & (soc > min_soc)
+    return _choose(charge, discharge, max_soc, min_soc)
+
+
+def maximize_self_consumption(
+    times: np.ndarray, price: np.ndarray, soc: np.ndarray, series: MarketSeries,
+    min_soc: float, max_soc: float, params: StrategyParams,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Discharge to leave headroom when a solar surplus period lies ahead."""
+    periods = series.solar_starts.size
+    if not periods:
+        return _idle(times.size)
+    # Per forecast position, the first qualifying period at or after it (periods if none)
+    qualifying = np.where(series.solar_surplus > params.solar_surplus_kw, np.arange(periods), periods)
+    next_qualifying = np.append(np.minimum.accumulate(qualifying[::-1])[::-1], periods)
+    upcoming = next_qualifying[np.searchsorted(series.solar_starts, times, side="right")] < periods
+    threshold = max_soc - params.solar_headroom
+    with np.errstate(invalid="ignore"):
+        discharge = upcoming & (soc > threshold)
+    return _choose(np.zeros(times.size, dtype=bool), discharge, max_soc, threshold)
+
+
+def grid_independence(
+    times: np.ndarray, price: np.ndarray, soc: np.ndarray, series: MarketSeries,
+    min_soc: float, max_soc: float, params: StrategyParams,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the battery charged to max SOC."""
+    with np.errstate(invalid="ignore"):
+        charge = soc < max_soc
+    return _choose(charge, np.zeros(times.size, dtype=bool), max_soc, min_soc)
+
+
+def balanced(
+    times: np.ndarray, price: np.ndarray, soc: np.ndarray, series: MarketSeries,
+    min_soc: float, max_soc: float, params: StrategyParams,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Charge below / discharge above a fraction of the future mean price."""
+    valid, _, _, mean = _future_stats(series, times)
+    with np.errstate(invalid="ignore"):
+        charge = valid & (price < mean * params.balanced_charge) & (soc < max_soc)
+        discharge = valid & ~charge & (price > mean * params.balanced_discharge) & (soc > min_soc)
+    return _choose(charge, discharge, max_soc, min_soc)
+
+
+BATCH_STRATEGIES = {
+    STRATEGY_MINIMIZE_COST: minimize_cost,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION: maximize_self_consumption,
+    STRATEGY_GRID_INDEPENDENCE: grid_independence,
+    STRATEGY_BALANCED: balanced,
+}
+
+
+def decide_batch(
+    strategy: str,
+    times: np.ndarray,
+    price: np.ndarray,
+    soc: np.ndarray,
+    series: MarketSeries,
+    *,
+    min_soc: float,
+    max_soc: float,
+    params: StrategyParams = DEFAULT_PARAMS,
+    safety: bool = True,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (action codes, target SOCs) of ``strategy`` for every decision time.
+
+    ``times``, ``price`` and ``soc`` are aligned 1-D arrays. A NaN price is
+    treated as 0, like a missing current price in the coordinator. With
+    ``safety`` the coordinator's override — charge to min SOC when below
+    it — takes precedence over the strategy.
+    """
+    try:
+        rule = BATCH_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"No batch form for strategy {strategy!r}") from None
+    times = np.asarray(times, dtype=np.float64)
+    soc = np.broadcast_to(np.asarray(soc, dtype=np.float64), times.shape)
+    price = np.nan_to_num(np.broadcast_to(np.asarray(price, dtype=np.float64), times.shape))
+    action, target = rule(times, price, soc, series, min_soc, max_soc, params)
+    if safety:
+        with np.errstate(invalid="ignore"):
+            below = soc < min_soc
+        action = np.where(below, CODE_CHARGE, action).astype(np.int8)
+        target = np.where(below, min_soc, target)
+    return action, target
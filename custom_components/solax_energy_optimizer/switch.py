@@ -6,11 +6,11 @@ from typing import Any
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, ENTITY_AUTOMATION_ENABLED, ENTITY_DRY_RUN, ENTITY_MANUAL_OVERRIDE
-from .coordinator import EnergyOptimizerCoordinator
 from . import EnergyOptimizerConfigEntry
+from .const import ENTITY_AUTOMATION_ENABLED, ENTITY_DRY_RUN, ENTITY_MANUAL_OVERRIDE
+from .coordinator import EnergyOptimizerCoordinator
+from .entity import EnergyOptimizerEntity
 
 
 async def async_setup_entry(
@@ -30,12 +30,9 @@ async def async_setup_entry(
     )
 
 
-class AutomationEnabledSwitch(
-    CoordinatorEntity[EnergyOptimizerCoordinator], SwitchEntity
-):
+class AutomationEnabledSwitch(EnergyOptimizerEntity, SwitchEntity):
     """Switch to enable/disable automation."""
 
-    _attr_has_entity_name = True
     _attr_translation_key = "automation_enabled"
     _attr_icon = "mdi:auto-mode"
 
@@ -45,12 +42,8 @@ class AutomationEnabledSwitch(
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_AUTOMATION_ENABLED}"
+        super().__init__(coordinator, entry, ENTITY_AUTOMATION_ENABLED)
         self._attr_name = "Automation enabled"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
 
     @property
     def is_on(self) -> bool:
@@ -68,12 +61,9 @@ class AutomationEnabledSwitch(
         self.async_write_ha_state()
 
 
-class ManualOverrideSwitch(
-    CoordinatorEntity[EnergyOptimizerCoordinator], SwitchEntity
-):
+class ManualOverrideSwitch(EnergyOptimizerEntity, SwitchEntity):
     """Switch to enable/disable manual override."""
 
-    _attr_has_entity_name = True
     _attr_translation_key = "manual_override"
     _attr_icon = "mdi:hand-back-right"
 
@@ -83,12 +73,8 @@ class ManualOverrideSwitch(
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_MANUAL_OVERRIDE}"
+        super().__init__(coordinator, entry, ENTITY_MANUAL_OVERRIDE)
         self._attr_name = "Manual override"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
 
     @property
     def is_on(self) -> bool:
@@ -106,10 +92,9 @@ class ManualOverrideSwitch(
         self.async_write_ha_state()
 
 
-class DryRunSwitch(CoordinatorEntity[EnergyOptimizerCoordinator], SwitchEntity):
+class DryRunSwitch(EnergyOptimizerEntity, SwitchEntity):
     """Switch to enable/disable dry run mode."""
 
-    _attr_has_entity_name = True
     _attr_translation_key = "dry_run"
     _attr_icon = "mdi:test-tube"
 
@@ -119,12 +104,8 @@ class DryRunSwitch(CoordinatorEntity[EnergyOptimizerCoordinator], SwitchEntity):
         entry: EnergyOptimizerConfigEntry,
     ) -> None:
         """Initialize the switch."""
-        super().__init__(coordinator)
-        self._attr_unique_id = f"{entry.entry_id}_{ENTITY_DRY_RUN}"
+        super().__init__(coordinator, entry, ENTITY_DRY_RUN)
         self._attr_name = "Dry run mode"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, entry.entry_id)},
-        }
 
     @property
     def is_on(self) -> bool:
@@ -0,0 +1,166 @@
+"""Import and export prices from the spot price, grid fees, energy tax and VAT.
+
+The price adapters deliver one raw spot price per slot. What a kWh actually
+costs or earns is described declaratively by ``TARIFF_COMPONENTS``: each
+component is one option holding either a factor on the spot price or a
+fixed amount per kWh, on the import or the export side, and VAT applies to
+the components selected in the ``vat_on`` option. Every component is
+linear in the spot price, so ``compile_tariff`` folds the whole table into
+one scale and one offset per side once, when the options are read:
+
+    import = spot × import_scale + import_offset
+    export = spot × export_scale + export_offset
+
+Applying the tariff to a horizon is then two fused multiply-adds over the
+spot array. ``TariffEngine`` also remembers the spot series it last
+converted, so the arrays are only recomputed when the prices change and
+every planner and strategy reads the same precomputed import / export
+arrays. With net metering, export earns the full import price.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+
+from .const import (
+    CONF_ENERGY_TAX,
+    CONF_EXPORT_FACTOR,
+    CONF_EXPORT_FEE,
+    CONF_GRID_FEE,
+    CONF_IMPORT_MARKUP,
+    CONF_NET_METERING,
+    CONF_VAT,
+    CONF_VAT_ON,
+    TARIFF_SPOT,
+)
+from .inputs import PlanningInputs
+
+_LOGGER = logging.getLogger(__name__)
+
+TARIFF_IMPORT = "import"
+TARIFF_EXPORT = "export"
+
+
+@dataclass(frozen=True, slots=True)
+class TariffComponent:
+    """One linear term of the tariff.
+
+    Attributes:
+        key: Option holding the value; TARIFF_SPOT is the spot price itself.
+        side: TARIFF_IMPORT or TARIFF_EXPORT.
+        per_spot: True when the value multiplies the spot price, False for an amount per kWh.
+        sign: +1 for amounts added to the price, -1 for amounts deducted.
+        default: Value when the option is not set; the defaults leave the spot price unchanged.
+        unit: Unit shown in the options form.
+    """
+
+    key: str
+    side: str
+    per_spot: bool
+    sign: float
+    default: float
+    unit: str | None
+
+
+TARIFF_COMPONENTS: tuple[TariffComponent, ...] = (
+    TariffComponent(TARIFF_SPOT, TARIFF_IMPORT, True, 1.0, 1.0, None),
+    TariffComponent(CONF_IMPORT_MARKUP, TARIFF_IMPORT, False, 1.0, 0.0, "€/kWh"),
+    TariffComponent(CONF_GRID_FEE, TARIFF_IMPORT, False, 1.0, 0.0, "€/kWh"),
+    TariffComponent(CONF_ENERGY_TAX, TARIFF_IMPORT, False, 1.0, 0.0, "€/kWh"),
+    TariffComponent(CONF_EXPORT_FACTOR, TARIFF_EXPORT, True, 1.0, 1.0, None),
+    TariffComponent(CONF_EXPORT_FEE, TARIFF_EXPORT, False, -1.0, 0.0, "€/kWh"),
+)
+# Components VAT applies to unless the options say otherwise
+DEFAULT_VAT_ON: tuple[str, ...] = (TARIFF_SPOT, CONF_IMPORT_MARKUP, CONF_GRID_FEE, CONF_ENERGY_TAX)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTariff:
+    """Scale and offset of the import and export price on the spot price."""
+
+    import_scale: float = 1.0
+    import_offset: float = 0.0
+    export_scale: float = 1.0
+    export_offset: float = 0.0
+
+    @property
+    def identity(self) -> bool:
+        """Return True when import and export both equal the spot price."""
+        return self == SPOT_TARIFF
+
+    def __call__(self, spot: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return the (import, export) price arrays of a spot price array."""
+        return (
+            spot * self.import_scale + self.import_offset,
+            spot * self.export_scale + self.export_offset,
+        )
+
+    def import_price(self, spot: float) -> float:
+        """Return the import price of one spot price."""
+        return spot * self.import_scale + self.import_offset
+
+    def export_price(self, spot: float) -> float:
+        """Return the export price of one spot price."""
+        return spot * self.export_scale + self.export_offset
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the coefficients for diagnostics."""
+        return {
+            "import_scale": round(self.import_scale, 6),
+            "import_offset": round(self.import_offset, 6),
+            "export_scale": round(self.export_scale, 6),
+            "export_offset": round(self.export_offset, 6),
+        }
+
+
+# Import and export both equal the spot price
+SPOT_TARIFF = CompiledTariff()
+
+
+def compile_tariff(options: Mapping[str, Any]) -> CompiledTariff:
+    """Fold the tariff components configured in ``options`` into one scale and offset per side."""
+    vat = float(options.get(CONF_VAT, 0.0)) / 100.0
+    vat_on = set(options.get(CONF_VAT_ON, DEFAULT_VAT_ON))
+    coefficients = {TARIFF_IMPORT: [0.0, 0.0], TARIFF_EXPORT: [0.0, 0.0]}
+    for component in TARIFF_COMPONENTS:
+        value = component.default if component.key == TARIFF_SPOT else float(
+            options.get(component.key, component.default)
+        )
+        value *= component.sign * (1.0 + vat if component.key in vat_on else 1.0)
+        coefficients[component.side][0 if component.per_spot else 1] += value
+    import_scale, import_offset = coefficients[TARIFF_IMPORT]
+    export_scale, export_offset = coefficients[TARIFF_EXPORT]
+    if options.get(CONF_NET_METERING, False):
+        export_scale, export_offset = import_scale, import_offset
+    return CompiledTariff(import_scale, import_offset, export_scale, export_offset)
+
+
+class TariffEngine:
+    """Applies a compiled tariff to planning inputs, once per price series."""
+
+    def __init__(self, tariff: CompiledTariff) -> None:
+        """Initialize the engine."""
+        self.tariff = tariff
+        self._spot: np.ndarray | None = None
+        self._prices: tuple[np.ndarray, np.ndarray] | None = None
+        self.conversions = 0
+
+    def apply(self, inputs: PlanningInputs) -> PlanningInputs:
+        """Return ``inputs`` with the import price as ``price`` and the export price set.
+
+        ``inputs.price`` must hold the raw spot price. Without fees, taxes or
+        an export discount the inputs are returned unchanged.
+        """
+        if self.tariff.identity:
+            return inputs
+        if self._prices is None or not np.array_equal(self._spot, inputs.price):
+            self._spot = inputs.price
+            self._prices = self.tariff(inputs.price)
+            self.conversions += 1
+            _LOGGER.debug("[tariff] import/export prices computed for %d slots", inputs.price.size)
+        import_price, export_price = self._prices
+        return replace(inputs, price=import_price, export_price=export_price)
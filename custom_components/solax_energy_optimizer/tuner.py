@@ -0,0 +1,339 @@
+"""Tune the rule-based strategy thresholds by replaying cached history.
+
+Every combination of a grid over a strategy's thresholds is replayed hour by
+hour through the batched strategy functions against the recorded prices,
+solar production and household load, each combination with its own virtual
+battery. Prices are revealed day by day: before ``PRICE_PUBLISH_HOUR`` (UTC)
+a decision only sees the rest of the day, afterwards the next day as well,
+like day-ahead prices. The recorded PV serves as a perfect solar forecast.
+The recorded spot prices are converted with the configured tariff first:
+the strategies decide on the import price, and exported energy is credited
+at the export price.
+
+All combinations of one batch are decided and simulated together as one
+vectorized step per hour, so a year of history costs 8760 small numpy steps
+per batch. Batches run in a process pool; the fields the batched strategies
+need as scalars (the solar surplus cutoff) split the grid into batches.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import product
+from typing import Any
+
+import numpy as np
+
+from .const import (
+    STRATEGY_BALANCED,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_MINIMIZE_COST,
+)
+from .history import HISTORY_COLUMNS, HISTORY_MAX_DAYS, HOURS_PER_DAY, HistoryArrays
+from .monte_carlo import worker_count
+from .planner import DEFAULT_PARAMS, BatteryModel, StrategyParams
+from .simulation import simulate_schedules
+from .strategies import MarketSeries, decide_batch
+from .tariff import SPOT_TARIFF, CompiledTariff
+
+_LOGGER = logging.getLogger(__name__)
+
+# Days of history replayed by default, and at most
+TUNER_DEFAULT_DAYS = 90
+TUNER_MAX_DAYS = HISTORY_MAX_DAYS
+# Hour (UTC) from which the next day's prices are known
+PRICE_PUBLISH_HOUR = 12
+
+# Thresholds each strategy depends on
+TUNABLE: dict[str, tuple[str, ...]] = {
+    STRATEGY_MINIMIZE_COST: ("cheap_band", "expensive_band"),
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION: ("solar_headroom", "solar_surplus_kw"),
+    STRATEGY_BALANCED: ("balanced_charge", "balanced_discharge"),
+}
+# Candidate values per threshold; each includes the default
+SEARCH_GRID: dict[str, tuple[float, ...]] = {
+    "cheap_band": (0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4),
+    "expensive_band": (0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4),
+    "balanced_charge": (0.8, 0.825, 0.85, 0.875, 0.9, 0.925, 0.95, 0.975, 1.0),
+    "balanced_discharge": (1.0, 1.025, 1.05, 1.075, 1.1, 1.125, 1.15, 1.175, 1.2),
+    "solar_headroom": (10.0, 15.0, 20.0, 25.0, 30.0, 40.0),
+    "solar_surplus_kw": (0.5, 1.0, 1.5, 2.0),
+}
+# Replayed saving (€) below which the default thresholds are kept
+TUNER_MIN_SAVING = 0.01
+# Thresholds the batched strategies only accept as scalars
+_SCALAR_FIELDS = frozenset({"solar_surplus_kw"})
+
+_PRICE, _PV, _LOAD, _SOC = (HISTORY_COLUMNS.index(name) for name in ("price", "pv", "load", "soc"))
+_ONE_HOUR = np.ones(1)
+
+
+def parameter_batches(
+    strategy: str, base: StrategyParams = DEFAULT_PARAMS
+) -> list[tuple[StrategyParams, list[dict[str, float]]]]:
+    """Split the search grid of ``strategy`` into vectorized batches.
+
+    Returns ``(params, combos)`` pairs where the tuned fields of ``params``
+    are arrays aligned with ``combos`` (scalar-only fields are constant
+    within a batch).
+    """
+    fields = TUNABLE[strategy]
+    groups: dict[tuple[float, ...], list[dict[str, float]]] = {}
+    for values in product(*(SEARCH_GRID[name] for name in fields)):
+        combo = dict(zip(fields, values))
+        groups.setdefault(tuple(combo[name] for name in fields if name in _SCALAR_FIELDS), []).append(combo)
+    return [
+        (
+            replace(base, **{
+                name: combos[0][name] if name in _SCALAR_FIELDS else np.array([combo[name] for combo in combos])
+                for name in fields
+            }),
+            combos,
+        )
+        for combos in groups.values()
+    ]
+
+
+def _day_series(
+    starts: np.ndarray, price: np.ndarray, surplus: np.ndarray, first: int, price_end: int, solar_end: int
+) -> MarketSeries:
+    """Return the market visible on one day: prices up to ``price_end``, solar up to ``solar_end``."""
+    window = slice(first, price_end)
+    known = ~np.isnan(price[window])
+    return MarketSeries.build(
+        starts[window][known], price[window][known], starts[first:solar_end], surplus[first:solar_end]
+    )
+
+
+def replay(
+    starts: np.ndarray,
+    values: np.ndarray,
+    strategy: str,
+    params: StrategyParams,
+    battery: BatteryModel,
+    min_soc: float,
+    max_soc: float,
+    soc: float,
+    tariff: CompiledTariff,
+) -> np.ndarray:
+    """Replay whole days of hourly history for a batch of parameter combinations.
+
+    Runs in a worker process. ``values`` is laid out like
+    ``HistoryArrays.values``, its price row holding the spot price. Hours
+    without a recorded price are skipped. Returns the net cost per
+    combination: grid cost minus the value of the energy left in the battery
+    at the mean import price.
+    """
+    price, export = tariff(values[_PRICE].astype(np.float64))
+    pv = np.nan_to_num(values[_PV].astype(np.float64))
+    load = np.nan_to_num(values[_LOAD].astype(np.float64))
+    surplus = pv - load
+    count = np.broadcast_shapes(*(np.shape(getattr(params, name)) for name in TUNABLE[strategy])) or (1,)
+    state = np.full(count, soc, dtype=np.float64)
+    grid_cost = np.zeros(count, dtype=np.float64)
+    hours = starts.size
+    for first in range(0, hours - hours % HOURS_PER_DAY, HOURS_PER_DAY):
+        ahead = min(first + 2 * HOURS_PER_DAY, hours)
+        today = _day_series(starts, price, surplus, first, first + HOURS_PER_DAY, ahead)
+        published = _day_series(starts, price, surplus, first, ahead, ahead)
+        for idx in range(first, first + HOURS_PER_DAY):
+            if np.isnan(price[idx]):
+                continue
+            series = published if idx - first >= PRICE_PUBLISH_HOUR else today
+            action, target = decide_batch(
+                strategy, np.full(count, starts[idx]), price[idx], state, series,
+                min_soc=min_soc, max_soc=max_soc, params=params,
+            )
+            step = slice(idx, idx + 1)
+            result = simulate_schedules(
+                action[:, None],
+                target[:, None],
+                price=price[step],
+                export_price=export[step],
+                pv=pv[step],
+                load=load[step],
+                hours=_ONE_HOUR,
+                soc=state,
+                battery=battery,
+                min_soc=min_soc,
+                max_soc=max_soc,
+                terminal_price=0.0,
+            )
+            grid_cost += result.grid_cost
+            state = result.final_soc
+    mean_price = float(np.nanmean(price)) if np.isfinite(price).any() else 0.0
+    return grid_cost - (state - soc) * (battery.capacity_kwh / 100.0) * mean_price
+
+
+def initial_soc(history: HistoryArrays, min_soc: float, max_soc: float) -> float:
+    """Return the first recorded SOC, or the middle of the allowed range."""
+    recorded = history.values[_SOC]
+    known = np.flatnonzero(np.isfinite(recorded))
+    if known.size:
+        return float(np.clip(recorded[known[0]], 0.0, 100.0))
+    return (min_soc + max_soc) / 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class StrategyTuning:
+    """Best thresholds found for one strategy."""
+
+    strategy: str
+    best: dict[str, float]
+    cost: float
+    default_cost: float
+    evaluated: int
+
+    @property
+    def saving(self) -> float:
+        """Return the replayed saving of the best thresholds over the defaults (€)."""
+        return self.default_cost - self.cost
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a rounded mapping for service responses."""
+        return {
+            "parameters": self.best,
+            "cost": round(self.cost, 2),
+            "default_cost": round(self.default_cost, 2),
+            "saving": round(self.saving, 2),
+            "evaluated": self.evaluated,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class TuneResult:
+    """Outcome of one tuning run."""
+
+    days: int
+    hours: int
+    elapsed_s: float
+    strategies: dict[str, StrategyTuning]
+    params: StrategyParams
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the service response payload."""
+        return {
+            "days": self.days,
+            "hours_with_prices": self.hours,
+            "elapsed_seconds": round(self.elapsed_s, 3),
+            "strategies": {name: tuning.as_dict() for name, tuning in self.strategies.items()},
+            "options": self.params.as_options(),
+        }
+
+
+def summarize(
+    strategy: str, batches: list[list[dict[str, float]]], costs: list[np.ndarray]
+) -> StrategyTuning:
+    """Pick the cheapest combination of a strategy's replayed batches.
+
+    The defaults win unless some combination saves more than
+    ``TUNER_MIN_SAVING``, so ties and rounding noise never move them.
+    """
+    combos = [combo for batch in batches for combo in batch]
+    flat = np.concatenate(costs)
+    default = combos.index({name: getattr(DEFAULT_PARAMS, name) for name in TUNABLE[strategy]})
+    best = int(np.argmin(flat))
+    if flat[default] - flat[best] <= TUNER_MIN_SAVING:
+        best = default
+    return StrategyTuning(
+        strategy=strategy,
+        best=combos[best],
+        cost=float(flat[best]),
+        default_cost=float(flat[default]),
+        evaluated=len(combos),
+    )
+
+
+class ParameterTuner:
+    """Runs one tuning at a time in a lazily started process pool."""
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        """Initialize the tuner; worker processes start on first use."""
+        self._max_workers = max_workers or worker_count()
+        self._pool: ProcessPoolExecutor | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while a tuning is in progress."""
+        return self._task is not None and not self._task.done()
+
+    async def async_tune(
+        self,
+        history: HistoryArrays,
+        *,
+        battery: BatteryModel,
+        min_soc: float,
+        max_soc: float,
+        base: StrategyParams = DEFAULT_PARAMS,
+        tariff: CompiledTariff = SPOT_TARIFF,
+    ) -> TuneResult:
+        """Grid-search every tunable strategy over ``history``.
+
+        ``tariff`` converts the recorded spot prices into import and export
+        prices. The returned ``params`` are ``base`` with each strategy's thresholds
+        replaced by the best ones found.
+        """
+        if self.running:
+            raise RuntimeError("A parameter tuning is already running")
+        self._task = asyncio.current_task()
+        began = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        soc = initial_soc(history, min_soc, max_soc)
+        values = np.ascontiguousarray(history.values)
+        jobs = {strategy: parameter_batches(strategy) for strategy in TUNABLE}
+        futures = {
+            strategy: [
+                loop.run_in_executor(
+                    self._pool, replay, history.starts, values, strategy, params,
+                    battery, min_soc, max_soc, soc, tariff,
+                )
+                for params, _ in batches
+            ]
+            for strategy, batches in jobs.items()
+        }
+        try:
+            pending = [future for batch in futures.values() for future in batch]
+            await asyncio.gather(*pending)
+        finally:
+            for batch in futures.values():
+                for future in batch:
+                    future.cancel()
+            self._task = None
+
+        tunings = {
+            strategy: summarize(
+                strategy, [combos for _, combos in jobs[strategy]], [future.result() for future in futures[strategy]]
+            )
+            for strategy in TUNABLE
+        }
+        params = replace(base, **{name: value for tuning in tunings.values() for name, value in tuning.best.items()})
+        result = TuneResult(
+            days=len(history) // HOURS_PER_DAY,
+            hours=int(np.isfinite(history.values[_PRICE]).sum()),
+            elapsed_s=time.monotonic() - began,
+            strategies=tunings,
+            params=params,
+        )
+        _LOGGER.info(
+            "[tuner] %d day(s), %d combinations in %.1f s → %s",
+            result.days, sum(tuning.evaluated for tuning in tunings.values()), result.elapsed_s,
+            {name: round(tuning.saving, 2) for name, tuning in tunings.items()},
+        )
+        return result
+
+    def shutdown(self) -> None:
+        """Cancel a running tuning and stop the worker processes without waiting."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,174 @@
+"""What-if simulation of other strategies, SOC limits and battery sizes.
+
+A scenario is the strategy, the SOC limits and the battery model the plan
+would be made with. Its plan is built the way the coordinator builds the
+live one — the rule strategies rolled forward slot by slot, the robust and
+optimal planners on the compressed horizon and their schedule simulated on
+the full one — but from the cached planning inputs and the current SOC, in
+an executor job, and without touching the live plan or the warm-started
+solver. The optimal planner gets a fresh solver, so jobs may run alongside
+the coordinator.
+
+Plans are memoized per scenario. The memo belongs to one basis (the planning
+inputs object, the battery SOC and the first remaining slot) and is dropped
+when the basis changes, so asking about the same scenarios again, including
+the current settings to compare against, costs a dictionary lookup until the
+next update cycle brings new inputs.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import STRATEGY_OPTIMAL, STRATEGY_ROBUST
+from .horizon import compress_horizon
+from .inputs import PlanningInputs, resample_pv
+from .optimizer import HorizonSolver
+from .plan import Plan
+from .planner import BatteryModel, SlotPlan, StrategyParams, build_slot_plan
+from .scenarios import choose_robust_schedule
+from .simulation import simulate_slot_plan
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class WhatIfScenario:
+    """Settings a what-if plan is made with; hashable, so it keys the memo."""
+
+    strategy: str
+    min_soc: float
+    max_soc: float
+    battery: BatteryModel
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "strategy": self.strategy,
+            "min_soc": self.min_soc,
+            "max_soc": self.max_soc,
+            "battery_capacity": self.battery.capacity_kwh,
+            "max_charge_rate": self.battery.max_charge_kw,
+            "max_discharge_rate": self.battery.max_discharge_kw,
+        }
+
+
+def plan_scenario(
+    inputs: PlanningInputs,
+    scenario: WhatIfScenario,
+    *,
+    soc: float,
+    params: StrategyParams,
+    forecast: list[dict],
+) -> SlotPlan:
+    """Return the slot plan ``scenario`` makes over ``inputs`` from ``soc``.
+
+    ``forecast`` is the normalized solar forecast; the robust planner samples
+    its scenarios between the pessimistic and optimistic estimates.
+    """
+    limits = {
+        "soc": soc,
+        "battery": scenario.battery,
+        "min_soc": scenario.min_soc,
+        "max_soc": scenario.max_soc,
+    }
+    if scenario.strategy == STRATEGY_OPTIMAL:
+        horizon = compress_horizon(inputs)
+        solution = HorizonSolver().solve(horizon.inputs, **limits)
+        return simulate_slot_plan(inputs, horizon.expand(solution.action), horizon.expand(solution.target), **limits)
+    if scenario.strategy == STRATEGY_ROBUST:
+        horizon = compress_horizon(inputs)
+        choice = choose_robust_schedule(
+            horizon.inputs,
+            horizon.aggregate(resample_pv(forecast, inputs.starts, inputs.ends, "pv_estimate10")),
+            horizon.aggregate(resample_pv(forecast, inputs.starts, inputs.ends, "pv_estimate90")),
+            params=params,
+            seed=int(inputs.starts[0]),
+            **limits,
+        )
+        return simulate_slot_plan(inputs, horizon.expand(choice.action), horizon.expand(choice.target), **limits)
+    return build_slot_plan(inputs, scenario.strategy, params=params, **limits)
+
+
+def summarize(
+    plan: Plan, scenario: WhatIfScenario, start: float | None = None, end: float | None = None
+) -> dict[str, Any]:
+    """Return the scenario, its expected cost and segments within ``[start, end)``, and its final SOC."""
+    slots = plan.slots
+    final = float(slots.soc[-1] + slots.battery_kwh[-1] * 100.0 / scenario.battery.capacity_kwh)
+    return {
+        **scenario.as_dict(),
+        "expected_cost": plan.slot_table(start, end)["expected_cost"],
+        "final_soc": round(final, 1),
+        "segments": [
+            segment.as_dict()
+            for segment in plan.segments
+            if (start is None or segment.end.timestamp() > start) and (end is None or segment.start.timestamp() < end)
+        ],
+    }
+
+
+class WhatIfSimulator:
+    """Plans scenarios in an executor and memoizes them until the inputs change."""
+
+    def __init__(self) -> None:
+        """Initialize an empty memo."""
+        self._basis: tuple[PlanningInputs, float, float] | None = None
+        self._plans: dict[WhatIfScenario, Plan] = {}
+        self.hits = 0
+        self.runs = 0
+
+    def _matches(self, inputs: PlanningInputs, soc: float, start: float) -> bool:
+        """Return True if the memo was filled from these inputs, SOC and first slot."""
+        return self._basis is not None and self._basis[0] is inputs and self._basis[1:] == (soc, start)
+
+    async def async_plan(
+        self,
+        hass: HomeAssistant,
+        inputs: PlanningInputs,
+        scenario: WhatIfScenario,
+        *,
+        now: datetime,
+        soc: float,
+        params: StrategyParams,
+        forecast: list[dict],
+    ) -> tuple[Plan, bool]:
+        """Return the plan of ``scenario`` over the slots of ``inputs`` from ``now`` on, and if it was memoized."""
+        remaining = inputs.slice_from(now.timestamp())
+        start = float(remaining.starts[0])
+        if not self._matches(inputs, soc, start):
+            self._basis = (inputs, soc, start)
+            self._plans = {}
+        if (plan := self._plans.get(scenario)) is not None:
+            self.hits += 1
+            return plan, True
+
+        began = time.perf_counter()
+        slots = await hass.async_add_executor_job(
+            partial(plan_scenario, remaining, scenario, soc=soc, params=params, forecast=forecast)
+        )
+        plan = Plan(slots, scenario.strategy, now)
+        # Another call may have refilled the memo from newer inputs meanwhile
+        if self._matches(inputs, soc, start):
+            self._plans[scenario] = plan
+        self.runs += 1
+        _LOGGER.info(
+            "[what-if] %s, SOC %.0f-%.0f%%, %.1f kWh → %d segments in %.1f ms",
+            scenario.strategy,
+            scenario.min_soc,
+            scenario.max_soc,
+            scenario.battery.capacity_kwh,
+            len(plan.segments),
+            (time.perf_counter() - began) * 1000,
+        )
+        return plan, False
+
+    def stats(self) -> dict[str, Any]:
+        """Return memo statistics for diagnostics."""
+        return {"memoized": len(self._plans), "hits": self.hits, "runs": self.runs}
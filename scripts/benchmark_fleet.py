@@ -0,0 +1,81 @@
+"""Benchmark the joint fleet schedule from 1 to 50 batteries.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/benchmark_fleet.py
+
+Every battery gets its own size, rates, SOC, PV and load on two days of
+15-minute slots, compressed as in the coordinator. For each fleet size the
+table shows the vectorized joint solve without and with a shared import cap
+of 2 kW per battery, against solving the batteries one by one with the
+single-battery DP on the same SOC grid, and what the cap costs.
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from benchmark_horizon import synthetic_inputs
+
+from custom_components.solax_energy_optimizer.fleet import FLEET_SOC_LEVELS, solve_fleet
+from custom_components.solax_energy_optimizer.horizon import compress_horizon
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+
+SIZES = (1, 2, 5, 10, 20, 50)
+CAP_PER_BATTERY_KW = 2.0
+MIN_SOC, MAX_SOC = 10.0, 90.0
+
+
+def fleet(count: int, seed: int = 0) -> tuple[list[PlanningInputs], list[float], list[BatteryModel]]:
+    """Return bucketed inputs, SOCs and batteries of ``count`` different sites."""
+    rng = np.random.default_rng(seed)
+    base = compress_horizon(synthetic_inputs(2)).inputs
+    inputs = [
+        PlanningInputs(
+            starts=base.starts,
+            ends=base.ends,
+            price=base.price,
+            pv=base.pv * rng.uniform(0.3, 1.5),
+            load=base.load * rng.uniform(0.5, 1.5),
+        )
+        for _ in range(count)
+    ]
+    batteries = [
+        BatteryModel(
+            capacity_kwh=float(rng.uniform(5.0, 15.0)),
+            max_charge_kw=float(rng.uniform(2.0, 5.0)),
+            max_discharge_kw=float(rng.uniform(2.0, 5.0)),
+        )
+        for _ in range(count)
+    ]
+    return inputs, list(rng.uniform(20.0, 80.0, count)), batteries
+
+
+def main() -> None:
+    """Print one row per fleet size."""
+    print(f"{'batteries':>9} {'buckets':>7} {'looped ms':>9} {'joint ms':>8} {'capped ms':>9} {'rounds':>6} "
+          f"{'peak kW':>8} {'capped kW':>9} {'cap €':>7}")
+    step = (MAX_SOC - MIN_SOC) / (FLEET_SOC_LEVELS - 1)
+    for count in SIZES:
+        inputs, soc, batteries = fleet(count)
+        limits = {"min_soc": [MIN_SOC] * count, "max_soc": [MAX_SOC] * count}
+
+        began = time.perf_counter()
+        for member, level, battery in zip(inputs, soc, batteries):
+            HorizonSolver(step=step).solve(member, soc=level, battery=battery, min_soc=MIN_SOC, max_soc=MAX_SOC)
+        looped_ms = (time.perf_counter() - began) * 1000.0
+
+        free = solve_fleet(inputs, soc=soc, batteries=batteries, **limits)
+        capped = solve_fleet(
+            inputs, soc=soc, batteries=batteries, import_limit=CAP_PER_BATTERY_KW * count, **limits
+        )
+        print(
+            f"{count:>9} {len(inputs[0]):>7} {looped_ms:>9.1f} {free.elapsed_ms:>8.1f} {capped.elapsed_ms:>9.1f} "
+            f"{capped.iterations:>6} {free.grid_kw.max():>8.1f} {capped.grid_kw.max():>9.1f} "
+            f"{capped.cost.sum() - free.cost.sum():>+7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark planning on the uniform 15-minute grid against the compressed horizon.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/benchmark_horizon.py
+
+For horizons of 1 to 7 days of synthetic prices, PV and load, times a cold
+solve of the dynamic-programming optimizer and of the robust planner on the
+native slots and on ``compress_horizon`` buckets. The cost column replays the
+first day re-planning every slot with either horizon and shows what the
+coarse far end costs in executed plan quality.
+"""
+from __future__ import annotations
+
+import time
+from functools import partial
+
+import numpy as np
+
+from custom_components.solax_energy_optimizer.horizon import compress_horizon
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import (
+    HorizonSolver,
+    terminal_price,
+)
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from custom_components.solax_energy_optimizer.scenarios import choose_robust_schedule
+from custom_components.solax_energy_optimizer.simulation import simulate_schedules
+
+BASE = 1_717_200_000.0  # 2024-06-01 00:00 UTC
+SLOT = 900.0
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+LIMITS = {"min_soc": 10.0, "max_soc": 90.0}
+SOC = 40.0
+REPEATS = 3
+
+
+def synthetic_inputs(days: int, seed: int = 0) -> PlanningInputs:
+    """Return ``days`` of 15-minute slots with daily price, PV and load shapes."""
+    rng = np.random.default_rng(seed)
+    count = days * 96
+    starts = BASE + SLOT * np.arange(count, dtype=np.float64)
+    hour = (starts % 86400.0) / 3600.0
+    price = 0.22 + 0.12 * np.sin((hour - 12.0) / 24.0 * 2 * np.pi) + rng.normal(0.0, 0.03, count)
+    pv = np.clip(4.0 * np.sin((hour - 6.0) / 14.0 * np.pi), 0.0, None) * rng.uniform(0.5, 1.0, count)
+    load = 0.4 + 0.6 * ((hour >= 17) & (hour < 22)) + rng.uniform(0.0, 0.3, count)
+    return PlanningInputs(starts=starts, ends=starts + SLOT, price=price, pv=pv, load=load)
+
+
+def timed(func) -> tuple[float, object]:
+    """Return the best wall time of ``REPEATS`` runs in ms and the last result."""
+    best = np.inf
+    for _ in range(REPEATS):
+        began = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - began) * 1000.0)
+    return best, result
+
+
+def optimal(inputs: PlanningInputs, soc: float, compressed: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Return the native-slot schedule of a cold DP solve."""
+    horizon = compress_horizon(inputs) if compressed else None
+    solution = HorizonSolver().solve(horizon.inputs if horizon else inputs, soc=soc, battery=BATTERY, **LIMITS)
+    if horizon is None:
+        return solution.action, solution.target
+    return horizon.expand(solution.action), horizon.expand(solution.target)
+
+
+def robust(inputs: PlanningInputs, soc: float, compressed: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Return the native-slot schedule of the robust planner."""
+    pv10, pv90 = inputs.pv * 0.6, inputs.pv * 1.3
+    horizon = compress_horizon(inputs) if compressed else None
+    choice = choose_robust_schedule(
+        horizon.inputs if horizon else inputs,
+        horizon.aggregate(pv10) if horizon else pv10,
+        horizon.aggregate(pv90) if horizon else pv90,
+        soc=soc, battery=BATTERY, seed=1, **LIMITS,
+    )
+    if horizon is None:
+        return choice.action, choice.target
+    return horizon.expand(choice.action), horizon.expand(choice.target)
+
+
+def receding_cost(planner, inputs: PlanningInputs, compressed: bool) -> float:
+    """Return the cost of re-planning every slot and executing slot 0 for one day.
+
+    Only the first slots of a plan are ever executed; the coarse far end is
+    re-planned at native resolution as it comes closer, so this is the cost
+    that matters, not the open-loop cost of a single plan.
+    """
+    soc, cost = SOC, 0.0
+    for idx in range(96):
+        window = inputs.slice_from(inputs.starts[idx])
+        action, target = planner(window, soc, compressed)
+        step = simulate_schedules(
+            action[:1], target[:1], price=window.price[:1], pv=window.pv[:1], load=window.load[:1],
+            hours=window.durations_h[:1], soc=soc, battery=BATTERY, **LIMITS,
+        )
+        cost += float(step.grid_cost)
+        soc = float(step.final_soc)
+    # Energy left over is worth the price of the rest of the horizon
+    rest = inputs.slice_from(inputs.starts[96]) if len(inputs) > 96 else inputs
+    return cost - (soc - SOC) * BATTERY.capacity_kwh / 100.0 * terminal_price(rest)
+
+
+def main() -> None:
+    """Print one row per planner and horizon length."""
+    print(f"{'planner':<8} {'days':>4} {'slots':>6} {'buckets':>7} "
+          f"{'uniform ms':>10} {'compressed ms':>13} {'speed-up':>8} {'1-day cost Δ €':>14}")
+    for planner in (optimal, robust):
+        for days in (1, 2, 4, 7):
+            inputs = synthetic_inputs(days)
+            buckets = len(compress_horizon(inputs).inputs)
+            uniform_ms, _ = timed(partial(planner, inputs, SOC, False))
+            compressed_ms, _ = timed(partial(planner, inputs, SOC, True))
+            delta = receding_cost(planner, inputs, True) - receding_cost(planner, inputs, False)
+            print(
+                f"{planner.__name__:<8} {days:>4} {len(inputs):>6} {buckets:>7} {uniform_ms:>10.1f} "
+                f"{compressed_ms:>13.1f} {uniform_ms / compressed_ms:>7.1f}× {delta:>+14.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark planning the battery together with more and more flexible loads.
+
+Usage (from the repository root):
+    PYTHONPATH=. python scripts/benchmark_loads.py
+
+Two days of 15-minute slots with a tariff that exports below the import
+price, compressed as in the coordinator, with 0 to 50
+flexible loads of random power, energy and deadline within the first day.
+For each count the table shows the greedy placement alone, the joint solve
+(cold, then warm with the same inputs as on the next cycle), its rounds,
+the cost of the battery and loads planned one after the other (one round)
+against the joint plan, and the energy that did not fit before the
+deadlines. The joint solve stops starting rounds after ``FLEX_BUDGET_MS``.
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from benchmark_horizon import BASE, BATTERY, LIMITS, SOC, synthetic_inputs
+
+from custom_components.solax_energy_optimizer.flexible_loads import (
+    FLEX_BUDGET_MS,
+    FlexibleLoad,
+    place_loads,
+    solve_with_loads,
+)
+from custom_components.solax_energy_optimizer.horizon import compress_horizon
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.tariff import CompiledTariff, TariffEngine
+
+COUNTS = (0, 1, 2, 5, 10, 20, 50)
+# Fees and VAT on import, 90 % of spot minus a fee on export
+TARIFF = CompiledTariff(import_scale=1.21, import_offset=0.18, export_scale=0.9, export_offset=-0.01)
+
+
+def flexible_loads(count: int, seed: int = 0) -> list[FlexibleLoad]:
+    """Return ``count`` loads needing 2-6 hours at full power before a deadline in the first day."""
+    rng = np.random.default_rng(seed)
+    power = rng.uniform(1.0, 7.0, count)
+    return [
+        FlexibleLoad(
+            key=f"load_{idx}",
+            power_kw=float(power[idx]),
+            energy_kwh=float(power[idx] * rng.uniform(2.0, 6.0)),
+            deadline=BASE + float(rng.uniform(10.0, 24.0)) * 3600.0,
+        )
+        for idx in range(count)
+    ]
+
+
+def main() -> None:
+    """Print one row per load count."""
+    inputs = compress_horizon(TariffEngine(TARIFF).apply(synthetic_inputs(2))).inputs
+    household = (inputs.load - inputs.pv) * inputs.durations_h
+    print(f"{len(inputs)} buckets, round budget {FLEX_BUDGET_MS:.0f} ms")
+    print(f"{'loads':>5} {'place ms':>8} {'joint ms':>8} {'warm ms':>7} {'rounds':>6} "
+          f"{'one round €':>11} {'joint €':>8} {'unmet kWh':>9}")
+    for count in COUNTS:
+        loads = flexible_loads(count)
+
+        began = time.perf_counter()
+        place_loads(loads, inputs, household)
+        place_ms = (time.perf_counter() - began) * 1000.0
+
+        single = solve_with_loads(inputs, loads, solver=HorizonSolver(), soc=SOC, battery=BATTERY, rounds=1, **LIMITS)
+        solver = HorizonSolver()
+        joint = solve_with_loads(inputs, loads, solver=solver, soc=SOC, battery=BATTERY, **LIMITS)
+        warm = solve_with_loads(inputs, loads, solver=solver, soc=SOC, battery=BATTERY, **LIMITS)
+        print(
+            f"{count:>5} {place_ms:>8.2f} {joint.elapsed_ms:>8.1f} {warm.elapsed_ms:>7.1f} {joint.rounds:>6} "
+            f"{single.solution.expected_cost:>11.2f} {joint.solution.expected_cost:>8.2f} "
+            f"{joint.loads.unmet_kwh.sum():>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 """Tests for provider adapter factory functions."""
 from __future__ import annotations
 
-import pytest
-
 from custom_components.solax_energy_optimizer.adapters.factory import (
     build_forecast_adapter,
     build_inverter_adapter,
@@ -27,7 +25,6 @@ from custom_components.solax_energy_optimizer.adapters.solcast import (
     SolcastSolarForecastAdapter,
 )
 
-
 # ---------------------------------------------------------------------------
 # build_inverter_adapter
 # ---------------------------------------------------------------------------
@@ -123,6 +120,19 @@ class TestBuildForecastAdapter:
         assert adapter._field_map.period_start_field == "period_start"
         assert adapter._field_map.pv_estimate_field == "pv_estimate"
         assert adapter._field_map.today_total_from_state is True
+        assert adapter._field_map.pv_estimate10_field is None
+        assert adapter._field_map.pv_estimate90_field is None
+
+    def test_generic_type_with_quantile_fields(self):
+        config = {
+            "forecast_entity": "sensor.forecast",
+            "forecast_type": "generic",
+            "forecast_pv_estimate10_field": "p10",
+            "forecast_pv_estimate90_field": "p90",
+        }
+        adapter = build_forecast_adapter(config)
+        assert adapter._field_map.pv_estimate10_field == "p10"
+        assert adapter._field_map.pv_estimate90_field == "p90"
 
     def test_falls_back_to_legacy_v1_key(self):
         config = {"solcast_entity": "sensor.old_forecast"}
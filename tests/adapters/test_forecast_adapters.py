@@ -11,7 +11,6 @@ from custom_components.solax_energy_optimizer.adapters.solcast import (
     SolcastSolarForecastAdapter,
 )
 
-
 ENTITY_ID = "sensor.solar_forecast"
 
 SOLCAST_FORECAST = [
@@ -37,6 +36,22 @@ class TestSolcastSolarForecastAdapter:
         result = adapter.get_forecast(hass)
         assert result == SOLCAST_FORECAST
 
+    def test_get_forecast_carries_quantile_bands(self, hass):
+        item = {
+            "period_start": "2024-06-01T06:00:00+00:00",
+            "pv_estimate": 1.0,
+            "pv_estimate10": 0.4,
+            "pv_estimate90": 1.6,
+        }
+        hass.set_state(ENTITY_ID, "8.5", {"detailedForecast": [item]})
+        adapter = SolcastSolarForecastAdapter(ENTITY_ID)
+        assert adapter.get_forecast(hass) == [item]
+
+    def test_get_forecast_skips_non_dict_items(self, hass):
+        hass.set_state(ENTITY_ID, "8.5", {"detailedForecast": [SOLCAST_FORECAST[0], "bad_item"]})
+        adapter = SolcastSolarForecastAdapter(ENTITY_ID)
+        assert adapter.get_forecast(hass) == [SOLCAST_FORECAST[0]]
+
     def test_get_forecast_returns_empty_when_entity_missing(self, hass):
         adapter = SolcastSolarForecastAdapter(ENTITY_ID)
         assert adapter.get_forecast(hass) == []
@@ -147,6 +162,26 @@ class TestGenericForecastAdapterFromState:
         result = adapter.get_forecast(hass)
         assert result[0]["pv_estimate"] == 0
 
+    def test_get_forecast_maps_quantile_fields(self, hass):
+        field_map = ForecastFieldMap(
+            forecast_attribute="forecasts",
+            period_start_field="start",
+            pv_estimate_field="power",
+            pv_estimate10_field="low",
+            pv_estimate90_field="high",
+        )
+        raw = [{"start": "2024-06-01T06:00:00+00:00", "power": 1.0, "low": 0.5, "high": 1.5}]
+        hass.set_state(ENTITY_ID, "5.0", {"forecasts": raw})
+        adapter = GenericForecastAdapter(ENTITY_ID, field_map)
+        assert adapter.get_forecast(hass) == [
+            {
+                "period_start": "2024-06-01T06:00:00+00:00",
+                "pv_estimate": 1.0,
+                "pv_estimate10": 0.5,
+                "pv_estimate90": 1.5,
+            }
+        ]
+
     def test_get_solar_today_reads_from_state(self, hass):
         hass.set_state(ENTITY_ID, "6.75", {"forecasts": GENERIC_FORECAST_RAW})
         adapter = GenericForecastAdapter(ENTITY_ID, FIELD_MAP_STATE)
@@ -1,10 +1,38 @@
-"""Shared pytest fixtures for Solar Energy Optimizer tests."""
+"""Shared pytest fixtures and planning input helpers for Solar Energy Optimizer tests."""
 from __future__ import annotations
 
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+
+BASE = 1_717_200_000.0  # 2024-06-01 00:00 UTC
+HOUR = 3600.0
+
+
+def make_inputs(
+    prices,
+    pv=0.0,
+    load=0.0,
+    *,
+    export_price=None,
+    start: float = BASE,
+    slot: float = HOUR,
+) -> PlanningInputs:
+    """Return back-to-back slots from ``start``; ``pv`` and ``load`` are arrays or constants (kW)."""
+    count = len(prices)
+    starts = start + slot * np.arange(count, dtype=np.float64)
+    return PlanningInputs(
+        starts=starts,
+        ends=starts + slot,
+        price=np.array(prices, dtype=np.float64),
+        pv=np.broadcast_to(np.asarray(pv, dtype=np.float64), (count,)).copy(),
+        load=np.broadcast_to(np.asarray(load, dtype=np.float64), (count,)).copy(),
+        export_price=None if export_price is None else np.array(export_price, dtype=np.float64),
+    )
+
 
 class MockState:
     """Minimal stand-in for a Home Assistant State object."""
@@ -0,0 +1,85 @@
+"""Tests for the plan calendar and its interval index."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from custom_components.solax_energy_optimizer.calendar import (
+    PlanCalendar,
+    PlanEventIndex,
+)
+from custom_components.solax_energy_optimizer.plan import PlanSegment
+
+BASE = datetime(2024, 6, 1, tzinfo=UTC)
+HOUR = timedelta(hours=1)
+
+
+def segments() -> list[PlanSegment]:
+    """Charge 00-02, idle 02-05, discharge 05-06."""
+    return [
+        PlanSegment(BASE, BASE + 2 * HOUR, "charge", 90.0, 0.051),
+        PlanSegment(BASE + 2 * HOUR, BASE + 5 * HOUR, "idle", None, 0.2),
+        PlanSegment(BASE + 5 * HOUR, BASE + 6 * HOUR, "discharge", 20.0, None),
+    ]
+
+
+def make_calendar(plan) -> PlanCalendar:
+    coordinator = MagicMock()
+    coordinator.data = SimpleNamespace(plan=plan)
+    entry = MagicMock()
+    entry.entry_id = "abc"
+    return PlanCalendar(coordinator, entry)
+
+
+# ---------------------------------------------------------------------------
+# PlanEventIndex
+# ---------------------------------------------------------------------------
+
+
+class TestPlanEventIndex:
+    def test_events_from_segments(self):
+        events = PlanEventIndex(segments()).events
+        assert [event.summary for event in events] == ["Charge to 90%", "Idle", "Discharge to 20%"]
+        assert events[0].description == "Expected price: 0.0510/kWh"
+        assert events[2].description is None
+        assert (events[1].start, events[1].end) == (BASE + 2 * HOUR, BASE + 5 * HOUR)
+
+    def test_range_returns_overlapping_events(self):
+        index = PlanEventIndex(segments())
+        summaries = [event.summary for event in index.between(BASE + 1 * HOUR, BASE + 3 * HOUR)]
+        assert summaries == ["Charge to 90%", "Idle"]
+        # Touching boundaries do not overlap
+        assert [event.summary for event in index.between(BASE + 2 * HOUR, BASE + 5 * HOUR)] == ["Idle"]
+        assert index.between(BASE + 6 * HOUR, BASE + 9 * HOUR) == []
+        assert len(index.between(BASE - HOUR, BASE + 9 * HOUR)) == 3
+
+    def test_upcoming_event(self):
+        index = PlanEventIndex(segments())
+        assert index.upcoming(BASE + 2 * HOUR).summary == "Idle"
+        assert index.upcoming(BASE - HOUR).summary == "Charge to 90%"
+        assert index.upcoming(BASE + 6 * HOUR) is None
+        assert PlanEventIndex([]).upcoming(BASE) is None
+
+
+# ---------------------------------------------------------------------------
+# PlanCalendar
+# ---------------------------------------------------------------------------
+
+
+class TestPlanCalendar:
+    def test_index_rebuilt_only_when_segments_change(self):
+        calendar = make_calendar(SimpleNamespace(segments=segments()))
+        index = calendar.index
+        assert len(index) == 3
+        # A refresh reproducing the same plan keeps the index
+        calendar.coordinator.data = SimpleNamespace(plan=SimpleNamespace(segments=segments()))
+        assert calendar.index is index
+        changed = segments()[:2]
+        calendar.coordinator.data = SimpleNamespace(plan=SimpleNamespace(segments=changed))
+        assert len(calendar.index) == 2
+
+    async def test_get_events_without_plan(self):
+        calendar = make_calendar(None)
+        assert await calendar.async_get_events(MagicMock(), BASE, BASE + HOUR) == []
+        assert calendar.event is None
@@ -0,0 +1,99 @@
+"""Tests for energy accounting and hourly statistics."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from custom_components.solax_energy_optimizer import energy_statistics
+from custom_components.solax_energy_optimizer.energy_statistics import (
+    STATISTIC_CHARGE,
+    STATISTIC_COST,
+    EnergyAccountant,
+    EnergyStatisticsPublisher,
+    HourlyTotals,
+)
+
+T0 = datetime(2024, 6, 1, 10, 0, tzinfo=UTC)
+STEP = timedelta(minutes=5)
+
+
+class TestEnergyAccountant:
+    def test_first_reading_records_nothing(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        assert accountant.record(T0, 50.0, 0.2, "charge") is None
+        assert accountant.daily_cost == 0.0
+
+    def test_grid_charge_is_billed_at_previous_price(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        accountant.record(T0, 50.0, 0.20, "charge")
+        accountant.record(T0 + STEP, 60.0, 0.30, "idle")
+        assert accountant.daily_cost == pytest.approx(0.20)
+        assert accountant.monthly_cost == pytest.approx(0.20)
+
+    def test_charging_while_idle_is_free(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        accountant.record(T0, 50.0, 0.20, "idle")
+        accountant.record(T0 + STEP, 60.0, 0.20, "idle")
+        assert accountant.daily_cost == 0.0
+
+    def test_discharge_counts_as_savings(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        accountant.record(T0, 60.0, 0.40, "discharge")
+        accountant.record(T0 + STEP, 50.0, 0.40, "discharge")
+        assert accountant.daily_savings == pytest.approx(0.40)
+
+    def test_returns_completed_hour_on_rollover(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        accountant.record(T0, 50.0, 0.20, "charge")
+        assert accountant.record(T0 + STEP, 55.0, 0.20, "charge") is None
+        completed = accountant.record(T0 + timedelta(hours=1), 60.0, 0.20, "idle")
+        assert completed is not None
+        assert completed.start == T0
+        assert completed.value(STATISTIC_CHARGE) == pytest.approx(0.5)
+        assert completed.value(STATISTIC_COST) == pytest.approx(0.1)
+
+    def test_missing_soc_keeps_previous_reading(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        accountant.record(T0, 50.0, 0.20, "charge")
+        accountant.record(T0 + STEP, None, 0.20, "charge")
+        accountant.record(T0 + 2 * STEP, 60.0, 0.20, "charge")
+        assert accountant.daily_cost == pytest.approx(0.20)
+
+    def test_daily_totals_reset_at_midnight(self):
+        accountant = EnergyAccountant(capacity_kwh=10.0)
+        late = datetime(2024, 6, 1, 23, 55, tzinfo=UTC)
+        accountant.record(late - STEP, 50.0, 0.20, "charge")
+        accountant.record(late, 60.0, 0.20, "charge")
+        assert accountant.daily_cost > 0
+        accountant.record(late + 2 * STEP, 60.0, 0.20, "idle")
+        assert accountant.daily_cost == 0.0
+        assert accountant.monthly_cost == pytest.approx(0.20)
+
+
+class TestEnergyStatisticsPublisher:
+    def test_statistic_ids_are_valid(self):
+        from homeassistant.components.recorder.statistics import valid_statistic_id
+
+        publisher = EnergyStatisticsPublisher(None, "01HXYZABC")
+        statistic_id = publisher.statistic_id(STATISTIC_COST)
+        assert statistic_id == "solax_energy_optimizer:01hxyzabc_cost"
+        assert valid_statistic_id(statistic_id)
+
+    @pytest.mark.parametrize("mean_type_known", [True, False])
+    async def test_metadata_matches_recorder_version(self, monkeypatch, mean_type_known):
+        imported = []
+        monkeypatch.setattr(
+            energy_statistics,
+            "async_add_external_statistics",
+            lambda hass, metadata, rows: imported.append(metadata),
+        )
+        if not mean_type_known:
+            # Home Assistant before 2025.4
+            monkeypatch.setattr(energy_statistics, "StatisticMeanType", None)
+        publisher = EnergyStatisticsPublisher(None, "abc")
+        publisher._sums = dict.fromkeys((series for series, _, _ in energy_statistics.STATISTIC_SERIES), 0.0)
+        await publisher.async_publish(HourlyTotals(T0, cost=0.5))
+        assert len(imported) == 4
+        assert all(metadata["has_mean"] is False for metadata in imported)
+        assert all(("mean_type" in metadata) is mean_type_known for metadata in imported)
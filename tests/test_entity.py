@@ -0,0 +1,135 @@
+"""Tests for the change-detecting base entity."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.solax_energy_optimizer.const import (
+    REASON_CHEAP_PRICE,
+    REASON_MODERATE_PRICE,
+)
+from custom_components.solax_energy_optimizer.entity import EnergyOptimizerEntity
+from custom_components.solax_energy_optimizer.reasons import DecisionReason
+from custom_components.solax_energy_optimizer.sensor import (
+    DECISION_REASON_SENSOR,
+    DecisionReasonSensor,
+)
+
+
+class ProbeEntity(EnergyOptimizerEntity):
+    """Entity whose state and attributes are set directly by the test."""
+
+    value: Any = None
+    attributes: dict[str, Any] | None = None
+
+    @property
+    def state(self) -> Any:
+        return self.value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self.attributes or {}
+
+
+def make_entity() -> ProbeEntity:
+    coordinator = MagicMock()
+    coordinator.last_update_success = True
+    entry = MagicMock()
+    entry.entry_id = "abc"
+    return ProbeEntity(coordinator, entry, "probe")
+
+
+class TestEnergyOptimizerEntity:
+    def test_unique_id_and_device(self):
+        entity = make_entity()
+        assert entity.unique_id == "abc_probe"
+        assert entity.device_info == {"identifiers": {("solax_energy_optimizer", "abc")}}
+
+    def test_skips_write_when_unchanged(self):
+        entity = make_entity()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            entity.value = "idle"
+            entity._handle_coordinator_update()
+            entity._handle_coordinator_update()
+            assert write.call_count == 1
+
+    def test_writes_on_state_change(self):
+        entity = make_entity()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            entity.value = "idle"
+            entity._handle_coordinator_update()
+            entity.value = "charge"
+            entity._handle_coordinator_update()
+            assert write.call_count == 2
+
+    def test_writes_on_attribute_change(self):
+        entity = make_entity()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            entity.value = "idle"
+            entity.attributes = {"soc": 50}
+            entity._handle_coordinator_update()
+            entity.attributes = {"soc": 51}
+            entity._handle_coordinator_update()
+            assert write.call_count == 2
+
+    def test_writes_on_availability_change(self):
+        entity = make_entity()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            entity._handle_coordinator_update()
+            entity.coordinator.last_update_success = False
+            entity._handle_coordinator_update()
+            assert write.call_count == 2
+
+    def test_explicit_write_updates_snapshot(self):
+        entity = make_entity()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            entity.value = "on"
+            entity.async_write_ha_state()
+            entity._handle_coordinator_update()
+            assert write.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Decision reason sensor
+# ---------------------------------------------------------------------------
+
+
+def cycle_data(soc: float, price: float, cheap_threshold: float = 0.15) -> SimpleNamespace:
+    """Coordinator data of one charging cycle, with the reason as the coordinator builds it."""
+    reason = DecisionReason(
+        REASON_CHEAP_PRICE,
+        {"price": price, "cheap_threshold": cheap_threshold, "soc": soc, "max_soc": 90.0},
+    )
+    return SimpleNamespace(
+        decision_reason=reason, target_soc=90.0, battery_soc=soc, current_price=price, last_action_time=None
+    )
+
+
+class TestDecisionReasonSensor:
+    def test_unchanged_decision_does_not_write(self):
+        coordinator = MagicMock()
+        coordinator.last_update_success = True
+        coordinator.current_strategy = "minimize_cost"
+        entry = MagicMock()
+        entry.entry_id = "abc"
+        sensor = DecisionReasonSensor(coordinator, DECISION_REASON_SENSOR, entry)
+        with patch.object(Entity, "async_write_ha_state") as write:
+            # SOC and price move every cycle while charging
+            for soc, price in ((40.0, 0.101), (43.5, 0.104), (47.0, 0.098)):
+                coordinator.data = cycle_data(soc, price)
+                coordinator.update_count = int(soc)
+                sensor._handle_coordinator_update()
+            assert write.call_count == 1
+            coordinator.data = cycle_data(50.0, 0.1, cheap_threshold=0.12)
+            sensor._handle_coordinator_update()
+            assert write.call_count == 2
+            coordinator.data = cycle_data(50.0, 0.1, cheap_threshold=0.12)
+            coordinator.data.decision_reason = DecisionReason(REASON_MODERATE_PRICE)
+            sensor._handle_coordinator_update()
+            assert write.call_count == 3
+        # Change detection never renders the description
+        assert "text" not in coordinator.data.decision_reason.__dict__
+        assert set(sensor.extra_state_attributes) == {"target_soc", "strategy", "parameters"}
@@ -0,0 +1,164 @@
+"""Tests for the joint fleet schedule under a shared grid connection limit."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.fleet import (
+    DATA_FLEETS,
+    FLEET_MEMBER_TIMEOUT,
+    FLEET_REPLAN_SECONDS,
+    FleetMember,
+    async_join_fleet,
+    async_leave_fleet,
+    solve_fleet,
+)
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from tests.conftest import BASE, HOUR, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=4.0, max_discharge_kw=4.0)
+PRICES = [0.30, 0.05, 0.05, 0.30, 0.30, 0.40, 0.40, 0.20]
+
+
+def solve(inputs, soc, **kwargs):
+    count = len(inputs)
+    return solve_fleet(
+        inputs,
+        soc=soc,
+        batteries=[BATTERY] * count,
+        min_soc=[10.0] * count,
+        max_soc=[90.0] * count,
+        **kwargs,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Joint solve
+# ---------------------------------------------------------------------------
+
+
+class TestSolveFleet:
+    def test_single_battery_matches_dp(self):
+        rng = np.random.default_rng(3)
+        inputs = make_inputs(rng.uniform(0.0, 0.4, 12), rng.uniform(0.0, 3.0, 12), rng.uniform(0.2, 1.5, 12))
+        schedule = solve([inputs], [50.0])
+        solution = HorizonSolver(step=2.0).solve(inputs, soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0)
+        np.testing.assert_allclose(schedule.soc[0], solution.soc)
+        np.testing.assert_array_equal(schedule.action[0], solution.action)
+        assert schedule.iterations == 1
+        assert schedule.capped_slots == 0
+
+    def test_without_cap_batteries_are_independent(self):
+        sunny, cloudy = make_inputs(PRICES, pv=2.0, load=0.5), make_inputs(PRICES, load=1.0)
+        joint = solve([sunny, cloudy], [30.0, 70.0])
+        for row, (inputs, soc) in enumerate(((sunny, 30.0), (cloudy, 70.0))):
+            alone = solve([inputs], [soc])
+            np.testing.assert_allclose(joint.soc[row], alone.soc[0])
+            assert joint.cost[row] == pytest.approx(alone.cost[0])
+
+    def test_import_cap_spreads_charging(self):
+        inputs = [make_inputs(PRICES, load=0.5)] * 3
+        free = solve(inputs, [10.0] * 3)
+        capped = solve(inputs, [10.0] * 3, import_limit=6.0)
+        assert free.grid_kw.max() > 6.0
+        assert capped.grid_kw.max() <= 6.0 + 1e-6
+        assert capped.capped_slots > 0
+        assert capped.cost.sum() >= free.cost.sum() - 1e-9
+
+    def test_reallocation_beats_pro_rata_shares(self):
+        # Only the first battery is empty; its share of the cheap slots must grow
+        inputs = [make_inputs(PRICES, load=0.5)] * 3
+        first_round = solve(inputs, [10.0, 90.0, 90.0], import_limit=6.0, iterations=1)
+        joint = solve(inputs, [10.0, 90.0, 90.0], import_limit=6.0)
+        assert joint.iterations > 1
+        assert joint.cost.sum() < first_round.cost.sum()
+        assert joint.grid_kw.max() <= 6.0 + 1e-6
+
+    def test_export_cap_limits_discharge(self):
+        inputs = [make_inputs([0.1, 0.1, 0.9, 0.1])] * 2
+        free = solve(inputs, [90.0, 90.0])
+        capped = solve(inputs, [90.0, 90.0], export_limit=3.0)
+        assert -free.grid_kw.min() > 3.0
+        assert -capped.grid_kw.min() <= 3.0 + 1e-6
+
+
+# ---------------------------------------------------------------------------
+# Fleet coordinator
+# ---------------------------------------------------------------------------
+
+
+def member(entry_id: str, soc: float = 20.0, max_soc: float = 90.0, inputs: PlanningInputs | None = None):
+    return FleetMember(
+        entry_id=entry_id,
+        inputs=inputs if inputs is not None else make_inputs(PRICES, load=0.5),
+        soc=soc,
+        battery=BATTERY,
+        min_soc=10.0,
+        max_soc=max_soc,
+    )
+
+
+class TestFleetCoordinator:
+    @pytest.fixture
+    def fleet(self, hass):
+        hass.data = {}
+        fleet = async_join_fleet(hass, "garage", "a", 6.0, None)
+        assert async_join_fleet(hass, "garage", "b", 8.0, 5.0) is fleet
+        return fleet
+
+    def test_membership_and_limits(self, hass, fleet):
+        assert fleet.entry_ids == ["a", "b"]
+        assert fleet.limits == (6.0, 5.0)
+        async_leave_fleet(hass, fleet, "a")
+        assert fleet.limits == (8.0, 5.0)
+        async_leave_fleet(hass, fleet, "b")
+        assert "garage" not in hass.data[DATA_FLEETS]
+
+    def test_members_share_one_solve(self, fleet):
+        now = BASE + 60
+        assert fleet.dispatch(member("c"), now) is None
+        fleet.dispatch(member("a"), now)
+        fleet.dispatch(member("b"), now)
+        second, joint = fleet.dispatch(member("a", soc=21.0), now + 60)
+        assert fleet.stats.solves == 2  # b joined the second solve
+        assert fleet.stats.reused == 1
+        assert joint.action.shape[0] == 2
+        assert joint.grid_kw.max() <= 6.0 + 1e-6
+        assert second.action.size == len(make_inputs(PRICES, load=0.5))
+
+    def test_later_slot_reads_offset_row(self, fleet):
+        fleet.dispatch(member("a"), BASE + HOUR - 120)
+        solution, _ = fleet.dispatch(member("b"), BASE + HOUR - 120)
+        # Within the replan interval, but the next slot has started
+        later = make_inputs(PRICES, load=0.5).slice_from(BASE + HOUR + 60)
+        shifted, _ = fleet.dispatch(member("b", inputs=later), BASE + HOUR + 60)
+        assert fleet.stats.reused == 1
+        np.testing.assert_array_equal(shifted.target, solution.target[1:])
+
+    def test_settings_change_or_age_resolves(self, fleet):
+        fleet.dispatch(member("a"), BASE + 60)
+        fleet.dispatch(member("a", max_soc=80.0), BASE + 120)
+        assert fleet.stats.solves == 2
+        fleet.dispatch(member("a", max_soc=80.0), BASE + 120 + FLEET_REPLAN_SECONDS)
+        assert fleet.stats.solves == 3
+
+    def test_member_on_other_slots_is_left_out(self, fleet):
+        fleet.dispatch(member("b", inputs=make_inputs(PRICES[:6], load=0.5)), BASE + 60)
+        _, schedule = fleet.dispatch(member("a"), BASE + 60)
+        assert schedule.action.shape[0] == 1
+
+    def test_withdrawn_or_silent_member_loses_its_share(self, fleet):
+        fleet.dispatch(member("a"), BASE + 60)
+        _, schedule = fleet.dispatch(member("b"), BASE + 60)
+        assert schedule.action.shape[0] == 2
+        # b switched to a rule strategy: the next dispatch solves without it
+        fleet.withdraw("b")
+        _, schedule = fleet.dispatch(member("a"), BASE + 120)
+        assert schedule.action.shape[0] == 1
+        assert fleet.stats.solves == 3
+        # b is back on the optimal strategy, then stops dispatching
+        fleet.dispatch(member("b"), BASE + 180)
+        _, schedule = fleet.dispatch(member("a"), BASE + 180 + FLEET_MEMBER_TIMEOUT)
+        assert schedule.action.shape[0] == 1
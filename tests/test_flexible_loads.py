@@ -0,0 +1,144 @@
+"""Tests for flexible loads planned together with the battery."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.const import (
+    CONF_BOILER_POWER,
+    CONF_EV_DEADLINE,
+    CONF_EV_ENERGY,
+    CONF_EV_POWER,
+)
+from custom_components.solax_energy_optimizer.flexible_loads import (
+    FlexibleLoad,
+    FlexibleLoadTracker,
+    load_status,
+    place_loads,
+    solve_with_loads,
+)
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from tests.conftest import BASE, HOUR, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+
+
+def household(inputs: PlanningInputs) -> np.ndarray:
+    return (inputs.load - inputs.pv) * inputs.durations_h
+
+
+def ev(energy_kwh: float, deadline_h: float, power_kw: float = 2.0, key: str = "ev_charger") -> FlexibleLoad:
+    return FlexibleLoad(key=key, power_kw=power_kw, energy_kwh=energy_kwh, deadline=BASE + deadline_h * HOUR)
+
+
+# ---------------------------------------------------------------------------
+# Placement
+# ---------------------------------------------------------------------------
+
+
+class TestPlaceLoads:
+    def test_takes_cheapest_slots_before_deadline(self):
+        inputs = make_inputs([0.30, 0.10, 0.20, 0.15, 0.05])
+        schedule = place_loads([ev(3.0, 4)], inputs, household(inputs))
+        # 0.05 lies after the deadline; 2 kWh at 0.10, the last 1 kWh at 0.15
+        np.testing.assert_allclose(schedule.energy_kwh[0], [0.0, 2.0, 0.0, 1.0, 0.0])
+        assert schedule.unmet_kwh[0] == 0.0
+
+    def test_solar_surplus_costs_the_export_price(self):
+        inputs = make_inputs([0.30] * 4, pv=[0, 0, 3.0, 0], export_price=[0.05] * 4)
+        schedule = place_loads([ev(2.0, 4)], inputs, household(inputs))
+        np.testing.assert_allclose(schedule.energy_kwh[0], [0.0, 0.0, 2.0, 0.0])
+
+    def test_loads_do_not_share_a_surplus(self):
+        inputs = make_inputs([0.30, 0.30, 0.20], pv=[2.0, 0, 0], export_price=[0.05] * 3)
+        schedule = place_loads([ev(2.0, 3, key="boiler"), ev(2.0, 2)], inputs, household(inputs))
+        # The earlier deadline picks first and takes the surplus
+        np.testing.assert_allclose(schedule.energy_kwh[1], [2.0, 0.0, 0.0])
+        np.testing.assert_allclose(schedule.energy_kwh[0], [0.0, 0.0, 2.0])
+
+    def test_import_limit_and_unmet_energy(self):
+        inputs = make_inputs([0.10, 0.20, 0.30], load=[2.0, 0.0, 0.0])
+        schedule = place_loads([ev(6.0, 3)], inputs, household(inputs), import_limit=3.0)
+        np.testing.assert_allclose(schedule.energy_kwh[0], [0.0, 2.0, 2.0])
+        assert schedule.unmet_kwh[0] == pytest.approx(2.0)
+
+    def test_status_merges_runs(self):
+        inputs = make_inputs([0.10, 0.10, 0.30, 0.10])
+        schedule = place_loads([ev(5.0, 4)], inputs, household(inputs))
+        status = load_status([ev(5.0, 4)], schedule, inputs)["ev_charger"]
+        assert status.power_kw == pytest.approx(2.0)
+        assert status.runs == ((BASE, BASE + 2 * HOUR, 2.0), (BASE + 3 * HOUR, BASE + 4 * HOUR, 1.0))
+        assert status.next_start == BASE
+        assert status.planned_kwh == pytest.approx(5.0)
+
+
+# ---------------------------------------------------------------------------
+# Joint solve with the battery
+# ---------------------------------------------------------------------------
+
+
+class TestSolveWithLoads:
+    def test_rounds_never_cost_more_than_the_first(self):
+        gains = []
+        for seed in range(40):
+            rng = np.random.default_rng(seed)
+            price = rng.uniform(0.05, 0.60, 12)
+            inputs = make_inputs(
+                price,
+                pv=np.clip(rng.normal(1.0, 3.0, 12), 0.0, None),
+                load=rng.uniform(0.2, 1.5, 12),
+                export_price=price * rng.uniform(0.1, 0.6),
+            )
+            loads = [
+                ev(float(rng.uniform(1.0, 10.0)), float(rng.integers(4, 13)), float(rng.uniform(1.0, 5.0)), f"l{idx}")
+                for idx in range(rng.integers(1, 4))
+            ]
+            battery = BatteryModel(*(float(value) for value in rng.uniform((3.0, 1.0, 1.0), (10.0, 5.0, 5.0))))
+            limits = {"soc": float(rng.uniform(10.0, 90.0)), "battery": battery, "min_soc": 10.0, "max_soc": 90.0}
+            single = solve_with_loads(inputs, loads, solver=HorizonSolver(), rounds=1, **limits)
+            joint = solve_with_loads(inputs, loads, solver=HorizonSolver(), **limits)
+            gains.append(single.solution.expected_cost - joint.solution.expected_cost)
+            placed = joint.loads.energy_kwh.sum() + joint.loads.unmet_kwh.sum()
+            assert placed == pytest.approx(sum(load.energy_kwh for load in loads))
+        assert min(gains) >= -1e-9
+        assert max(gains) > 0.01
+
+    def test_load_takes_the_slot_the_battery_would_import_in(self):
+        # Cheap first hour: the battery fills up, the load still runs there at the import limit
+        inputs = make_inputs([0.05, 0.40, 0.40])
+        joint = solve_with_loads(
+            inputs, [ev(2.0, 3)], solver=HorizonSolver(), soc=10.0, battery=BATTERY,
+            min_soc=10.0, max_soc=90.0, import_limit=5.0,
+        )
+        assert joint.loads.energy_kwh[0, 0] == pytest.approx(2.0)
+        # 5 kW limit − 2 kW load leaves 3 kWh of charge in the first hour
+        assert joint.solution.soc[0] == pytest.approx(40.0)
+
+
+# ---------------------------------------------------------------------------
+# Tracker
+# ---------------------------------------------------------------------------
+
+
+class TestFlexibleLoadTracker:
+    def test_only_loads_with_power_and_energy(self):
+        tracker = FlexibleLoadTracker({CONF_EV_POWER: 7.0, CONF_EV_ENERGY: 10.0, CONF_BOILER_POWER: 2.0})
+        assert tracker.keys == ["ev_charger"]
+        assert not FlexibleLoadTracker({})
+
+    def test_delivered_energy_and_deadline(self):
+        tracker = FlexibleLoadTracker({CONF_EV_POWER: 7.0, CONF_EV_ENERGY: 10.0, CONF_EV_DEADLINE: "06:00:00"})
+        tracker.advance(BASE)
+        (load,) = tracker.loads()
+        assert load.deadline == BASE + 6 * HOUR
+        tracker.follow([7.0])
+        tracker.advance(BASE + 0.5 * HOUR)
+        assert tracker.loads()[0].energy_kwh == pytest.approx(6.5)
+        tracker.advance(BASE + 2 * HOUR)
+        assert tracker.loads()[0].energy_kwh == 0.0  # never more than the target
+        tracker.advance(BASE + 6 * HOUR)
+        (load,) = tracker.loads()
+        assert load.energy_kwh == 10.0
+        assert load.deadline == BASE + 30 * HOUR
@@ -0,0 +1,107 @@
+"""Tests for forecast accuracy tracking and correction."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.solax_energy_optimizer.forecast_accuracy import (
+    MIN_CORRECTION_SAMPLES,
+    ForecastErrorTracker,
+    HourErrorStats,
+)
+
+# 2024-06-01 10:00 UTC
+BASE = datetime(2024, 6, 1, 10, tzinfo=UTC).timestamp()
+HALF_HOUR = 1800.0
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=UTC).isoformat()
+
+
+def make_forecast(start: float, estimates: list[float]) -> list[dict]:
+    return [
+        {"period_start": iso(start + idx * HALF_HOUR), "pv_estimate": value}
+        for idx, value in enumerate(estimates)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Per-hour statistics
+# ---------------------------------------------------------------------------
+
+
+class TestHourErrorStats:
+    def test_welford_mean_and_std(self):
+        stats = HourErrorStats()
+        for estimate, measured in ((2.0, 1.0), (2.0, 2.0), (2.0, 3.0)):
+            stats.update(estimate, measured)
+        assert stats.mean_error == pytest.approx(0.0)
+        assert stats.std_error == pytest.approx(1.0)
+        assert stats.mean_abs_error == pytest.approx(2 / 3)
+
+    def test_correction_needs_enough_samples(self):
+        stats = HourErrorStats()
+        for _ in range(MIN_CORRECTION_SAMPLES - 1):
+            stats.update(2.0, 1.0)
+        assert stats.correction == 1.0
+        stats.update(2.0, 1.0)
+        assert stats.correction < 1.0
+
+    def test_tiny_estimates_do_not_move_ratio(self):
+        stats = HourErrorStats()
+        stats.update(0.01, 0.5)
+        assert stats.ratio == 1.0
+        assert stats.count == 1
+
+
+# ---------------------------------------------------------------------------
+# Matching forecast periods with measurements
+# ---------------------------------------------------------------------------
+
+
+class TestForecastErrorTracker:
+    def test_period_closes_with_mean_measurement(self):
+        tracker = ForecastErrorTracker()
+        forecast = make_forecast(BASE, [2.0, 2.0, 2.0])
+        assert tracker.observe(BASE - 60, forecast, 0.0) == 0
+        tracker.observe(BASE + 60, forecast, 1.0)
+        tracker.observe(BASE + 900, forecast, 2.0)
+        assert tracker.observe(BASE + HALF_HOUR + 60, forecast, 5.0) == 1
+        summary = tracker.summary(BASE)
+        assert summary.periods == 1
+        assert summary.bias_kw == pytest.approx(-0.5)
+        assert summary.mae_kw == pytest.approx(0.5)
+
+    def test_estimate_frozen_when_period_starts(self):
+        tracker = ForecastErrorTracker()
+        tracker.observe(BASE - 60, make_forecast(BASE, [2.0, 2.0]), None)
+        # A later forecast revision for the running period is ignored
+        tracker.observe(BASE + 60, make_forecast(BASE, [4.0, 4.0]), 2.0)
+        tracker.observe(BASE + HALF_HOUR + 60, make_forecast(BASE, [4.0, 4.0]), 2.0)
+        assert tracker.summary(BASE).bias_kw == pytest.approx(0.0)
+
+    def test_periods_without_measurements_are_dropped(self):
+        tracker = ForecastErrorTracker()
+        forecast = make_forecast(BASE, [2.0, 2.0])
+        tracker.observe(BASE + 60, forecast, None)
+        assert tracker.observe(BASE + HALF_HOUR + 60, forecast, None) == 0
+        assert tracker.summary(BASE).periods == 0
+
+    def test_correct_scales_estimates_of_learned_hours(self):
+        tracker = ForecastErrorTracker()
+        hour = tracker.hours[10]
+        for _ in range(50):
+            hour.update(2.0, 1.0)
+        corrected = tracker.correct(make_forecast(BASE, [2.0]) + make_forecast(BASE + 7200, [2.0]))
+        assert corrected[0]["pv_estimate"] == pytest.approx(2.0 * hour.correction)
+        assert corrected[0]["pv_estimate"] < 1.5
+        assert corrected[1]["pv_estimate"] == 2.0
+
+    def test_round_trip_through_storage(self):
+        tracker = ForecastErrorTracker()
+        tracker.hours[3].update(1.0, 1.5)
+        restored = ForecastErrorTracker.from_dict(tracker.as_dict())
+        assert restored.hours[3] == tracker.hours[3]
+        assert restored.hours[4] == HourErrorStats()
@@ -0,0 +1,163 @@
+"""Tests for the on-disk history cache."""
+from __future__ import annotations
+
+import os
+from datetime import UTC, date, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from custom_components import solax_energy_optimizer
+from custom_components.solax_energy_optimizer.const import DOMAIN
+from custom_components.solax_energy_optimizer.history import (
+    HISTORY_COLUMNS,
+    HistoryCache,
+    _batches,
+    async_remove_history,
+    day_start,
+    last_final_day,
+    statistics_to_block,
+)
+
+DAY = date(2024, 6, 1)
+ENTITIES = {"soc": "sensor.soc", "price": "sensor.price", "pv": None, "load": "sensor.load"}
+
+
+def make_hass(tmp_path) -> MagicMock:
+    hass = MagicMock()
+    hass.config.path = lambda *parts: os.path.join(tmp_path, *parts)
+
+    async def run_inline(func, *args):
+        return func(*args)
+
+    hass.async_add_executor_job = run_inline
+    return hass
+
+
+def make_cache(tmp_path, entities=ENTITIES) -> HistoryCache:
+    return HistoryCache(make_hass(tmp_path), "entry1", entities)
+
+
+# ---------------------------------------------------------------------------
+# Batching and scattering
+# ---------------------------------------------------------------------------
+
+
+class TestBatching:
+    def test_contiguous_days_are_grouped_up_to_batch_size(self):
+        days = [date(2024, 6, d) for d in (1, 2, 3, 4, 5, 8, 9)]
+        assert _batches(days, 3) == [
+            (date(2024, 6, 1), 3),
+            (date(2024, 6, 4), 2),
+            (date(2024, 6, 8), 2),
+        ]
+
+    def test_no_days_no_batches(self):
+        assert _batches([], 14) == []
+
+
+class TestStatisticsToBlock:
+    def test_rows_land_in_their_hour_and_column(self):
+        origin = day_start(DAY)
+        stats = {
+            "sensor.price": [{"start": origin + 3600, "mean": 0.25}],
+            "sensor.load": [
+                {"start": origin + 86400 + 7200, "mean": 1.5},
+                {"start": origin - 3600, "mean": 9.0},  # before the block
+                {"start": origin, "mean": None},
+            ],
+        }
+        block = statistics_to_block(stats, ENTITIES, DAY, 2)
+        assert block.shape == (len(HISTORY_COLUMNS), 48)
+        assert block[HISTORY_COLUMNS.index("price"), 1] == np.float32(0.25)
+        assert block[HISTORY_COLUMNS.index("load"), 26] == np.float32(1.5)
+        assert np.isnan(block[HISTORY_COLUMNS.index("load"), 0])
+        assert np.isnan(block[HISTORY_COLUMNS.index("pv")]).all()
+
+
+# ---------------------------------------------------------------------------
+# Disk cache
+# ---------------------------------------------------------------------------
+
+
+class TestHistoryCacheFiles:
+    def test_days_round_trip_through_disk(self, tmp_path):
+        cache = make_cache(tmp_path)
+        assert cache._prepare(DAY) == set()
+        block = np.arange(len(HISTORY_COLUMNS) * 48, dtype=np.float32).reshape(len(HISTORY_COLUMNS), 48)
+        cache._write(DAY, block)
+
+        assert cache._prepare(DAY) == {DAY, date(2024, 6, 2)}
+        history = cache._read([DAY, date(2024, 6, 2)])
+        assert len(history) == 48
+        assert history.starts[0] == day_start(DAY)
+        assert history.starts[25] == day_start(DAY) + 25 * 3600
+        np.testing.assert_array_equal(history.values, block)
+        np.testing.assert_array_equal(history.column("price"), block[1])
+
+    def test_changed_sources_invalidate_cache(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache._prepare(DAY)
+        cache._write(DAY, np.zeros((len(HISTORY_COLUMNS), 24), dtype=np.float32))
+
+        other = make_cache(tmp_path, {**ENTITIES, "pv": "sensor.pv"})
+        assert other._prepare(DAY) == set()
+        assert not list((tmp_path / ".storage").rglob("*.npy"))
+
+    def test_days_before_oldest_are_pruned(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache._prepare(DAY)
+        cache._write(DAY, np.zeros((len(HISTORY_COLUMNS), 72), dtype=np.float32))
+        assert cache._prepare(date(2024, 6, 2)) == {date(2024, 6, 2), date(2024, 6, 3)}
+        assert not cache._path(DAY).exists()
+
+
+# ---------------------------------------------------------------------------
+# Entry removal
+# ---------------------------------------------------------------------------
+
+
+class TestEntryRemoval:
+    async def test_history_of_removed_entry_is_deleted(self, tmp_path):
+        kept, removed = make_cache(tmp_path), HistoryCache(make_hass(tmp_path), "entry2", ENTITIES)
+        for cache in (kept, removed):
+            cache._prepare(DAY)
+            cache._write(DAY, np.zeros((len(HISTORY_COLUMNS), 24), dtype=np.float32))
+        await async_remove_history(make_hass(tmp_path), "entry2")
+        assert not removed._dir.exists()
+        assert kept._path(DAY).exists()
+        # Removing twice, or an entry that never cached anything, is fine
+        await async_remove_history(make_hass(tmp_path), "entry2")
+
+    async def test_remove_entry_deletes_every_store(self, tmp_path, monkeypatch):
+        removed = []
+
+        class FakeStore:
+            def __init__(self, hass, version, key):
+                self.key = key
+
+            async def async_remove(self):
+                removed.append(self.key)
+
+        monkeypatch.setattr(solax_energy_optimizer, "Store", FakeStore)
+        cache = make_cache(tmp_path)
+        cache._prepare(DAY)
+        await solax_energy_optimizer.async_remove_entry(make_hass(tmp_path), SimpleNamespace(entry_id="entry1"))
+        assert not cache._dir.exists()
+        assert sorted(removed) == [
+            f"{DOMAIN}.entry1.{key}" for key in ("forecast_accuracy", "load_profile", "peak_demand", "shadow")
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Finalized days
+# ---------------------------------------------------------------------------
+
+
+class TestFinalizedDays:
+    def test_day_is_final_an_hour_after_its_end(self):
+        # The recorder may not have compiled the 23:00 statistic yet
+        assert last_final_day(datetime(2024, 6, 2, 0, 20, tzinfo=UTC)) == date(2024, 5, 31)
+        assert last_final_day(datetime(2024, 6, 2, 1, 0, tzinfo=UTC)) == DAY
+        assert last_final_day(datetime(2024, 6, 2, 23, 59, tzinfo=UTC)) == DAY
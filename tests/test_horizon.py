@@ -0,0 +1,119 @@
+"""Tests for the multi-resolution planning horizon."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.horizon import compress_horizon
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from tests.conftest import BASE, HOUR, make_inputs
+
+SLOT = 900.0
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=2.0, max_discharge_kw=2.0)
+
+
+def random_inputs(count: int, start: float = BASE, seed: int = 0) -> PlanningInputs:
+    rng = np.random.default_rng(seed)
+    return make_inputs(
+        rng.uniform(0.0, 0.4, count), rng.uniform(0.0, 3.0, count), rng.uniform(0.2, 1.5, count),
+        start=start, slot=SLOT,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+
+
+class TestCompression:
+    def test_conserves_energy_and_flat_load_cost(self):
+        inputs = random_inputs(4 * 48)
+        horizon = compress_horizon(inputs)
+        coarse = horizon.inputs
+        assert len(coarse) < len(inputs)
+        assert (coarse.pv * coarse.durations_h).sum() == pytest.approx((inputs.pv * inputs.durations_h).sum())
+        assert (coarse.load * coarse.durations_h).sum() == pytest.approx(
+            (inputs.load * inputs.durations_h).sum()
+        )
+        assert (coarse.price * coarse.durations_h).sum() == pytest.approx(
+            (inputs.price * inputs.durations_h).sum()
+        )
+        assert coarse.starts[0] == inputs.starts[0]
+        assert coarse.ends[-1] == inputs.ends[-1]
+
+    def test_keeps_native_slots_near_term(self):
+        inputs = random_inputs(4 * 48, start=BASE + 10 * SLOT)
+        horizon = compress_horizon(inputs)
+        np.testing.assert_array_equal(horizon.inputs.starts[:16], inputs.starts[:16])
+        np.testing.assert_array_equal(horizon.inputs.price[:16], inputs.price[:16])
+
+    def test_buckets_are_clock_aligned(self):
+        inputs = random_inputs(4 * 48, start=BASE + 3 * SLOT)
+        coarse = compress_horizon(inputs).inputs
+        width = coarse.durations_h * HOUR
+        # Full buckets start on a multiple of their width; only tier boundaries clip them
+        full = np.isin(coarse.durations_h, (1.0, 2.0, 4.0))
+        assert full.sum() > 10
+        assert np.all(coarse.starts[full] % width[full] == 0.0)
+        assert coarse.durations_h.max() == pytest.approx(4.0)
+
+    def test_no_bucket_across_gap(self):
+        inputs = random_inputs(4 * 48)
+        keep = np.ones(len(inputs), dtype=bool)
+        keep[100:104] = False  # one missing hour, far out
+        gapped = PlanningInputs(
+            starts=inputs.starts[keep],
+            ends=inputs.ends[keep],
+            price=inputs.price[keep],
+            pv=inputs.pv[keep],
+            load=inputs.load[keep],
+        )
+        coarse = compress_horizon(gapped).inputs
+        assert not np.any((coarse.starts < inputs.starts[100]) & (coarse.ends > inputs.starts[100]))
+        assert coarse.durations_h.sum() == pytest.approx(gapped.durations_h.sum())
+
+    def test_expand_round_trip(self):
+        inputs = random_inputs(4 * 36)
+        horizon = compress_horizon(inputs)
+        expanded = horizon.expand(horizon.inputs.price)
+        assert expanded.shape == inputs.price.shape
+        np.testing.assert_allclose(horizon.aggregate(expanded), horizon.inputs.price)
+        np.testing.assert_array_equal(horizon.expand(np.arange(len(horizon.inputs)))[horizon.first],
+                                      np.arange(len(horizon.inputs)))
+
+    def test_empty(self):
+        inputs = random_inputs(0)
+        horizon = compress_horizon(inputs)
+        assert len(horizon.inputs) == 0
+        assert horizon.ratio == 1.0
+
+
+# ---------------------------------------------------------------------------
+# Consecutive cycles
+# ---------------------------------------------------------------------------
+
+
+class TestConsecutiveCycles:
+    def test_far_buckets_are_stable(self):
+        inputs = random_inputs(4 * 48)
+        now = compress_horizon(inputs).inputs
+        later = compress_horizon(inputs.slice_from(BASE + SLOT)).inputs
+        # Only buckets around tier boundaries move; the clock-aligned far end is identical
+        far = now.starts >= BASE + 25 * HOUR
+        assert far.sum() == 5
+        np.testing.assert_array_equal(now.starts[far], later.starts[-5:])
+        np.testing.assert_array_equal(now.price[far], later.price[-5:])
+
+    def test_compressed_dp_warm_starts(self):
+        inputs = random_inputs(4 * 48)
+        solver = HorizonSolver()
+        compressed = compress_horizon(inputs).inputs
+        solver.solve(compressed, soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0)
+        shifted = compress_horizon(inputs.slice_from(BASE + SLOT)).inputs
+        warm = solver.solve(shifted, soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0)
+        cold = HorizonSolver().solve(shifted, soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0)
+        assert warm.reused_slots == 5
+        assert warm.expected_cost == pytest.approx(cold.expected_cost)
+        np.testing.assert_array_equal(warm.soc, cold.soc)
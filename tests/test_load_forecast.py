@@ -0,0 +1,116 @@
+"""Tests for the household load profile."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.load_forecast import (
+    LoadForecaster,
+    LoadProfile,
+    profile_cell,
+)
+from tests.conftest import BASE, HOUR
+
+# BASE is Saturday 2024-06-01 00:00 UTC
+DAY = 24 * HOUR
+
+
+# ---------------------------------------------------------------------------
+# Profile
+# ---------------------------------------------------------------------------
+
+
+class TestLoadProfile:
+    def test_empty_profile_forecasts_zero(self):
+        profile = LoadProfile()
+        assert profile.is_empty
+        assert profile.power_at(BASE) == 0.0
+        starts = BASE + HOUR * np.arange(3)
+        assert profile.forecast(starts, starts + HOUR).tolist() == [0.0, 0.0, 0.0]
+
+    def test_first_fold_sets_cell_then_smooths(self):
+        profile = LoadProfile(smoothing=0.5)
+        assert profile.fold(BASE + 8 * HOUR, 1.0)
+        assert profile.values[profile_cell(BASE + 8 * HOUR)] == 1.0
+        assert profile.fold(BASE + 7 * DAY + 8 * HOUR, 2.0)
+        assert profile.values[profile_cell(BASE + 8 * HOUR)] == pytest.approx(1.5)
+
+    def test_hours_already_folded_are_ignored(self):
+        profile = LoadProfile()
+        profile.fold(BASE + 2 * HOUR, 1.0)
+        assert not profile.fold(BASE + 2 * HOUR, 5.0)
+        assert not profile.fold(BASE + HOUR, 5.0)
+        assert profile.values[profile_cell(BASE + HOUR)] != 5.0
+
+    def test_seed_folds_in_time_order(self):
+        profile = LoadProfile(smoothing=0.5)
+        starts = np.array([BASE + 7 * DAY, BASE])
+        assert profile.seed(starts, np.array([3.0, 1.0])) == 2
+        assert profile.values[profile_cell(BASE)] == pytest.approx(2.0)
+        assert profile.last_hour == BASE + 7 * DAY
+
+    def test_live_samples_fold_when_hour_completes(self):
+        profile = LoadProfile()
+        assert not profile.add_sample(BASE + 10 * HOUR, 1.0)
+        assert not profile.add_sample(BASE + 10 * HOUR + 1800, 3.0)
+        assert profile.add_sample(BASE + 11 * HOUR, 0.5)
+        assert profile.values[profile_cell(BASE + 10 * HOUR)] == pytest.approx(2.0)
+
+    def test_unknown_cells_fall_back_to_profile_mean(self):
+        profile = LoadProfile()
+        profile.fold(BASE, 1.0)
+        profile.fold(BASE + HOUR, 3.0)
+        assert profile.power_at(BASE + 5 * HOUR) == pytest.approx(2.0)
+
+    def test_forecast_averages_cells_covered_by_long_slots(self):
+        profile = LoadProfile()
+        profile.fold(BASE, 1.0)
+        profile.fold(BASE + HOUR, 3.0)
+        quarter = BASE + 900.0 * np.arange(8)
+        assert profile.forecast(quarter, quarter + 900.0).tolist() == [1.0] * 4 + [3.0] * 4
+        two_hours = np.array([BASE])
+        assert profile.forecast(two_hours, two_hours + 2 * HOUR).tolist() == [2.0]
+
+    def test_round_trip_through_storage(self):
+        profile = LoadProfile()
+        profile.fold(BASE + 3 * HOUR, 0.75)
+        restored = LoadProfile.from_dict(profile.as_dict())
+        assert restored.last_hour == profile.last_hour
+        assert restored.power_at(BASE + 3 * HOUR) == pytest.approx(0.75)
+        assert np.isnan(restored.values[profile_cell(BASE)])
+
+
+# ---------------------------------------------------------------------------
+# Live sampling
+# ---------------------------------------------------------------------------
+
+
+class TestLoadForecasterSampling:
+    def make_forecaster(self, hass) -> LoadForecaster:
+        forecaster = LoadForecaster.__new__(LoadForecaster)
+        forecaster.hass = hass
+        forecaster.entity_id = "sensor.house_load"
+        forecaster.profile = LoadProfile()
+        forecaster.loaded = True
+        return forecaster
+
+    def test_watts_are_converted_to_kilowatts(self, hass):
+        forecaster = self.make_forecaster(hass)
+        hass.set_state("sensor.house_load", "1500", {"unit_of_measurement": "W"})
+        forecaster.sample(BASE)
+        hass.set_state("sensor.house_load", "0.5", {"unit_of_measurement": "kW"})
+        forecaster.sample(BASE + 1800)
+        assert forecaster.profile._hour_sum == pytest.approx(2.0)
+
+    def test_samples_ignored_until_history_loaded(self, hass):
+        forecaster = self.make_forecaster(hass)
+        forecaster.loaded = False
+        hass.set_state("sensor.house_load", "1500", {"unit_of_measurement": "W"})
+        forecaster.sample(BASE)
+        assert forecaster.profile._hour_count == 0
+
+    def test_unavailable_state_is_skipped(self, hass):
+        forecaster = self.make_forecaster(hass)
+        hass.set_state("sensor.house_load", "unavailable")
+        forecaster.sample(BASE)
+        assert forecaster.profile._hour_count == 0
@@ -0,0 +1,169 @@
+"""Tests for the process-pool Monte Carlo strategy evaluation."""
+from __future__ import annotations
+
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer import monte_carlo
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.monte_carlo import (
+    MC_CHUNK_SAMPLES,
+    CostDistribution,
+    MonteCarloEvaluator,
+    _share_inputs,
+    evaluate_chunk,
+    sample_trajectories,
+)
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from custom_components.solax_energy_optimizer.scenarios import build_candidates
+from custom_components.solax_energy_optimizer.simulation import simulate_schedules
+from custom_components.solax_energy_optimizer.tariff import CompiledTariff, TariffEngine
+from tests.conftest import make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+SPOT = CompiledTariff()
+
+
+def sunny_inputs(prices: list[float]) -> PlanningInputs:
+    """Return hourly slots with PV rising to 3 kW over a 0.5 kW load."""
+    return make_inputs(prices, pv=np.linspace(0.0, 3.0, len(prices)), load=0.5)
+
+
+# ---------------------------------------------------------------------------
+# Sampling and chunk evaluation
+# ---------------------------------------------------------------------------
+
+
+class TestSampling:
+    def test_trajectories_vary_around_inputs(self):
+        inputs = sunny_inputs([0.1, 0.2, 0.3, 0.4])
+        price, pv, load = sample_trajectories(
+            inputs.price, inputs.pv, inputs.pv * 0.5, inputs.pv * 1.5, inputs.load, 5000, np.random.default_rng(3)
+        )
+        assert price.shape == pv.shape == load.shape == (5000, 4)
+        assert price.mean(axis=0) == pytest.approx(inputs.price, abs=0.005)
+        assert load.min() >= 0.0 and pv.min() >= 0.0
+        assert price.std(axis=0).min() > 0.0
+
+    def test_chunk_reads_shared_block(self):
+        inputs = sunny_inputs([0.1, 0.1, 0.5, 0.5])
+        candidates = build_candidates(inputs, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY)
+        block = _share_inputs(inputs, inputs.pv, inputs.pv, candidates)
+        try:
+            costs = evaluate_chunk(block.name, 4, len(candidates.names), 50, 7, BATTERY, 50.0, 10.0, 90.0, SPOT)
+            again = evaluate_chunk(block.name, 4, len(candidates.names), 50, 7, BATTERY, 50.0, 10.0, 90.0, SPOT)
+        finally:
+            block.close()
+            block.unlink()
+        assert costs.shape == (len(candidates.names), 50)
+        np.testing.assert_array_equal(costs, again)
+
+    def test_chunk_credits_export_price(self):
+        inputs = sunny_inputs([0.1, 0.1, 0.5, 0.5])
+        candidates = build_candidates(inputs, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY)
+        costs = {}
+        for name, export in (("spot", None), ("free", np.zeros(4))):
+            block = _share_inputs(replace(inputs, export_price=export), inputs.pv, inputs.pv, candidates)
+            try:
+                costs[name] = evaluate_chunk(
+                    block.name, 4, len(candidates.names), 50, 7, BATTERY, 50.0, 10.0, 90.0, SPOT
+                )
+            finally:
+                block.close()
+                block.unlink()
+        # Same samples, but the PV surplus no longer earns anything
+        assert np.all(costs["free"] >= costs["spot"] - 1e-12)
+        assert np.any(costs["free"] > costs["spot"])
+
+    def test_chunk_samples_spot_price_through_tariff(self, monkeypatch):
+        tariff = CompiledTariff(import_scale=1.21, import_offset=0.08, export_scale=0.9, export_offset=-0.01)
+        spot = sunny_inputs([0.1, 0.1, 0.5, 0.5])
+        inputs = TariffEngine(tariff).apply(spot)
+        candidates = build_candidates(inputs, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY)
+        seen = {}
+
+        def capture(*args, **kwargs):
+            seen.update(kwargs)
+            return simulate_schedules(*args, **kwargs)
+
+        monkeypatch.setattr(monte_carlo, "simulate_schedules", capture)
+        block = _share_inputs(inputs, inputs.pv, inputs.pv, candidates)
+        try:
+            evaluate_chunk(block.name, 4, len(candidates.names), 20, 7, BATTERY, 50.0, 10.0, 90.0, tariff)
+        finally:
+            block.close()
+            block.unlink()
+        sampled_spot = (seen["price"] - tariff.import_offset) / tariff.import_scale
+        np.testing.assert_allclose(seen["export_price"], tariff(sampled_spot)[1])
+        assert seen["price"].mean() == pytest.approx(inputs.price.mean(), abs=0.02)
+
+    @pytest.mark.parametrize("track_keyword", [True, False])
+    def test_chunk_attaches_on_every_python(self, track_keyword):
+        inputs = sunny_inputs([0.1, 0.5])
+        candidates = build_candidates(inputs, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY)
+        block = _share_inputs(inputs, inputs.pv, inputs.pv, candidates)
+        unregistered = []
+        try:
+            with pytest.MonkeyPatch.context() as patch:
+                patch.setattr(monte_carlo, "_SHM_TRACK_KEYWORD", track_keyword)
+                patch.setattr(monte_carlo.resource_tracker, "unregister", lambda name, kind: unregistered.append(kind))
+                if not track_keyword:
+                    # Python 3.12's SharedMemory has no track keyword
+                    patch.setattr(monte_carlo, "SharedMemory", lambda name: SharedMemory(name=name))
+                costs = evaluate_chunk(block.name, 2, len(candidates.names), 10, 7, BATTERY, 50.0, 10.0, 90.0, SPOT)
+        finally:
+            block.close()
+            block.unlink()
+        assert costs.shape == (len(candidates.names), 10)
+        # Without the keyword the worker drops the tracker registration itself
+        assert unregistered == ([] if track_keyword else ["shared_memory"])
+
+    def test_cost_distribution_summary(self):
+        dist = CostDistribution.from_costs(np.arange(101, dtype=np.float64))
+        assert dist.mean == pytest.approx(50.0)
+        assert dist.p5 == pytest.approx(5.0)
+        assert dist.p95 == pytest.approx(95.0)
+        assert dist.cvar == pytest.approx(np.mean(np.arange(90, 101)))
+
+
+# ---------------------------------------------------------------------------
+# Process pool evaluation
+# ---------------------------------------------------------------------------
+
+
+class TestMonteCarloEvaluator:
+    async def test_evaluates_all_strategies(self):
+        inputs = sunny_inputs([0.1, 0.1, 0.5, 0.5, 0.3, 0.2])
+        evaluator = MonteCarloEvaluator(max_workers=1)
+        try:
+            result = await evaluator.async_evaluate(
+                inputs, inputs.pv, inputs.pv, soc=50.0, min_soc=10.0, max_soc=90.0,
+                battery=BATTERY, samples=2 * MC_CHUNK_SAMPLES, time_limit=60.0, seed=1,
+            )
+        finally:
+            evaluator.shutdown()
+        assert result.completed
+        assert result.samples == 2 * MC_CHUNK_SAMPLES
+        payload = result.as_dict()
+        assert set(payload["strategies"]) == {
+            "minimize_cost", "maximize_self_consumption", "grid_independence", "balanced", "idle"
+        }
+        assert payload["best_candidate"]["mean"] <= payload["strategies"]["idle"]["mean"]
+        assert not evaluator.running
+
+    async def test_time_limit_returns_partial_result(self):
+        inputs = sunny_inputs([0.2] * 4)
+        evaluator = MonteCarloEvaluator(max_workers=1)
+        try:
+            result = await evaluator.async_evaluate(
+                inputs, inputs.pv, inputs.pv, soc=50.0, min_soc=10.0, max_soc=90.0,
+                battery=BATTERY, samples=MC_CHUNK_SAMPLES, time_limit=0.0,
+            )
+        finally:
+            evaluator.shutdown()
+        assert result.samples == 0
+        assert not result.completed
+        assert result.as_dict()["best_candidate"] is None
@@ -0,0 +1,173 @@
+"""Tests for the warm-started dynamic-programming optimizer."""
+from __future__ import annotations
+
+from dataclasses import replace
+from itertools import product
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.optimizer import (
+    HorizonSolver,
+    soc_levels,
+    terminal_price,
+)
+from custom_components.solax_energy_optimizer.planner import (
+    CODE_CHARGE,
+    CODE_DISCHARGE,
+    BatteryModel,
+)
+from tests.conftest import BASE, HOUR, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=2.0, max_discharge_kw=2.0)
+
+
+def random_inputs(rng: np.random.Generator, count: int) -> PlanningInputs:
+    return make_inputs(
+        rng.uniform(-0.05, 0.45, count), rng.uniform(0.0, 3.0, count), rng.uniform(0.2, 1.5, count)
+    )
+
+
+def solve(solver: HorizonSolver, inputs: PlanningInputs, soc: float, **kwargs):
+    return solver.solve(inputs, soc=soc, battery=BATTERY, min_soc=10.0, max_soc=90.0, **kwargs)
+
+
+def brute_force(inputs: PlanningInputs, soc: float, levels: np.ndarray, export: np.ndarray) -> float:
+    """Return the cheapest cost over every feasible level path."""
+    kwh = BATTERY.capacity_kwh / 100.0
+    final = terminal_price(inputs)
+    best = np.inf
+    for path in product(range(levels.size), repeat=len(inputs)):
+        state, cost = soc, 0.0
+        for idx, level in enumerate(path):
+            move = (levels[level] - state) * kwh
+            if not -BATTERY.max_discharge_kw - 1e-6 <= move <= BATTERY.max_charge_kw + 1e-6:
+                break
+            grid = (inputs.load[idx] - inputs.pv[idx]) + move
+            cost += grid * (inputs.price[idx] if grid > 0 else export[idx])
+            state = levels[level]
+        else:
+            best = min(best, cost - state * kwh * final)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Optimality
+# ---------------------------------------------------------------------------
+
+
+class TestOptimality:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_brute_force(self, seed):
+        rng = np.random.default_rng(seed)
+        inputs = random_inputs(rng, 4)
+        export = inputs.price * 0.5
+        solver = HorizonSolver(step=20.0)
+        solution = solver.solve(
+            inputs, soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0, export_price=export
+        )
+        assert solution.expected_cost == pytest.approx(
+            brute_force(inputs, 50.0, soc_levels(10.0, 90.0, 20.0), export)
+        )
+
+    def test_arbitrage(self):
+        solution = solve(HorizonSolver(), make_inputs([0.05, 0.05, 0.4, 0.4, 0.2], load=0.5), 50.0)
+        assert list(solution.action[:4]) == [CODE_CHARGE, CODE_CHARGE, CODE_DISCHARGE, CODE_DISCHARGE]
+        assert solution.soc[1] == pytest.approx(90.0)
+        assert solution.soc[3] == pytest.approx(50.0)
+
+    def test_unreachable_soc_moves_closest(self):
+        # Max SOC just lowered far below the SOC: more than one slot of discharge away
+        solution = HorizonSolver().solve(
+            make_inputs([0.2, 0.2], load=0.5), soc=99.0, battery=BATTERY, min_soc=10.0, max_soc=50.0
+        )
+        assert solution.soc[0] == pytest.approx(50.0)
+
+
+# ---------------------------------------------------------------------------
+# Import limit
+# ---------------------------------------------------------------------------
+
+
+class TestImportLimit:
+    def test_charging_stays_under_limit(self):
+        inputs = make_inputs([0.05, 0.05, 0.05, 0.4, 0.4, 0.4], load=[1.0, 0.5, 0.0, 0.5, 0.5, 0.5])
+        free = solve(HorizonSolver(), inputs, 10.0)
+        limited = solve(HorizonSolver(), inputs, 10.0, import_limit=1.5)
+
+        def grid(solution):
+            return inputs.load - inputs.pv + np.diff(solution.soc, prepend=10.0) * BATTERY.capacity_kwh / 100.0
+
+        assert grid(free).max() > 1.5
+        assert grid(limited).max() <= 1.5 + 1e-6
+        assert limited.soc[2] == pytest.approx(10.0 + (0.5 + 1.0 + 1.5) * 10.0)
+        assert limited.expected_cost >= free.expected_cost
+
+    def test_load_above_limit_blocks_charging_only(self):
+        inputs = make_inputs([0.05, 0.4], load=[3.0, 0.5])
+        solution = solve(HorizonSolver(), inputs, 50.0, import_limit=2.5)
+        assert solution.soc[0] <= 50.0
+        assert solution.action[1] == CODE_DISCHARGE
+
+    def test_limit_change_recomputes_affected_slots(self):
+        inputs = random_inputs(np.random.default_rng(11), 12)
+        solver = HorizonSolver()
+        solve(solver, inputs, 50.0, import_limit=1.0)
+        assert solve(solver, inputs, 50.0, import_limit=1.0).reused_slots == 11
+        warm = solve(solver, inputs, 50.0, import_limit=1.5)
+        cold = solve(HorizonSolver(), inputs, 50.0, import_limit=1.5)
+        assert warm.reused_slots < 11
+        assert warm.expected_cost == pytest.approx(cold.expected_cost)
+        np.testing.assert_array_equal(warm.soc, cold.soc)
+
+
+# ---------------------------------------------------------------------------
+# Warm start
+# ---------------------------------------------------------------------------
+
+
+class TestWarmStart:
+    def test_shifted_horizon_reuses_tables(self):
+        inputs = random_inputs(np.random.default_rng(7), 48)
+        solver = HorizonSolver()
+        assert not solve(solver, inputs, 50.0).warm
+        shifted = inputs.slice_from(BASE + 2.5 * HOUR)
+        warm = solve(solver, shifted, 41.0)
+        cold = solve(HorizonSolver(), shifted, 41.0)
+        assert warm.reused_slots == len(shifted) - 1
+        assert warm.expected_cost == pytest.approx(cold.expected_cost)
+        np.testing.assert_array_equal(warm.action, cold.action)
+        np.testing.assert_array_equal(warm.soc, cold.soc)
+
+    def test_changed_slot_recomputes_prefix_only(self):
+        inputs = random_inputs(np.random.default_rng(8), 24)
+        solver = HorizonSolver()
+        solve(solver, inputs, 50.0)
+        load = inputs.load.copy()
+        load[10] += 1.0
+        changed = replace(inputs, load=load)
+        warm = solve(solver, changed, 50.0)
+        cold = solve(HorizonSolver(), changed, 50.0)
+        assert warm.reused_slots == 24 - 1 - 10
+        assert warm.expected_cost == pytest.approx(cold.expected_cost)
+        np.testing.assert_array_equal(warm.soc, cold.soc)
+
+    def test_new_prices_or_limits_force_full_solve(self):
+        inputs = random_inputs(np.random.default_rng(9), 24)
+        solver = HorizonSolver()
+        solve(solver, inputs, 50.0)
+        longer = random_inputs(np.random.default_rng(9), 30)
+        assert not solve(solver, longer, 50.0).warm
+        assert not solver.solve(longer, soc=50.0, battery=BATTERY, min_soc=20.0, max_soc=90.0).warm
+
+    def test_stats(self):
+        inputs = random_inputs(np.random.default_rng(10), 12)
+        solver = HorizonSolver()
+        for soc in (50.0, 52.0, 54.0, 56.0):
+            solve(solver, inputs, soc)
+        stats = solver.stats.as_dict()
+        assert stats["solves"] == 4
+        assert stats["warm_starts"] == 3
+        assert stats["hit_rate"] == 0.75
+        assert stats["last_ms"] > 0.0
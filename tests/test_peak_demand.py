@@ -0,0 +1,122 @@
+"""Tests for the capacity-tariff demand meter."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.solax_energy_optimizer.peak_demand import (
+    DEMAND_WINDOW,
+    DemandMeter,
+)
+from tests.conftest import BASE
+
+# BASE is a quarter-hour boundary
+MINUTE = 60.0
+
+
+def feed(meter: DemandMeter, samples) -> None:
+    for offset, power_kw in samples:
+        meter.sample(BASE + offset * MINUTE, power_kw)
+
+
+# ---------------------------------------------------------------------------
+# Rolling 15-minute demand
+# ---------------------------------------------------------------------------
+
+
+class TestRollingDemand:
+    def test_step_is_time_weighted(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 2.0), (5, 8.0)])
+        meter.advance(BASE + 15 * MINUTE)
+        assert meter.rolling_kw() == pytest.approx((2.0 * 5 + 8.0 * 10) / 15)
+
+    def test_old_segments_leave_the_window(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 10.0), (20, 1.0)])
+        meter.advance(BASE + 30 * MINUTE)
+        # [15, 20) at 10 kW and [20, 30) at 1 kW; the head segment counts in part
+        assert meter.rolling_kw() == pytest.approx((10.0 * 5 + 1.0 * 10) / 15)
+        meter.advance(BASE + 40 * MINUTE)
+        assert meter.rolling_kw() == pytest.approx(1.0)
+
+    def test_short_history_averages_what_was_seen(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 3.0), (2, 1.0)])
+        meter.advance(BASE + 4 * MINUTE)
+        assert meter.rolling_kw() == pytest.approx(2.0)
+
+    def test_export_counts_as_zero_import(self):
+        meter = DemandMeter()
+        feed(meter, [(0, -4.0), (5, 3.0)])
+        meter.advance(BASE + 10 * MINUTE)
+        assert meter.rolling_kw() == pytest.approx(1.5)
+
+    def test_many_samples_keep_the_window_small(self):
+        meter = DemandMeter()
+        for second in range(0, 7200, 2):
+            meter.sample(BASE + second, 1.0 + (second // 2) % 2)
+        assert len(meter._segments) <= DEMAND_WINDOW / 2 + 1
+        assert meter.rolling_kw() == pytest.approx(1.5, abs=0.01)
+
+
+# ---------------------------------------------------------------------------
+# Quarter-hours and the monthly peak
+# ---------------------------------------------------------------------------
+
+
+class TestMonthlyPeak:
+    def test_peak_is_highest_completed_quarter(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 4.0), (10, 1.0), (15, 2.0), (30, 0.5)])
+        assert meter.peak_kw == pytest.approx(3.0)  # (4×10 + 1×5) / 15
+        assert meter.peak_time == BASE
+        snapshot = meter.snapshot(floor_kw=2.5)
+        assert snapshot.quarter_end == BASE + 45 * MINUTE
+        assert snapshot.limit_kw == pytest.approx(3.0)
+
+    def test_floor_applies_below_it(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 1.0), (15, 1.0)])
+        assert meter.snapshot(floor_kw=2.5).limit_kw == 2.5
+
+    def test_gap_folds_skipped_quarters(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 1.0), (5, 6.0), (100, 0.0)])
+        assert meter.peak_kw == pytest.approx(6.0)
+        assert meter.peak_time == BASE + 75 * MINUTE
+
+    def test_steady_power_closes_quarters_on_advance(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 5.0)])
+        assert meter.advance(BASE + 16 * MINUTE)
+        assert meter.peak_kw == pytest.approx(5.0)
+
+    def test_new_month_starts_from_zero(self):
+        meter = DemandMeter()
+        meter.sample(BASE - 30 * MINUTE, 9.0)
+        meter.sample(BASE - 10 * MINUTE, 1.0)
+        assert meter.month == "2024-05"
+        assert meter.peak_kw == pytest.approx(9.0)
+        meter.sample(BASE + 5 * MINUTE, 1.0)
+        assert meter.month == "2024-06"
+        assert meter.peak_kw == 0.0
+        meter.advance(BASE + 15 * MINUTE)
+        assert meter.peak_kw == pytest.approx(1.0)
+
+    def test_projection_of_current_quarter(self):
+        meter = DemandMeter()
+        feed(meter, [(0, 2.0)])
+        meter.advance(BASE + 5 * MINUTE)
+        snapshot = meter.snapshot()
+        assert snapshot.quarter_kw == pytest.approx(2.0)
+        # 5 min at 2 kW, then 10 min at 5 kW
+        assert snapshot.projected_kw(BASE + 5 * MINUTE, 5.0) == pytest.approx(4.0)
+
+    def test_restore_keeps_peak_of_same_month(self):
+        meter = DemandMeter()
+        meter.restore({"month": "2024-06", "peak_kw": 4.2, "peak_time": BASE})
+        feed(meter, [(20, 1.0), (30, 1.0)])
+        assert meter.peak_kw == pytest.approx(4.2)
+        meter.restore({"month": "2024-05", "peak_kw": 4.2, "peak_time": BASE - 86400})
+        meter.advance(BASE + 50 * MINUTE)
+        assert meter.peak_kw == pytest.approx(1.0)
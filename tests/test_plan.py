@@ -0,0 +1,231 @@
+"""Tests for planning inputs, the horizon planner and plan encoding."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.inputs import (
+    build_planning_inputs,
+)
+from custom_components.solax_energy_optimizer.plan import Plan, encode_segments
+from custom_components.solax_energy_optimizer.planner import (
+    CODE_CHARGE,
+    CODE_DISCHARGE,
+    CODE_IDLE,
+    BatteryModel,
+    SlotPlan,
+    build_slot_plan,
+)
+from custom_components.solax_energy_optimizer.simulation import simulate_slot_plan
+from tests.conftest import BASE, HOUR, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+
+
+# ---------------------------------------------------------------------------
+# build_planning_inputs
+# ---------------------------------------------------------------------------
+
+
+class TestBuildPlanningInputs:
+    def test_infers_slot_ends_from_next_start(self):
+        prices = [
+            {"from": "2024-06-01T01:00:00+00:00", "price": 0.18},
+            {"from": "2024-06-01T00:00:00+00:00", "price": 0.21},
+        ]
+        inputs = build_planning_inputs(prices, [])
+        assert inputs.price.tolist() == [0.21, 0.18]
+        assert (inputs.ends - inputs.starts).tolist() == [HOUR, HOUR]
+
+    def test_uses_till_when_present(self):
+        prices = [
+            {"from": "2024-06-01T00:00:00+00:00", "till": "2024-06-01T00:15:00+00:00", "price": 0.2},
+        ]
+        inputs = build_planning_inputs(prices, [])
+        assert inputs.durations_h.tolist() == [0.25]
+
+    def test_skips_invalid_entries(self):
+        prices = [
+            {"from": "garbage", "price": 0.2},
+            {"from": "2024-06-01T00:00:00+00:00", "price": "n/a"},
+            "not a dict",
+            {"from": "2024-06-01T00:00:00+00:00", "price": 0.3},
+        ]
+        inputs = build_planning_inputs(prices, [])
+        assert inputs.price.tolist() == [0.3]
+
+    def test_resamples_half_hour_forecast_onto_hourly_slots(self):
+        prices = [
+            {"from": "2024-06-01T06:00:00+00:00", "price": 0.2},
+            {"from": "2024-06-01T07:00:00+00:00", "price": 0.2},
+        ]
+        forecast = [
+            {"period_start": "2024-06-01T06:00:00+00:00", "pv_estimate": 1.0},
+            {"period_start": "2024-06-01T06:30:00+00:00", "pv_estimate": 2.0},
+            {"period_start": "2024-06-01T07:00:00+00:00", "pv_estimate": 4.0},
+        ]
+        inputs = build_planning_inputs(prices, forecast)
+        np.testing.assert_allclose(inputs.pv, [1.5, 2.0])
+
+    def test_empty_prices(self):
+        inputs = build_planning_inputs([], [])
+        assert len(inputs) == 0
+
+    def test_slice_from_keeps_current_slot(self):
+        inputs = make_inputs([0.1, 0.2, 0.3])
+        sliced = inputs.slice_from(BASE + 1.5 * HOUR)
+        assert sliced.price.tolist() == [0.2, 0.3]
+
+
+# ---------------------------------------------------------------------------
+# build_slot_plan
+# ---------------------------------------------------------------------------
+
+
+class TestBuildSlotPlan:
+    def test_minimize_cost_charges_cheap_and_discharges_expensive(self):
+        inputs = make_inputs([0.10, 0.30, 0.50])
+        plan = build_slot_plan(
+            inputs, "minimize_cost", soc=50.0, min_soc=20.0, max_soc=90.0, battery=BATTERY
+        )
+        assert plan.action.tolist() == [CODE_CHARGE, CODE_IDLE, CODE_DISCHARGE]
+        assert plan.soc.tolist() == [50.0, 90.0, 90.0]
+
+    def test_first_slot_pinned_to_current_decision(self):
+        inputs = make_inputs([0.10, 0.30, 0.50])
+        plan = build_slot_plan(
+            inputs,
+            "minimize_cost",
+            soc=50.0,
+            min_soc=20.0,
+            max_soc=90.0,
+            battery=BATTERY,
+            first_action="idle",
+        )
+        assert plan.action[0] == CODE_IDLE
+        assert np.isnan(plan.target_soc[0])
+
+    def test_safety_override_charges_to_min(self):
+        inputs = make_inputs([0.5, 0.5])
+        plan = build_slot_plan(
+            inputs, "balanced", soc=5.0, min_soc=20.0, max_soc=90.0, battery=BATTERY
+        )
+        assert plan.action[0] == CODE_CHARGE
+        assert plan.target_soc[0] == 20.0
+        assert plan.soc[1] == 20.0
+
+    def test_grid_independence_charges_until_full(self):
+        inputs = make_inputs([0.2] * 4)
+        plan = build_slot_plan(
+            inputs, "grid_independence", soc=50.0, min_soc=20.0, max_soc=95.0, battery=BATTERY
+        )
+        assert plan.action.tolist() == [CODE_CHARGE, CODE_IDLE, CODE_IDLE, CODE_IDLE]
+
+    def test_self_consumption_makes_room_before_solar(self):
+        inputs = make_inputs([0.2] * 3, pv=[0.0, 0.0, 3.0])
+        plan = build_slot_plan(
+            inputs,
+            "maximize_self_consumption",
+            soc=95.0,
+            min_soc=20.0,
+            max_soc=95.0,
+            battery=BATTERY,
+        )
+        assert plan.action[0] == CODE_DISCHARGE
+        assert plan.target_soc[0] == 75.0
+
+    def test_self_consumption_ignores_solar_absorbed_by_load(self):
+        inputs = make_inputs([0.2] * 3, pv=[0.0, 0.0, 3.0], load=[0.5, 0.5, 2.5])
+        plan = build_slot_plan(
+            inputs,
+            "maximize_self_consumption",
+            soc=95.0,
+            min_soc=20.0,
+            max_soc=95.0,
+            battery=BATTERY,
+        )
+        assert plan.action.tolist() == [CODE_IDLE, CODE_IDLE, CODE_IDLE]
+
+
+# ---------------------------------------------------------------------------
+# Run-length encoding
+# ---------------------------------------------------------------------------
+
+
+def make_slot_plan(actions: list[int], targets: list[float], prices: list[float]) -> SlotPlan:
+    inputs = make_inputs(prices)
+    return SlotPlan(
+        starts=inputs.starts,
+        ends=inputs.ends,
+        action=np.array(actions, dtype=np.int8),
+        target_soc=np.array(targets, dtype=np.float64),
+        soc=np.zeros(len(actions)),
+        price=inputs.price,
+        pv=inputs.pv,
+    )
+
+
+class TestEncodeSegments:
+    def test_merges_runs(self):
+        slots = make_slot_plan(
+            [CODE_CHARGE, CODE_CHARGE, CODE_IDLE, CODE_IDLE, CODE_DISCHARGE],
+            [90.0, 90.0, np.nan, np.nan, 20.0],
+            [0.1, 0.2, 0.3, 0.3, 0.5],
+        )
+        segments = encode_segments(slots)
+        assert [s.action for s in segments] == ["charge", "idle", "discharge"]
+        assert [s.target_soc for s in segments] == [90.0, None, 20.0]
+        assert segments[0].expected_price == pytest.approx(0.15)
+        assert segments[0].end == segments[1].start
+
+    def test_splits_on_target_change(self):
+        slots = make_slot_plan([CODE_CHARGE, CODE_CHARGE], [20.0, 90.0], [0.1, 0.1])
+        assert len(encode_segments(slots)) == 2
+
+    def test_empty(self):
+        assert encode_segments(make_slot_plan([], [], [])) == []
+
+
+class TestPlan:
+    def test_attributes_are_cached(self):
+        slots = make_slot_plan([CODE_CHARGE, CODE_IDLE], [90.0, np.nan], [0.1, 0.3])
+        plan = Plan(slots, "minimize_cost", datetime(2024, 6, 1, tzinfo=UTC))
+        assert plan.attributes is plan.attributes
+        assert plan.attributes["segment_count"] == 2
+        assert plan.attributes["segments"][0]["action"] == "charge"
+
+    def test_next_change_and_segment_at(self):
+        slots = make_slot_plan([CODE_CHARGE, CODE_IDLE], [90.0, np.nan], [0.1, 0.3])
+        plan = Plan(slots, "minimize_cost", datetime(2024, 6, 1, tzinfo=UTC))
+        now = datetime(2024, 6, 1, 0, 30, tzinfo=UTC)
+        assert plan.segment_at(now).action == "charge"
+        assert plan.next_change(now) == datetime(2024, 6, 1, 1, 0, tzinfo=UTC)
+        later = datetime(2024, 6, 1, 1, 30, tzinfo=UTC)
+        assert plan.next_change(later) is None
+
+    def test_slot_table_prices_the_planned_grid_energy(self):
+        inputs = make_inputs([0.10, 0.40, 0.30], pv=[0.0, 0.0, 4.0], load=[1.0, 2.0, 1.0])
+        slots = simulate_slot_plan(
+            inputs,
+            np.array([CODE_CHARGE, CODE_DISCHARGE, CODE_IDLE]),
+            np.array([90.0, 40.0, np.nan]),
+            soc=50.0, battery=BATTERY, min_soc=10.0, max_soc=90.0,
+        )
+        table = Plan(slots, "optimal", datetime(2024, 6, 1, tzinfo=UTC)).slot_table()
+        assert [row["action"] for row in table["slots"]] == ["charge", "discharge", "idle"]
+        # 1 kWh load + 4 kWh into the battery, 2 kWh load − 5 kWh out, the solar surplus fills the battery
+        assert [row["expected_cost"] for row in table["slots"]] == pytest.approx([0.5, -1.2, 0.0])
+        assert table["expected_cost"] == pytest.approx(-0.7)
+        assert table["slots"][2]["pv"] == 4.0
+        assert table["slots"][0]["target_soc"] == 90.0
+
+    def test_slot_table_filters_by_time(self):
+        slots = make_slot_plan([CODE_CHARGE, CODE_IDLE, CODE_IDLE], [90.0, np.nan, np.nan], [0.1, 0.3, 0.2])
+        plan = Plan(slots, "minimize_cost", datetime(2024, 6, 1, tzinfo=UTC))
+        table = plan.slot_table(start=BASE + 0.5 * HOUR, end=BASE + 2 * HOUR)
+        assert table["slot_count"] == 2
+        assert [row["import_price"] for row in table["slots"]] == [0.1, 0.3]
+        assert plan.slot_table(start=BASE + 3 * HOUR)["slots"] == []
+        assert plan.slot_table(start=BASE + 2 * HOUR, end=BASE + HOUR)["slot_count"] == 0
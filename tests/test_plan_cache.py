@@ -0,0 +1,73 @@
+"""Tests for the input fingerprint and the LRU decision cache."""
+from __future__ import annotations
+
+from custom_components.solax_energy_optimizer.plan_cache import (
+    CachedDecision,
+    PlanCache,
+    input_fingerprint,
+)
+from custom_components.solax_energy_optimizer.reasons import DecisionReason
+from tests.conftest import BASE, HOUR, make_inputs
+
+
+def decision(action: str) -> CachedDecision:
+    return CachedDecision(
+        next_action=action,
+        target_soc=None,
+        decision_reason=DecisionReason(),
+        acted=False,
+        optimal=None,
+        robust_choice=None,
+        joint=None,
+        load_schedule=None,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Fingerprint
+# ---------------------------------------------------------------------------
+
+
+class TestInputFingerprint:
+    def test_equal_content_gives_equal_fingerprints(self):
+        assert input_fingerprint(make_inputs([0.1, 0.2]), ("optimal", 10.0)) == input_fingerprint(
+            make_inputs([0.1, 0.2]), ("optimal", 10.0)
+        )
+
+    def test_any_difference_changes_the_fingerprint(self):
+        base = input_fingerprint(make_inputs([0.1, 0.2]), ("optimal", 10.0))
+        assert input_fingerprint(make_inputs([0.1, 0.3]), ("optimal", 10.0)) != base
+        assert input_fingerprint(make_inputs([0.1, 0.2], export_price=[0.1, 0.2]), ("optimal", 10.0)) != base
+        assert input_fingerprint(make_inputs([0.1, 0.2]), ("optimal", 20.0)) != base
+        assert input_fingerprint(make_inputs([0.1, 0.2]), ("balanced", 10.0)) != base
+
+    def test_sliced_inputs_hash_their_remaining_slots(self):
+        inputs = make_inputs([0.3, 0.1, 0.2])
+        # Within a slot the remaining slots are the same; past its end they are not
+        assert input_fingerprint(inputs.slice_from(BASE + 600), ()) == input_fingerprint(inputs.slice_from(BASE + 1800), ())
+        assert input_fingerprint(inputs.slice_from(BASE + HOUR), ()) != input_fingerprint(inputs.slice_from(BASE), ())
+
+
+# ---------------------------------------------------------------------------
+# LRU cache
+# ---------------------------------------------------------------------------
+
+
+class TestPlanCache:
+    def test_counts_hits_and_misses(self):
+        cache = PlanCache()
+        assert cache.get(b"a") is None
+        cache.put(b"a", decision("charge"))
+        assert cache.get(b"a").next_action == "charge"
+        assert cache.as_dict() == {"size": 1, "capacity": 8, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_evicts_least_recently_used(self):
+        cache = PlanCache(size=2)
+        cache.put(b"a", decision("charge"))
+        cache.put(b"b", decision("idle"))
+        cache.get(b"a")
+        cache.put(b"c", decision("discharge"))
+        assert len(cache) == 2
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") is not None
+        assert cache.get(b"c") is not None
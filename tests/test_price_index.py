@@ -0,0 +1,52 @@
+"""Tests for the price rank/percentile index."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.price_index import PriceRankIndex
+from tests.conftest import BASE, HOUR, make_inputs
+
+
+class TestPriceRankIndex:
+    def test_ranks_and_percentiles(self):
+        index = PriceRankIndex(make_inputs([0.30, 0.10, 0.20, 0.40, 0.50]))
+        assert index.ranks.tolist() == [2, 0, 1, 3, 4]
+        assert index.percentiles.tolist() == [50.0, 0.0, 25.0, 75.0, 100.0]
+        assert index.quantile_bands.tolist() == [3, 1, 2, 4, 5]
+
+    def test_ties_share_rank(self):
+        index = PriceRankIndex(make_inputs([0.2, 0.1, 0.2]))
+        assert index.ranks.tolist() == [1, 0, 1]
+
+    def test_slot_stats_for_current_slot(self):
+        index = PriceRankIndex(make_inputs([0.30, 0.10, 0.20]))
+        assert index.slot_stats(BASE + 1.5 * HOUR) == (1, 0.0, 1)
+        assert index.slot_stats(BASE - HOUR) is None
+
+    def test_future_stats_match_filter_and_sort(self):
+        rng = np.random.default_rng(3)
+        prices = list(rng.random(48))
+        index = PriceRankIndex(make_inputs(prices))
+        for offset in (0.0, 0.5, 10.0, 47.0):
+            when = BASE + offset * HOUR
+            future = [p for i, p in enumerate(prices) if BASE + i * HOUR >= when]
+            stats = index.future_stats(when)
+            assert stats.count == len(future)
+            assert stats.minimum == min(future)
+            assert stats.maximum == max(future)
+            assert stats.mean == pytest.approx(sum(future) / len(future))
+
+    def test_future_stats_none_past_horizon(self):
+        index = PriceRankIndex(make_inputs([0.1, 0.2]))
+        assert index.future_stats(BASE + 1.5 * HOUR) is None
+
+    def test_single_slot(self):
+        index = PriceRankIndex(make_inputs([0.1]))
+        assert index.percentiles.tolist() == [0.0]
+        assert index.quantile(0.5) == 0.1
+
+    def test_empty(self):
+        index = PriceRankIndex(make_inputs([]))
+        assert len(index) == 0
+        assert index.quantile(0.2) is None
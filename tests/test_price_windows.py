@@ -0,0 +1,100 @@
+"""Tests for the contiguous price window engine."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs
+from custom_components.solax_energy_optimizer.price_windows import (
+    WINDOW_MODE_CHEAPEST,
+    WINDOW_MODE_MOST_EXPENSIVE,
+    PriceWindowEngine,
+    sliding_max,
+)
+from tests.conftest import BASE, HOUR, make_inputs
+
+
+def brute_force(prices: list[float], width: int, cheapest: bool) -> int:
+    averages = [np.mean(prices[i:i + width]) for i in range(len(prices) - width + 1)]
+    return int(np.argmin(averages) if cheapest else np.argmax(averages))
+
+
+class TestSlidingMax:
+    def test_matches_naive(self):
+        rng = np.random.default_rng(1)
+        values = rng.random(50)
+        for width in (1, 3, 7, 50):
+            expected = [values[i:i + width].max() for i in range(values.size - width + 1)]
+            np.testing.assert_allclose(sliding_max(values, width), expected)
+
+    def test_window_larger_than_series(self):
+        assert sliding_max(np.array([1.0, 2.0]), 3).size == 0
+
+
+class TestPriceWindowEngine:
+    PRICES = (0.30, 0.25, 0.10, 0.12, 0.11, 0.28, 0.40, 0.45, 0.20)
+
+    def test_cheapest_window(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        window = engine.find(3, WINDOW_MODE_CHEAPEST)
+        assert window.start == BASE + 2 * HOUR
+        assert window.end == BASE + 5 * HOUR
+        assert window.average_price == pytest.approx(0.11)
+        assert window.extreme_price == pytest.approx(0.12)
+
+    def test_most_expensive_window(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        window = engine.find(2, WINDOW_MODE_MOST_EXPENSIVE)
+        assert window.start == BASE + 6 * HOUR
+        assert window.extreme_price == pytest.approx(0.40)
+
+    def test_matches_brute_force_on_random_series(self):
+        rng = np.random.default_rng(7)
+        prices = list(rng.random(96))
+        engine = PriceWindowEngine(make_inputs(prices, slot=900.0))
+        for hours in (0.25, 1, 2.5, 6):
+            width = engine.slots_for(hours)
+            for mode, cheapest in ((WINDOW_MODE_CHEAPEST, True), (WINDOW_MODE_MOST_EXPENSIVE, False)):
+                window = engine.find(hours, mode)
+                assert window.start == BASE + 900.0 * brute_force(prices, width, cheapest)
+
+    def test_end_before_bound(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        window = engine.find(2, WINDOW_MODE_CHEAPEST, end_before=BASE + 3 * HOUR)
+        assert window.start == BASE + 1 * HOUR
+
+    def test_start_after_includes_running_slot(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        window = engine.find(1, WINDOW_MODE_CHEAPEST, start_after=BASE + 2.5 * HOUR)
+        assert window.start == BASE + 2 * HOUR
+
+    def test_no_room_for_window(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        assert engine.find(20, WINDOW_MODE_CHEAPEST) is None
+        assert engine.find(2, WINDOW_MODE_CHEAPEST, end_before=BASE + HOUR) is None
+
+    def test_windows_do_not_span_gaps(self):
+        inputs = make_inputs([0.1, 0.1, 0.5, 0.5])
+        inputs = PlanningInputs(
+            starts=np.append(inputs.starts[:2], inputs.starts[2:] + 10 * HOUR),
+            ends=np.append(inputs.ends[:2], inputs.ends[2:] + 10 * HOUR),
+            price=np.array([0.5, 0.1, 0.1, 0.5]),
+            pv=inputs.pv,
+            load=inputs.load,
+        )
+        engine = PriceWindowEngine(inputs)
+        window = engine.find(2, WINDOW_MODE_CHEAPEST)
+        assert window.average_price == pytest.approx(0.3)
+
+    def test_results_are_memoized(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        assert engine.find(3) is engine.find(3)
+
+    def test_matches_detects_price_change(self):
+        engine = PriceWindowEngine(make_inputs(self.PRICES))
+        assert engine.matches(make_inputs(self.PRICES))
+        assert not engine.matches(make_inputs([*self.PRICES[:-1], 0.99]))
+
+    def test_empty_series(self):
+        engine = PriceWindowEngine(make_inputs([]))
+        assert engine.find(1) is None
@@ -0,0 +1,61 @@
+"""Tests for decision reason codes."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from custom_components.solax_energy_optimizer.const import (
+    REASON_CHEAP_PRICE,
+    REASON_CODES,
+    REASON_NO_PRICE_DATA,
+    REASON_SOLAR_HAS_ROOM,
+)
+from custom_components.solax_energy_optimizer.reasons import (
+    REASON_TEMPLATES,
+    DecisionReason,
+)
+
+STRINGS = Path(__file__).parent.parent / "custom_components" / "solax_energy_optimizer" / "strings.json"
+
+
+class TestDecisionReason:
+    def test_every_code_has_template_and_translation(self):
+        states = json.loads(STRINGS.read_text())["entity"]["sensor"]["decision_reason"]["state"]
+        for code in REASON_CODES:
+            assert code in REASON_TEMPLATES
+            assert code in states
+
+    def test_renders_parameters(self):
+        reason = DecisionReason(
+            REASON_CHEAP_PRICE,
+            {"price": 0.1, "cheap_threshold": 0.15, "soc": 40.0, "max_soc": 95.0},
+        )
+        assert reason.text == "Price €0.1000 ≤ cheap threshold €0.1500 and SOC 40.0% < max 95%"
+        assert str(reason) == reason.text
+
+    def test_text_is_rendered_once(self):
+        reason = DecisionReason(REASON_NO_PRICE_DATA)
+        assert "text" not in reason.__dict__
+        assert reason.text is reason.text
+
+    def test_missing_parameters_fall_back_to_template(self):
+        reason = DecisionReason(REASON_SOLAR_HAS_ROOM, {"pv": 2.0})
+        assert reason.text == REASON_TEMPLATES[REASON_SOLAR_HAS_ROOM]
+
+    def test_equal_codes_and_params_compare_equal(self):
+        assert DecisionReason(REASON_NO_PRICE_DATA) == DecisionReason(REASON_NO_PRICE_DATA)
+
+    def test_as_dict_renders_description(self):
+        reason = DecisionReason(REASON_NO_PRICE_DATA, {"slots": 0})
+        assert reason.as_dict() == {
+            "code": REASON_NO_PRICE_DATA,
+            "description": "No price data available",
+            "parameters": {"slots": 0},
+        }
+
+    def test_decision_params_leave_out_readings(self):
+        reason = DecisionReason(
+            REASON_CHEAP_PRICE,
+            {"price": 0.1, "cheap_threshold": 0.15, "soc": 40.0, "max_soc": 95.0},
+        )
+        assert reason.decision_params == (("cheap_threshold", 0.15), ("max_soc", 95.0))
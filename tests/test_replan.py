@@ -0,0 +1,293 @@
+"""Tests for the incremental re-plan after setting changes."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.solax_energy_optimizer.const import (
+    ACTION_CHARGE,
+    ACTION_DISCHARGE,
+    ACTION_IDLE,
+    CONF_EV_DEADLINE,
+    CONF_EV_ENERGY,
+    CONF_EV_POWER,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_MINIMIZE_COST,
+    STRATEGY_OPTIMAL,
+)
+from custom_components.solax_energy_optimizer.coordinator import (
+    EnergyOptimizerCoordinator,
+    EnergyOptimizerData,
+)
+from custom_components.solax_energy_optimizer.fleet import FleetCoordinator, FleetMember
+from custom_components.solax_energy_optimizer.flexible_loads import FlexibleLoadTracker
+from custom_components.solax_energy_optimizer.inputs import build_planning_inputs
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.peak_demand import PeakDemand
+from custom_components.solax_energy_optimizer.plan_cache import PlanCache
+from custom_components.solax_energy_optimizer.planner import (
+    DEFAULT_PARAMS,
+    BatteryModel,
+)
+from custom_components.solax_energy_optimizer.price_index import PriceRankIndex
+from custom_components.solax_energy_optimizer.reasons import (
+    REASON_PEAK_LIMIT,
+    REASON_SAFETY_OVERRIDE,
+)
+from tests.conftest import BASE, HOUR
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=UTC).isoformat()
+
+
+@pytest.fixture
+def coordinator(monkeypatch) -> EnergyOptimizerCoordinator:
+    """Return a coordinator holding the result of one update cycle, without its sources."""
+    monkeypatch.setattr(dt_util, "now", lambda *args: dt_util.utc_from_timestamp(BASE + 600))
+    prices = [
+        {"from": iso(BASE + idx * HOUR), "price": price}
+        for idx, price in enumerate(np.linspace(0.4, 0.1, 12).round(4))
+    ]
+    coordinator = EnergyOptimizerCoordinator.__new__(EnergyOptimizerCoordinator)
+    coordinator._current_strategy = STRATEGY_MINIMIZE_COST
+    coordinator._automation_enabled = True
+    coordinator._manual_override = False
+    coordinator._dry_run_mode = True
+    coordinator._min_soc = 10.0
+    coordinator._max_soc = 90.0
+    coordinator._params = DEFAULT_PARAMS
+    coordinator._battery = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+    coordinator._load_forecaster = None
+    coordinator._load_entity = coordinator._pv_entity = None
+    coordinator._robust_choice = None
+    coordinator._solver = HorizonSolver()
+    coordinator._optimal = None
+    coordinator._fleet = None
+    coordinator._flexible = FlexibleLoadTracker({})
+    coordinator._load_schedule = coordinator._joint = None
+    coordinator._plan_cache = PlanCache()
+    coordinator._inputs = build_planning_inputs(prices, [])
+    coordinator._price_index = PriceRankIndex(coordinator._inputs)
+    # Any attempt to re-read a source fails the test
+    coordinator._inverter_adapter = coordinator._price_adapter = coordinator._forecast_adapter = None
+    data = EnergyOptimizerData()
+    data.prices_today = prices
+    data.current_price = data.import_price = 0.4
+    data.battery_soc = 30.0
+    coordinator.data = data
+    coordinator.updates = []
+    coordinator.async_set_updated_data = coordinator.updates.append
+    coordinator._decide(data)
+    return coordinator
+
+
+# ---------------------------------------------------------------------------
+# Re-plan
+# ---------------------------------------------------------------------------
+
+
+class TestReplan:
+    def test_min_soc_change_is_applied_immediately(self, coordinator):
+        assert coordinator.data.next_action == ACTION_DISCHARGE
+        coordinator.set_min_soc(40.0)
+        coordinator.async_replan("min_soc")
+        (data,) = coordinator.updates
+        assert data.next_action == ACTION_CHARGE
+        assert data.target_soc == 40.0
+        assert data.decision_reason.code == REASON_SAFETY_OVERRIDE
+        assert data.battery_soc == 30.0
+
+    def test_strategy_change_rebuilds_plan(self, coordinator):
+        coordinator.set_strategy(STRATEGY_GRID_INDEPENDENCE)
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        assert data.next_action == ACTION_CHARGE
+        assert data.plan.strategy == STRATEGY_GRID_INDEPENDENCE
+        assert coordinator.data.next_action == ACTION_DISCHARGE  # previous data is not mutated
+
+    def test_optimal_strategy_warm_starts(self, coordinator):
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.async_replan("strategy")
+        coordinator.set_max_soc(80.0)
+        coordinator.async_replan("max_soc")
+        # A new SOC reading misses the plan cache but keeps the DP grid
+        coordinator.data.battery_soc = 32.0
+        coordinator.async_replan("strategy")
+        first, limited, again = coordinator.updates
+        assert first.plan.strategy == STRATEGY_OPTIMAL
+        assert limited.plan.slots.soc.max() <= 80.0
+        assert again.next_action == limited.next_action
+        assert coordinator.solver.stats.solves == 3
+        assert coordinator.solver.stats.warm_starts == 1
+
+    def test_disabled_automation_stays_idle(self, coordinator):
+        coordinator.set_automation_enabled(False)
+        coordinator.async_replan("max_soc")
+        (data,) = coordinator.updates
+        assert data.next_action == ACTION_IDLE
+        assert data.plan is None
+
+    def test_without_data_waits_for_first_update(self, coordinator):
+        coordinator.data = None
+        coordinator.async_replan("strategy")
+        assert coordinator.updates == []
+
+
+# ---------------------------------------------------------------------------
+# Plan cache
+# ---------------------------------------------------------------------------
+
+
+class TestPlanCache:
+    def test_unchanged_inputs_reuse_the_decision(self, coordinator):
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        assert data.decision_reason is coordinator.data.decision_reason
+        assert data.next_action == ACTION_DISCHARGE
+        assert coordinator.plan_cache.as_dict()["hits"] == 1
+
+    def test_switching_back_hits_the_cache(self, coordinator):
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.async_replan("strategy")
+        solution = coordinator._optimal
+        coordinator.set_strategy(STRATEGY_MINIMIZE_COST)
+        coordinator.async_replan("strategy")
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.async_replan("strategy")
+        # The cached solution is restored for the plan without solving again
+        assert coordinator._optimal is solution
+        assert coordinator.solver.stats.solves == 1
+        assert coordinator.updates[2].plan.strategy == STRATEGY_OPTIMAL
+        stats = coordinator.plan_cache.as_dict()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+    def test_changed_inputs_recompute(self, coordinator):
+        coordinator.set_max_soc(80.0)
+        coordinator.async_replan("max_soc")
+        coordinator.data.battery_soc = 35.0
+        coordinator.async_replan("strategy")
+        assert coordinator.plan_cache.as_dict()["misses"] == 3
+
+
+# ---------------------------------------------------------------------------
+# Capacity tariff
+# ---------------------------------------------------------------------------
+
+
+def demand(quarter_kwh: float, limit_kw: float) -> PeakDemand:
+    return PeakDemand(
+        rolling_kw=0.0,
+        quarter_kw=0.0,
+        quarter_kwh=quarter_kwh,
+        quarter_end=BASE + 900,
+        peak_kw=limit_kw,
+        peak_time=BASE - 86400,
+        limit_kw=limit_kw,
+    )
+
+
+class TestPeakLimit:
+    @pytest.fixture(autouse=True)
+    def utcnow(self, monkeypatch):
+        monkeypatch.setattr(dt_util, "utcnow", lambda: dt_util.utc_from_timestamp(BASE + 600))
+
+    def test_charging_that_raises_the_peak_is_held(self, coordinator):
+        coordinator.set_strategy(STRATEGY_GRID_INDEPENDENCE)
+        coordinator.data.peak_demand = demand(0.5, 3.0)
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        # (0.5 kWh + 5 kW × 5 min) / 15 min = 3.67 kW
+        assert data.next_action == ACTION_IDLE
+        assert data.decision_reason.code == REASON_PEAK_LIMIT
+        assert data.decision_reason.params["projected"] == pytest.approx(3.667, abs=1e-3)
+        assert data.plan.slots.action[0] == 0
+
+    def test_charging_within_the_peak_goes_ahead(self, coordinator):
+        coordinator.set_strategy(STRATEGY_GRID_INDEPENDENCE)
+        coordinator.data.peak_demand = demand(0.1, 5.0)
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        assert data.next_action == ACTION_CHARGE
+
+    def test_optimal_schedule_charges_under_the_limit(self, coordinator):
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.data.peak_demand = demand(0.0, 3.0)
+        coordinator.async_replan("strategy")
+        # No load: 3 kW for an hour is 30 SOC points of the 10 kWh battery
+        soc = coordinator._optimal.soc
+        assert np.diff(soc).max() <= 30.0 + 1e-6
+        assert soc.max() == pytest.approx(90.0)
+
+
+# ---------------------------------------------------------------------------
+# Flexible loads
+# ---------------------------------------------------------------------------
+
+
+class TestFlexibleLoads:
+    @pytest.fixture(autouse=True)
+    def ev_charger(self, coordinator):
+        coordinator._flexible = FlexibleLoadTracker(
+            {CONF_EV_POWER: 5.0, CONF_EV_ENERGY: 10.0, CONF_EV_DEADLINE: "12:00:00"}
+        )
+        coordinator._flexible.advance(BASE + 600)
+
+    def test_rule_strategy_places_load_in_cheapest_hours(self, coordinator):
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        status = data.flexible_loads["ev_charger"]
+        assert status.runs == ((BASE + 10 * HOUR, BASE + 12 * HOUR, 5.0),)
+        assert status.power_kw == 0.0
+        assert coordinator.joint_plan is None
+
+    def test_optimal_strategy_plans_load_with_battery(self, coordinator):
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        assert data.flexible_loads["ev_charger"].planned_kwh == pytest.approx(10.0)
+        assert coordinator.joint_plan.rounds >= 1
+        assert data.plan.strategy == STRATEGY_OPTIMAL
+
+    def test_disabled_automation_stops_loads(self, coordinator):
+        coordinator.set_automation_enabled(False)
+        coordinator.async_replan("strategy")
+        (data,) = coordinator.updates
+        assert data.flexible_loads == {}
+
+
+# ---------------------------------------------------------------------------
+# Fleet membership
+# ---------------------------------------------------------------------------
+
+
+class TestFleetMembership:
+    def test_leaving_optimal_strategy_withdraws_from_fleet(self, coordinator):
+        fleet = FleetCoordinator("garage")
+        fleet.join("a", 6.0, None)
+        fleet.join("b", 6.0, None)
+        coordinator._fleet = fleet
+        coordinator.config_entry = SimpleNamespace(entry_id="b")
+        now = BASE + 600
+        neighbour = FleetMember(
+            entry_id="a",
+            inputs=coordinator._inputs.slice_from(now),
+            soc=50.0,
+            battery=coordinator._battery,
+            min_soc=10.0,
+            max_soc=90.0,
+        )
+
+        coordinator.set_strategy(STRATEGY_OPTIMAL)
+        coordinator.async_replan("strategy")
+        _, schedule = fleet.dispatch(neighbour, now)
+        assert schedule.action.shape[0] == 2
+
+        coordinator.set_strategy(STRATEGY_MINIMIZE_COST)
+        coordinator.async_replan("strategy")
+        _, schedule = fleet.dispatch(neighbour, now)
+        assert schedule.action.shape[0] == 1
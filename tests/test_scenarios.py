@@ -0,0 +1,177 @@
+"""Tests for schedule simulation and scenario-based planning."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.inputs import PlanningInputs, resample_pv
+from custom_components.solax_energy_optimizer.planner import (
+    CODE_CHARGE,
+    CODE_DISCHARGE,
+    CODE_IDLE,
+    BatteryModel,
+)
+from custom_components.solax_energy_optimizer.scenarios import (
+    build_candidates,
+    choose_robust_schedule,
+    expected_shortfall,
+    sample_pv_scenarios,
+)
+from custom_components.solax_energy_optimizer.simulation import simulate_schedules
+from tests.conftest import BASE, HOUR, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+
+
+def simulate(inputs: PlanningInputs, action: list[int], target: list[float], soc: float = 50.0, **kwargs):
+    return simulate_schedules(
+        np.array(action, dtype=np.int8),
+        np.array(target, dtype=np.float64),
+        price=inputs.price,
+        pv=inputs.pv,
+        load=inputs.load,
+        hours=inputs.durations_h,
+        soc=soc,
+        battery=BATTERY,
+        min_soc=10.0,
+        max_soc=90.0,
+        **kwargs,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+
+class TestSimulateSchedules:
+    def test_grid_charge_is_billed_and_capped_at_target(self):
+        inputs = make_inputs([0.10, 0.10])
+        result = simulate(inputs, [CODE_CHARGE, CODE_CHARGE], [80.0, 80.0], terminal_price=0.0, keep_soc=True)
+        # 3 kWh needed to go 50 → 80 %, first slot delivers all of it at 5 kW max
+        assert result.soc.tolist() == [50.0, 80.0]
+        assert float(result.final_soc) == pytest.approx(80.0)
+        assert float(result.grid_cost) == pytest.approx(0.30)
+
+    def test_idle_covers_load_from_battery_down_to_min(self):
+        inputs = make_inputs([0.30], load=[8.0])
+        result = simulate(inputs, [CODE_IDLE], [np.nan], soc=20.0, terminal_price=0.0)
+        # 1 kWh available above min SOC, 7 kWh imported
+        assert float(result.final_soc) == pytest.approx(10.0)
+        assert float(result.grid_cost) == pytest.approx(7 * 0.30)
+
+    def test_idle_stores_solar_surplus_and_exports_rest(self):
+        inputs = make_inputs([0.20], pv=[6.0], load=[1.0])
+        result = simulate(inputs, [CODE_IDLE], [np.nan], soc=85.0, terminal_price=0.0)
+        # 0.5 kWh of room left, 4.5 kWh exported at the slot price
+        assert float(result.final_soc) == pytest.approx(90.0)
+        assert float(result.grid_cost) == pytest.approx(-4.5 * 0.20)
+
+    def test_discharge_exports_towards_target(self):
+        inputs = make_inputs([0.40])
+        result = simulate(inputs, [CODE_DISCHARGE], [30.0], terminal_price=0.0)
+        assert float(result.final_soc) == pytest.approx(30.0)
+        assert float(result.grid_cost) == pytest.approx(-2 * 0.40)
+
+    def test_terminal_value_offsets_stored_energy(self):
+        inputs = make_inputs([0.10, 0.30])
+        result = simulate(inputs, [CODE_CHARGE, CODE_IDLE], [60.0, np.nan])
+        # 1 kWh bought at 0.10, valued at the mean price 0.20
+        assert float(result.cost) == pytest.approx(0.10 - 0.20)
+
+    def test_batch_dimensions_broadcast(self):
+        inputs = make_inputs([0.10, 0.30, 0.20])
+        actions = np.array([[CODE_IDLE] * 3, [CODE_CHARGE, CODE_DISCHARGE, CODE_IDLE]], dtype=np.int8)
+        targets = np.array([[np.nan] * 3, [90.0, 10.0, np.nan]])
+        pv = np.stack([inputs.pv, inputs.pv + 1.0, inputs.pv + 2.0])
+        result = simulate_schedules(
+            actions[:, None, :],
+            targets[:, None, :],
+            price=inputs.price,
+            pv=pv[None, :, :],
+            load=inputs.load,
+            hours=inputs.durations_h,
+            soc=50.0,
+            battery=BATTERY,
+            min_soc=10.0,
+            max_soc=90.0,
+        )
+        assert result.cost.shape == (2, 3)
+        single = simulate(make_inputs([0.10, 0.30, 0.20], pv=[1.0] * 3), [CODE_CHARGE, CODE_DISCHARGE, CODE_IDLE], [90.0, 10.0, np.nan])
+        assert result.cost[1, 1] == pytest.approx(float(single.cost))
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+
+class TestScenarioSampling:
+    def test_samples_follow_quantile_bands(self):
+        pv = np.full(4, 2.0)
+        samples = sample_pv_scenarios(pv, pv - 1.0, pv + 1.0, 20_000, np.random.default_rng(1))
+        assert samples.shape == (20_000, 4)
+        assert np.quantile(samples[:, 0], 0.1) == pytest.approx(1.0, abs=0.05)
+        assert np.quantile(samples[:, 0], 0.9) == pytest.approx(3.0, abs=0.05)
+
+    def test_no_spread_without_bands(self):
+        pv = np.array([0.0, 1.5, 3.0])
+        samples = sample_pv_scenarios(pv, pv, pv, 10, np.random.default_rng(0))
+        np.testing.assert_array_equal(samples, np.broadcast_to(pv, (10, 3)))
+
+    def test_expected_shortfall_averages_worst_tail(self):
+        costs = np.arange(20, dtype=np.float64)
+        assert float(expected_shortfall(costs, 0.1)) == pytest.approx(18.5)
+
+    def test_band_resampling_falls_back_to_median(self):
+        forecast = [
+            {"period_start": "2024-06-01T00:00:00+00:00", "pv_estimate": 2.0, "pv_estimate10": 1.0},
+            {"period_start": "2024-06-01T00:30:00+00:00", "pv_estimate": 4.0},
+        ]
+        starts = np.array([BASE])
+        assert resample_pv(forecast, starts, starts + HOUR, "pv_estimate10").tolist() == [2.5]
+
+
+class TestRobustSchedule:
+    def test_candidates_include_rule_based_and_threshold_schedules(self):
+        inputs = make_inputs([0.1, 0.2, 0.3, 0.4])
+        candidates = build_candidates(inputs, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY)
+        assert candidates.names[:5] == (
+            "minimize_cost",
+            "maximize_self_consumption",
+            "grid_independence",
+            "balanced",
+            "idle",
+        )
+        assert candidates.action.shape == (len(candidates.names), 4)
+        assert len(candidates.names) == 5 + 16
+
+    def test_buys_cheap_and_sells_expensive(self):
+        inputs = make_inputs([0.05, 0.05, 0.50, 0.50], load=[0.5] * 4)
+        choice = choose_robust_schedule(
+            inputs, inputs.pv, inputs.pv, soc=20.0, min_soc=10.0, max_soc=90.0, battery=BATTERY, seed=1
+        )
+        assert choice.action[0] == CODE_CHARGE
+        assert choice.action[-1] in (CODE_DISCHARGE, CODE_IDLE)
+        assert choice.expected_cost <= choice.cvar + 1e-9
+
+    def test_budget_limits_scenarios(self):
+        inputs = make_inputs([0.2] * 48)
+        choice = choose_robust_schedule(
+            inputs,
+            inputs.pv,
+            inputs.pv,
+            soc=50.0,
+            min_soc=10.0,
+            max_soc=90.0,
+            battery=BATTERY,
+            budget=21 * 48 * 10,
+        )
+        assert choice.scenarios == 10
+        assert choice.candidates == 21
+
+    def test_empty_horizon(self):
+        inputs = make_inputs([])
+        assert choose_robust_schedule(
+            inputs, inputs.pv, inputs.pv, soc=50.0, min_soc=10.0, max_soc=90.0, battery=BATTERY
+        ) is None
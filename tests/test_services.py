@@ -0,0 +1,89 @@
+"""Tests for the domain-wide services and their config entry lookup."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.solax_energy_optimizer.const import DOMAIN
+from custom_components.solax_energy_optimizer.services import (
+    GET_PLAN_SCHEMA,
+    SERVICE_GET_PLAN,
+    async_setup_services,
+    get_coordinator,
+)
+
+
+def make_hass(*entries) -> MagicMock:
+    hass = MagicMock()
+    by_id = {entry.entry_id: entry for entry in entries}
+    hass.config_entries.async_get_entry = by_id.get
+    hass.config_entries.async_entries = lambda domain: [entry for entry in entries if entry.domain == domain]
+    return hass
+
+
+def make_entry(entry_id: str, state=ConfigEntryState.LOADED, domain=DOMAIN) -> SimpleNamespace:
+    return SimpleNamespace(entry_id=entry_id, title=entry_id, domain=domain, state=state, runtime_data=MagicMock())
+
+
+def registered_handler(hass: MagicMock, service: str):
+    for call in hass.services.async_register.call_args_list:
+        if call.args[1] == service:
+            return call.args[2]
+    raise AssertionError(f"{service} not registered")
+
+
+# ---------------------------------------------------------------------------
+# Entry lookup
+# ---------------------------------------------------------------------------
+
+
+class TestGetCoordinator:
+    def test_returns_the_named_entries_coordinator(self):
+        first, second = make_entry("a"), make_entry("b")
+        hass = make_hass(first, second)
+        assert get_coordinator(hass, "a") is first.runtime_data
+        assert get_coordinator(hass, "b") is second.runtime_data
+
+    @pytest.mark.parametrize(
+        "entry",
+        [
+            make_entry("a", state=ConfigEntryState.NOT_LOADED),
+            make_entry("a", domain="other"),
+            None,
+        ],
+    )
+    def test_unloaded_or_foreign_entries_are_rejected(self, entry):
+        hass = make_hass(*([entry] if entry is not None else []))
+        with pytest.raises(ServiceValidationError):
+            get_coordinator(hass, "a")
+
+
+# ---------------------------------------------------------------------------
+# Registration
+# ---------------------------------------------------------------------------
+
+
+class TestServices:
+    async def test_calls_reach_the_named_entry(self):
+        first, second = make_entry("a"), make_entry("b")
+        hass = make_hass(first, second)
+        async_setup_services(hass)
+        assert hass.services.async_register.call_count == 6
+        first.runtime_data.data = None
+        second.runtime_data.data.plan.slot_table.return_value = {"slots": [], "expected_cost": 0.0}
+        second.runtime_data.data.decision_reason.as_dict.return_value = {"code": "none"}
+
+        handler = registered_handler(hass, SERVICE_GET_PLAN)
+        response = await handler(SimpleNamespace(data=GET_PLAN_SCHEMA({"config_entry_id": "b"})))
+        assert response["decision_reason"] == {"code": "none"}
+        with pytest.raises(ServiceValidationError):
+            await handler(SimpleNamespace(data=GET_PLAN_SCHEMA({"config_entry_id": "a"})))
+
+    def test_entry_is_required(self):
+        with pytest.raises(vol.Invalid):
+            GET_PLAN_SCHEMA({})
@@ -0,0 +1,72 @@
+"""Tests for the shadow strategy book."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.solax_energy_optimizer.planner import BatteryModel
+from custom_components.solax_energy_optimizer.shadow import MAX_STEP_SECONDS, ShadowBook
+from custom_components.solax_energy_optimizer.strategies import MarketSeries
+from tests.conftest import BASE, make_inputs
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+
+
+def make_series(prices: list[float], start: float = BASE) -> MarketSeries:
+    return MarketSeries.from_inputs(make_inputs(prices, start=start))
+
+
+def step(book: ShadowBook, now: float, series: MarketSeries, price: float, soc: float | None = 50.0) -> bool:
+    return book.step(
+        now, series, price=price, pv_kw=0.0, load_kw=1.0, soc=soc,
+        battery=BATTERY, min_soc=10.0, max_soc=90.0,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Counterfactual accounting
+# ---------------------------------------------------------------------------
+
+
+class TestShadowBook:
+    def test_first_step_only_seeds(self):
+        book = ShadowBook()
+        assert not step(book, BASE, make_series([0.1, 0.5]), 0.1)
+        summary = book.summary()
+        assert summary.since == BASE
+        assert set(summary.soc.values()) == {50.0}
+        assert summary.action["minimize_cost"] == "charge"
+        assert summary.action["grid_independence"] == "charge"
+
+    def test_interval_is_billed_per_strategy(self):
+        book = ShadowBook()
+        step(book, BASE, make_series([0.1, 0.5]), 0.1)
+        assert step(book, BASE + 900, make_series([0.1, 0.5]), 0.1)
+        summary = book.summary()
+        # Idle strategies cover 0.25 kWh of load from the battery at no grid cost
+        assert summary.cost["maximize_self_consumption"] == pytest.approx(0.0)
+        # Charging ones import 1.25 kWh for the battery plus the load
+        assert summary.cost["minimize_cost"] == pytest.approx(1.5 * 0.1)
+        assert summary.soc["minimize_cost"] == pytest.approx(62.5)
+        assert summary.soc["maximize_self_consumption"] == pytest.approx(47.5)
+        assert summary.best == "maximize_self_consumption"
+
+    def test_long_gaps_are_not_billed(self):
+        book = ShadowBook()
+        step(book, BASE, make_series([0.1, 0.5]), 0.1)
+        assert not step(book, BASE + MAX_STEP_SECONDS + 1, make_series([0.1, 0.5]), 0.1)
+        assert all(cost == 0.0 for cost in book.summary().cost.values())
+
+    def test_waits_for_soc(self):
+        book = ShadowBook()
+        step(book, BASE, make_series([0.1]), 0.1, soc=None)
+        assert book.summary().since is None
+        assert book.summary().best is None
+
+    def test_round_trip_through_storage(self):
+        book = ShadowBook()
+        step(book, BASE, make_series([0.1, 0.5]), 0.1)
+        step(book, BASE + 900, make_series([0.1, 0.5]), 0.1)
+        restored = ShadowBook.from_dict(book.as_dict())
+        assert restored.summary().cost == book.summary().cost
+        assert restored.summary().soc == book.summary().soc
+        assert restored.since == BASE
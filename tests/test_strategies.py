@@ -0,0 +1,192 @@
+"""Tests proving the batched strategies decide exactly like the coordinator."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.solax_energy_optimizer.const import (
+    ACTION_IDLE,
+    STRATEGY_BALANCED,
+    STRATEGY_GRID_INDEPENDENCE,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION,
+    STRATEGY_MINIMIZE_COST,
+)
+from custom_components.solax_energy_optimizer.coordinator import (
+    EnergyOptimizerCoordinator,
+    EnergyOptimizerData,
+)
+from custom_components.solax_energy_optimizer.inputs import build_planning_inputs
+from custom_components.solax_energy_optimizer.planner import (
+    ACTIONS,
+    CODE_CHARGE,
+    DEFAULT_PARAMS,
+    StrategyParams,
+)
+from custom_components.solax_energy_optimizer.price_index import PriceRankIndex
+from custom_components.solax_energy_optimizer.strategies import (
+    MarketSeries,
+    decide_batch,
+)
+from tests.conftest import BASE, HOUR
+
+MIN_SOC = 10.0
+MAX_SOC = 90.0
+
+METHODS = {
+    STRATEGY_MINIMIZE_COST: EnergyOptimizerCoordinator._optimize_minimize_cost,
+    STRATEGY_MAXIMIZE_SELF_CONSUMPTION: EnergyOptimizerCoordinator._optimize_maximize_self_consumption,
+    STRATEGY_GRID_INDEPENDENCE: EnergyOptimizerCoordinator._optimize_grid_independence,
+    STRATEGY_BALANCED: EnergyOptimizerCoordinator._optimize_balanced,
+}
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=UTC).isoformat()
+
+
+def random_market(rng: np.random.Generator) -> tuple[list[dict], list[dict], np.ndarray]:
+    """Return hourly prices, a half-hourly forecast and per-period loads."""
+    prices = [
+        {"from": iso(BASE + idx * HOUR), "price": round(float(price), 4)}
+        for idx, price in enumerate(rng.uniform(-0.05, 0.45, 24))
+    ]
+    pv = np.clip(rng.normal(1.5, 1.5, 48), 0.0, None)
+    forecast = [
+        {"period_start": iso(BASE + idx * 1800), "pv_estimate": round(float(value), 3)}
+        for idx, value in enumerate(pv)
+    ]
+    return prices, forecast, rng.uniform(0.0, 1.5, 48)
+
+
+TUNED = StrategyParams(
+    cheap_band=0.15,
+    expensive_band=0.35,
+    balanced_charge=0.95,
+    balanced_discharge=1.2,
+    solar_headroom=30.0,
+    solar_surplus_kw=0.5,
+)
+
+
+def run_coordinator(strategy, now, prices, forecast, loads, soc, price, params, monkeypatch):
+    """Run the coordinator's strategy method against a stub with the given market."""
+    monkeypatch.setattr(dt_util, "now", lambda *args: dt_util.utc_from_timestamp(now))
+    inputs = build_planning_inputs(prices, forecast)
+    index = PriceRankIndex(inputs)
+    stub = SimpleNamespace(
+        _min_soc=MIN_SOC,
+        _max_soc=MAX_SOC,
+        _params=params,
+        _future_price_stats=lambda: index.future_stats(now),
+        _load_at=lambda when: float(loads[int((when.timestamp() - BASE) // 1800)]),
+    )
+    stub._parse_datetime = partial(EnergyOptimizerCoordinator._parse_datetime, stub)
+    data = EnergyOptimizerData()
+    data.prices_today = prices
+    data.solar_forecast = forecast
+    data.battery_soc = soc
+    data.current_price = data.import_price = price
+    METHODS[strategy](stub, data)
+    return data
+
+
+def series_for(prices, forecast, loads) -> MarketSeries:
+    inputs = build_planning_inputs(prices, forecast)
+    return MarketSeries.from_inputs(
+        inputs, forecast, lambda starts: loads[((starts - BASE) // 1800).astype(int)]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Equivalence with the coordinator
+# ---------------------------------------------------------------------------
+
+
+class TestMatchesCoordinator:
+    @pytest.mark.parametrize("params", [DEFAULT_PARAMS, TUNED], ids=["default", "tuned"])
+    @pytest.mark.parametrize("strategy", list(METHODS))
+    @pytest.mark.parametrize("seed", range(25))
+    def test_identical_decisions(self, strategy, seed, params, monkeypatch):
+        rng = np.random.default_rng(seed)
+        prices, forecast, loads = random_market(rng)
+        series = series_for(prices, forecast, loads)
+        for _ in range(8):
+            now = BASE + float(rng.uniform(-HOUR, 25 * HOUR))
+            soc = None if rng.random() < 0.1 else float(rng.choice([MIN_SOC, MAX_SOC, rng.uniform(0, 100)]))
+            price = None if rng.random() < 0.1 else float(rng.uniform(-0.05, 0.45))
+            data = run_coordinator(strategy, now, prices, forecast, loads, soc, price, params, monkeypatch)
+            action, target = decide_batch(
+                strategy,
+                np.array([now]),
+                np.nan if price is None else price,
+                np.nan if soc is None else soc,
+                series,
+                min_soc=MIN_SOC,
+                max_soc=MAX_SOC,
+                params=params,
+                safety=False,
+            )
+            assert ACTIONS[action[0]] == data.next_action
+            if data.next_action != ACTION_IDLE:
+                assert target[0] == pytest.approx(data.target_soc)
+
+    def test_no_prices_is_idle(self):
+        series = MarketSeries.from_inputs(build_planning_inputs([], []))
+        action, _ = decide_batch(
+            STRATEGY_MINIMIZE_COST, np.array([BASE]), 0.0, 50.0, series, min_soc=MIN_SOC, max_soc=MAX_SOC
+        )
+        assert ACTIONS[action[0]] == ACTION_IDLE
+
+
+# ---------------------------------------------------------------------------
+# Batch behaviour
+# ---------------------------------------------------------------------------
+
+
+class TestDecideBatch:
+    @pytest.mark.parametrize("strategy", list(METHODS))
+    def test_batch_equals_elementwise(self, strategy):
+        rng = np.random.default_rng(99)
+        prices, forecast, loads = random_market(rng)
+        series = series_for(prices, forecast, loads)
+        times = BASE + rng.uniform(0, 24 * HOUR, 500)
+        price = rng.uniform(-0.05, 0.45, 500)
+        soc = rng.uniform(0, 100, 500)
+        actions, targets = decide_batch(strategy, times, price, soc, series, min_soc=MIN_SOC, max_soc=MAX_SOC)
+        for idx in range(0, 500, 37):
+            single_action, single_target = decide_batch(
+                strategy, times[idx : idx + 1], price[idx], soc[idx], series, min_soc=MIN_SOC, max_soc=MAX_SOC
+            )
+            assert actions[idx] == single_action[0]
+            np.testing.assert_equal(targets[idx], single_target[0])
+
+    def test_safety_override_charges_to_min(self):
+        series = series_for(*random_market(np.random.default_rng(1)))
+        action, target = decide_batch(
+            STRATEGY_BALANCED, np.array([BASE, BASE]), 0.4, np.array([5.0, 50.0]), series,
+            min_soc=MIN_SOC, max_soc=MAX_SOC,
+        )
+        assert action[0] == CODE_CHARGE
+        assert target[0] == MIN_SOC
+
+    def test_params_move_thresholds(self):
+        series = series_for(*random_market(np.random.default_rng(2)))
+        times = np.full(3, BASE)
+        price = series.suffix_mean[0] * np.array([0.85, 0.95, 1.0])
+        default, _ = decide_batch(STRATEGY_BALANCED, times, price, 50.0, series, min_soc=MIN_SOC, max_soc=MAX_SOC)
+        wide, _ = decide_batch(
+            STRATEGY_BALANCED, times, price, 50.0, series, min_soc=MIN_SOC, max_soc=MAX_SOC,
+            params=StrategyParams(balanced_charge=0.97),
+        )
+        assert (default == CODE_CHARGE).sum() == 1
+        assert (wide == CODE_CHARGE).sum() == 2
+
+    def test_unknown_strategy(self):
+        series = MarketSeries.from_inputs(build_planning_inputs([], []))
+        with pytest.raises(ValueError):
+            decide_batch("robust", np.array([BASE]), 0.1, 50.0, series, min_soc=MIN_SOC, max_soc=MAX_SOC)
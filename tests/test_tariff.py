@@ -0,0 +1,108 @@
+"""Tests for the compiled import/export tariff."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.const import (
+    CONF_ENERGY_TAX,
+    CONF_EXPORT_FACTOR,
+    CONF_EXPORT_FEE,
+    CONF_GRID_FEE,
+    CONF_IMPORT_MARKUP,
+    CONF_NET_METERING,
+    CONF_VAT,
+    CONF_VAT_ON,
+    TARIFF_SPOT,
+)
+from custom_components.solax_energy_optimizer.horizon import compress_horizon
+from custom_components.solax_energy_optimizer.optimizer import HorizonSolver
+from custom_components.solax_energy_optimizer.planner import (
+    CODE_DISCHARGE,
+    CODE_IDLE,
+    BatteryModel,
+)
+from custom_components.solax_energy_optimizer.tariff import (
+    CompiledTariff,
+    TariffEngine,
+    compile_tariff,
+)
+from tests.conftest import BASE, HOUR, make_inputs
+
+SPOT = np.array([-0.02, 0.05, 0.10, 0.30])
+DUTCH = {
+    CONF_IMPORT_MARKUP: 0.02,
+    CONF_GRID_FEE: 0.04,
+    CONF_ENERGY_TAX: 0.10,
+    CONF_VAT: 21.0,
+    CONF_EXPORT_FACTOR: 0.9,
+    CONF_EXPORT_FEE: 0.01,
+}
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+
+class TestCompileTariff:
+    def test_defaults_are_the_spot_price(self):
+        tariff = compile_tariff({})
+        assert tariff.identity
+        import_price, export_price = tariff(SPOT)
+        np.testing.assert_array_equal(import_price, SPOT)
+        np.testing.assert_array_equal(export_price, SPOT)
+
+    def test_matches_component_arithmetic(self):
+        import_price, export_price = compile_tariff(DUTCH)(SPOT)
+        np.testing.assert_allclose(import_price, (SPOT + 0.02 + 0.04 + 0.10) * 1.21)
+        np.testing.assert_allclose(export_price, SPOT * 0.9 - 0.01)
+
+    def test_vat_only_on_selected_components(self):
+        tariff = compile_tariff({**DUTCH, CONF_VAT_ON: [TARIFF_SPOT, CONF_ENERGY_TAX, CONF_EXPORT_FEE]})
+        assert tariff.import_price(0.10) == pytest.approx(0.10 * 1.21 + 0.02 + 0.04 + 0.10 * 1.21)
+        assert tariff.export_price(0.10) == pytest.approx(0.10 * 0.9 - 0.01 * 1.21)
+
+    def test_net_metering_exports_at_import_price(self):
+        tariff = compile_tariff({**DUTCH, CONF_NET_METERING: True})
+        import_price, export_price = tariff(SPOT)
+        np.testing.assert_array_equal(import_price, export_price)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+
+class TestTariffEngine:
+    def test_identity_leaves_inputs_untouched(self):
+        inputs = make_inputs(SPOT, load=0.5)
+        assert TariffEngine(CompiledTariff()).apply(inputs) is inputs
+        assert inputs.export is inputs.price
+
+    def test_converts_once_per_price_series(self):
+        engine = TariffEngine(compile_tariff(DUTCH))
+        first = engine.apply(make_inputs(SPOT, load=0.5))
+        again = engine.apply(make_inputs(SPOT.copy(), load=0.5))
+        assert engine.conversions == 1
+        assert again.price is first.price
+        np.testing.assert_allclose(first.export_price, SPOT * 0.9 - 0.01)
+        engine.apply(make_inputs(SPOT + 0.01, load=0.5))
+        assert engine.conversions == 2
+
+    def test_export_price_follows_slicing_and_buckets(self):
+        inputs = TariffEngine(compile_tariff(DUTCH)).apply(make_inputs(np.linspace(0.0, 0.3, 30), load=0.5))
+        sliced = inputs.slice_from(BASE + 2.5 * HOUR)
+        np.testing.assert_array_equal(sliced.export_price, inputs.export_price[2:])
+        horizon = compress_horizon(inputs)
+        assert horizon.inputs.export_price.size == len(horizon.inputs)
+        assert (horizon.inputs.export_price < horizon.inputs.price).all()
+
+    def test_optimizer_exports_at_export_price(self):
+        # Spot: stored energy is sold back at 0.20; taxed, 0.17 export is worth less than keeping it
+        battery = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+        spot = make_inputs([0.05, 0.20])
+        taxed = TariffEngine(compile_tariff(DUTCH)).apply(spot)
+        limits = {"soc": 60.0, "battery": battery, "min_soc": 10.0, "max_soc": 90.0}
+        assert HorizonSolver().solve(spot, **limits).action[1] == CODE_DISCHARGE
+        assert HorizonSolver().solve(taxed, **limits).action[1] == CODE_IDLE
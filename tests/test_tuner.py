@@ -0,0 +1,177 @@
+"""Tests for the strategy parameter tuner."""
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from custom_components.solax_energy_optimizer.history import HistoryArrays
+from custom_components.solax_energy_optimizer.planner import (
+    DEFAULT_PARAMS,
+    BatteryModel,
+)
+from custom_components.solax_energy_optimizer.tariff import CompiledTariff
+from custom_components.solax_energy_optimizer.tuner import (
+    SEARCH_GRID,
+    TUNABLE,
+    TUNER_MIN_SAVING,
+    ParameterTuner,
+    initial_soc,
+    parameter_batches,
+    replay,
+    summarize,
+)
+from tests.conftest import BASE
+
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+SPOT = CompiledTariff()
+
+
+def make_history(days: int, seed: int = 0, soc: float = np.nan) -> HistoryArrays:
+    """Return days of a cheap-night / expensive-evening market with midday solar."""
+    rng = np.random.default_rng(seed)
+    hours = days * 24
+    hour = np.arange(hours) % 24
+    price = 0.2 + 0.1 * np.sin(2 * np.pi * (hour - 10) / 24) + rng.normal(0.0, 0.02, hours)
+    pv = np.clip(4.0 * np.sin(np.pi * (hour - 6) / 12), 0.0, None) * rng.uniform(0.3, 1.0, hours)
+    load = rng.uniform(0.2, 1.5, hours)
+    socs = np.full(hours, np.nan)
+    socs[0] = soc
+    return HistoryArrays(
+        starts=BASE + 3600.0 * np.arange(hours, dtype=np.float64),
+        values=np.stack([socs, price, pv, load]).astype(np.float32),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Search grid
+# ---------------------------------------------------------------------------
+
+
+class TestParameterBatches:
+    @pytest.mark.parametrize("strategy", list(TUNABLE))
+    def test_grid_is_covered_once_and_includes_defaults(self, strategy):
+        fields = TUNABLE[strategy]
+        combos = [tuple(combo[name] for name in fields) for _, batch in parameter_batches(strategy) for combo in batch]
+        assert len(combos) == len(set(combos)) == int(np.prod([len(SEARCH_GRID[name]) for name in fields]))
+        assert tuple(getattr(DEFAULT_PARAMS, name) for name in fields) in combos
+
+    def test_surplus_cutoff_splits_batches(self):
+        batches = parameter_batches("maximize_self_consumption")
+        assert len(batches) == len(SEARCH_GRID["solar_surplus_kw"])
+        for params, combos in batches:
+            assert np.isscalar(params.solar_surplus_kw)
+            np.testing.assert_array_equal(params.solar_headroom, [combo["solar_headroom"] for combo in combos])
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+
+class TestReplay:
+    @pytest.mark.parametrize("strategy", list(TUNABLE))
+    def test_batch_matches_single_replays(self, strategy):
+        history = make_history(3)
+        params, combos = parameter_batches(strategy)[0]
+        costs = replay(history.starts, history.values, strategy, params, BATTERY, 10.0, 90.0, 50.0, SPOT)
+        assert costs.shape == (len(combos),)
+        for idx in (0, len(combos) // 2, len(combos) - 1):
+            single = replay(
+                history.starts, history.values, strategy, replace(DEFAULT_PARAMS, **combos[idx]),
+                BATTERY, 10.0, 90.0, 50.0, SPOT,
+            )
+            assert costs[idx] == pytest.approx(single[0])
+
+    def test_hours_without_price_are_skipped(self):
+        history = make_history(2)
+        values = history.values.copy()
+        values[1] = np.nan
+        params, _ = parameter_batches("balanced")[0]
+        costs = replay(history.starts, values, "balanced", params, BATTERY, 10.0, 90.0, 50.0, SPOT)
+        np.testing.assert_array_equal(costs, 0.0)
+
+    def test_tariff_converts_recorded_spot_prices(self):
+        history = make_history(3)
+        params, _ = parameter_batches("minimize_cost")[0]
+        tariff = CompiledTariff(import_scale=1.21, import_offset=0.08, export_scale=1.21, export_offset=0.08)
+        converted = history.values.astype(np.float64)
+        converted[1] = tariff(converted[1])[0]
+        costs = replay(history.starts, history.values, "minimize_cost", params, BATTERY, 10.0, 90.0, 50.0, tariff)
+        expected = replay(history.starts, converted, "minimize_cost", params, BATTERY, 10.0, 90.0, 50.0, SPOT)
+        np.testing.assert_allclose(costs, expected)
+
+    def test_export_is_credited_at_export_price(self):
+        history = make_history(3)
+        params, _ = parameter_batches("balanced")[0]
+        spot = replay(history.starts, history.values, "balanced", params, BATTERY, 10.0, 90.0, 50.0, SPOT)
+        halved = replay(
+            history.starts, history.values, "balanced", params, BATTERY, 10.0, 90.0, 50.0,
+            CompiledTariff(export_scale=0.5),
+        )
+        # Decisions follow the import price alone; only the exported surplus earns less
+        assert np.all(halved > spot)
+
+    def test_initial_soc(self):
+        assert initial_soc(make_history(1, soc=42.0), 10.0, 90.0) == 42.0
+        assert initial_soc(make_history(1), 20.0, 80.0) == 50.0
+
+
+# ---------------------------------------------------------------------------
+# Best combination
+# ---------------------------------------------------------------------------
+
+
+class TestSummarize:
+    @staticmethod
+    def flat_costs(strategy: str, default_cost: float, other_cost: float):
+        batches = [combos for _, combos in parameter_batches(strategy)]
+        default = {name: getattr(DEFAULT_PARAMS, name) for name in TUNABLE[strategy]}
+        costs = [
+            np.array([default_cost if combo == default else other_cost for combo in combos]) for combos in batches
+        ]
+        return batches, costs, default
+
+    @pytest.mark.parametrize("strategy", list(TUNABLE))
+    def test_ties_keep_defaults(self, strategy):
+        batches, costs, default = self.flat_costs(strategy, 5.0, 5.0)
+        tuning = summarize(strategy, batches, costs)
+        assert tuning.best == default
+        assert tuning.saving == 0.0
+
+    def test_defaults_kept_within_min_saving(self):
+        batches, costs, default = self.flat_costs("balanced", 5.0, 5.0 - TUNER_MIN_SAVING / 2)
+        assert summarize("balanced", batches, costs).best == default
+
+    def test_strictly_cheaper_combination_wins(self):
+        batches, costs, default = self.flat_costs("balanced", 5.0, 6.0)
+        costs[-1][-1] = 4.0
+        tuning = summarize("balanced", batches, costs)
+        assert tuning.best == batches[-1][-1] != default
+        assert tuning.saving == pytest.approx(1.0)
+
+
+# ---------------------------------------------------------------------------
+# Process pool tuning
+# ---------------------------------------------------------------------------
+
+
+class TestParameterTuner:
+    async def test_tunes_every_strategy(self):
+        tuner = ParameterTuner(max_workers=1)
+        base = replace(DEFAULT_PARAMS, cheap_band=0.33)
+        try:
+            result = await tuner.async_tune(make_history(4), battery=BATTERY, min_soc=10.0, max_soc=90.0, base=base)
+        finally:
+            tuner.shutdown()
+        assert set(result.strategies) == set(TUNABLE)
+        assert result.days == 4
+        assert result.hours == 96
+        for tuning in result.strategies.values():
+            assert tuning.cost <= tuning.default_cost
+            for name, value in tuning.best.items():
+                assert getattr(result.params, name) == value
+        options = result.as_dict()["options"]
+        assert options["cheap_band"] == result.strategies["minimize_cost"].best["cheap_band"]
+        assert not tuner.running
@@ -0,0 +1,109 @@
+"""Tests for the memoizing what-if simulator."""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.solax_energy_optimizer.const import (
+    STRATEGIES,
+    STRATEGY_MINIMIZE_COST,
+    STRATEGY_OPTIMAL,
+)
+from custom_components.solax_energy_optimizer.planner import (
+    DEFAULT_PARAMS,
+    BatteryModel,
+)
+from custom_components.solax_energy_optimizer.what_if import (
+    WhatIfScenario,
+    WhatIfSimulator,
+    plan_scenario,
+    summarize,
+)
+from tests.conftest import BASE, HOUR, make_inputs
+
+NOW = datetime(2024, 6, 1, 0, 30, tzinfo=UTC)
+BATTERY = BatteryModel(capacity_kwh=10.0, max_charge_kw=5.0, max_discharge_kw=5.0)
+SCENARIO = WhatIfScenario(STRATEGY_OPTIMAL, 10.0, 90.0, BATTERY)
+
+
+class ExecutorHass:
+    """Runs executor jobs inline and counts them."""
+
+    def __init__(self) -> None:
+        self.jobs = 0
+
+    async def async_add_executor_job(self, target, *args):
+        self.jobs += 1
+        return target(*args)
+
+
+# ---------------------------------------------------------------------------
+# Planning a scenario
+# ---------------------------------------------------------------------------
+
+
+class TestPlanScenario:
+    @pytest.mark.parametrize("strategy", STRATEGIES)
+    def test_every_strategy_plans_every_slot(self, strategy):
+        inputs = make_inputs([0.1, 0.1, 0.5, 0.5, 0.3, 0.2], load=1.0)
+        slots = plan_scenario(
+            inputs, replace(SCENARIO, strategy=strategy), soc=50.0, params=DEFAULT_PARAMS, forecast=[]
+        )
+        assert len(slots) == 6
+        assert slots.battery_kwh is not None
+
+    def test_bigger_battery_stores_more_cheap_energy(self):
+        inputs = make_inputs([0.05, 0.05, 0.50, 0.50], load=1.0)
+        small = plan_scenario(inputs, SCENARIO, soc=10.0, params=DEFAULT_PARAMS, forecast=[])
+        big = plan_scenario(
+            inputs, replace(SCENARIO, battery=replace(BATTERY, capacity_kwh=20.0)),
+            soc=10.0, params=DEFAULT_PARAMS, forecast=[],
+        )
+        # Twice the capacity stores more of the cheap hours' energy for the expensive ones
+        assert big.battery_kwh[:2].sum() > small.battery_kwh[:2].sum()
+
+
+# ---------------------------------------------------------------------------
+# Memo
+# ---------------------------------------------------------------------------
+
+
+class TestWhatIfSimulator:
+    async def test_memoized_until_inputs_change(self):
+        hass = ExecutorHass()
+        simulator = WhatIfSimulator()
+        inputs = make_inputs([0.1, 0.5, 0.3], load=1.0)
+        kwargs = {"now": NOW, "soc": 50.0, "params": DEFAULT_PARAMS, "forecast": []}
+        first, memoized = await simulator.async_plan(hass, inputs, SCENARIO, **kwargs)
+        assert not memoized
+        again, memoized = await simulator.async_plan(hass, inputs, SCENARIO, **kwargs)
+        assert memoized and again is first
+        other = replace(SCENARIO, strategy=STRATEGY_MINIMIZE_COST)
+        await simulator.async_plan(hass, inputs, other, **kwargs)
+        assert hass.jobs == 2
+        assert simulator.stats() == {"memoized": 2, "hits": 1, "runs": 2}
+
+        # New inputs, or a new SOC, drop the memo
+        _, memoized = await simulator.async_plan(hass, make_inputs([0.1, 0.5, 0.3], load=1.0), SCENARIO, **kwargs)
+        assert not memoized
+        _, memoized = await simulator.async_plan(hass, inputs, SCENARIO, **{**kwargs, "soc": 60.0})
+        assert not memoized
+        assert simulator.stats()["memoized"] == 1
+
+    async def test_summary_covers_the_remaining_slots(self):
+        simulator = WhatIfSimulator()
+        inputs = make_inputs([0.05, 0.05, 0.50, 0.50], load=1.0)
+        plan, _ = await simulator.async_plan(
+            ExecutorHass(), inputs, SCENARIO, now=NOW, soc=10.0, params=DEFAULT_PARAMS, forecast=[]
+        )
+        summary = summarize(plan, SCENARIO)
+        assert summary["strategy"] == STRATEGY_OPTIMAL
+        assert summary["battery_capacity"] == 10.0
+        assert summary["expected_cost"] == pytest.approx(plan.slot_table()["expected_cost"])
+        assert summary["segments"][0]["action"] == "charge"
+        # The battery ends at min SOC after covering the expensive hours
+        assert summary["final_soc"] == pytest.approx(10.0)
+        late = summarize(plan, SCENARIO, start=BASE + 2 * HOUR)
+        assert all(segment["end"] > "2024-06-01T02:00:00" for segment in late["segments"])